@@ -0,0 +1,96 @@
+-- Adicionar telefone canônico (E.164) em nail_designers e clients
+-- Execute este script no SQL Editor do Supabase
+--
+-- O login busca por telefone com .eq('phone', ...) no texto digitado, então
+-- "(11) 99999-9999" e "11999999999" não se encontram. phone_e164 guarda a
+-- forma canônica (+5511999999999); o trigger mantém a coluna em dia nas
+-- linhas novas e as antigas são preenchidas aqui mesmo, num UPDATE por
+-- tabela. Números inválidos ficam com NULL; para listá-los, junto com os
+-- telefones repetidos:
+--   python -m studio.phones check
+--
+-- phone_to_e164 segue as mesmas regras de studio/phones.py e de
+-- src/utils/phoneUtils.ts: mudou uma, mude as três.
+
+-- 1. Coluna com o telefone canônico
+ALTER TABLE nail_designers
+ADD COLUMN IF NOT EXISTS phone_e164 TEXT;
+
+ALTER TABLE clients
+ADD COLUMN IF NOT EXISTS phone_e164 TEXT;
+
+-- 2. Canonicalização: DDD + número (celular antigo de 8 dígitos ganha o 9),
+--    com ou sem +55/0055/0 na frente; outros países só com + explícito
+CREATE OR REPLACE FUNCTION phone_to_e164(raw TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    digits TEXT := regexp_replace(coalesce(raw, ''), '\D', '', 'g');
+    international BOOLEAN := btrim(coalesce(raw, '')) LIKE '+%';
+BEGIN
+    IF NOT international AND digits LIKE '00%' THEN
+        digits := substr(digits, 3);
+        international := TRUE;
+    END IF;
+    IF international THEN
+        IF digits NOT LIKE '55%' THEN
+            RETURN CASE WHEN length(digits) BETWEEN 8 AND 15 THEN '+' || digits END;
+        END IF;
+        digits := substr(digits, 3);
+    ELSE
+        IF digits LIKE '0%' THEN
+            digits := substr(digits, 2);
+            IF length(digits) IN (12, 13) THEN
+                digits := substr(digits, 3);
+            END IF;
+        ELSIF length(digits) IN (12, 13) AND digits LIKE '55%' THEN
+            digits := substr(digits, 3);
+        END IF;
+    END IF;
+    IF length(digits) = 10 AND substr(digits, 3, 1) BETWEEN '6' AND '9' THEN
+        digits := substr(digits, 1, 2) || '9' || substr(digits, 3);
+    END IF;
+    IF digits !~ '^[1-9][1-9][0-9]{8,9}$' THEN
+        RETURN NULL;
+    END IF;
+    IF length(digits) = 11 AND substr(digits, 3, 1) <> '9' THEN
+        RETURN NULL;
+    END IF;
+    RETURN '+55' || digits;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION set_phone_e164()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.phone_e164 = phone_to_e164(NEW.phone);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_nail_designers_phone_e164 ON nail_designers;
+CREATE TRIGGER set_nail_designers_phone_e164 BEFORE INSERT OR UPDATE OF phone ON nail_designers
+    FOR EACH ROW EXECUTE FUNCTION set_phone_e164();
+
+DROP TRIGGER IF EXISTS set_clients_phone_e164 ON clients;
+CREATE TRIGGER set_clients_phone_e164 BEFORE INSERT OR UPDATE OF phone ON clients
+    FOR EACH ROW EXECUTE FUNCTION set_phone_e164();
+
+-- 3. Linhas antigas (o trigger só dispara quando phone muda)
+UPDATE nail_designers SET phone_e164 = phone_to_e164(phone) WHERE phone_e164 IS NULL;
+UPDATE clients SET phone_e164 = phone_to_e164(phone) WHERE phone_e164 IS NULL;
+
+-- 4. Índices para o login por telefone (não únicos: duplicatas antigas
+--    continuam existindo até a deduplicação)
+CREATE INDEX IF NOT EXISTS idx_nail_designers_phone_e164 ON nail_designers(phone_e164);
+CREATE INDEX IF NOT EXISTS idx_clients_phone_e164 ON clients(phone_e164);
+
+-- 5. Documentação
+COMMENT ON COLUMN nail_designers.phone_e164 IS 'Telefone em E.164 (ex: +5511999999999), chave do login por telefone';
+COMMENT ON COLUMN clients.phone_e164 IS 'Telefone em E.164 (ex: +5511999999999), chave do login por telefone';
+
+-- Verificar resultado
+SELECT phone_to_e164('(11) 99999-9999') AS esperado_5511999999999,
+       phone_to_e164('+55 11 9999-9999') AS esperado_5511999999999_com_9,
+       phone_to_e164('1133334444') AS esperado_551133334444;
+SELECT COUNT(*) AS sem_e164 FROM nail_designers WHERE phone_e164 IS NULL;
+SELECT COUNT(*) AS sem_e164 FROM clients WHERE phone_e164 IS NULL;
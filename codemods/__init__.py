@@ -0,0 +1,29 @@
+"""
+Motor de patches compartilhado pelos scripts fix_*.py
+
+Cada codemod é um spec declarativo (codemods/specs/*.toml) com pares
+(âncora, substituição); o motor encontra todas as âncoras em uma única
+passada e monta o arquivo final de uma vez.
+"""
+
+from .engine import AnchorAutomaton, CompiledEdits, Edit, EditResult, OverlapError, PatchResult, apply_edits, compile_edits
+from .manifest import Manifest
+from .runner import run_script, run_spec
+from .spec import Codemod, SpecError, load_specs
+
+__all__ = [
+    'AnchorAutomaton',
+    'Codemod',
+    'CompiledEdits',
+    'Edit',
+    'EditResult',
+    'Manifest',
+    'OverlapError',
+    'PatchResult',
+    'SpecError',
+    'apply_edits',
+    'compile_edits',
+    'load_specs',
+    'run_script',
+    'run_spec',
+]
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de regressão do motor de patches
+
+Monta um corpus com as revisões do git dos arquivos que os codemods
+costumam atacar (BookingPage.tsx, AdminDashboard.tsx, LoginPage.tsx, a
+cópia antiga em "Nova pasta/" e os alvos dos specs), a versão da árvore
+de trabalho quando difere do HEAD e cópias sintéticas 10x e 100x maiores
+da revisão mais nova. Cada codemod roda sobre cada documento, só na
+memória (nada é gravado), e para cada par fica registrado:
+
+- tempo de apply_edits (o menor de até --repeat execuções, que sofre
+  menos com o resto da máquina);
+- pico de memória (tracemalloc, numa passada à parte, como no --profile);
+- edições aplicadas, já aplicadas e em drift, ocorrências substituídas;
+- hash do texto de entrada e do resultado.
+
+`--save` grava o resultado em JSON e `--compare` falha (código 1) se um
+par ficou mais lento ou usou mais memória além de `--tolerance`, ou se o
+mesmo texto de entrada passou a gerar outro resultado. Os tempos são
+comparados depois de escalados por uma calibração (o autômato sobre um
+texto fixo, medido antes de cada documento), para que uma máquina mais
+lenta ou ocupada não pareça regressão, e cada par que parece mais lento é
+medido de novo (até CONFIRM_ROUNDS vezes) antes de ser reportado.
+
+tracemalloc deixa o laço do autômato ~15x mais lento: documentos maiores
+que --memory-limit caracteres ficam sem pico de memória (0 = medir todos).
+
+    python -m codemods.bench
+    python -m codemods.bench --save bench-baseline.json
+    python -m codemods.bench --compare bench-baseline.json [--tolerance 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from .engine import ALREADY_APPLIED, DRIFT, PATCHED, AnchorAutomaton, PatchResult, apply_edits
+from .manifest import content_hash
+from .profile import format_size, peak_memory, start_memory, stop_memory
+from .spec import Codemod, SpecError, load_specs
+
+# Arquivos grandes e que mudam muito, além dos alvos dos specs
+CORPUS = (
+    'src/components/BookingPage.tsx',
+    'src/components/AdminDashboard.tsx',
+    'src/components/LoginPage.tsx',
+    'src/components/Nova pasta/BookingPage.tsx',
+)
+DEFAULT_SCALES = (10, 100)
+DEFAULT_REVISIONS = 20
+DEFAULT_REPEAT = 5
+# Repete até --repeat vezes ou até somar MIN_TIME, com pelo menos MIN_RUNS execuções
+MIN_RUNS = 3
+MIN_TIME = 1.0
+DEFAULT_MEMORY_LIMIT = 2_000_000
+DEFAULT_TOLERANCE = 0.25
+# Diferenças de tempo menores que isso são ruído, qualquer que seja a razão
+NOISE_MS = 2.0
+CONFIRM_ROUNDS = 2
+REPORT_VERSION = 1
+CALIBRATION_TEXT = 'const [open, setOpen] = useState(false);\n<div className="grid">{items}</div>\n' * 4000
+CALIBRATION_ANCHORS = ('useState(', 'useEffect(', '</div>', 'className="modal"')
+
+
+@dataclass(frozen=True)
+class Document:
+    """Um texto do corpus: `name` é o caminho com a revisão (e a escala)"""
+    name: str
+    path: str
+    revision: str
+    scale: int
+    text: str
+
+
+@dataclass
+class Measurement:
+    document: str
+    codemod: str
+    chars: int
+    input_sha: str
+    output_sha: str = ''
+    time_ms: float = 0.0
+    runs: int = 0
+    peak_memory: int | None = None
+    patched: int = 0
+    already_applied: int = 0
+    drift: int = 0
+    matches: int = 0
+    # Calibração medida logo antes do documento (ver calibrate)
+    calibration_ms: float = 0.0
+    skipped: str = ''
+    error: str = ''
+
+
+# --- corpus ----------------------------------------------------------------
+
+def _git(root: Path, *args: str) -> bytes:
+    return subprocess.run(['git', *args], cwd=root, capture_output=True, check=True).stdout
+
+
+def revisions(root: Path, path: str, limit: int = DEFAULT_REVISIONS) -> list[tuple[str, str]]:
+    """(commit, caminho naquele commit) das revisões que mexeram no arquivo, da mais nova para a mais antiga"""
+    try:
+        output = _git(root, 'log', '--follow', f'--max-count={limit}', '--format=%x00%h', '--name-only', '--', path)
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    found = []
+    for block in output.decode('utf-8', errors='replace').split('\0')[1:]:
+        lines = [line for line in block.splitlines() if line.strip()]
+        if len(lines) >= 2:
+            found.append((lines[0], lines[1]))
+    return found
+
+
+def _scaled(text: str, factor: int) -> str:
+    if not text.endswith('\n'):
+        text += '\n'
+    return text * factor
+
+
+def build_corpus(
+    root: Path,
+    paths: Sequence[str],
+    limit: int = DEFAULT_REVISIONS,
+    scales: Sequence[int] = DEFAULT_SCALES,
+) -> list[Document]:
+    documents = []
+    for path in paths:
+        history = []
+        for commit, old_path in revisions(root, path, limit):
+            try:
+                history.append((commit, _git(root, 'show', f'{commit}:{old_path}').decode('utf-8')))
+            except (subprocess.CalledProcessError, UnicodeDecodeError):
+                continue  # Arquivo removido ou binário naquela revisão
+        current = root / path
+        if current.exists():
+            text = current.read_text(encoding='utf-8')
+            if not history or history[0][1] != text:
+                history.insert(0, ('worktree', text))
+        documents.extend(Document(f'{path}@{commit}', path, commit, 1, text) for commit, text in history)
+        if history:
+            commit, text = history[0]
+            documents.extend(
+                Document(f'{path}@{commit}x{factor}', path, commit, factor, _scaled(text, factor)) for factor in scales
+            )
+    return documents
+
+
+# --- medição ---------------------------------------------------------------
+
+def _timed(codemod: Codemod, text: str, repeat: int) -> tuple[list[float], PatchResult]:
+    samples = []
+    with _no_gc():
+        while True:
+            started = time.perf_counter()
+            result = apply_edits(text, codemod.matcher)
+            samples.append(time.perf_counter() - started)
+            if len(samples) >= max(repeat, 1) or (len(samples) >= MIN_RUNS and sum(samples) >= MIN_TIME):
+                return samples, result
+
+
+@contextmanager
+def _no_gc() -> Iterator[None]:
+    """Sem coleta de lixo durante a medição, como no timeit (pausas do gc não entram no tempo)"""
+    enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def measure(codemod: Codemod, document: Document, repeat: int = DEFAULT_REPEAT, memory_limit: int = DEFAULT_MEMORY_LIMIT) -> Measurement:
+    """Roda o codemod sobre o documento: tempo, memória, contagens e hash do resultado"""
+    text = document.text
+    measurement = Measurement(document.name, codemod.name, len(text), content_hash(text))
+    reason = codemod.unmet(text)
+    if reason:
+        measurement.skipped = reason
+        return measurement
+
+    try:
+        samples, result = _timed(codemod, text, repeat)
+        if not memory_limit or len(text) <= memory_limit:
+            start_memory()
+            apply_edits(text, codemod.matcher)
+            measurement.peak_memory = peak_memory()
+            stop_memory()
+    except Exception as e:
+        stop_memory()
+        measurement.error = f'{type(e).__name__}: {e}'
+        return measurement
+
+    statuses = [item.status for item in result.results]
+    measurement.time_ms = round(min(samples) * 1000, 3)
+    measurement.runs = len(samples)
+    measurement.patched = statuses.count(PATCHED)
+    measurement.already_applied = statuses.count(ALREADY_APPLIED)
+    measurement.drift = statuses.count(DRIFT)
+    measurement.matches = len(result.spans)
+    measurement.output_sha = content_hash(result.output)
+    return measurement
+
+
+def calibrate(runs: int = 5) -> float:
+    """Milissegundos da passada do autômato sobre um texto fixo (o menor de `runs`)"""
+    automaton = AnchorAutomaton(CALIBRATION_ANCHORS)
+    best = float('inf')
+    with _no_gc():
+        for _ in range(runs):
+            started = time.perf_counter()
+            for _ in automaton.finditer(CALIBRATION_TEXT):
+                pass
+            best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def build_report(root: Path, specs_digest: str, measurements: Sequence[Measurement]) -> dict:
+    try:
+        head = _git(root, 'rev-parse', '--short', 'HEAD').decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        head = ''
+    return {
+        'version': REPORT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'head': head,
+        'python': platform.python_version(),
+        'specs': specs_digest,
+        'measurements': [asdict(measurement) for measurement in measurements],
+    }
+
+
+# --- comparação ------------------------------------------------------------
+
+def _behavior(item: dict) -> tuple:
+    return (item['output_sha'], item['patched'], item['already_applied'], item['drift'], item['matches'], item['skipped'], bool(item['error']))
+
+
+def _speed(item: dict, old: dict) -> float:
+    """Quanto a máquina estava mais lenta que no baseline quando o par foi medido"""
+    if item.get('calibration_ms') and old.get('calibration_ms'):
+        return item['calibration_ms'] / old['calibration_ms']
+    return 1.0
+
+
+def speed_factor(report: dict, baseline: dict) -> float:
+    """Mediana de `_speed` entre os pares comparáveis (1.0 sem calibração)"""
+    speeds = sorted(_speed(item, old) for item, old in _pairs(report, baseline))
+    return speeds[len(speeds) // 2] if speeds else 1.0
+
+
+def _pairs(report: dict, baseline: dict) -> Iterator[tuple[dict, dict]]:
+    """(atual, baseline) dos pares presentes nos dois com o mesmo texto de entrada"""
+    before = {(item['document'], item['codemod']): item for item in baseline['measurements']}
+    for item in report['measurements']:
+        old = before.get((item['document'], item['codemod']))
+        # Mesmo nome com outro texto (a árvore de trabalho mudou) não tem com o que comparar
+        if old is not None and old['input_sha'] == item['input_sha']:
+            yield item, old
+
+
+def _slower(item: dict, old: dict, tolerance: float) -> bool:
+    expected = old['time_ms'] * _speed(item, old)
+    return item['time_ms'] > expected * (1 + tolerance) and item['time_ms'] - expected > NOISE_MS
+
+
+def slower_pairs(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> set[tuple[str, str]]:
+    """(documento, codemod) dos pares mais lentos que o baseline, já descontada a calibração"""
+    return {(item['document'], item['codemod']) for item, old in _pairs(report, baseline) if _slower(item, old, tolerance)}
+
+
+def regressions(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """O que ficou mais lento, mais pesado ou mudou de resultado em relação ao baseline"""
+    found = []
+    for item, old in _pairs(report, baseline):
+        label = f"[{item['codemod']}] {item['document']}"
+        if _behavior(old) != _behavior(item):
+            found.append(
+                f"{label}: resultado mudou (aplicadas {old['patched']}->{item['patched']}, "
+                f"drift {old['drift']}->{item['drift']}, saída {old['output_sha'][:12]}->{item['output_sha'][:12]})"
+            )
+        if _slower(item, old, tolerance):
+            expected = old['time_ms'] * _speed(item, old)
+            found.append(f"{label}: {old['time_ms']:.1f} ms (~{expected:.1f} ms nesta máquina) -> {item['time_ms']:.1f} ms")
+        if old['peak_memory'] and item['peak_memory'] and item['peak_memory'] > old['peak_memory'] * (1 + tolerance):
+            found.append(f"{label}: pico {format_size(old['peak_memory'])} -> {format_size(item['peak_memory'])}")
+    return found
+
+
+# --- CLI -------------------------------------------------------------------
+
+def _describe(item: Measurement) -> str:
+    if item.error:
+        return f"❌ {item.error}"
+    if item.skipped:
+        return f"⏭️ {item.skipped}"
+    return (
+        f"{item.time_ms:9.1f} ms  pico {format_size(item.peak_memory):>9}  "
+        f"aplicadas {item.patched}, já aplicadas {item.already_applied}, drift {item.drift}, "
+        f"{item.matches} trecho(s)  {item.output_sha[:12]}"
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m codemods.bench',
+        description='Tempo, memória e resultado de cada codemod sobre as revisões dos arquivos alvo',
+    )
+    parser.add_argument('paths', nargs='*', help='Arquivos do corpus (padrão: os componentes grandes e os alvos dos specs)')
+    parser.add_argument('--root', default='.', help='Raiz do projeto (padrão: diretório atual)')
+    parser.add_argument('--specs', default=None, help='Diretório dos specs (padrão: codemods/specs)')
+    parser.add_argument('--codemod', action='append', default=[], metavar='NOME', help='Medir só estes codemods')
+    parser.add_argument('--revisions', type=int, default=DEFAULT_REVISIONS, help='Revisões do git por arquivo')
+    parser.add_argument(
+        '--scale',
+        type=int,
+        action='append',
+        default=None,
+        metavar='N',
+        help=f'Cópias sintéticas N vezes maiores da revisão mais nova (padrão: {", ".join(map(str, DEFAULT_SCALES))})',
+    )
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Execuções por par (vale a mais rápida)')
+    parser.add_argument(
+        '--memory-limit',
+        type=int,
+        default=DEFAULT_MEMORY_LIMIT,
+        metavar='CHARS',
+        help='Medir o pico de memória só em documentos até este tamanho (0 = todos)',
+    )
+    parser.add_argument('--save', type=Path, help='Gravar o resultado em JSON')
+    parser.add_argument('--compare', type=Path, help='Comparar com um resultado salvo e falhar se piorar')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Piora aceita (padrão: 0.25)')
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).resolve()
+    try:
+        specs = load_specs(root, Path(args.specs).resolve() if args.specs else None)
+    except SpecError as e:
+        print(f"❌ Spec inválido: {e}")
+        return 1
+    codemods = [codemod for codemod in specs.codemods if codemod.edits]
+    if args.codemod:
+        wanted = {name.removesuffix('.py') for name in args.codemod}
+        codemods = [codemod for codemod in codemods if codemod.name in wanted]
+    if not codemods:
+        print("⚠️ Nenhum codemod encontrado")
+        return 1
+
+    paths = args.paths or list(dict.fromkeys([*CORPUS, *(codemod.target.replace('\\', '/') for codemod in codemods)]))
+    documents = build_corpus(root, paths, args.revisions, DEFAULT_SCALES if args.scale is None else args.scale)
+    if not documents:
+        print("⚠️ Nenhum documento no corpus")
+        return 1
+
+    print(f"📚 {len(documents)} documento(s) x {len(codemods)} codemod(s)\n")
+    started = time.perf_counter()
+    measurements = []
+    for document in documents:
+        print(f"📄 {document.name} ({document.text.count(chr(10))} linhas)")
+        calibration = calibrate()
+        for codemod in codemods:
+            item = measure(codemod, document, args.repeat, args.memory_limit)
+            item.calibration_ms = calibration
+            measurements.append(item)
+            print(f"   {codemod.name:<32} {_describe(item)}")
+        sys.stdout.flush()
+    print(f"\n⏱️ {time.perf_counter() - started:.1f} s no total")
+
+    report = build_report(root, specs.digest, measurements)
+    found = []
+    if args.compare:
+        try:
+            baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"❌ Baseline ilegível: {e}")
+            return 1
+        speed = speed_factor(report, baseline)
+        if speed != 1.0:
+            print(f"⚖️ Calibração: esta execução está {speed:.2f}x o tempo do baseline")
+        by_key = {(item.document, item.codemod): item for item in measurements}
+        texts = {document.name: document.text for document in documents}
+        for _ in range(CONFIRM_ROUNDS):
+            suspects = slower_pairs(report, baseline, args.tolerance)
+            if not suspects:
+                break
+            print(f"🔁 Medindo de novo {len(suspects)} par(es) mais lento(s) que o baseline...")
+            for document, name in sorted(suspects):
+                item = by_key[document, name]
+                calibration = calibrate()
+                samples, _ = _timed(specs.get(name), texts[document], args.repeat)
+                item.runs += len(samples)
+                # Fica a medição mais rápida relativa à máquina naquele momento
+                if min(samples) * 1000 / calibration < item.time_ms / item.calibration_ms:
+                    item.time_ms = round(min(samples) * 1000, 3)
+                    item.calibration_ms = calibration
+            report = build_report(root, specs.digest, measurements)
+        found = regressions(report, baseline, args.tolerance)
+        if found:
+            print(f"❌ {len(found)} regressão(ões) em relação a {args.compare}:")
+            for line in found:
+                print(f"   {line}")
+        else:
+            print(f"✅ Sem regressões em relação a {args.compare} (tolerância {args.tolerance:.0%})")
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"💾 Resultado salvo em {args.save}")
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de patches com múltiplas âncoras em passada única
+
+Em vez de um `in` + `content.replace` por edição (cada um relendo e copiando
+o arquivo inteiro), todas as âncoras são compiladas em um autômato
+Aho-Corasick, o texto é percorrido uma vez só e a saída é descrita como
+fatias do original + substituições (montada só quando necessário).
+
+Âncoras que não aparecem byte a byte (checkout com CRLF, reindentação) são
+procuradas em seguida no índice de linhas normalizadas (lineindex.py), que
+é montado no máximo uma vez por texto. Se nem assim aparecerem, o melhor
+trecho parecido é relocado (relocate.py) e aplicado apenas quando a
+confiança passa do limite pedido.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from time import perf_counter
+from typing import Iterable, Iterator, Sequence
+
+from .lineindex import AnchorShape, LineIndex, detect_newline
+from .relocate import DEFAULT_THRESHOLD, Relocation, relocate, relocation_span
+
+# Status de cada edição em relação ao texto analisado
+PATCHED = 'patched'
+ALREADY_APPLIED = 'already-applied'
+DRIFT = 'drift'
+
+
+class OverlapError(ValueError):
+    """Duas edições tentam alterar o mesmo trecho do arquivo"""
+
+
+@dataclass(frozen=True)
+class Edit:
+    """Uma edição declarativa: troca `anchor` por `replacement`"""
+
+    anchor: str
+    replacement: str
+    done: str = ''
+    missing: str = ''
+    # Quantas ocorrências substituir (None = todas, como str.replace)
+    count: int | None = None
+
+
+@dataclass
+class EditResult:
+    edit: Edit
+    starts: list[int] = field(default_factory=list)
+    # A substituição já está no texto (e nenhuma âncora "viva" sobrou)
+    present: bool = False
+    # Encontrada só no índice normalizado (espaços/CRLF diferentes)
+    normalized: bool = False
+    # Melhor trecho parecido quando a âncora sumiu (aplicado ou só sugerido)
+    relocation: Relocation | None = None
+    # Telemetria: ocorrências brutas da âncora e segundos gastos só com esta
+    # edição (busca normalizada/relocação e adaptação da substituição); a
+    # passada do autômato é compartilhada e fica em PatchResult.scan_time
+    candidates: int = 0
+    search_time: float = 0.0
+    replace_time: float = 0.0
+
+    @property
+    def applied(self) -> bool:
+        return bool(self.starts)
+
+    @property
+    def status(self) -> str:
+        if self.starts:
+            return PATCHED
+        return ALREADY_APPLIED if self.present else DRIFT
+
+
+@dataclass
+class PatchResult:
+    original: str
+    results: list[EditResult]
+    # Trechos trocados no original: (início, fim, texto novo), em ordem
+    spans: list[tuple[int, int, str]] = field(default_factory=list)
+    # Segundos na passada única do autômato e montando o índice de linhas
+    scan_time: float = 0.0
+    index_time: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return any(self.original[start:end] != replacement for start, end, replacement in self.spans)
+
+    def pieces(self) -> Iterator[str]:
+        """Saída como sequência de fatias do original e substituições"""
+        cursor = 0
+        for start, end, replacement in self.spans:
+            yield self.original[cursor:start]
+            yield replacement
+            cursor = end
+        yield self.original[cursor:]
+
+    @cached_property
+    def output(self) -> str:
+        # Montado só quando alguém precisa do texto inteiro (ex.: o próximo codemod)
+        return ''.join(self.pieces()) if self.spans else self.original
+
+
+class AnchorAutomaton:
+    """Autômato Aho-Corasick sobre um conjunto fixo de âncoras"""
+
+    def __init__(self, patterns: Sequence[str]):
+        if any(not p for p in patterns):
+            raise ValueError('Âncora vazia não é permitida')
+        self.patterns = list(patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # BFS para os links de falha; as saídas herdam as do link de falha
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int]]:
+        """Gera (início, índice da âncora) para cada ocorrência, em ordem de fim"""
+        return self.finditer_chunks((text,))
+
+    def finditer_chunks(self, chunks: Iterable[str]) -> Iterator[tuple[int, int]]:
+        """Igual a finditer, mas sobre um texto entregue em pedaços
+
+        O estado do autômato passa de um pedaço para o outro, então uma âncora
+        partida na fronteira entre dois pedaços também é encontrada; as
+        posições são absolutas no texto completo.
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        offset = 0
+        for chunk in chunks:
+            for pos, char in enumerate(chunk, offset):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                for index in out[state]:
+                    yield pos - len(patterns[index]) + 1, index
+            offset += len(chunk)
+
+
+class CompiledEdits:
+    """Edições prontas para a busca: autômato de âncoras + substituições
+
+    Compilar é a parte cara (o autômato tem um estado por caractere das
+    âncoras), então o objeto é reaproveitado entre arquivos e pode ser
+    serializado com pickle (ver spec.py). A variante CRLF é compilada só
+    quando algum arquivo com CRLF aparece.
+    """
+
+    def __init__(self, edits: Sequence[Edit]):
+        self.edits = tuple(edits)
+        patterns = [edit.anchor for edit in self.edits]
+        # Posição do padrão no autômato -> índice da edição dona da substituição
+        self.replacement_index: dict[int, int] = {}
+        for index, edit in enumerate(self.edits):
+            if edit.replacement:
+                self.replacement_index[len(patterns)] = index
+                patterns.append(edit.replacement)
+        self.automaton = AnchorAutomaton(patterns) if self.edits else None
+
+    def __len__(self) -> int:
+        return len(self.edits)
+
+    @cached_property
+    def crlf(self) -> 'CompiledEdits':
+        return CompiledEdits([
+            replace(edit, anchor=_crlf(edit.anchor), replacement=_crlf(edit.replacement)) for edit in self.edits
+        ])
+
+
+def compile_edits(edits: Sequence[Edit] | CompiledEdits) -> CompiledEdits:
+    return edits if isinstance(edits, CompiledEdits) else CompiledEdits(edits)
+
+
+def _select_matches(text: str, compiled: CompiledEdits) -> tuple[list[list[int]], list[bool], list[int]]:
+    """Escolhe as ocorrências de cada âncora com a semântica de str.replace
+
+    Âncoras e substituições entram no mesmo autômato, então a mesma passada
+    também diz quais edições já estão aplicadas. Uma âncora contida numa
+    ocorrência da própria substituição (edições que só inserem texto após um
+    marcador) não conta: é exatamente o que fica no arquivo depois do patch.
+    """
+    edits = compiled.edits
+    hits: list[list[int]] = [[] for _ in edits]
+    replacement_hits: list[list[int]] = [[] for _ in edits]
+    for start, index in compiled.automaton.finditer(text):
+        if index < len(edits):
+            hits[index].append(start)
+        else:
+            replacement_hits[compiled.replacement_index[index]].append(start)
+
+    selected: list[list[int]] = []
+    present: list[bool] = []
+    for edit, starts, rep_starts in zip(edits, hits, replacement_hits):
+        rep_starts.sort()
+        chosen: list[int] = []
+        end = -1
+        for start in sorted(starts):
+            if start < end:
+                continue  # Sobreposta com a ocorrência anterior da mesma âncora
+            if _inside_replacement(start, edit, rep_starts):
+                continue
+            if edit.count is not None and len(chosen) >= edit.count:
+                break
+            chosen.append(start)
+            end = start + len(edit.anchor)
+        selected.append(chosen)
+        present.append(bool(rep_starts) or (not edit.replacement and not starts))
+    return selected, present, [len(starts) for starts in hits]
+
+
+def _inside_replacement(start: int, edit: Edit, rep_starts: list[int]) -> bool:
+    if not rep_starts or len(edit.replacement) < len(edit.anchor):
+        return False
+    lowest = start + len(edit.anchor) - len(edit.replacement)
+    pos = bisect_left(rep_starts, lowest)
+    return pos < len(rep_starts) and rep_starts[pos] <= start
+
+
+def _normalized_matches(index: LineIndex, edit: Edit, shape: AnchorShape) -> tuple[list[tuple[int, int]], bool]:
+    """Procura a edição no índice normalizado: (trechos encontrados, já aplicada)"""
+    rep_spans = index.find(edit.replacement) if edit.replacement.strip() else []
+
+    spans = []
+    for start, end in index.find(shape):
+        if any(r_start <= start and end <= r_end for r_start, r_end in rep_spans):
+            continue
+        if edit.count is not None and len(spans) >= edit.count:
+            break
+        spans.append((start, end))
+    return spans, bool(rep_spans)
+
+
+def _relocated_match(
+    index: LineIndex,
+    edit: Edit,
+    shape: AnchorShape,
+    threshold: float | None,
+) -> tuple[tuple[int, int] | None, Relocation | None, bool]:
+    """Relocação aproximada: (trecho a aplicar, candidato, já aplicada em versão modificada)"""
+    found = relocate(index, shape)
+    applied = relocate(index, edit.replacement) if edit.replacement.strip() else None
+    if applied and applied.confidence >= DEFAULT_THRESHOLD and (found is None or applied.confidence >= found.confidence):
+        return None, applied, True
+    if found is None or threshold is None or found.confidence < threshold:
+        return None, found, False
+    return relocation_span(index, found), found, False
+
+
+def _crlf(value: str) -> str:
+    return value.replace('\r\n', '\n').replace('\n', '\r\n')
+
+
+def apply_edits(
+    text: str,
+    edits: Sequence[Edit] | CompiledEdits,
+    normalize: bool = True,
+    relocate_threshold: float | None = None,
+) -> PatchResult:
+    """Aplica todas as edições sobre o texto original em uma única passada
+
+    `relocate_threshold` liga a aplicação automática das âncoras relocadas
+    com confiança maior ou igual ao limite; sem ele a relocação só é sugerida.
+    `edits` pode vir já compilado (compile_edits) para reaproveitar o autômato.
+    """
+    compiled = compile_edits(edits)
+    results = [EditResult(edit) for edit in compiled.edits]
+    if not compiled.edits:
+        return PatchResult(text, results)
+
+    if '\r' in text and detect_newline(text) == '\r\n':
+        # Checkout com CRLF: âncoras e substituições seguem o arquivo
+        compiled = compiled.crlf
+    edits = compiled.edits
+
+    clock = perf_counter()
+    selected, present, candidates = _select_matches(text, compiled)
+    scan_time = perf_counter() - clock
+
+    spans: list[tuple[int, int, int, str]] = []
+    index: LineIndex | None = None
+    index_time = 0.0
+    for number, starts in enumerate(selected):
+        edit = edits[number]
+        result = results[number]
+        result.starts = starts
+        result.present = present[number]
+        result.candidates = candidates[number]
+        if not starts and not result.present and normalize and edit.anchor.strip():
+            if index is None:
+                clock = perf_counter()
+                index = LineIndex(text)
+                index_time = perf_counter() - clock
+            clock = perf_counter()
+            shape = AnchorShape.from_text(edit.anchor)
+            found, result.present = _normalized_matches(index, edit, shape)
+            result.candidates = len(found)
+            if not found and not result.present:
+                span, result.relocation, result.present = _relocated_match(index, edit, shape, relocate_threshold)
+                found = [span] if span else []
+            else:
+                result.normalized = bool(found)
+            result.search_time = perf_counter() - clock
+
+            clock = perf_counter()
+            result.starts = [start for start, _ in found]
+            spans.extend((start, end, number, index.adapt(edit.replacement, shape, start)) for start, end in found)
+            result.replace_time = perf_counter() - clock
+            continue
+        anchor_len = len(edit.anchor)
+        spans.extend((start, start + anchor_len, number, edit.replacement) for start in starts)
+    spans.sort()
+
+    for (start_a, end_a, index_a, _), (start_b, _, index_b, _) in zip(spans, spans[1:]):
+        if start_b < end_a:
+            raise OverlapError(
+                f'Edições {index_a + 1} e {index_b + 1} se sobrepõem '
+                f'(posições {start_a} e {start_b})'
+            )
+
+    return PatchResult(
+        text,
+        results,
+        [(start, end, rep) for start, end, _, rep in spans],
+        scan_time=scan_time,
+        index_time=index_time,
+    )
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de hashes por linha normalizada
+
+Cada linha do arquivo é reduzida aos seus tokens (tudo que não é espaço),
+então CRLF, tabs e reindentação não mudam o hash. O índice é montado uma
+vez por texto; a busca de uma âncora vira uma busca da sequência de hashes
+e o resultado é mapeado de volta para as posições exatas no texto original.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Sequence
+
+_TOKEN = re.compile(r'\S+')
+_LINE = re.compile(r'[^\n]*\n|[^\n]+')
+
+
+def line_tokens(line: str) -> list[str]:
+    return line.split()
+
+
+def line_hash(tokens: Sequence[str]) -> int:
+    """Hash estável entre processos (o hash() do Python muda a cada execução)"""
+    return int.from_bytes(hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def detect_newline(text: str) -> str:
+    crlf = text.count('\r\n')
+    return '\r\n' if crlf and crlf * 2 >= text.count('\n') else '\n'
+
+
+@dataclass(frozen=True)
+class AnchorShape:
+    """Âncora quebrada em linhas de tokens, pronta para a busca
+
+    Como na busca exata, uma âncora que começa (ou termina) sem espaço pode
+    começar no meio de um token do arquivo: `select value=` acha
+    `<select  value=`. Só os tokens das pontas podem ser parciais.
+    """
+
+    lines: tuple[tuple[str, ...], ...]
+    hashes: tuple[int, ...]
+    indent: str
+    open_head: bool = False
+    open_tail: bool = False
+
+    @classmethod
+    def from_text(cls, anchor: str) -> 'AnchorShape':
+        raw = anchor.replace('\r\n', '\n').split('\n')
+        lines = tuple(tuple(line_tokens(line)) for line in raw)
+        indent = raw[0][:len(raw[0]) - len(raw[0].lstrip())]
+        return cls(
+            lines,
+            tuple(line_hash(tokens) for tokens in lines),
+            indent,
+            open_head=bool(anchor) and not anchor[0].isspace(),
+            open_tail=bool(anchor) and not anchor[-1].isspace(),
+        )
+
+
+def match_tokens(have: Sequence[str], want: Sequence[str], head: bool, tail: bool) -> tuple[int, int] | None:
+    """Compara tokens permitindo ponta parcial: (caracteres a pular no primeiro, a cortar no último)
+
+    `head`: o primeiro token procurado pode ser sufixo do token do arquivo;
+    `tail`: o último pode ser prefixo. None se não casar.
+    """
+    if len(have) != len(want) or not want:
+        return None
+    last = len(want) - 1
+    if last == 0:
+        found, wanted = have[0], want[0]
+        if found == wanted:
+            return 0, 0
+        if head and tail:
+            pos = found.find(wanted)
+        elif head:
+            pos = len(found) - len(wanted) if found.endswith(wanted) else -1
+        elif tail:
+            pos = 0 if found.startswith(wanted) else -1
+        else:
+            pos = -1
+        return (pos, len(found) - pos - len(wanted)) if pos >= 0 else None
+    for i in range(1, last):
+        if have[i] != want[i]:
+            return None
+    skip = drop = 0
+    if have[0] != want[0]:
+        if not (head and have[0].endswith(want[0])):
+            return None
+        skip = len(have[0]) - len(want[0])
+    if have[last] != want[last]:
+        if not (tail and have[last].startswith(want[last])):
+            return None
+        drop = len(have[last]) - len(want[last])
+    return skip, drop
+
+
+class LineIndex:
+    """Hashes das linhas normalizadas de um texto + posições de cada linha"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.newline = detect_newline(text)
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.tokens: list[list[str]] = []
+        self.hashes: list[int] = []
+        self.by_hash: dict[int, list[int]] = {}
+
+        for match in _LINE.finditer(text):
+            start, end = match.span()
+            if text[end - 1:end] == '\n':
+                end -= 1
+                if text[end - 1:end] == '\r':
+                    end -= 1
+            tokens = line_tokens(text[start:end])
+            number = len(self.starts)
+            self.starts.append(start)
+            self.ends.append(end)
+            self.tokens.append(tokens)
+            digest = line_hash(tokens)
+            self.hashes.append(digest)
+            self.by_hash.setdefault(digest, []).append(number)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _token_spans(self, number: int) -> list[tuple[int, int]]:
+        return [m.span() for m in _TOKEN.finditer(self.text, self.starts[number], self.ends[number])]
+
+    def _suffix_start(self, number: int, tokens: Sequence[str], head: bool = False) -> int | None:
+        """Início do trecho se `tokens` for sufixo da linha; None caso contrário"""
+        line = self.tokens[number]
+        if not tokens:
+            return self.ends[number]
+        first = len(line) - len(tokens)
+        matched = match_tokens(line[first:], tokens, head, False) if first >= 0 else None
+        if matched is None:
+            return None
+        return self._token_spans(number)[first][0] + matched[0]
+
+    def _prefix_end(self, number: int, tokens: Sequence[str], tail: bool = False) -> int | None:
+        line = self.tokens[number]
+        if not tokens:
+            return self.starts[number]
+        matched = match_tokens(line[:len(tokens)], tokens, False, tail)
+        if matched is None:
+            return None
+        return self._token_spans(number)[len(tokens) - 1][1] - matched[1]
+
+    def _find_in_line(self, shape: AnchorShape) -> list[tuple[int, int]]:
+        wanted = shape.lines[0]
+        width = len(wanted)
+        found = []
+        for number, line in enumerate(self.tokens):
+            for pos in range(len(line) - width + 1):
+                matched = match_tokens(line[pos:pos + width], wanted, shape.open_head, shape.open_tail)
+                if matched is not None:
+                    spans = self._token_spans(number)
+                    found.append((spans[pos][0] + matched[0], spans[pos + width - 1][1] - matched[1]))
+                    break
+        return found
+
+    def find(self, anchor: str | AnchorShape) -> list[tuple[int, int]]:
+        """Todas as ocorrências (início, fim) da âncora, ignorando espaços"""
+        shape = anchor if isinstance(anchor, AnchorShape) else AnchorShape.from_text(anchor)
+        height = len(shape.lines)
+        if height == 1:
+            return self._find_in_line(shape) if shape.lines[0] else []
+
+        # A linha interna mais rara decide os candidatos; primeira e última
+        # linhas podem ser parciais (sufixo/prefixo da linha do arquivo)
+        interior = range(1, height - 1)
+        if interior:
+            pivot = min(interior, key=lambda i: len(self.by_hash.get(shape.hashes[i], ())))
+            candidates = [number - pivot for number in self.by_hash.get(shape.hashes[pivot], ())]
+        else:
+            candidates = list(range(len(self) - 1))
+
+        found = []
+        last_end = -1
+        for first in candidates:
+            if first < 0 or first + height > len(self):
+                continue
+            if any(self.hashes[first + i] != shape.hashes[i] for i in interior):
+                continue
+            start = self._suffix_start(first, shape.lines[0], shape.open_head)
+            if start is None or start < last_end:
+                continue
+            end = self._prefix_end(first + height - 1, shape.lines[-1], shape.open_tail)
+            if end is None:
+                continue
+            found.append((start, end))
+            last_end = end
+        return found
+
+    def adapt(self, replacement: str, anchor: AnchorShape, start: int) -> str:
+        """Ajusta quebras de linha e indentação da substituição ao trecho encontrado"""
+        line = self.starts[self._line_of(start)]
+        before = self.text[line:start]
+        target_indent = before if not before.strip() else None
+        lines = replacement.replace('\r\n', '\n').split('\n')
+        if target_indent is not None and anchor.indent != target_indent:
+            lines = [lines[0][len(anchor.indent):] if lines[0].startswith(anchor.indent) else lines[0]] + [
+                target_indent + rest[len(anchor.indent):] if rest.startswith(anchor.indent) else rest
+                for rest in lines[1:]
+            ]
+        elif target_indent is not None:
+            lines[0] = lines[0][len(anchor.indent):] if lines[0].startswith(anchor.indent) else lines[0]
+        return self.newline.join(lines)
+
+    def _line_of(self, offset: int) -> int:
+        return max(bisect_right(self.starts, offset) - 1, 0)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifesto persistente dos patches aplicados
+
+Para cada arquivo alvo guarda o tamanho, o mtime, o hash do conteúdo e o
+status de cada patch (id do codemod + hash das edições) calculado sobre esse
+conteúdo. Se o arquivo não mudou, rodar de novo é só uma checagem de
+metadados: nada é lido nem regravado.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .engine import Edit
+
+CACHE_DIR = '.codemods-cache'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Status agregado de um patch (codemod) sobre um conteúdo
+APPLIED = 'applied'
+DRIFT = 'drift'
+# Pré-condições do codemod não batem com o conteúdo: nada foi tentado
+SKIPPED = 'skipped'
+
+
+def content_hash(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def patch_id(name: str, edits: Iterable[Edit], preconditions: Iterable[str] = ()) -> str:
+    """Id estável do patch: muda sempre que uma âncora, substituição ou pré-condição mudar"""
+    digest = hashlib.sha256()
+    for edit in edits:
+        for part in (edit.anchor, edit.replacement, str(edit.count)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+    for part in preconditions:
+        digest.update(b'?' + part.encode('utf-8') + b'\0')
+    return f'{name}@{digest.hexdigest()[:12]}'
+
+
+@dataclass
+class FileEntry:
+    size: int
+    mtime_ns: int
+    sha256: str
+    patches: dict[str, str] = field(default_factory=dict)
+
+    def covers(self, patch_ids: Sequence[str]) -> bool:
+        return all(pid in self.patches for pid in patch_ids)
+
+    def same_stat(self, stat: os.stat_result) -> bool:
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+class Manifest:
+    """Arquivo JSON em .codemods-cache/manifest.json, indexado por caminho relativo"""
+
+    def __init__(self, root: Path, files: dict[str, FileEntry] | None = None):
+        self.root = root
+        self.files = files or {}
+        self.dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self.root / CACHE_DIR / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, root: Path) -> 'Manifest':
+        manifest = cls(root)
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return manifest
+        if data.get('version') != MANIFEST_VERSION:
+            return manifest
+        manifest.files = {key: FileEntry(**entry) for key, entry in data.get('files', {}).items()}
+        return manifest
+
+    def key(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def get(self, path: Path) -> FileEntry | None:
+        return self.files.get(self.key(path))
+
+    def put(self, path: Path, entry: FileEntry) -> None:
+        key = self.key(path)
+        previous = self.files.get(key)
+        if previous and previous.sha256 == entry.sha256:
+            # Mesmo conteúdo: os status de outros patches continuam válidos
+            entry.patches = {**previous.patches, **entry.patches}
+        self.files[key] = entry
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': MANIFEST_VERSION, 'files': {k: asdict(v) for k, v in sorted(self.files.items())}},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, self.path)
+        self.dirty = False
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfil das execuções dos codemods (--profile)
+
+Para cada arquivo registra bytes lidos/gravados, tempo de leitura, da
+passada do autômato, do índice de linhas, da montagem da saída, da
+verificação e da gravação, além do pico de memória (tracemalloc, numa
+passada separada para não distorcer os tempos). Para cada
+edição registra ocorrências candidatas, tempo de busca própria (índice
+normalizado/relocação) e tempo de substituição.
+
+O relatório vai para JSON (para comparar execuções) e um resumo legível é
+impresso com os arquivos e âncoras que mais pesam.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+from .engine import PatchResult
+from .manifest import CACHE_DIR
+
+DEFAULT_REPORT = f'{CACHE_DIR}/profile.json'
+REPORT_VERSION = 1
+TOP = 8
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+@dataclass
+class EditProfile:
+    codemod: str
+    number: int
+    # Linha mais longa da âncora, para identificar a edição no resumo
+    anchor: str
+    status: str
+    candidates: int
+    search_ms: float
+    replace_ms: float
+    removed_chars: int
+    inserted_chars: int
+
+
+@dataclass
+class FileProfile:
+    path: str
+    skipped: bool = False
+    bytes_read: int = 0
+    bytes_written: int = 0
+    read_ms: float = 0.0
+    # Tempo total em apply_edits; scan_ms (passada do autômato) e index_ms
+    # (índice de linhas) são partes dele
+    apply_ms: float = 0.0
+    scan_ms: float = 0.0
+    index_ms: float = 0.0
+    output_ms: float = 0.0
+    verify_ms: float = 0.0
+    write_ms: float = 0.0
+    total_ms: float = 0.0
+    # Pico de memória alocada pelo Python durante o arquivo, medido numa
+    # passada à parte com tracemalloc (mmap e a gravação não entram)
+    peak_memory: int = 0
+    edits: list[EditProfile] = field(default_factory=list)
+
+    def add_patch(self, codemod: str, result: PatchResult) -> None:
+        self.scan_ms += _ms(result.scan_time)
+        self.index_ms += _ms(result.index_time)
+        spans = {}
+        for start, end, replacement in result.spans:
+            spans[start] = (end - start, len(replacement))
+        for number, item in enumerate(result.results, 1):
+            removed = inserted = 0
+            for start in item.starts:
+                span = spans.get(start)
+                if span:
+                    removed += span[0]
+                    inserted += span[1]
+            self.edits.append(EditProfile(
+                codemod=codemod,
+                number=number,
+                anchor=_preview(item.edit.anchor),
+                status=item.status,
+                candidates=item.candidates,
+                search_ms=_ms(item.search_time),
+                replace_ms=_ms(item.replace_time),
+                removed_chars=removed,
+                inserted_chars=inserted,
+            ))
+
+
+def _preview(anchor: str, width: int = 60) -> str:
+    # A linha mais longa costuma ser a mais reconhecível (a primeira é muitas vezes um `<div>`)
+    line = max((line.strip() for line in anchor.splitlines()), key=len, default='')
+    return line if len(line) <= width else line[:width - 1] + '…'
+
+
+class Stopwatch:
+    """Acumula o tempo de cada etapa de um arquivo no campo `<etapa>_ms`"""
+
+    def __init__(self, profile: FileProfile):
+        self.profile = profile
+        self.started = time.perf_counter()
+        self.last = self.started
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        name = f'{stage}_ms'
+        setattr(self.profile, name, getattr(self.profile, name) + _ms(now - self.last))
+        self.last = now
+
+    def stop(self) -> None:
+        self.profile.total_ms = _ms(time.perf_counter() - self.started)
+
+
+def start_memory() -> None:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+
+
+def peak_memory() -> int:
+    return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+
+
+def stop_memory() -> None:
+    tracemalloc.stop()
+
+
+def _peak_rss() -> int:
+    """Pico de memória residente do processo, em bytes (0 onde não há resource)"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def build_report(files: Sequence[FileProfile], mode: str, total: float, discovery: float) -> dict:
+    return {
+        'version': REPORT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'mode': mode,
+        'total_ms': _ms(total),
+        'discovery_ms': _ms(discovery),
+        'peak_rss': _peak_rss(),
+        'files': [asdict(profile) for profile in files],
+    }
+
+
+def write_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def format_size(count: int | None) -> str:
+    """Bytes em B/KB/MB para os relatórios (— quando não medido)"""
+    if count is None:
+        return '—'
+    if count < 1024:
+        return f'{count} B'
+    if count < 1 << 20:
+        return f'{count / 1024:.1f} KB'
+    return f'{count / (1 << 20):.1f} MB'
+
+
+def summary(report: dict, top: int = TOP) -> str:
+    files = report['files']
+    worked = [f for f in files if not f['skipped']]
+    lines = [
+        f"⏱️ Perfil: {report['total_ms']:.1f} ms no total "
+        f"(descoberta {report['discovery_ms']:.1f} ms), {len(files)} arquivo(s), "
+        f"{len(files) - len(worked)} pulado(s) pelo manifesto",
+        f"   Lidos {format_size(sum(f['bytes_read'] for f in files))}, "
+        f"gravados {format_size(sum(f['bytes_written'] for f in files))}, "
+        f"pico RSS {format_size(report['peak_rss'])}",
+    ]
+
+    if worked:
+        lines.append('\n   Arquivos mais lentos:')
+        for f in sorted(worked, key=lambda f: f['total_ms'], reverse=True)[:top]:
+            lines.append(
+                f"   {f['total_ms']:8.1f} ms  {f['path']}  "
+                f"(leitura {f['read_ms']:.1f}, patch {f['apply_ms']:.1f} [autômato {f['scan_ms']:.1f}, "
+                f"índice {f['index_ms']:.1f}], "
+                f"saída {f['output_ms']:.1f}, verificação {f['verify_ms']:.1f}, gravação {f['write_ms']:.1f}; "
+                f"pico {format_size(f['peak_memory'])})"
+            )
+
+    edits = [(f['path'], e) for f in worked for e in f['edits'] if e['search_ms'] + e['replace_ms'] > 0]
+    if edits:
+        lines.append('\n   Edições mais caras (busca própria + substituição):')
+        ranked = sorted(edits, key=lambda item: item[1]['search_ms'] + item[1]['replace_ms'], reverse=True)
+        for path, e in ranked[:top]:
+            lines.append(
+                f"   {e['search_ms'] + e['replace_ms']:8.1f} ms  [{e['codemod']} #{e['number']}] {e['status']}, "
+                f"{e['candidates']} candidata(s) em {Path(path).name}: {e['anchor']}"
+            )
+    return '\n'.join(lines)
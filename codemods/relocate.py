@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relocação aproximada de âncoras quando o código muda no upstream
+
+Quando uma âncora não aparece nem byte a byte nem no índice normalizado,
+procuramos o trecho mais parecido usando só os hashes de linha:
+
+1. cada linha da âncora que existe no arquivo vota numa diagonal
+   (linha do arquivo - linha da âncora); linhas muito comuns (`}`, vazias)
+   não votam;
+2. para as diagonais mais votadas roda um alinhamento (LCS) limitado a uma
+   faixa de ±band linhas em volta da diagonal.
+
+O custo é O(linhas da âncora × faixa) por candidato, independente do
+tamanho do arquivo, então continua rápido em BookingPage.tsx/AdminDashboard.tsx.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+
+from .lineindex import AnchorShape, LineIndex
+
+# Confiança mínima para aplicar uma relocação sem revisão manual
+DEFAULT_THRESHOLD = 0.85
+# Linhas que aparecem mais vezes que isso no arquivo não servem de semente
+MAX_SEED_FREQUENCY = 8
+MAX_CANDIDATES = 3
+MIN_ANCHOR_LINES = 2
+
+
+@dataclass(frozen=True)
+class Relocation:
+    first_line: int
+    last_line: int
+    confidence: float
+
+    def describe(self) -> str:
+        return f'linhas {self.first_line + 1}-{self.last_line + 1}, confiança {self.confidence:.0%}'
+
+
+def _band(height: int) -> int:
+    return max(4, height // 4)
+
+
+def _align(index: LineIndex, shape: AnchorShape, diagonal: int, band: int) -> Relocation | None:
+    """LCS em faixa entre a âncora e o arquivo em torno de `diagonal`"""
+    weights = [1 if tokens else 0 for tokens in shape.lines]
+    total = sum(weights)
+    if not total:
+        return None
+
+    lo = max(0, diagonal - band)
+    hi = min(len(index), diagonal + len(shape.lines) + band)
+    if lo >= hi:
+        return None
+    width = hi - lo
+    file_hashes = index.hashes[lo:hi]
+
+    # Cada célula guarda (peso casado, primeira casada (linha da âncora, linha
+    # do arquivo), última casada (linha da âncora, linha do arquivo))
+    empty = (0, None, None)
+    previous = [empty] * (width + 1)
+    for i, anchor_hash in enumerate(shape.hashes):
+        current = [empty] * (width + 1)
+        center = diagonal + i - lo
+        j_from = max(0, center - band)
+        j_to = min(width, center + band + 1)
+        for j in range(j_from, j_to):
+            best = previous[j + 1] if previous[j + 1][0] >= current[j][0] else current[j]
+            if file_hashes[j] == anchor_hash and weights[i]:
+                diag = previous[j]
+                score = diag[0] + weights[i]
+                if score > best[0]:
+                    best = (score, diag[1] or (i, lo + j), (i, lo + j))
+            current[j + 1] = best
+        for j in range(j_to, width):
+            current[j + 1] = current[j] if current[j][0] >= previous[j + 1][0] else previous[j + 1]
+        previous = current
+
+    score, first, last = max(previous, key=lambda cell: cell[0])
+    if score == 0:
+        return None
+    # Linhas da âncora sem par nas pontas também entram no trecho, senão a
+    # versão modificada delas ficaria duplicada ao lado da substituição
+    first_line = max(0, first[1] - first[0])
+    last_line = min(len(index) - 1, last[1] + len(shape.lines) - 1 - last[0])
+    return Relocation(first_line, last_line, score / total)
+
+
+def relocate(index: LineIndex, anchor: str | AnchorShape) -> Relocation | None:
+    """Melhor trecho parecido com a âncora, ou None se nada razoável existir"""
+    shape = anchor if isinstance(anchor, AnchorShape) else AnchorShape.from_text(anchor)
+    if sum(1 for tokens in shape.lines if tokens) < MIN_ANCHOR_LINES:
+        return None
+
+    seeds = [
+        (offset, index.by_hash[digest])
+        for offset, (tokens, digest) in enumerate(zip(shape.lines, shape.hashes))
+        if tokens and digest in index.by_hash
+    ]
+    if not seeds:
+        return None
+    # Num arquivo muito repetitivo nenhuma linha é rara: usa as menos comuns
+    limit = max(MAX_SEED_FREQUENCY, min(len(hits) for _, hits in seeds))
+
+    votes: Counter[int] = Counter()
+    for offset, hits in seeds:
+        if len(hits) <= limit:
+            votes.update(number - offset for number in hits)
+    if not votes:
+        return None
+
+    band = _band(len(shape.lines))
+    best: Relocation | None = None
+    tried: list[int] = []
+    for diagonal, _ in votes.most_common():
+        if len(tried) >= MAX_CANDIDATES:
+            break
+        if any(abs(diagonal - seen) <= band for seen in tried):
+            continue  # Já coberta pela faixa de um candidato anterior
+        tried.append(diagonal)
+        found = _align(index, shape, diagonal, band)
+        if found and (best is None or found.confidence > best.confidence):
+            best = found
+    return best
+
+
+def relocation_span(index: LineIndex, found: Relocation) -> tuple[int, int]:
+    """Converte as linhas relocadas em posições: do primeiro token ao fim da última linha"""
+    begin, end = index.starts[found.first_line], index.ends[found.first_line]
+    line = index.text[begin:end]
+    return begin + len(line) - len(line.lstrip()), index.ends[found.last_line]
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Executor em lote de todos os codemods
+
+Carrega os specs declarativos (codemods/specs/*.toml, ver spec.py), agrupa
+as edições por arquivo alvo e lê/grava cada arquivo exatamente uma vez.
+Arquivos diferentes são processados em paralelo num pool de processos; os
+codemods do mesmo arquivo são aplicados em sequência, na memória, na ordem
+definida pelos specs. Um codemod cujas pré-condições não batem com o texto
+é pulado.
+
+Com --all-files os codemods valem para qualquer arquivo do repositório que
+contenha as âncoras (cópias em test-*.html, "Nova pasta/", ...): o índice
+de trigramas (trigram.py) escolhe os candidatos sem abrir os demais.
+
+O manifesto (.codemods-cache/manifest.json) evita reler arquivos que não
+mudaram desde a última execução; patches que não estão aplicados nem podem
+ser aplicados são reportados como drift.
+
+Todo resultado passa pelo verificador estrutural (verify.py) antes de ser
+gravado: se o patch desbalancear chaves/tags de um arquivo que estava
+correto, nada é gravado.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+from .engine import DRIFT, PATCHED, Edit, OverlapError, PatchResult, apply_edits
+from .profile import DEFAULT_REPORT, FileProfile, Stopwatch, build_report, peak_memory, start_memory, stop_memory, summary, write_report
+from .relocate import DEFAULT_THRESHOLD
+from .spec import Codemod, SpecError, load_specs
+from .trigram import DEFAULT_EXCLUDE, TrigramIndex, anchor_mask, scan_file
+from .verify import EXTENSIONS, check_text
+from .writer import read_source, unencodable, write_patched, write_text
+from .manifest import APPLIED, SKIPPED, FileEntry, Manifest, content_hash, patch_id
+
+SKIPPED_NOTE = '⏭️ Pré-condição não atendida'
+
+
+@dataclass
+class FileReport:
+    path: str
+    messages: list[str] = field(default_factory=list)
+    diff: str = ''
+    changed: bool = False
+    error: str = ''
+    # Nenhuma leitura/escrita: o manifesto já cobria este conteúdo
+    skipped: bool = False
+    drift: list[str] = field(default_factory=list)
+    entry: FileEntry | None = None
+    # Primeiro desbalanceamento do resultado (linha:coluna - mensagem)
+    issue: str = ''
+    profile: FileProfile | None = None
+
+
+def resolve_target(root: Path, target: str) -> Path:
+    """Resolve o caminho alvo igual em qualquer SO (aceita `\\` e `/` como separador)"""
+    return (root / Path(*target.replace('\\', '/').split('/'))).resolve()
+
+
+def discover(root: Path, directory: Path | None = None, use_cache: bool = True) -> list[Codemod]:
+    """Carrega os codemods dos specs do projeto, na ordem definida por eles"""
+    return [codemod for codemod in load_specs(root, directory, use_cache).codemods if codemod.edits]
+
+
+def codemod_id(codemod: Codemod) -> str:
+    return patch_id(codemod.name, codemod.edits, codemod.requires + codemod.forbids)
+
+
+def group_by_target(root: Path, codemods: Sequence[Codemod]) -> dict[Path, list[Codemod]]:
+    groups: dict[Path, list[Codemod]] = {}
+    for codemod in codemods:
+        groups.setdefault(resolve_target(root, codemod.target), []).append(codemod)
+    return groups
+
+
+def _patch_status(statuses: Sequence[str]) -> str:
+    """Status agregado de um codemod depois da gravação (patched vira applied)"""
+    return DRIFT if DRIFT in statuses else APPLIED
+
+
+def _collect_messages(report: FileReport, codemod: Codemod, result: PatchResult) -> None:
+    for number, item in enumerate(result.results, 1):
+        if item.status == PATCHED:
+            if item.edit.done:
+                note = ''
+                if item.normalized:
+                    note = ' (ignorando espaços/CRLF)'
+                elif item.relocation:
+                    note = f' (relocado: {item.relocation.describe()})'
+                report.messages.append(f'[{codemod.name}] {item.edit.done}{note}')
+        elif item.status == DRIFT:
+            message = item.edit.missing or f"⚠️ Edição {number} não encontrada"
+            if item.relocation:
+                message += f' — melhor candidato: {item.relocation.describe()}'
+            report.messages.append(f'[{codemod.name}] {message}')
+
+
+def _encoding_problems(codemod: Codemod, result: PatchResult, encoding: str) -> list[str]:
+    """Edições aplicadas cujo texto novo não cabe na codificação do arquivo"""
+    problems = []
+    for number, item in enumerate(result.results, 1):
+        char = unencodable(item.edit.replacement, encoding) if item.status == PATCHED else None
+        if char:
+            problems.append(f'[{codemod.name}] edição {number}: {char!r} (U+{ord(char):04X}) não existe em {encoding}')
+    return problems
+
+
+def patch_file(
+    path: Path,
+    codemods: Sequence[Codemod],
+    dry_run: bool = False,
+    entry: FileEntry | None = None,
+    relocate_threshold: float | None = None,
+    profile: bool = False,
+) -> FileReport:
+    """Lê o arquivo uma vez, aplica os codemods em sequência e grava uma vez"""
+    if not profile:
+        return _patch_file(path, codemods, dry_run, entry, relocate_threshold, None)
+    # tracemalloc deixa o laço do autômato ~15x mais lento: a memória é medida
+    # numa passada separada, sem gravar, e os tempos numa passada sem rastreio
+    start_memory()
+    _patch_file(path, codemods, dry_run, entry, relocate_threshold, None, write=False)
+    peak = peak_memory()
+    stop_memory()
+
+    watch = Stopwatch(FileProfile(str(path)))
+    report = _patch_file(path, codemods, dry_run, entry, relocate_threshold, watch)
+    watch.stop()
+    watch.profile.skipped = report.skipped
+    watch.profile.peak_memory = peak
+    report.profile = watch.profile
+    return report
+
+
+def _ignore(stage: str) -> None:
+    pass
+
+
+def _patch_file(
+    path: Path,
+    codemods: Sequence[Codemod],
+    dry_run: bool,
+    entry: FileEntry | None,
+    relocate_threshold: float | None,
+    watch: Stopwatch | None,
+    write: bool = True,
+) -> FileReport:
+    report = FileReport(str(path))
+    lap = watch.lap if watch else _ignore
+    ids = [codemod_id(codemod) for codemod in codemods]
+    if entry and relocate_threshold is not None and any(entry.patches.get(pid) == DRIFT for pid in ids):
+        entry = None  # Drift registrado: com relocação ligada vale tentar de novo
+    try:
+        stat = os.stat(path)
+        if entry and entry.same_stat(stat) and entry.covers(ids):
+            report.skipped = True
+            report.entry = entry
+            report.drift = [pid for pid in ids if entry.patches[pid] == DRIFT]
+            return report
+
+        with read_source(path) as source:
+            digest = content_hash(source.buffer)
+            if watch:
+                watch.profile.bytes_read = len(source.buffer)
+            lap('read')
+            if entry and entry.sha256 == digest and entry.covers(ids):
+                # Só o mtime mudou (arquivo "tocado"): nada para regravar
+                report.skipped = True
+                report.entry = FileEntry(stat.st_size, stat.st_mtime_ns, digest, entry.patches)
+                report.drift = [pid for pid in ids if entry.patches[pid] == DRIFT]
+                return report
+
+            text = source.text
+            current = None
+            changes = []
+            problems: list[str] = []
+            statuses: dict[str, str] = {}
+            for codemod, pid in zip(codemods, ids):
+                if current is not None and current.changed:
+                    text = current.output
+                reason = codemod.unmet(text)
+                if reason:
+                    report.messages.append(f'[{codemod.name}] {SKIPPED_NOTE}: {reason}')
+                    statuses[pid] = SKIPPED
+                    continue
+                current = apply_edits(text, codemod.matcher, relocate_threshold=relocate_threshold)
+                lap('apply')
+                if watch:
+                    watch.profile.add_patch(codemod.name, current)
+                _collect_messages(report, codemod, current)
+                problems.extend(_encoding_problems(codemod, current, source.encoding))
+                statuses[pid] = _patch_status([item.status for item in current.results])
+                if current.changed:
+                    changes.append(current)
+
+            report.changed = bool(changes)
+            if len(changes) > 1:
+                # Um codemod pode ter mexido no trecho de outro: confere no texto final
+                text = current.output
+                for codemod, pid in zip(codemods, ids):
+                    if statuses[pid] == SKIPPED:
+                        continue
+                    final = apply_edits(text, codemod.matcher, relocate_threshold=relocate_threshold)
+                    statuses[pid] = _patch_status([item.status for item in final.results])
+                lap('apply')
+            report.drift = [pid for pid, status in statuses.items() if status == DRIFT]
+
+            if not report.changed:
+                report.entry = FileEntry(stat.st_size, stat.st_mtime_ns, digest, statuses)
+                return report
+
+            if problems:
+                report.error = '; '.join(problems) + '; nada foi gravado'
+                report.entry = None
+                return report
+
+            # Com um único codemod a gravação sai por fatias do original: o texto
+            # inteiro só é montado se o verificador ou o diff precisarem dele
+            # (e fica fora do PatchResult para ser solto antes da gravação)
+            verify = path.suffix in EXTENSIONS
+            output = None
+            if len(changes) > 1:
+                output = changes[-1].output
+            elif verify or dry_run:
+                output = ''.join(changes[0].pieces())
+            lap('output')
+            issue = check_text(output, str(path)) if verify else None
+            if issue:
+                report.issue = f'{issue.line}:{issue.column} - {issue.message}'
+                if check_text(source.text, str(path)) is None:
+                    report.error = f'patch deixaria o arquivo desbalanceado ({report.issue}); nada foi gravado'
+                    report.entry = None
+                    return report
+            lap('verify')
+
+            if dry_run:
+                report.diff = ''.join(difflib.unified_diff(
+                    source.text.splitlines(keepends=True),
+                    output.splitlines(keepends=True),
+                    fromfile=f'a/{path.name}',
+                    tofile=f'b/{path.name}',
+                ))
+                lap('output')
+                return report
+            if not write:
+                return report
+
+            if len(changes) == 1:
+                # Único codemod que mudou algo rodou sobre o original: grava por fatias
+                output = None
+                written = write_patched(source, changes[0].spans)
+            else:
+                written = write_text(source, output)
+        stat = os.stat(path)
+        lap('write')
+        if watch:
+            watch.profile.bytes_written = stat.st_size
+        report.entry = FileEntry(stat.st_size, stat.st_mtime_ns, written, statuses)
+    except (OSError, UnicodeError, OverlapError) as e:
+        # Erros de E/S, de codificação ou de specs conflitantes viram erro do
+        # arquivo; qualquer outra exceção é bug e sobe
+        report.error = f'{type(e).__name__}: {e}'
+    return report
+
+
+def run_spec(name: str) -> FileReport:
+    """Caminho usado pelos scripts fix_*.py individuais (a partir da raiz do projeto)"""
+    root = Path.cwd()
+    return _run_single(root, load_specs(root).get(name))
+
+
+def run_script(file_path: str, edits: Sequence[Edit], script: str) -> FileReport:
+    """Aplica edições avulsas, sem spec (ex.: um script ainda não convertido)"""
+    return _run_single(Path.cwd(), Codemod(Path(script).stem, file_path, tuple(edits)))
+
+
+def _run_single(root: Path, codemod: Codemod) -> FileReport:
+    path = resolve_target(root, codemod.target)
+    manifest = Manifest.load(root)
+
+    report = patch_file(path, [codemod], entry=manifest.get(path))
+    if report.error:
+        if not path.exists():
+            raise FileNotFoundError(codemod.target)
+        raise RuntimeError(report.error)
+
+    if report.issue:
+        print(f"⚠️ Arquivo já estava desbalanceado: {report.issue}")
+    if report.skipped:
+        print("✓ Arquivo sem alterações desde a última execução")
+    else:
+        print("✅ Arquivo lido com sucesso")
+    for message in report.messages:
+        print(message.split('] ', 1)[1])
+    if SKIPPED in (report.entry.patches.values() if report.entry else ()):
+        print("⏭️ Pré-condições do patch não atendidas, nada foi aplicado")
+    elif report.drift:
+        print("⚠️ Drift: o patch não está aplicado e as âncoras não foram encontradas")
+    elif not report.changed:
+        print("✓ Patch já aplicado, nada a gravar")
+
+    if report.entry:
+        manifest.put(path, report.entry)
+        manifest.save()
+    return report
+
+
+def run_batch(
+    root: Path,
+    codemods: Sequence[Codemod],
+    dry_run: bool = False,
+    jobs: int | None = None,
+    manifest: Manifest | None = None,
+    relocate_threshold: float | None = None,
+    profile: bool = False,
+) -> list[FileReport]:
+    return _run_groups(group_by_target(root, codemods), dry_run, jobs, manifest, relocate_threshold, profile)
+
+
+def repo_groups(
+    root: Path,
+    codemods: Sequence[Codemod],
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+    manifest: Manifest | None = None,
+) -> dict[Path, list[Codemod]]:
+    """Arquivos do repositório que contêm âncoras de cada codemod
+
+    O índice de trigramas descarta quem não pode conter nenhuma âncora; os
+    candidatos restantes são varridos em pedaços com o autômato do codemod.
+    Arquivo que o manifesto já cobre nem é varrido: patch_file o pula.
+    """
+    index = TrigramIndex.load(root)
+    index.update()
+    index.save()
+
+    groups: dict[Path, list[Codemod]] = {}
+    for codemod in codemods:
+        pid = codemod_id(codemod)
+        masks = [anchor_mask(edit.anchor) for edit in codemod.edits]
+        for key in index.candidates(masks, include, exclude):
+            path = (root / key).resolve()
+            entry = manifest.get(path) if manifest else None
+            known = entry and pid in entry.patches and entry.same_stat(os.stat(path))
+            if known or scan_file(path, codemod.matcher):
+                groups.setdefault(path, []).append(codemod)
+    return groups
+
+
+def run_repo(
+    root: Path,
+    codemods: Sequence[Codemod],
+    dry_run: bool = False,
+    jobs: int | None = None,
+    manifest: Manifest | None = None,
+    relocate_threshold: float | None = None,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+    profile: bool = False,
+) -> list[FileReport]:
+    """Aplica os codemods em todo arquivo que contém as âncoras, não só no alvo"""
+    groups = repo_groups(root, codemods, include, exclude, manifest)
+    return _run_groups(groups, dry_run, jobs, manifest, relocate_threshold, profile)
+
+
+def _run_groups(
+    groups: dict[Path, list[Codemod]],
+    dry_run: bool,
+    jobs: int | None,
+    manifest: Manifest | None,
+    relocate_threshold: float | None,
+    profile: bool = False,
+) -> list[FileReport]:
+    entries = {path: manifest.get(path) if manifest else None for path in groups}
+    if len(groups) <= 1 or jobs == 1:
+        reports = [
+            patch_file(path, mods, dry_run, entries[path], relocate_threshold, profile)
+            for path, mods in groups.items()
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs or min(len(groups), os.cpu_count() or 1)) as pool:
+            futures = [
+                pool.submit(patch_file, path, mods, dry_run, entries[path], relocate_threshold, profile)
+                for path, mods in groups.items()
+            ]
+            reports = [future.result() for future in futures]
+
+    if manifest is not None and not dry_run:
+        for report in reports:
+            if report.entry:
+                manifest.put(Path(report.path), report.entry)
+        manifest.save()
+    return reports
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m codemods', description='Aplica todos os codemods (specs) de uma vez')
+    parser.add_argument('names', nargs='*', help='Aplicar só estes codemods (ex.: fix_login)')
+    parser.add_argument('--root', default='.', help='Raiz do projeto (padrão: diretório atual)')
+    parser.add_argument('--dry-run', action='store_true', help='Mostrar diffs sem gravar')
+    parser.add_argument('--jobs', type=int, default=None, help='Número de processos')
+    parser.add_argument('--no-manifest', action='store_true', help='Ignorar o manifesto e reprocessar tudo')
+    parser.add_argument('--specs', default=None, help='Diretório dos specs (padrão: codemods/specs)')
+    parser.add_argument('--no-cache', action='store_true', help='Recompilar os specs sem usar o cache de autômatos')
+    parser.add_argument(
+        '--all-files',
+        action='store_true',
+        help='Aplicar em todo arquivo do repositório que contenha as âncoras, não só no alvo',
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=[],
+        metavar='PADRÃO',
+        help='Com --all-files: só caminhos que casam com o padrão (ex.: "test-*.html")',
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=[],
+        metavar='PADRÃO',
+        help='Com --all-files: ignorar também caminhos que casam com o padrão',
+    )
+    parser.add_argument(
+        '--relocate',
+        nargs='?',
+        type=float,
+        const=DEFAULT_THRESHOLD,
+        default=None,
+        metavar='LIMITE',
+        help=f'Aplicar âncoras relocadas com confiança >= LIMITE (padrão {DEFAULT_THRESHOLD})',
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const=DEFAULT_REPORT,
+        default=None,
+        metavar='ARQUIVO',
+        help=f'Medir tempo, bytes e memória por arquivo/edição e gravar o relatório JSON (padrão {DEFAULT_REPORT})',
+    )
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).resolve()
+    started = time.perf_counter()
+    try:
+        codemods = discover(root, Path(args.specs).resolve() if args.specs else None, use_cache=not args.no_cache)
+    except SpecError as e:
+        print(f"❌ Spec inválido: {e}")
+        return 1
+    if args.names:
+        wanted = {name.removesuffix('.py') for name in args.names}
+        codemods = [c for c in codemods if c.name in wanted]
+    if not codemods:
+        print("⚠️ Nenhum codemod encontrado")
+        return 1
+
+    print(f"🔧 Aplicando {len(codemods)} codemod(s)...\n")
+    manifest = None if args.no_manifest else Manifest.load(root)
+    if args.all_files:
+        groups = repo_groups(root, codemods, args.include, DEFAULT_EXCLUDE + tuple(args.exclude), manifest)
+    else:
+        groups = group_by_target(root, codemods)
+    discovery = time.perf_counter() - started
+    reports = _run_groups(groups, args.dry_run, args.jobs, manifest, args.relocate, profile=args.profile is not None)
+
+    failed = False
+    for report in reports:
+        print(f"📄 {os.path.relpath(report.path, root)}")
+        for message in report.messages:
+            print(f"   {message}")
+        for pid in report.drift:
+            print(f"   ⚠️ Drift: {pid} não está aplicado nem pode ser aplicado")
+        if report.issue and not report.error:
+            print(f"   ⚠️ Arquivo já estava desbalanceado: {report.issue}")
+        if report.error:
+            failed = True
+            print(f"   ❌ Erro: {report.error}")
+        elif report.diff:
+            sys.stdout.write(report.diff)
+        elif report.changed:
+            print("   💾 Arquivo salvo")
+        elif report.skipped:
+            print("   ✓ Sem alterações desde a última execução (manifesto)")
+        else:
+            print("   ✓ Nenhuma alteração")
+
+    if args.profile is not None:
+        profiles = [report.profile for report in reports if report.profile]
+        for profile in profiles:
+            profile.path = os.path.relpath(profile.path, root)
+        report = build_report(
+            profiles,
+            mode='all-files' if args.all_files else 'targets',
+            total=time.perf_counter() - started,
+            discovery=discovery,
+        )
+        destination = root / args.profile
+        write_report(destination, report)
+        print(f"\n{summary(report)}")
+        print(f"\n📊 Relatório completo em {os.path.relpath(destination, root)}")
+
+    return 1 if failed else 0
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codemods declarativos em arquivos TOML
+
+Cada arquivo em codemods/specs/ descreve um codemod: id, arquivo alvo,
+pré-condições, ordem e a lista de edições. Trechos repetidos entre specs
+ficam em _fragments.toml e são referenciados por nome:
+
+    id = "fix_exemplo"
+    target = "src/components/Exemplo.tsx"
+    requires = ["useRef"]          # textos que precisam existir no alvo
+    forbids = []                   # textos que não podem existir
+    after = ["fix_outro"]          # roda depois destes codemods
+
+    [[edits]]
+    anchor = [{ fragment = "botao_voltar" }, '''texto extra''']
+    replacement = '''...'''
+    done = "✅ ..."
+    missing = "⚠️ ..."
+
+O conjunto carregado (specs + autômatos já compilados) é gravado com pickle
+em .codemods-cache/matchers/, com o hash dos arquivos de spec como chave:
+enquanto nenhum spec mudar, as execuções seguintes não fazem parse de TOML
+nem montam autômato nenhum.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+import tomllib
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Sequence
+
+from .engine import CompiledEdits, Edit
+from .manifest import CACHE_DIR
+
+# Specs distribuídos junto com o pacote
+SPEC_DIR = Path(__file__).resolve().parent / 'specs'
+FRAGMENTS_NAME = '_fragments.toml'
+MATCHERS_DIR = 'matchers'
+# Mudar sempre que o formato de Codemod/CompiledEdits mudar (invalida o cache)
+CACHE_FORMAT = 1
+
+_EDIT_KEYS = {'anchor', 'replacement', 'done', 'missing', 'count'}
+_SPEC_KEYS = {'id', 'target', 'description', 'order', 'after', 'requires', 'forbids', 'edits'}
+
+
+class SpecError(ValueError):
+    """Spec inválido: campo desconhecido, fragmento inexistente, ciclo na ordem..."""
+
+
+@dataclass(frozen=True)
+class Codemod:
+    name: str
+    target: str
+    edits: tuple[Edit, ...]
+    description: str = ''
+    order: int = 0
+    after: tuple[str, ...] = ()
+    # Pré-condições avaliadas no texto que o codemod vai receber
+    requires: tuple[str, ...] = ()
+    forbids: tuple[str, ...] = ()
+
+    @cached_property
+    def matcher(self) -> CompiledEdits:
+        return CompiledEdits(self.edits)
+
+    def unmet(self, text: str) -> str:
+        """Primeira pré-condição não atendida, ou '' se o codemod pode rodar"""
+        for needle in self.requires:
+            if needle not in text:
+                return f'requer {needle!r}'
+        for needle in self.forbids:
+            if needle in text:
+                return f'proíbe {needle!r}'
+        return ''
+
+
+@dataclass
+class SpecSet:
+    """Codemods de um diretório de specs, já ordenados e com os autômatos compilados"""
+
+    digest: str
+    codemods: list[Codemod] = field(default_factory=list)
+
+    def get(self, name: str) -> Codemod:
+        for codemod in self.codemods:
+            if codemod.name == name:
+                return codemod
+        raise KeyError(name)
+
+
+def _spec_files(directory: Path) -> list[Path]:
+    return sorted(path for path in directory.glob('*.toml') if not path.name.startswith('_'))
+
+
+def specs_digest(directory: Path) -> str:
+    """Hash do conteúdo de todos os specs (e fragmentos) do diretório"""
+    digest = hashlib.sha256(f'codemods-spec:{CACHE_FORMAT}'.encode('utf-8'))
+    fragments = directory / FRAGMENTS_NAME
+    for path in ([fragments] if fragments.exists() else []) + _spec_files(directory):
+        digest.update(path.name.encode('utf-8') + b'\0')
+        digest.update(path.read_bytes())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _text(value, fragments: dict[str, str], where: str) -> str:
+    """Texto literal ou lista de literais/{ fragment = "nome" } concatenados"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        raise SpecError(f'{where}: esperado texto ou lista de partes')
+    parts = []
+    for part in value:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and set(part) == {'fragment'}:
+            try:
+                parts.append(fragments[part['fragment']])
+            except KeyError:
+                raise SpecError(f"{where}: fragmento {part['fragment']!r} não existe") from None
+        else:
+            raise SpecError(f'{where}: parte inválida {part!r}')
+    return ''.join(parts)
+
+
+def parse_spec(data: dict, fragments: dict[str, str], source: str = '<spec>') -> Codemod:
+    unknown = set(data) - _SPEC_KEYS
+    if unknown:
+        raise SpecError(f'{source}: campos desconhecidos {sorted(unknown)}')
+    for key in ('id', 'target'):
+        if not isinstance(data.get(key), str) or not data[key]:
+            raise SpecError(f'{source}: campo {key!r} obrigatório')
+
+    edits = []
+    for number, item in enumerate(data.get('edits', []), 1):
+        where = f'{source}: edição {number}'
+        unknown = set(item) - _EDIT_KEYS
+        if unknown:
+            raise SpecError(f'{where}: campos desconhecidos {sorted(unknown)}')
+        if 'anchor' not in item or 'replacement' not in item:
+            raise SpecError(f'{where}: anchor e replacement são obrigatórios')
+        edits.append(Edit(
+            anchor=_text(item['anchor'], fragments, where),
+            replacement=_text(item['replacement'], fragments, where),
+            done=item.get('done', ''),
+            missing=item.get('missing', ''),
+            count=item.get('count'),
+        ))
+
+    return Codemod(
+        name=data['id'],
+        target=data['target'],
+        edits=tuple(edits),
+        description=data.get('description', ''),
+        order=data.get('order', 0),
+        after=tuple(data.get('after', ())),
+        requires=tuple(data.get('requires', ())),
+        forbids=tuple(data.get('forbids', ())),
+    )
+
+
+def order_codemods(codemods: Sequence[Codemod]) -> list[Codemod]:
+    """Ordenação topológica por `after`; empates resolvidos por (order, id)"""
+    by_name: dict[str, Codemod] = {}
+    for codemod in codemods:
+        if codemod.name in by_name:
+            raise SpecError(f'id duplicado: {codemod.name}')
+        by_name[codemod.name] = codemod
+    pending = {
+        name: {dep for dep in codemod.after if dep in by_name}
+        for name, codemod in by_name.items()
+    }
+
+    ordered: list[Codemod] = []
+    while pending:
+        ready = [by_name[name] for name, deps in pending.items() if not deps]
+        if not ready:
+            raise SpecError(f'ciclo na ordem dos codemods: {sorted(pending)}')
+        chosen = min(ready, key=lambda codemod: (codemod.order, codemod.name))
+        ordered.append(chosen)
+        del pending[chosen.name]
+        for deps in pending.values():
+            deps.discard(chosen.name)
+    return ordered
+
+
+def parse_specs(directory: Path) -> list[Codemod]:
+    fragments: dict[str, str] = {}
+    fragments_path = directory / FRAGMENTS_NAME
+    if fragments_path.exists():
+        with open(fragments_path, 'rb') as f:
+            fragments = tomllib.load(f)
+
+    codemods = []
+    for path in _spec_files(directory):
+        with open(path, 'rb') as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise SpecError(f'{path.name}: {e}') from None
+        codemods.append(parse_spec(data, fragments, path.name))
+    return order_codemods(codemods)
+
+
+def _cache_path(root: Path, digest: str) -> Path:
+    return root / CACHE_DIR / MATCHERS_DIR / f'{digest[:32]}.pickle'
+
+
+def _save_cache(path: Path, specs: SpecSet) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.matchers.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(specs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    # Só o conjunto atual interessa: versões antigas dos specs saem do cache
+    for stale in path.parent.glob('*.pickle'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def load_specs(root: Path, directory: Path | None = None, use_cache: bool = True) -> SpecSet:
+    """Carrega os specs do projeto, do cache de autômatos quando possível"""
+    directory = directory or SPEC_DIR
+    digest = specs_digest(directory)
+    path = _cache_path(root, digest)
+    if use_cache:
+        try:
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
+            if isinstance(cached, SpecSet) and cached.digest == digest:
+                return cached
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            pass
+
+    specs = SpecSet(digest, parse_specs(directory))
+    for codemod in specs.codemods:
+        codemod.matcher  # Compila agora para o autômato ir junto no pickle
+    if use_cache:
+        try:
+            _save_cache(path, specs)
+        except OSError:
+            pass  # Sem cache (ex.: diretório só leitura): só fica mais lento
+    return specs
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de trigramas do repositório para codemods em todos os arquivos
+
+Os trechos que os codemods corrigem foram copiados para dezenas de arquivos
+vizinhos (test-*.html, debug-*.html, corrigir-*.cjs, "Nova pasta/..."). Para
+não abrir o repositório inteiro a cada execução, cada arquivo tem uma
+assinatura: um bitmap com os trigramas (de bytes, sem espaços) do conteúdo.
+Uma âncora só pode estar num arquivo cujo bitmap contém todos os bits dos
+trigramas dela, então a triagem é um AND de inteiros por arquivo.
+
+Espaços, tabs e quebras de linha ficam de fora dos trigramas, de modo que
+cópias com CRLF ou reindentadas também passam pela triagem. O bitmap pode
+dar falso positivo (nunca falso negativo); por isso os candidatos ainda são
+varridos com o autômato das âncoras, em pedaços, antes de serem patchados.
+Candidato sem nenhuma ocorrência exata ainda passa pela busca normalizada
+(lineindex.py), a mesma que o motor usa: cópias reindentadas não se perdem.
+
+O índice fica em .codemods-cache/trigrams.pickle e é atualizado por
+tamanho + mtime: só arquivos novos ou alterados são relidos.
+"""
+
+from __future__ import annotations
+
+import codecs
+import fnmatch
+import os
+import pickle
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from .engine import CompiledEdits
+from .lineindex import LineIndex
+from .manifest import CACHE_DIR
+
+INDEX_NAME = 'trigrams.pickle'
+INDEX_VERSION = 1
+# Bits por assinatura: com ~30 mil trigramas distintos (BookingPage.tsx) o
+# bitmap fica ~20% preenchido e uma âncora de 20+ trigramas quase nunca
+# passa por engano
+SIGNATURE_BITS = 1 << 17
+CHUNK_SIZE = 1 << 20
+# tests/ guarda cópias das âncoras como fixture dos próprios codemods
+SKIP_DIRS = frozenset({'.git', 'node_modules', CACHE_DIR, 'dist', 'build', '__pycache__', '.venv', 'venv', 'tests'})
+# Documentação e diffs citam os trechos "antes/depois" e os scripts Python
+# (fix_*.py, studio/) carregam as âncoras como dado: nada disso é código a corrigir
+DEFAULT_EXCLUDE = ('*.md', '*.txt', '*.patch', '*.diff', '*.py')
+SKIP_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.ico', '.webp', '.pdf', '.zip', '.gz', '.woff', '.woff2', '.pickle'})
+
+# O próprio pacote (specs incluídos) contém todas as âncoras
+_PACKAGE_DIR = Path(__file__).resolve().parent
+_WHITESPACE = b' \t\r\n\f\v'
+_MASK = SIGNATURE_BITS - 1
+
+
+def _trigram_bits(data: bytes, bits: bytearray) -> None:
+    for trigram in {data[i:i + 3] for i in range(len(data) - 2)}:
+        bit = zlib.crc32(trigram) & _MASK
+        bits[bit >> 3] |= 1 << (bit & 7)
+
+
+def signature(chunks: Iterable[bytes]) -> int:
+    """Bitmap dos trigramas de um conteúdo entregue em pedaços
+
+    Os dois últimos bytes (já sem espaços) de cada pedaço são levados para o
+    próximo, então trigramas na fronteira entre pedaços também entram.
+    """
+    bits = bytearray(SIGNATURE_BITS // 8)
+    carry = b''
+    for chunk in chunks:
+        data = carry + bytes(chunk).translate(None, _WHITESPACE)
+        _trigram_bits(data, bits)
+        carry = data[-2:]
+    return int.from_bytes(bits, 'little')
+
+
+def anchor_mask(anchor: str) -> int:
+    """Bits que um arquivo precisa ter para poder conter a âncora (0 = qualquer um)"""
+    return signature((anchor.encode('utf-8'),))
+
+
+def read_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _text_chunks(path: Path, chunk_size: int) -> Iterator[str]:
+    """Texto do arquivo em pedaços, com CRLF convertido para LF
+
+    Um `\\r` no fim de um pedaço fica retido até o próximo, senão um CRLF
+    partido na fronteira viraria `\\r` + `\\n`.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    for raw in read_chunks(path, chunk_size):
+        text = pending + decoder.decode(raw)
+        pending = ''
+        if text.endswith('\r'):
+            text, pending = text[:-1], '\r'
+        yield text.replace('\r\n', '\n')
+    tail = pending + decoder.decode(b'', final=True)
+    if tail:
+        yield tail.replace('\r\n', '\n')
+
+
+def scan_file(path: Path, compiled: CompiledEdits, chunk_size: int = CHUNK_SIZE) -> set[int]:
+    """Índices das edições cuja âncora aparece no arquivo (leitura em pedaços)
+
+    Sem nenhuma ocorrência exata, o arquivo ainda é lido inteiro uma vez para
+    a busca normalizada, que ignora espaços e indentação como apply_edits.
+    """
+    found: set[int] = set()
+    if not compiled.edits:
+        return found
+    wanted = len(compiled.edits)
+    for _, index in compiled.automaton.finditer_chunks(_text_chunks(path, chunk_size)):
+        if index < wanted:
+            found.add(index)
+            if len(found) == wanted:
+                break
+    if not found:
+        lines = LineIndex(''.join(_text_chunks(path, chunk_size)))
+        found = {index for index, edit in enumerate(compiled.edits) if edit.anchor.strip() and lines.find(edit.anchor)}
+    return found
+
+
+@dataclass
+class FileSignature:
+    size: int
+    mtime_ns: int
+    bits: int
+
+
+@dataclass
+class UpdateStats:
+    scanned: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+@dataclass
+class TrigramIndex:
+    """Assinaturas de todos os arquivos de texto do projeto, por caminho relativo"""
+
+    root: Path
+    files: dict[str, FileSignature] = field(default_factory=dict)
+    dirty: bool = False
+
+    @property
+    def path(self) -> Path:
+        return self.root / CACHE_DIR / INDEX_NAME
+
+    @classmethod
+    def load(cls, root: Path) -> 'TrigramIndex':
+        index = cls(root)
+        try:
+            with open(index.path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return index
+        if isinstance(data, dict) and data.get('version') == INDEX_VERSION and data.get('bits') == SIGNATURE_BITS:
+            index.files = data['files']
+        return index
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(
+                {'version': INDEX_VERSION, 'bits': SIGNATURE_BITS, 'files': self.files},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def walk(self) -> Iterator[tuple[str, os.stat_result]]:
+        """(caminho relativo, stat) de cada arquivo candidato do projeto"""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    path = Path(entry.path)
+                    if entry.name not in SKIP_DIRS and path.resolve() != _PACKAGE_DIR:
+                        stack.append(path)
+                elif entry.is_file(follow_symlinks=False):
+                    if os.path.splitext(entry.name)[1].lower() in SKIP_EXTENSIONS:
+                        continue
+                    key = Path(os.path.relpath(entry.path, self.root)).as_posix()
+                    yield key, entry.stat(follow_symlinks=False)
+
+    def update(self) -> UpdateStats:
+        """Relê só os arquivos novos ou com tamanho/mtime diferente"""
+        stats = UpdateStats()
+        seen = set()
+        for key, stat in self.walk():
+            seen.add(key)
+            known = self.files.get(key)
+            if known and known.size == stat.st_size and known.mtime_ns == stat.st_mtime_ns:
+                stats.reused += 1
+                continue
+            try:
+                bits = signature(read_chunks(self.root / key))
+            except OSError:
+                continue
+            self.files[key] = FileSignature(stat.st_size, stat.st_mtime_ns, bits)
+            stats.scanned += 1
+            self.dirty = True
+        for key in [key for key in self.files if key not in seen]:
+            del self.files[key]
+            stats.removed += 1
+            self.dirty = True
+        return stats
+
+    def candidates(
+        self,
+        masks: Sequence[int],
+        include: Sequence[str] = (),
+        exclude: Sequence[str] = DEFAULT_EXCLUDE,
+    ) -> list[str]:
+        """Arquivos que podem conter ao menos uma das âncoras (máscaras de anchor_mask)"""
+        found = []
+        for key, entry in sorted(self.files.items()):
+            if include and not any(fnmatch.fnmatch(key, pattern) for pattern in include):
+                continue
+            if any(fnmatch.fnmatch(key, pattern) for pattern in exclude):
+                continue
+            bits = entry.bits
+            if any(bits & mask == mask for mask in masks):
+                found.append(key)
+        return found
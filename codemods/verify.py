@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificador estrutural de arquivos .ts/.tsx (substitui verificar-sintaxe.cjs)
+
+Diferente de só contar `{`/`}` e `(`/`)`, o verificador entende strings,
+template literals (com `${...}` aninhados), comentários, regex e JSX, então
+chaves dentro de textos não atrapalham. Além de chaves, parênteses e
+colchetes, confere se cada tag JSX aberta é fechada com o mesmo nome.
+
+Roda sozinho depois de cada codemod e pode varrer src/components inteira em
+paralelo; o resultado fica em cache por (caminho, mtime, tamanho).
+
+    python -m codemods.verify                 # src/components
+    python -m codemods.verify src/App.tsx ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .manifest import CACHE_DIR
+
+VERIFY_CACHE_NAME = 'verify.json'
+DEFAULT_TARGETS = ('src/components',)
+EXTENSIONS = ('.ts', '.tsx')
+
+_CLOSERS = {')': '(', ']': '[', '}': '{'}
+# Palavras após as quais vem uma expressão (então `/` é regex e `<` pode ser JSX)
+_EXPR_KEYWORDS = frozenset({
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'instanceof', 'yield', 'await',
+})
+# `if (...) /re/`: depois do ')' destas vem um comando, não uma divisão
+_CONDITION_KEYWORDS = frozenset({'if', 'while', 'for', 'with'})
+_SKIP_JS = re.compile(r'[^\'"`/{}()\[\]<\s\w$]+|\s+')
+_WORD = re.compile(r'[\w$]+')
+_JSX_NAME = re.compile(r'[A-Za-z_$][\w$.:-]*')
+_JSX_TEXT = re.compile(r'[^{}<]+')
+_TYPE_PARAMS = re.compile(r'<\s*[A-Za-z_$][\w$]*\s*(?:extends\b|,)')
+
+
+@dataclass(frozen=True)
+class Issue:
+    path: str
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f'{self.path}:{self.line}:{self.column}: {self.message}'
+
+
+class _Imbalance(Exception):
+    def __init__(self, pos: int, message: str):
+        super().__init__(message)
+        self.pos = pos
+        self.message = message
+
+
+@dataclass
+class _Frame:
+    # '(' '[' '{' → JS; '${' → volta para o template; 'attr' / 'child' → chaves
+    # de JSX; 'tag' → dentro de <Tag ...>; 'element' → filhos de <Tag>...</Tag>
+    kind: str
+    pos: int
+    name: str = ''
+
+
+class _Scanner:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.stack: list[_Frame] = []
+        # Último token significativo: decide regex x divisão e JSX x "menor que"
+        self.expects_expr = True
+        self.last_word = ''
+
+    def fail(self, pos: int, message: str) -> None:
+        raise _Imbalance(pos, message)
+
+    def run(self) -> None:
+        text = self.text
+        end = len(text)
+        while self.pos < end:
+            top = self.stack[-1].kind if self.stack else ''
+            if top == 'tag':
+                self.scan_tag()
+            elif top == 'element':
+                self.scan_children()
+            else:
+                self.scan_js()
+        if self.stack:
+            frame = self.stack[-1]
+            what = {'tag': f'<{frame.name}', 'element': f'<{frame.name}>', '${': '${', 'attr': '{', 'child': '{'}.get(frame.kind, frame.kind)
+            self.fail(frame.pos, f"'{what}' aberto e nunca fechado")
+
+    # ----------------------------------------------------------------- JS --
+    def scan_js(self) -> None:
+        text = self.text
+        match = _SKIP_JS.match(text, self.pos)
+        if match:
+            chunk = match.group()
+            if not chunk.isspace():
+                self.expects_expr = chunk[-1] not in ')]}' and not chunk.endswith(('++', '--'))
+                self.last_word = ''
+            self.pos = match.end()
+            return
+
+        char = text[self.pos]
+        word = self.last_word
+        self.last_word = ''
+        if char == '/' and text.startswith('//', self.pos):
+            newline = text.find('\n', self.pos)
+            self.pos = len(text) if newline < 0 else newline
+        elif char == '/' and text.startswith('/*', self.pos):
+            close = text.find('*/', self.pos + 2)
+            if close < 0:
+                self.fail(self.pos, 'comentário /* nunca fechado')
+            self.pos = close + 2
+        elif char == '/':
+            if self.expects_expr:
+                self.skip_regex()
+            else:
+                self.pos += 1
+                self.expects_expr = True
+        elif char in '\'"':
+            self.skip_string(char)
+            self.expects_expr = False
+        elif char == '`':
+            self.pos += 1
+            self.scan_template()
+        elif char in '([{':
+            self.stack.append(_Frame(char, self.pos, word if char == '(' else ''))
+            self.pos += 1
+            self.expects_expr = True
+        elif char in ')]}':
+            self.close_js(char)
+        elif char == '<':
+            # Onde se espera uma expressão, '<' não pode ser "menor que"
+            if self.expects_expr and not self.is_type_parameters():
+                self.open_tag()
+            else:
+                self.pos += 1
+                self.expects_expr = True
+        elif char.isspace():
+            self.pos += 1
+            self.last_word = word
+        else:
+            match = _WORD.match(text, self.pos)
+            self.pos = match.end()
+            self.last_word = match.group()
+            self.expects_expr = self.last_word in _EXPR_KEYWORDS
+
+    def close_js(self, char: str) -> None:
+        if not self.stack:
+            self.fail(self.pos, f"'{char}' sem abertura correspondente")
+        frame = self.stack[-1]
+        expected = _CLOSERS[char]
+        braces = ('{', '${', 'attr', 'child')
+        if (char == '}' and frame.kind not in braces) or (char != '}' and frame.kind != expected):
+            opener = '{' if frame.kind in braces else frame.kind
+            if frame.kind in ('tag', 'element'):
+                opener = f'<{frame.name}>'
+            self.fail(self.pos, f"'{char}' fecha '{opener}' aberto na linha {self.line_of(frame.pos)}")
+        self.stack.pop()
+        self.pos += 1
+        if frame.kind == '${':
+            self.scan_template()
+        else:
+            self.expects_expr = frame.kind == '(' and frame.name in _CONDITION_KEYWORDS
+
+    def skip_string(self, quote: str) -> None:
+        text = self.text
+        pos = self.pos + 1
+        while True:
+            if pos >= len(text) or text[pos] == '\n':
+                self.fail(self.pos, 'string nunca fechada')
+            char = text[pos]
+            if char == '\\':
+                pos += 2
+                continue
+            pos += 1
+            if char == quote:
+                break
+        self.pos = pos
+
+    def skip_regex(self) -> None:
+        text = self.text
+        pos = self.pos + 1
+        in_class = False
+        while True:
+            if pos >= len(text) or text[pos] == '\n':
+                # Não era regex (ex.: divisão depois de um token ambíguo)
+                self.pos += 1
+                self.expects_expr = True
+                return
+            char = text[pos]
+            if char == '\\':
+                pos += 2
+                continue
+            pos += 1
+            if char == '[':
+                in_class = True
+            elif char == ']':
+                in_class = False
+            elif char == '/' and not in_class:
+                break
+        flags = _WORD.match(text, pos)
+        self.pos = flags.end() if flags else pos
+        self.expects_expr = False
+
+    def scan_template(self) -> None:
+        """Continua um template literal até '`' (fim) ou '${' (entra em JS)"""
+        text = self.text
+        start = self.pos
+        pos = start
+        while True:
+            if pos >= len(text):
+                self.fail(start - 1, 'template literal nunca fechado')
+            char = text[pos]
+            if char == '\\':
+                pos += 2
+            elif char == '`':
+                self.pos = pos + 1
+                self.expects_expr = False
+                return
+            elif char == '$' and text.startswith('${', pos):
+                self.stack.append(_Frame('${', pos))
+                self.pos = pos + 2
+                self.expects_expr = True
+                return
+            else:
+                pos += 1
+
+    # ---------------------------------------------------------------- JSX --
+    def is_type_parameters(self) -> bool:
+        """`<T extends ...>(` / `<T,>(` de arrow function genérica, não JSX"""
+        match = _TYPE_PARAMS.match(self.text, self.pos)
+        return bool(match)
+
+    def skip_space(self) -> None:
+        text = self.text
+        while self.pos < len(text) and text[self.pos].isspace():
+            self.pos += 1
+
+    def open_tag(self) -> None:
+        start = self.pos
+        self.pos += 1
+        self.skip_space()
+        if self.text.startswith('>', self.pos):
+            self.pos += 1
+            self.stack.append(_Frame('element', start, ''))
+            return
+        name = _JSX_NAME.match(self.text, self.pos)
+        if not name:
+            self.fail(start, "'<' solto no meio do JSX")
+        self.pos = name.end()
+        self.stack.append(_Frame('tag', start, name.group()))
+
+    def scan_tag(self) -> None:
+        text = self.text
+        frame = self.stack[-1]
+        self.skip_space()
+        if self.pos >= len(text):
+            return
+        char = text[self.pos]
+        if text.startswith('//', self.pos):
+            newline = text.find('\n', self.pos)
+            self.pos = len(text) if newline < 0 else newline
+        elif text.startswith('/*', self.pos):
+            close = text.find('*/', self.pos + 2)
+            if close < 0:
+                self.fail(self.pos, 'comentário /* nunca fechado')
+            self.pos = close + 2
+        elif text.startswith('/>', self.pos):
+            self.stack.pop()
+            self.pos += 2
+            self.expects_expr = False
+        elif char == '>':
+            frame.kind = 'element'
+            self.pos += 1
+        elif char in '\'"':
+            close = text.find(char, self.pos + 1)
+            if close < 0:
+                self.fail(self.pos, f'valor de atributo em <{frame.name}> nunca fechado')
+            self.pos = close + 1
+        elif char == '{':
+            self.stack.append(_Frame('attr', self.pos))
+            self.pos += 1
+            self.expects_expr = True
+        elif char == '=':
+            self.pos += 1
+        else:
+            word = _JSX_NAME.match(text, self.pos)
+            if not word:
+                self.fail(self.pos, f"caractere inesperado '{char}' dentro de <{frame.name}>")
+            self.pos = word.end()
+
+    def scan_children(self) -> None:
+        text = self.text
+        frame = self.stack[-1]
+        match = _JSX_TEXT.match(text, self.pos)
+        if match:
+            self.pos = match.end()
+            return
+        if text[self.pos] == '}':
+            self.fail(self.pos, f"'}}' solto no texto de <{frame.name}> (use {{'}}'}})")
+        if text[self.pos] == '{':
+            self.stack.append(_Frame('child', self.pos))
+            self.pos += 1
+            self.expects_expr = True
+            return
+
+        # '<': filho novo ou fechamento deste elemento
+        if not re.match(r'<\s*/', text[self.pos:self.pos + 32]):
+            self.open_tag()
+            return
+        start = self.pos
+        self.pos = text.index('/', self.pos) + 1
+        self.skip_space()
+        name = _JSX_NAME.match(text, self.pos)
+        closing = name.group() if name else ''
+        self.pos = name.end() if name else self.pos
+        self.skip_space()
+        if not text.startswith('>', self.pos):
+            self.fail(start, f'tag de fechamento </{closing}> malformada')
+        if closing != frame.name:
+            self.fail(start, f'</{closing}> fecha <{frame.name}> aberto na linha {self.line_of(frame.pos)}')
+        self.pos += 1
+        self.stack.pop()
+        self.expects_expr = False
+
+    def line_of(self, pos: int) -> int:
+        return self.text.count('\n', 0, pos) + 1
+
+
+def check_text(text: str, path: str = '<texto>') -> Issue | None:
+    """Primeiro desbalanceamento do texto, ou None se estiver tudo fechado"""
+    scanner = _Scanner(text)
+    try:
+        scanner.run()
+    except _Imbalance as error:
+        newlines = [m.start() for m in re.finditer('\n', text[:error.pos])]
+        line = len(newlines) + 1
+        column = error.pos - (newlines[-1] + 1 if newlines else 0) + 1
+        return Issue(path, line, column, error.message)
+    return None
+
+
+def check_file(path: str) -> Issue | None:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return check_text(f.read(), path)
+
+
+# ------------------------------------------------------------- em lote --
+def _cache_path(root: Path) -> Path:
+    return root / CACHE_DIR / VERIFY_CACHE_NAME
+
+
+def _load_cache(root: Path) -> dict:
+    try:
+        with open(_cache_path(root), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_cache(root: Path, cache: dict) -> None:
+    path = _cache_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def collect(root: Path, targets: Iterable[str]) -> list[Path]:
+    files = []
+    for target in targets:
+        path = (root / target).resolve()
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix in EXTENSIONS and p.is_file()))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def verify_paths(root: Path, files: Sequence[Path], jobs: int | None = None, use_cache: bool = True) -> dict[Path, Issue | None]:
+    """Verifica vários arquivos; só os que mudaram desde o cache são relidos"""
+    cache = _load_cache(root) if use_cache else {}
+    results: dict[Path, Issue | None] = {}
+    pending: list[tuple[Path, str, os.stat_result]] = []
+    for path in files:
+        stat = path.stat()
+        key = Path(os.path.relpath(path, root)).as_posix()
+        cached = cache.get(key)
+        if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+            results[path] = Issue(**cached['issue']) if cached['issue'] else None
+        else:
+            pending.append((path, key, stat))
+
+    if len(pending) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs or min(len(pending), os.cpu_count() or 1)) as pool:
+            issues = list(pool.map(check_file, [str(path) for path, _, _ in pending]))
+    else:
+        issues = [check_file(str(path)) for path, _, _ in pending]
+
+    for (path, key, stat), issue in zip(pending, issues):
+        results[path] = issue
+        cache[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'issue': asdict(issue) if issue else None}
+    if pending and use_cache:
+        _save_cache(root, cache)
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m codemods.verify', description='Confere chaves, parênteses e tags JSX')
+    parser.add_argument('paths', nargs='*', default=list(DEFAULT_TARGETS), help='Arquivos ou pastas (padrão: src/components)')
+    parser.add_argument('--root', default='.', help='Raiz do projeto (padrão: diretório atual)')
+    parser.add_argument('--jobs', type=int, default=None, help='Número de processos')
+    parser.add_argument('--no-cache', action='store_true', help='Ignorar o cache e verificar tudo')
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).resolve()
+    files = collect(root, args.paths)
+    if not files:
+        print("⚠️ Nenhum arquivo .ts/.tsx encontrado")
+        return 1
+
+    results = verify_paths(root, files, jobs=args.jobs, use_cache=not args.no_cache)
+    failed = 0
+    for path, issue in results.items():
+        name = os.path.relpath(path, root)
+        if issue:
+            failed += 1
+            print(f"❌ {name}:{issue.line}:{issue.column} - {issue.message}")
+        else:
+            print(f"✓ {name}")
+    print(f"\n{len(results) - failed}/{len(results)} arquivo(s) balanceado(s)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo watch: reaplica os codemods quando um arquivo alvo é regenerado
+
+Fica observando os alvos dos specs (BookingPage.tsx, LoginPage.tsx, ...)
+com inotify (via ctypes, sem dependências) ou, fora do Linux, por polling
+de tamanho/mtime. Rajadas de gravações do editor são agrupadas (debounce).
+
+A cada mudança o novo índice de hashes de linha é comparado com o último
+conhecido; só os specs com alguma âncora nas linhas alteradas são
+reaplicados, e o resultado passa pelo verificador estrutural. A gravação
+feita pelo próprio watch é reconhecida pelo hash e não dispara outro ciclo.
+
+    python -m codemods.watch                  # todos os specs
+    python -m codemods.watch fix_calendar_auto_open --poll
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Sequence
+
+from .lineindex import AnchorShape, LineIndex, detect_newline
+from .manifest import Manifest, content_hash
+from .relocate import DEFAULT_THRESHOLD
+from .runner import FileReport, group_by_target, patch_file
+from .spec import Codemod, SpecError, load_specs
+from .verify import EXTENSIONS, check_text
+from .writer import read_source
+
+# Silêncio exigido depois da última gravação antes de reaplicar
+DEFAULT_DEBOUNCE = 0.02
+DEFAULT_POLL_INTERVAL = 0.05
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Observa os arquivos comparando (tamanho, mtime) a cada intervalo"""
+
+    def __init__(self, paths: Sequence[Path], interval: float = DEFAULT_POLL_INTERVAL):
+        self.paths = list(paths)
+        self.interval = interval
+        self.stats = {path: self._stat(path) for path in self.paths}
+
+    @staticmethod
+    def _stat(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path in self.paths:
+                current = self._stat(path)
+                if current != self.stats[path]:
+                    self.stats[path] = current
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Observa os diretórios dos alvos com inotify (pega também o rename dos editores)"""
+
+    def __init__(self, paths: Sequence[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 falhou')
+        self.names: dict[int, dict[str, Path]] = {}
+        for directory in sorted({path.parent for path in paths}):
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(error, f'inotify_add_watch falhou em {directory}')
+            self.names[wd] = {path.name: path for path in paths if path.parent == directory}
+        self.paths = list(paths)
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: set[Path] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    # Fila do kernel estourou: na dúvida, todos mudaram
+                    return set(self.paths)
+                path = self.names.get(wd, {}).get(os.fsdecode(name))
+                if path:
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(paths: Sequence[Path], polling: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass  # Sem inotify (container restrito, limite de watches): cai no polling
+    return PollingWatcher(paths, interval)
+
+
+@dataclass
+class FileState:
+    """Último conteúdo conhecido de um alvo (depois do patch)"""
+
+    digest: str
+    hashes: list[int]
+
+
+@dataclass
+class AnchorProfile:
+    """O que basta saber das âncoras de um codemod para decidir se uma mudança o afeta"""
+
+    height: int
+    # Hashes das linhas internas das âncoras (linhas inteiras; triviais como `}` ficam de fora)
+    line_hashes: frozenset[int]
+
+    @classmethod
+    def of(cls, codemod: Codemod) -> 'AnchorProfile':
+        height = 1
+        hashes = set()
+        for edit in codemod.edits:
+            shape = AnchorShape.from_text(edit.anchor)
+            height = max(height, len(shape.lines))
+            for tokens, digest in list(zip(shape.lines, shape.hashes))[1:-1]:
+                if len(tokens) > 1:
+                    hashes.add(digest)
+        return cls(height, frozenset(hashes))
+
+
+def _unique_pairs(old: Sequence[int], new: Sequence[int]) -> list[tuple[int, int]]:
+    """Pares (linha antiga, linha nova) de hashes únicos nos dois lados, em ordem crescente
+
+    É o esqueleto do patience diff: linhas que aparecem uma vez só em cada
+    versão e na mesma ordem relativa (maior subsequência crescente).
+    """
+    seen_old: dict[int, int] = {}
+    for i, digest in enumerate(old):
+        seen_old[digest] = -1 if digest in seen_old else i
+    seen_new: dict[int, int] = {}
+    for j, digest in enumerate(new):
+        seen_new[digest] = -1 if digest in seen_new else j
+    pairs = [(seen_old[d], j) for d, j in seen_new.items() if j >= 0 and seen_old.get(d, -1) >= 0]
+    pairs.sort(key=lambda pair: pair[1])
+
+    # Maior subsequência crescente em i (paciência com bisect)
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous = [-1] * len(pairs)
+    for k, (i, _) in enumerate(pairs):
+        pos = bisect_left(tails, i)
+        if pos == len(tails):
+            tails.append(i)
+            tail_index.append(k)
+        else:
+            tails[pos] = i
+            tail_index[pos] = k
+        previous[k] = tail_index[pos - 1] if pos else -1
+    chain = []
+    k = tail_index[-1] if tail_index else -1
+    while k >= 0:
+        chain.append(pairs[k])
+        k = previous[k]
+    return chain[::-1]
+
+
+def changed_ranges(old: Sequence[int], new: Sequence[int], offset: int = 0) -> list[tuple[int, int]]:
+    """Faixas [início, fim) de linhas do texto novo que diferem do antigo
+
+    Corta prefixo e sufixo comuns e usa as linhas únicas dos dois lados como
+    âncoras (patience diff); cada trecho entre âncoras é resolvido do mesmo
+    jeito. Custo ~linear, mesmo com mudanças espalhadas pelo arquivo.
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+        suffix += 1
+    old = old[prefix:len(old) - suffix]
+    new = new[prefix:len(new) - suffix]
+    offset += prefix
+    if not old and not new:
+        return []
+    if not old or not new:
+        return [(offset, offset + len(new))]
+
+    pairs = _unique_pairs(old, new)
+    if not pairs:
+        return [(offset, offset + len(new))]
+    ranges = []
+    last_i = last_j = 0
+    for i, j in pairs + [(len(old), len(new))]:
+        ranges.extend(changed_ranges(old[last_i:i], new[last_j:j], offset + last_j))
+        last_i, last_j = i + 1, j + 1
+    return ranges
+
+
+def affected(codemod: Codemod, anchors: AnchorProfile, text: str, index: LineIndex, ranges: Sequence[tuple[int, int]]) -> bool:
+    """O codemod tem alguma âncora (exata ou normalizada) tocando as linhas alteradas?"""
+    if not len(index):
+        return False
+    matcher = codemod.matcher.crlf if detect_newline(text) == '\r\n' else codemod.matcher
+    wanted = len(matcher.edits)
+    for first, last in ranges:
+        lo = max(0, first - anchors.height)
+        hi = min(len(index), last + anchors.height)
+        if lo >= hi:
+            continue
+        window = text[index.starts[lo]:index.ends[hi - 1]]
+        if any(number < wanted for _, number in matcher.automaton.finditer(window)):
+            return True
+        if any(index.hashes[line] in anchors.line_hashes for line in range(first, min(last, len(index)))):
+            return True
+    return False
+
+
+@dataclass
+class Cycle:
+    """Resultado de uma reação a mudanças num arquivo"""
+
+    path: Path
+    codemods: list[str] = field(default_factory=list)
+    report: FileReport | None = None
+    issue: str = ''
+    elapsed: float = 0.0
+
+
+class Watch:
+    def __init__(
+        self,
+        root: Path,
+        codemods: Sequence[Codemod],
+        relocate_threshold: float | None = None,
+        manifest: Manifest | None = None,
+    ):
+        self.root = root
+        self.groups = group_by_target(root, codemods)
+        self.anchors = {codemod.name: AnchorProfile.of(codemod) for codemod in codemods}
+        self.relocate_threshold = relocate_threshold
+        self.manifest = manifest
+        self.states: dict[Path, FileState] = {}
+
+    def _remember(self, path: Path) -> tuple[str, LineIndex] | None:
+        try:
+            with read_source(path) as source:
+                digest = content_hash(source.buffer)
+                index = LineIndex(source.text)
+        except FileNotFoundError:
+            self.states.pop(path, None)
+            return None
+        self.states[path] = FileState(digest, index.hashes)
+        return source.text, index
+
+    def _patch(self, path: Path, codemods: Sequence[Codemod]) -> FileReport:
+        entry = self.manifest.get(path) if self.manifest else None
+        report = patch_file(path, codemods, entry=entry, relocate_threshold=self.relocate_threshold)
+        if report.entry and self.manifest is not None:
+            self.manifest.put(path, report.entry)
+            self.manifest.save()
+        return report
+
+    def start(self) -> list[Cycle]:
+        """Passada inicial: aplica todos os codemods e guarda o estado de cada alvo"""
+        cycles = []
+        for path, codemods in self.groups.items():
+            started = time.perf_counter()
+            cycle = Cycle(path, [codemod.name for codemod in codemods])
+            if path.exists():
+                cycle.report = self._patch(path, codemods)
+                self._verify(cycle)
+            cycle.elapsed = time.perf_counter() - started
+            cycles.append(cycle)
+        return cycles
+
+    def _verify(self, cycle: Cycle) -> None:
+        remembered = self._remember(cycle.path)
+        report = cycle.report
+        if report and report.changed and not report.error:
+            cycle.issue = report.issue  # patch_file já verificou o que gravou
+        elif remembered and cycle.path.suffix in EXTENSIONS:
+            issue = check_text(remembered[0], str(cycle.path))
+            cycle.issue = f'{issue.line}:{issue.column} - {issue.message}' if issue else ''
+
+    def react(self, path: Path) -> Cycle | None:
+        """Reaplica só os codemods com âncoras nas linhas que mudaram"""
+        started = time.perf_counter()
+        previous = self.states.get(path)
+        try:
+            with read_source(path) as source:
+                digest = content_hash(source.buffer)
+                if previous and previous.digest == digest:
+                    return None  # Nossa própria gravação (ou só um touch)
+                text = source.text
+        except FileNotFoundError:
+            return None
+
+        index = LineIndex(text)
+        ranges = changed_ranges(previous.hashes, index.hashes) if previous else [(0, len(index))]
+        codemods = [
+            codemod for codemod in self.groups[path]
+            if affected(codemod, self.anchors[codemod.name], text, index, ranges)
+        ]
+        cycle = Cycle(path, [codemod.name for codemod in codemods])
+        if codemods:
+            cycle.report = self._patch(path, codemods)
+            self._verify(cycle)
+        else:
+            self.states[path] = FileState(digest, index.hashes)
+            if path.suffix in EXTENSIONS:
+                issue = check_text(text, str(path))
+                cycle.issue = f'{issue.line}:{issue.column} - {issue.message}' if issue else ''
+        cycle.elapsed = time.perf_counter() - started
+        return cycle
+
+    def run(
+        self,
+        watcher: PollingWatcher | InotifyWatcher,
+        debounce: float = DEFAULT_DEBOUNCE,
+        on_cycle: Callable[[Cycle], None] | None = None,
+        max_cycles: int | None = None,
+    ) -> None:
+        done = 0
+        try:
+            while max_cycles is None or done < max_cycles:
+                pending = watcher.wait(None)
+                # Debounce: espera a rajada de gravações terminar
+                while more := watcher.wait(debounce):
+                    pending |= more
+                for path in sorted(pending):
+                    cycle = self.react(path)
+                    if cycle is not None:
+                        done += 1
+                        if on_cycle:
+                            on_cycle(cycle)
+        finally:
+            watcher.close()
+
+
+def _print_cycle(root: Path, cycle: Cycle) -> None:
+    name = os.path.relpath(cycle.path, root)
+    elapsed = f'{cycle.elapsed * 1000:.0f} ms'
+    report = cycle.report
+    if report is None:
+        print(f"👀 {name}: mudança fora das âncoras, nada a reaplicar ({elapsed})")
+    else:
+        print(f"📄 {name} ({', '.join(cycle.codemods)}; {elapsed})")
+        for message in report.messages:
+            print(f"   {message}")
+        for pid in report.drift:
+            print(f"   ⚠️ Drift: {pid} não está aplicado nem pode ser aplicado")
+        if report.error:
+            print(f"   ❌ Erro: {report.error}")
+        elif report.changed:
+            print("   💾 Arquivo salvo")
+    if cycle.issue:
+        print(f"   ⚠️ Desbalanceado: {cycle.issue}")
+    sys.stdout.flush()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m codemods.watch', description='Reaplica os codemods quando os alvos mudam')
+    parser.add_argument('names', nargs='*', help='Observar só estes codemods (ex.: fix_calendar_auto_open)')
+    parser.add_argument('--root', default='.', help='Raiz do projeto (padrão: diretório atual)')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE * 1000, metavar='MS', help='Silêncio antes de reaplicar')
+    parser.add_argument(
+        '--poll',
+        nargs='?',
+        type=float,
+        const=DEFAULT_POLL_INTERVAL * 1000,
+        default=None,
+        metavar='MS',
+        help='Usar polling em vez de inotify (intervalo em ms)',
+    )
+    parser.add_argument('--no-manifest', action='store_true', help='Não ler nem atualizar o manifesto')
+    parser.add_argument(
+        '--relocate',
+        nargs='?',
+        type=float,
+        const=DEFAULT_THRESHOLD,
+        default=None,
+        metavar='LIMITE',
+        help=f'Aplicar âncoras relocadas com confiança >= LIMITE (padrão {DEFAULT_THRESHOLD})',
+    )
+    args = parser.parse_args(argv)
+
+    root = Path(args.root).resolve()
+    try:
+        codemods = [codemod for codemod in load_specs(root).codemods if codemod.edits]
+    except SpecError as e:
+        print(f"❌ Spec inválido: {e}")
+        return 1
+    if args.names:
+        wanted = {name.removesuffix('.py') for name in args.names}
+        codemods = [c for c in codemods if c.name in wanted]
+    if not codemods:
+        print("⚠️ Nenhum codemod encontrado")
+        return 1
+
+    watch = Watch(root, codemods, args.relocate, None if args.no_manifest else Manifest.load(root))
+    for cycle in watch.start():
+        _print_cycle(root, cycle)
+    watcher = make_watcher(list(watch.groups), args.poll is not None, (args.poll or DEFAULT_POLL_INTERVAL * 1000) / 1000)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"\n👀 Observando {len(watch.groups)} arquivo(s) ({kind}). Ctrl+C para sair.\n")
+    try:
+        watch.run(watcher, debounce=args.debounce / 1000, on_cycle=lambda cycle: _print_cycle(root, cycle))
+    except KeyboardInterrupt:
+        print("\n👋 Encerrado")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
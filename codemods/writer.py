@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura e gravação atômica dos arquivos alvo
+
+O arquivo é lido uma vez (via mmap quando é grande), decodificado com a
+codificação original (BOM incluso) e a saída é gravada como uma sequência
+de fatias do buffer original intercaladas com as substituições: nenhuma
+cópia inteira do resultado é montada. A gravação vai para um arquivo
+temporário no mesmo diretório, recebe fsync e só então substitui o original
+com os.replace, então uma queda no meio nunca deixa um componente truncado.
+
+O mapeamento é fechado antes do os.replace (o Windows não troca um arquivo
+mapeado). Arquivos antigos em cp1252/latin-1 continuam nessa codificação:
+uma substituição com caractere que ela não representa vira EncodingError
+antes de qualquer byte ser gravado.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+# A partir deste tamanho o arquivo é mapeado em vez de copiado para a memória
+MMAP_THRESHOLD = 1 << 20
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+class EncodingError(UnicodeError):
+    """Texto novo com caractere que a codificação original do arquivo não representa"""
+
+
+def unencodable(text: str, encoding: str) -> str | None:
+    """Primeiro caractere de `text` que `encoding` não representa, ou None"""
+    try:
+        text.encode(encoding)
+    except UnicodeEncodeError as e:
+        return text[e.start]
+    return None
+
+
+def _encoding_error(char: str, encoding: str, where: str) -> EncodingError:
+    return EncodingError(f'{char!r} (U+{ord(char):04X}) não existe em {encoding} ({where}); nada foi gravado')
+
+
+@dataclass
+class Source:
+    """Conteúdo original de um arquivo: buffer bruto, texto e codificação"""
+
+    path: Path
+    buffer: bytes | mmap.mmap
+    text: str
+    encoding: str
+    bom: bytes
+
+    @property
+    def data(self) -> memoryview:
+        """Bytes do conteúdo, sem o BOM"""
+        return memoryview(self.buffer)[len(self.bom):]
+
+    def close(self) -> None:
+        # Pode ser chamado de novo (ex.: pelo with depois da gravação)
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self) -> 'Source':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _map(path: Path) -> bytes | mmap.mmap:
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def read_source(path: Path) -> Source:
+    buffer = _map(path)
+    head = bytes(buffer[:4])
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            break
+    else:
+        bom, encoding = b'', 'utf-8'
+
+    view = memoryview(buffer)[len(bom):]
+    try:
+        text = codecs.decode(view, encoding)
+    except UnicodeDecodeError:
+        # Arquivos antigos salvos pelo Windows em ANSI
+        encoding = 'cp1252'
+        try:
+            text = codecs.decode(view, encoding)
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+            text = codecs.decode(view, encoding)
+    finally:
+        view.release()
+    return Source(Path(path), buffer, text, encoding, bom)
+
+
+def _chunks(source: Source, spans: Iterable[tuple[int, int, str]]) -> Iterable[bytes | memoryview]:
+    """Fatias do buffer original intercaladas com as substituições já codificadas"""
+    data = source.data
+    # Texto com um byte por caractere: posições no texto valem no buffer
+    single_byte = len(data) == len(source.text)
+    char_cursor = 0
+    byte_cursor = 0
+    for start, end, replacement in spans:
+        char = unencodable(replacement, source.encoding)
+        if char:
+            raise _encoding_error(char, source.encoding, f'substituição na posição {start}')
+        if single_byte:
+            gap = start - char_cursor
+            removed = end - start
+        else:
+            gap = len(source.text[char_cursor:start].encode(source.encoding))
+            removed = len(source.text[start:end].encode(source.encoding))
+        yield data[byte_cursor:byte_cursor + gap]
+        yield replacement.encode(source.encoding)
+        byte_cursor += gap + removed
+        char_cursor = end
+    yield data[byte_cursor:]
+
+
+def write_atomic(
+    path: Path,
+    chunks: Iterable[bytes | memoryview],
+    mode_from: Path | None = None,
+    release: Callable[[], None] | None = None,
+) -> str:
+    """Grava os pedaços num temporário, faz fsync e troca pelo destino atomicamente
+
+    `release` roda depois de o temporário estar completo e antes do
+    os.replace: é onde o mapeamento do original é fechado. Retorna o sha256
+    do que foi gravado (calculado durante a escrita).
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+            chunk = None  # Solta a última fatia do buffer antes do release
+            f.flush()
+            os.fsync(f.fileno())
+        if release:
+            release()
+        if (mode_from or path).exists():
+            shutil.copymode(mode_from or path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+    return digest.hexdigest()
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_patched(source: Source, spans: list[tuple[int, int, str]]) -> str:
+    """Grava o original com os trechos trocados, sem montar o resultado inteiro"""
+    return write_atomic(source.path, _with_bom(source, _chunks(source, spans)), release=source.close)
+
+
+def write_text(source: Source, text: str, chunk_size: int = MMAP_THRESHOLD) -> str:
+    """Grava um texto já montado, codificando aos poucos na codificação original"""
+    return write_atomic(source.path, _with_bom(source, _encode(source, text, chunk_size)), release=source.close)
+
+
+def _encode(source: Source, text: str, chunk_size: int) -> Iterable[bytes]:
+    encoder = codecs.getincrementalencoder(source.encoding)()
+    for i in range(0, len(text), chunk_size):
+        try:
+            yield encoder.encode(text[i:i + chunk_size])
+        except UnicodeEncodeError as e:
+            pos = i + e.start
+            line = text.count('\n', 0, pos) + 1
+            raise _encoding_error(text[pos], source.encoding, f'linha {line}') from None
+
+
+def _with_bom(source: Source, chunks: Iterable[bytes | memoryview]) -> Iterable[bytes | memoryview]:
+    if source.bom:
+        yield source.bom
+    yield from chunks
@@ -25,9 +25,11 @@ USING (true);
 SELECT * FROM pg_policies WHERE tablename = 'nail_designers';
 
 -- Add policy to allow anyone to create a new designer account
+DROP POLICY IF EXISTS "Anyone can create designer account" ON public.nail_designers;
 CREATE POLICY "Anyone can create designer account" ON public.nail_designers FOR INSERT WITH CHECK (true);
 
 -- Optional: Add policy to allow anyone to view designer profiles (for booking purposes)
+DROP POLICY IF EXISTS "Anyone can view designer profiles" ON public.nail_designers;
 CREATE POLICY "Anyone can view designer profiles" ON public.nail_designers FOR SELECT USING (true);
 
 -- Note: The existing policies for UPDATE are kept as they are (designers can only update their own profile)
@@ -355,10 +355,13 @@ const BookingPage: React.FC<BookingPageProps> = ({ designer: initialDesigner, on
       // Combinar e remover duplicatas, priorizando Supabase
       const allDesigners = [...(supabaseDesigners || []), ...localDesigners];
 
-      // Remover duplicatas baseado no ID
-      const uniqueDesigners = allDesigners.filter((designer, index, self) =>
-        index === self.findIndex(d => d.id === designer.id)
-      );
+      // Remover duplicatas baseado no ID (primeira ocorrência vence, numa passada)
+      const seenIds = new Set<string>();
+      const uniqueDesigners = allDesigners.filter(designer => {
+        if (seenIds.has(designer.id)) return false;
+        seenIds.add(designer.id);
+        return true;
+      });
 
       console.log('🔄 Total de designers combinados (únicos):', uniqueDesigners?.length || 0);
 
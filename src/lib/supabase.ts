@@ -20,6 +20,7 @@ export interface Database {
           email: string
           password: string
           phone: string
+          phone_e164?: string | null // Preenchido pelo trigger de add-phone-e164-columns.sql
           pix_key: string | null
           is_active: boolean
           created_at: string
@@ -179,6 +180,7 @@ export interface Database {
           email: string
           password: string
           phone: string
+          phone_e164?: string | null // Preenchido pelo trigger de add-phone-e164-columns.sql
           is_active: boolean
           created_at: string
           updated_at: string
@@ -0,0 +1,110 @@
+// Utilitários para telefone canônico (E.164) e cache do login por telefone
+//
+// As regras de toE164 são as mesmas de phone_to_e164 (add-phone-e164-columns.sql)
+// e de studio/phones.py: mudou uma, mude as três.
+
+const COUNTRY_CODE = '55';
+
+/**
+ * Converte qualquer forma de um telefone brasileiro para E.164
+ * Exemplo: "(11) 99999-9999" -> "+5511999999999"; "(11) 9999-9999" (celular antigo) -> "+5511999999999"
+ * Números de outros países só são aceitos com + explícito. Retorna null se não der para saber qual é.
+ */
+export function toE164(raw: string | null | undefined): string | null {
+  if (!raw) return null;
+  const text = raw.trim();
+  let digits = text.replace(/\D/g, '');
+  let international = text.startsWith('+');
+
+  if (!international && digits.startsWith('00')) {
+    digits = digits.slice(2);
+    international = true;
+  }
+
+  if (international) {
+    if (!digits.startsWith(COUNTRY_CODE)) {
+      return digits.length >= 8 && digits.length <= 15 ? `+${digits}` : null;
+    }
+    digits = digits.slice(COUNTRY_CODE.length);
+  } else if (digits.startsWith('0')) {
+    digits = digits.slice(1); // Prefixo de longa distância: 0 DDD número ou 0 XX DDD número
+    if (digits.length === 12 || digits.length === 13) digits = digits.slice(2); // Código da operadora
+  } else if ((digits.length === 12 || digits.length === 13) && digits.startsWith(COUNTRY_CODE)) {
+    digits = digits.slice(COUNTRY_CODE.length); // 55 sem o +, copiado da agenda
+  }
+
+  if (digits.length === 10 && '6789'.includes(digits[2])) {
+    digits = `${digits.slice(0, 2)}9${digits.slice(2)}`;
+  }
+  if (!/^[1-9][1-9]\d{8,9}$/.test(digits) || (digits.length === 11 && digits[2] !== '9')) {
+    return null;
+  }
+  return `+${COUNTRY_CODE}${digits}`;
+}
+
+/**
+ * Formas em que o mesmo número costuma estar gravado em `phone`
+ * Usado enquanto a coluna phone_e164 ainda não existe no banco
+ */
+export function phoneVariants(e164: string): string[] {
+  if (!e164.startsWith(`+${COUNTRY_CODE}`)) return [e164, e164.slice(1)];
+  const national = e164.slice(COUNTRY_CODE.length + 1);
+  const area = national.slice(0, 2);
+  const number = national.slice(2);
+  const numbers = number.length === 9 ? [number, number.slice(1)] : [number];
+  const found = new Set<string>();
+  for (const item of numbers) {
+    const head = item.slice(0, -4);
+    const tail = item.slice(-4);
+    [
+      `${area}${item}`, `(${area}) ${head}-${tail}`, `(${area})${head}-${tail}`, `${area} ${head}-${tail}`,
+      `${area} ${item}`, `0${area}${item}`, `+${COUNTRY_CODE}${area}${item}`, `${COUNTRY_CODE}${area}${item}`,
+      `+${COUNTRY_CODE} ${area} ${head}-${tail}`, `+${COUNTRY_CODE} (${area}) ${head}-${tail}`,
+    ].forEach(form => found.add(form));
+  }
+  return [...found];
+}
+
+/**
+ * Cache com validade por entrada e descarte do menos usado (LRU)
+ * O Map mantém a ordem de inserção: reinserir uma chave a move para o fim
+ */
+export class TtlCache<T> {
+  private entries = new Map<string, { expires: number; value: T }>();
+
+  constructor(private maxSize = 256, private ttlMs = 5 * 60 * 1000) {}
+
+  has(key: string): boolean {
+    const found = this.entries.get(key);
+    if (!found) return false;
+    if (found.expires <= Date.now()) {
+      this.entries.delete(key);
+      return false;
+    }
+    return true;
+  }
+
+  get(key: string): T | undefined {
+    if (!this.has(key)) return undefined;
+    const found = this.entries.get(key)!;
+    this.entries.delete(key);
+    this.entries.set(key, found);
+    return found.value;
+  }
+
+  set(key: string, value: T, ttlMs = this.ttlMs): void {
+    this.entries.delete(key);
+    this.entries.set(key, { expires: Date.now() + ttlMs, value });
+    while (this.entries.size > this.maxSize) {
+      this.entries.delete(this.entries.keys().next().value as string);
+    }
+  }
+
+  delete(key: string): void {
+    this.entries.delete(key);
+  }
+
+  clear(): void {
+    this.entries.clear();
+  }
+}
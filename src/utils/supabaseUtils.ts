@@ -1,5 +1,6 @@
 import { supabase } from '../lib/supabase'
 import type { Database } from '../lib/supabase'
+import { phoneVariants, toE164, TtlCache } from './phoneUtils'
 
 // Types
 type NailDesigner = Database['public']['Tables']['nail_designers']['Row']
@@ -17,6 +18,48 @@ type Client = {
   updated_at: string
 }
 
+// Números sem cadastro (chave: tabela + E.164), por pouco tempo: quem errou o
+// número e tenta de novo em outro formato não vai ao banco. Quem é encontrado
+// não entra no cache: senha e is_active vêm do banco a cada login, para uma
+// troca de senha ou um bloqueio valer na hora. Qualquer escrita em
+// nail_designers/clients limpa tudo (um cadastro novo entra logo).
+const PHONE_MISS_TTL_MS = 15 * 1000
+const phoneMissCache = new TtlCache<true>(256, PHONE_MISS_TTL_MS)
+// Vira false se add-phone-e164-columns.sql ainda não rodou no banco
+let phoneE164Available = true
+
+async function findByPhone(table: 'nail_designers' | 'clients', phone: string): Promise<any | null> {
+  const key = toE164(phone)
+  if (!key) {
+    // Formato desconhecido: comparação exata, como antes
+    const { data, error } = await supabase.from(table).select('*').eq('phone', phone).limit(1)
+    if (error) {
+      console.error(`Error fetching ${table} by phone:`, error)
+      return null
+    }
+    return data?.[0] ?? null
+  }
+
+  const cacheKey = `${table}:${key}`
+  if (phoneMissCache.has(cacheKey)) return null
+
+  let result = phoneE164Available
+    ? await supabase.from(table).select('*').eq('phone_e164', key).order('created_at').limit(1)
+    : null
+  if (!result || result.error?.code === '42703') {
+    phoneE164Available = false
+    result = await supabase.from(table).select('*').in('phone', phoneVariants(key)).order('created_at').limit(1)
+  }
+  if (result.error) {
+    console.error(`Error fetching ${table} by phone:`, result.error)
+    return null
+  }
+
+  const row = result.data?.[0] ?? null
+  if (!row) phoneMissCache.set(cacheKey, true)
+  return row
+}
+
 // Nail Designers CRUD Operations
 export const designerService = {
   // Get all designers
@@ -73,6 +116,7 @@ export const designerService = {
       .insert(designer)
       .select()
       .single()
+    phoneMissCache.clear()
     
     if (error) {
       console.error('Error creating designer:', error)
@@ -91,6 +135,7 @@ export const designerService = {
       .from('nail_designers')
       .update(updates)
       .eq('id', id)
+    phoneMissCache.clear()
     
     if (updateError) {
       console.error('❌ Erro ao atualizar designer:', updateError);
@@ -121,6 +166,7 @@ export const designerService = {
       .from('nail_designers')
       .delete()
       .eq('id', id)
+    phoneMissCache.clear()
     
     if (error) {
       console.error('Error deleting designer:', error)
@@ -390,20 +436,9 @@ export const clientService = {
     return data
   },
 
-  // Get client by phone
+  // Get client by phone (qualquer formato: busca pelo E.164, com cache)
   async getByPhone(phone: string): Promise<Client | null> {
-    const { data, error } = await supabase
-      .from('clients')
-      .select('*')
-      .eq('phone', phone)
-      .single()
-    
-    if (error) {
-      console.error('Error fetching client by phone:', error)
-      return null
-    }
-    
-    return data
+    return findByPhone('clients', phone)
   },
 
   // Get client by email
@@ -429,6 +464,7 @@ export const clientService = {
       .insert(client)
       .select()
       .single()
+    phoneMissCache.clear()
     
     if (error) {
       console.error('Error creating client:', error)
@@ -446,6 +482,7 @@ export const clientService = {
       .eq('id', id)
       .select()
       .single()
+    phoneMissCache.clear()
     
     if (error) {
       console.error('Error updating client:', error)
@@ -461,6 +498,7 @@ export const clientService = {
       .from('clients')
       .delete()
       .eq('id', id)
+    phoneMissCache.clear()
     
     if (error) {
       console.error('Error deleting client:', error)
@@ -644,16 +682,8 @@ export const updateNailDesigner = async (id: string, updates: any) => {
 };
 export const deleteNailDesigner = (id: string) => designerService.delete(id);
 export const getNailDesignerByPhone = async (phone: string) => {
-  const { data, error } = await supabase
-    .from('nail_designers')
-    .select('*')
-    .eq('phone', phone)
-    .single();
-
-  if (error) {
-    console.error('Error fetching designer by phone:', error);
-    return null;
-  }
+  const data = await findByPhone('nail_designers', phone);
+  if (!data) return null;
 
   // Converter de snake_case (Supabase) para camelCase (App)
   return {
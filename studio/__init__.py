@@ -0,0 +1,7 @@
+"""
+Ferramentas de dados do studio sobre as tabelas do Supabase
+
+Trabalham com as linhas como o PostgREST devolve (ou exportadas em JSON) e
+reproduzem as regras de agendamento do frontend em Python. Cada módulo é
+também um comando: python -m studio.<módulo> --help
+"""
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Checagem de conflitos de agendamento em lote, considerando a duração
+
+`appointmentService.checkTimeConflict` (src/utils/supabaseUtils.ts) faz uma
+consulta por (designer, data, horário) e só compara o horário de início:
+um Alongamento de 2h30 às 13:00 não conflita com um horário às 14:00. Aqui
+os agendamentos pending/confirmed de um designer num intervalo de datas são
+carregados uma vez e viram, por dia, uma lista de intervalos
+[início, início + duração) ordenada pelo início, com o maior fim acumulado
+ao lado. Cada consulta é um bisect mais a varredura só dos intervalos que
+podem alcançar o candidato, então milhares de candidatos saem da memória.
+
+O mesmo índice faz a varredura de integridade: todos os pares de
+agendamentos que se sobrepõem.
+
+Uso:
+    python -m studio.conflicts dump.json [--designer <id>] [--from D] [--to D]
+    python -m studio.conflicts --supabase --designer <id> --from D --to D
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from .postgrest import PostgrestClient, PostgrestError
+from .tables import BOOKED, Row, ServiceCatalog, format_time, load_dump, parse_date, parse_time
+
+# Teto de linhas por resposta do PostgREST no Supabase
+PAGE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Booking:
+    id: str
+    start: int
+    end: int
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """Horário que se quer reservar (ou um agendamento existente sendo remarcado)"""
+
+    designer_id: str
+    date: date
+    time: str
+    duration: int
+    # Agendamento que está sendo remarcado: não conflita consigo mesmo
+    exclude: str | None = None
+
+
+@dataclass(frozen=True)
+class Conflict:
+    designer_id: str
+    date: date
+    start: int
+    end: int
+    # Id do candidato (ou do agendamento, na varredura) e dos que ele sobrepõe
+    subject: str | None
+    conflicting: tuple[str, ...]
+
+    def describe(self) -> str:
+        who = self.subject or 'candidato'
+        return (
+            f"{self.date.isoformat()} {format_time(self.start)}-{format_time(self.end)} "
+            f"({who}) × {', '.join(self.conflicting)}"
+        )
+
+
+@dataclass
+class DayIntervals:
+    """Intervalos de um dia ordenados pelo início, com o maior fim até cada posição"""
+
+    bookings: list[Booking] = field(default_factory=list)
+    starts: list[int] = field(default_factory=list)
+    reach: list[int] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, bookings: Iterable[Booking]) -> 'DayIntervals':
+        ordered = sorted(bookings, key=lambda booking: (booking.start, booking.end))
+        reach = []
+        furthest = -1
+        for booking in ordered:
+            furthest = max(furthest, booking.end)
+            reach.append(furthest)
+        return cls(ordered, [booking.start for booking in ordered], reach)
+
+    def overlapping(self, start: int, end: int) -> Iterator[Booking]:
+        """Agendamentos com início < end e fim > start, do último para o primeiro"""
+        i = bisect_left(self.starts, end) - 1
+        # reach[i] <= start: nada antes de i chega até o candidato
+        while i >= 0 and self.reach[i] > start:
+            booking = self.bookings[i]
+            if booking.end > start:
+                yield booking
+            i -= 1
+
+
+class ConflictIndex:
+    """Agendamentos ativos indexados por (designer, data)"""
+
+    def __init__(self, days: dict[tuple[str, date], DayIntervals] | None = None):
+        self.days = days or {}
+
+    @classmethod
+    def from_rows(cls, appointments: Iterable[Row], services: ServiceCatalog | Iterable[Row] = ()) -> 'ConflictIndex':
+        catalog = services if isinstance(services, ServiceCatalog) else ServiceCatalog.from_rows(services)
+        grouped: dict[tuple[str, date], list[Booking]] = {}
+        for row in appointments:
+            if str(row.get('status') or 'pending') not in BOOKED or not row.get('date') or not row.get('time'):
+                continue
+            designer = str(row.get('designer_id'))
+            start = parse_time(row['time'])
+            end = start + catalog.duration(designer, row.get('service'))
+            grouped.setdefault((designer, parse_date(row['date'])), []).append(Booking(str(row.get('id')), start, end))
+        return cls({key: DayIntervals.build(bookings) for key, bookings in grouped.items()})
+
+    @classmethod
+    def fetch(
+        cls,
+        client: PostgrestClient,
+        designer_id: str,
+        start: date,
+        end: date,
+        services: ServiceCatalog | None = None,
+        page_size: int = PAGE_SIZE,
+    ) -> 'ConflictIndex':
+        """Uma consulta por página para o intervalo inteiro, em vez de uma por horário
+
+        O PostgREST do Supabase corta cada resposta em 1000 linhas, então as
+        páginas seguem por keyset em (date, id), como em Snapshot.sync_table.
+        """
+        window = [
+            ('designer_id', f'eq.{designer_id}'),
+            ('date', f'gte.{start.isoformat()}'),
+            ('date', f'lte.{end.isoformat()}'),
+            ('status', f'in.({",".join(sorted(BOOKED))})'),
+        ]
+        rows: list[Row] = []
+        while True:
+            filters = list(window)
+            if rows:
+                last_date, last_id = rows[-1]['date'], rows[-1]['id']
+                filters.append(('or', f'(date.gt.{last_date},and(date.eq.{last_date},id.gt.{last_id}))'))
+            page = client.select(
+                'appointments', filters, columns='id,designer_id,date,time,service,status',
+                order='date.asc,id.asc', limit=page_size,
+            )
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+        if services is None:
+            services = ServiceCatalog.from_rows(client.select(
+                'services', {'designer_id': f'eq.{designer_id}'}, columns='designer_id,name,duration',
+            ))
+        return cls.from_rows(rows, services)
+
+    def conflicts(self, designer_id: str, day: date, time: str, duration: int, exclude: str | None = None) -> list[str]:
+        """Ids dos agendamentos que se sobrepõem a [time, time + duration)"""
+        intervals = self.days.get((str(designer_id), day))
+        if intervals is None:
+            return []
+        start = parse_time(time)
+        found = [booking.id for booking in intervals.overlapping(start, start + duration) if booking.id != exclude]
+        found.reverse()
+        return found
+
+    def check(self, candidates: Iterable[Candidate]) -> list[Conflict]:
+        """Todos os candidatos que conflitam, com os agendamentos que eles sobrepõem"""
+        found = []
+        for candidate in candidates:
+            ids = self.conflicts(candidate.designer_id, candidate.date, candidate.time, candidate.duration, candidate.exclude)
+            if ids:
+                start = parse_time(candidate.time)
+                found.append(Conflict(
+                    candidate.designer_id, candidate.date, start, start + candidate.duration,
+                    candidate.exclude, tuple(ids),
+                ))
+        return found
+
+    def sweep(self) -> list[Conflict]:
+        """Varredura de integridade: cada agendamento que se sobrepõe a outro anterior do mesmo dia"""
+        found = []
+        for (designer, day), intervals in sorted(self.days.items(), key=lambda item: (item[0][1], item[0][0])):
+            for i, booking in enumerate(intervals.bookings):
+                if i == 0 or intervals.reach[i - 1] <= booking.start:
+                    continue
+                ids = []
+                j = i - 1
+                while j >= 0 and intervals.reach[j] > booking.start:
+                    if intervals.bookings[j].end > booking.start:
+                        ids.append(intervals.bookings[j].id)
+                    j -= 1
+                found.append(Conflict(designer, day, booking.start, booking.end, booking.id, tuple(reversed(ids))))
+        return found
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.conflicts',
+        description='Varredura de agendamentos sobrepostos (considerando a duração do serviço)',
+    )
+    parser.add_argument('dump', type=Path, nargs='?', help='JSON com as tabelas (appointments, services)')
+    parser.add_argument('--supabase', action='store_true', help='Ler do Supabase (SUPABASE_URL/SUPABASE_KEY)')
+    parser.add_argument('--designer', help='Só este designer (obrigatório com --supabase)')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help='Primeira data')
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help='Última data')
+    args = parser.parse_args(argv)
+    if args.supabase == bool(args.dump):
+        parser.error('informe um dump JSON ou --supabase')
+    if args.supabase and not (args.designer and args.start and args.end):
+        parser.error('--supabase precisa de --designer, --from e --to')
+
+    started = time.perf_counter()
+    try:
+        if args.supabase:
+            index = ConflictIndex.fetch(PostgrestClient.from_env(), args.designer, args.start, args.end)
+        else:
+            tables = load_dump(args.dump)
+            index = ConflictIndex.from_rows(tables['appointments'], tables['services'])
+    except (OSError, ValueError, PostgrestError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    conflicts = [
+        conflict for conflict in index.sweep()
+        if (not args.designer or conflict.designer_id == args.designer)
+        and (not args.start or conflict.date >= args.start)
+        and (not args.end or conflict.date <= args.end)
+    ]
+    elapsed = (time.perf_counter() - started) * 1000
+    for conflict in conflicts:
+        print(f"⚠️ {conflict.designer_id}: {conflict.describe()}")
+    if conflicts:
+        print(f"\n❌ {len(conflicts)} agendamento(s) sobreposto(s) ({elapsed:.1f} ms)")
+        return 1
+    print(f"✅ Nenhum agendamento sobreposto ({elapsed:.1f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
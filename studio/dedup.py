@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deduplicação em lote de designers, clientes e agendamentos
+
+Hoje a limpeza é feita à mão em remove-duplicate-designers.html,
+remove-test-appointments.html e fix-designer-ids.html, uma linha por vez.
+Aqui tudo sai de uma passada de hash por tabela:
+
+- designers e clientes se agrupam por telefone canônico (studio.phones) ou
+  por e-mail normalizado; quem compartilha qualquer uma das chaves cai no
+  mesmo grupo (union-find);
+- agendamentos se agrupam por designer (já remapeado), data, horário e
+  cliente. Dois clientes diferentes no mesmo horário são um conflito
+  (studio.conflicts), não uma duplicata, e ficam como estão;
+- em cada grupo uma linha sobrevive pela regra escolhida em `--keep`; as
+  outras têm as referências (services, availability e appointments
+  .designer_id) reescritas para ela e depois são removidas; campos vazios
+  da sobrevivente são preenchidos com os das removidas;
+- cada operação vai para um log JSON Lines com o valor anterior, e
+  `undo` aplica o log de trás para frente.
+
+Funciona sobre a cópia local (studio.snapshot) ou sobre um Postgres local
+(`--postgres DSN`, requer psycopg). Tudo é O(linhas): um dicionário por
+chave, sem comparar pares.
+
+Uso:
+    python -m studio.dedup plan [--db ARQUIVO | --postgres DSN] [--keep oldest]
+    python -m studio.dedup apply [--db ARQUIVO | --postgres DSN] [--keep oldest] [--log ARQUIVO]
+    python -m studio.dedup undo LOG [--db ARQUIVO | --postgres DSN]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as clock_time, timezone
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Sequence
+from uuid import UUID
+
+from .phones import canonical_phone
+from .snapshot import CACHE_DIR, DEFAULT_DB, Snapshot
+from .tables import occupies, parse_time
+
+BATCH = 1000
+# Tabelas que apontam para nail_designers(id) (ON DELETE CASCADE no Supabase:
+# as referências precisam mudar antes de a designer duplicada ser removida)
+DESIGNER_REFERENCES = ('services', 'availability', 'appointments')
+# Nunca copiados de uma linha removida para a sobrevivente
+KEEP_COLUMNS = frozenset({'id', 'created_at', 'updated_at'})
+
+Key = tuple
+
+
+def _text(value: object) -> str:
+    return '' if value is None else str(value)
+
+
+def _filled(row: Mapping) -> int:
+    return sum(value not in (None, '') for value in row.values())
+
+
+# --- regras de sobrevivência ----------------------------------------------
+
+@dataclass(frozen=True)
+class SurvivorRule:
+    """Chave de ordenação; a sobrevivente é a menor (ou a maior, com `newest`)"""
+    description: str
+    key: Callable[[Mapping, int], tuple]
+    newest: bool = False
+
+    def pick(self, rows: Sequence[Mapping], references: Callable[[Mapping], int]) -> Mapping:
+        ranked = max if self.newest else min
+        return ranked(rows, key=lambda row: self.key(row, references(row)))
+
+
+RULES: dict[str, SurvivorRule] = {
+    'oldest': SurvivorRule(
+        'mais antiga (created_at), como remove-duplicate-designers.html',
+        lambda row, refs: (_text(row.get('created_at')) or '~', str(row['id'])),
+    ),
+    'newest': SurvivorRule(
+        'alterada por último (updated_at)',
+        lambda row, refs: (_text(row.get('updated_at') or row.get('created_at')), str(row['id'])),
+        newest=True,
+    ),
+    'most-complete': SurvivorRule(
+        'mais campos preenchidos; empate fica com a mais antiga',
+        lambda row, refs: (-_filled(row), _text(row.get('created_at')) or '~', str(row['id'])),
+    ),
+    'most-referenced': SurvivorRule(
+        'mais agendamentos/serviços/horários ligados; empate fica com a mais antiga',
+        lambda row, refs: (-refs, _text(row.get('created_at')) or '~', str(row['id'])),
+    ),
+}
+
+
+# --- agrupamento -----------------------------------------------------------
+
+def _email_key(row: Mapping, column: str = 'email') -> str | None:
+    email = _text(row.get(column)).strip().lower()
+    return email or None
+
+
+# Os mesmos telefones de clientes se repetem em milhares de agendamentos
+_canonical_phone = lru_cache(maxsize=1 << 16)(canonical_phone)
+
+
+def _phone_key(row: Mapping, column: str = 'phone') -> str | None:
+    value = row.get(column)
+    return _canonical_phone(value) if isinstance(value, str) else canonical_phone(value)
+
+
+def person_keys(row: Mapping) -> list[Key]:
+    """Chaves de designers e clientes: telefone canônico e e-mail"""
+    keys = []
+    phone = _phone_key(row)
+    if phone:
+        keys.append(('phone', phone))
+    email = _email_key(row)
+    if email:
+        keys.append(('email', email))
+    return keys
+
+
+def _client_identity(row: Mapping) -> str:
+    return (
+        _phone_key(row, 'client_phone')
+        or _email_key(row, 'client_email')
+        or ' '.join(_text(row.get('client_name')).casefold().split())
+    )
+
+
+def appointment_keys(row: Mapping) -> list[Key]:
+    """designer + data + horário + cliente; cancelados não se fundem com nada"""
+    if not occupies(row) or not row.get('date') or not row.get('time'):
+        return []
+    try:
+        minutes = parse_time(row['time'])
+    except ValueError:
+        return []
+    return [('slot', _text(row.get('designer_id')), _text(row['date'])[:10], minutes, _client_identity(row))]
+
+
+def group_duplicates(rows: Sequence[Mapping], keys: Callable[[Mapping], list[Key]]) -> list[list[Mapping]]:
+    """Grupos (2+ linhas) ligados por qualquer chave em comum, numa passada com union-find"""
+    parent = list(range(len(rows)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    first: dict[Key, int] = {}
+    for index, row in enumerate(rows):
+        for key in keys(row):
+            owner = first.setdefault(key, index)
+            if owner != index:
+                a, b = find(owner), find(index)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+    groups: dict[int, list[Mapping]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(find(index), []).append(row)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+# --- plano -----------------------------------------------------------------
+
+@dataclass
+class Operation:
+    """Uma alteração do log: update guarda antes/depois, delete guarda a linha inteira"""
+    op: str
+    table: str
+    id: str
+    before: dict = field(default_factory=dict)
+    after: dict = field(default_factory=dict)
+
+    def to_json(self) -> dict:
+        item = {'op': self.op, 'table': self.table, 'id': self.id, 'before': self.before}
+        if self.op == 'update':
+            item['after'] = self.after
+        return item
+
+    @classmethod
+    def from_json(cls, item: Mapping) -> 'Operation':
+        return cls(item['op'], item['table'], item['id'], dict(item.get('before') or {}), dict(item.get('after') or {}))
+
+
+@dataclass
+class Merge:
+    table: str
+    survivor: str
+    removed: list[str]
+
+
+@dataclass
+class DedupPlan:
+    rule: str
+    merges: list[Merge] = field(default_factory=list)
+    operations: list[Operation] = field(default_factory=list)
+
+    def summary(self) -> dict[str, tuple[int, int]]:
+        """tabela -> (grupos, linhas removidas)"""
+        found: dict[str, tuple[int, int]] = {}
+        for merge in self.merges:
+            groups, removed = found.get(merge.table, (0, 0))
+            found[merge.table] = (groups + 1, removed + len(merge.removed))
+        return found
+
+
+def _references(tables: Mapping[str, list[dict]]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for table in DESIGNER_REFERENCES:
+        for row in tables.get(table, []):
+            key = _text(row.get('designer_id'))
+            counts[key] = counts.get(key, 0) + 1
+    for row in tables.get('appointments', []):
+        phone = _phone_key(row, 'client_phone')
+        if phone:
+            counts[phone] = counts.get(phone, 0) + 1
+    return counts
+
+
+def _fill(survivor: Mapping, removed: Sequence[Mapping]) -> dict:
+    """Campos vazios da sobrevivente que alguma linha removida tinha"""
+    values = {}
+    for row in removed:
+        for column, value in row.items():
+            if column in KEEP_COLUMNS or value in (None, ''):
+                continue
+            if survivor.get(column) in (None, '') and column not in values:
+                values[column] = value
+    return values
+
+
+def plan_dedup(tables: Mapping[str, list[dict]], rule: str = 'oldest') -> DedupPlan:
+    """Grupos, sobreviventes e operações, na ordem em que devem ser aplicadas
+
+    Ordem: referências -> remoções -> preenchimento das sobreviventes (o
+    preenchimento pode copiar um e-mail único que só fica livre depois da
+    remoção).
+    """
+    choose = RULES[rule]
+    plan = DedupPlan(rule)
+    references = _references(tables)
+    rewrites: list[Operation] = []
+    deletes: list[Operation] = []
+    fills: list[Operation] = []
+
+    def merge(table: str, groups: list[list[Mapping]], refs: Callable[[Mapping], str]) -> dict[str, str]:
+        remap: dict[str, str] = {}
+        for group in groups:
+            survivor = choose.pick(group, lambda row: references.get(refs(row), 0))
+            removed = [row for row in group if row is not survivor]
+            plan.merges.append(Merge(table, str(survivor['id']), [str(row['id']) for row in removed]))
+            for row in removed:
+                remap[str(row['id'])] = str(survivor['id'])
+                deletes.append(Operation('delete', table, str(row['id']), dict(row)))
+            values = _fill(survivor, removed)
+            if values:
+                fills.append(Operation(
+                    'update', table, str(survivor['id']),
+                    {column: survivor.get(column) for column in values}, values,
+                ))
+        return remap
+
+    designers = merge(
+        'nail_designers',
+        group_duplicates(tables.get('nail_designers', []), person_keys),
+        lambda row: str(row['id']),
+    )
+    merge('clients', group_duplicates(tables.get('clients', []), person_keys), lambda row: _phone_key(row) or '')
+
+    # Agendamentos comparados já com a designer sobrevivente
+    appointments = []
+    for row in tables.get('appointments', []):
+        target = designers.get(_text(row.get('designer_id')))
+        appointments.append({**row, 'designer_id': target} if target else row)
+    removed_appointments = merge(
+        'appointments', group_duplicates(appointments, appointment_keys), lambda row: str(row['id']),
+    )
+    # O log guarda a linha como estava, não a cópia remapeada
+    originals = {str(row['id']): row for row in tables.get('appointments', [])}
+    for operation in deletes:
+        if operation.table == 'appointments':
+            operation.before = dict(originals[operation.id])
+
+    for table in DESIGNER_REFERENCES:
+        for row in tables.get(table, []):
+            current = _text(row.get('designer_id'))
+            if current in designers and not (table == 'appointments' and str(row['id']) in removed_appointments):
+                rewrites.append(Operation(
+                    'update', table, str(row['id']), {'designer_id': current}, {'designer_id': designers[current]},
+                ))
+    plan.operations = rewrites + deletes + fills
+    return plan
+
+
+# --- destinos --------------------------------------------------------------
+
+def _plain(value: object) -> object:
+    """Valor do driver em algo que vai para JSON e volta igual"""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date, clock_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class SnapshotTarget:
+    """Cópia local: escreve pelo Snapshot, então os listeners (rollups) acompanham"""
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+
+    def tables(self) -> dict[str, list[dict]]:
+        return self.snapshot.tables()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self.snapshot.db:
+            yield
+
+    def update(self, table: str, changes: Sequence[tuple[str, dict]]) -> None:
+        current = self.snapshot.by_ids(table, [key for key, _ in changes])
+        rows = [{**current[key], **values} for key, values in changes if key in current]
+        self.snapshot.upsert(table, rows)
+
+    def delete(self, table: str, ids: Sequence[str]) -> None:
+        self.snapshot.delete(table, list(ids))
+
+    def insert(self, table: str, rows: Sequence[dict]) -> None:
+        self.snapshot.upsert(table, rows)
+
+
+class PostgresTarget:
+    """Postgres local com o schema do Supabase (supabase-schema.sql e os ALTER TABLE)"""
+
+    TABLES = ('nail_designers', 'clients', 'services', 'availability', 'appointments')
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError:
+            try:
+                import psycopg2 as psycopg
+            except ImportError:
+                raise ValueError('--postgres requer psycopg: pip install "psycopg[binary]"') from None
+        self.db = psycopg.connect(dsn)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def tables(self) -> dict[str, list[dict]]:
+        found = {}
+        with self.db.cursor() as cursor:
+            for table in self.TABLES:
+                cursor.execute(f'SELECT * FROM public.{table}')
+                names = [column[0] for column in cursor.description]
+                rows = found[table] = []
+                while batch := cursor.fetchmany(BATCH):
+                    rows.extend({name: _plain(value) for name, value in zip(names, row)} for row in batch)
+        return found
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        try:
+            yield
+        except BaseException:
+            self.db.rollback()
+            raise
+        self.db.commit()
+
+    def update(self, table: str, changes: Sequence[tuple[str, dict]]) -> None:
+        by_columns: dict[tuple[str, ...], list[tuple]] = {}
+        for key, values in changes:
+            columns = tuple(sorted(values))
+            by_columns.setdefault(columns, []).append(tuple(values[name] for name in columns) + (key,))
+        with self.db.cursor() as cursor:
+            for columns, params in by_columns.items():
+                assignments = ', '.join(f'{name} = %s' for name in columns)
+                cursor.executemany(f'UPDATE public.{table} SET {assignments} WHERE id = %s::uuid', params)
+
+    def delete(self, table: str, ids: Sequence[str]) -> None:
+        with self.db.cursor() as cursor:
+            cursor.execute(f'DELETE FROM public.{table} WHERE id = ANY(%s::uuid[])', (list(ids),))
+
+    def insert(self, table: str, rows: Sequence[dict]) -> None:
+        with self.db.cursor() as cursor:
+            for row in rows:
+                columns = list(row)
+                cursor.execute(
+                    f'INSERT INTO public.{table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))}) '
+                    f'ON CONFLICT (id) DO NOTHING',
+                    [row[name] for name in columns],
+                )
+
+
+def _batches(operations: Sequence[Operation]) -> Iterator[tuple[str, str, list[Operation]]]:
+    """Operações consecutivas do mesmo tipo e tabela, em lotes de até BATCH"""
+    start = 0
+    while start < len(operations):
+        first = operations[start]
+        end = start + 1
+        while (
+            end < len(operations) and end - start < BATCH
+            and operations[end].op == first.op and operations[end].table == first.table
+        ):
+            end += 1
+        yield first.op, first.table, list(operations[start:end])
+        start = end
+
+
+def apply_operations(target: SnapshotTarget | PostgresTarget, operations: Sequence[Operation]) -> None:
+    """Aplica as operações em ordem, numa transação só"""
+    with target.transaction():
+        for op, table, batch in _batches(operations):
+            if op == 'update':
+                target.update(table, [(item.id, item.after) for item in batch])
+            elif op == 'delete':
+                target.delete(table, [item.id for item in batch])
+            elif op == 'insert':
+                target.insert(table, [item.before for item in batch])
+            else:
+                raise ValueError(f'operação desconhecida no log: {op!r}')
+
+
+def inverse(operations: Sequence[Operation]) -> list[Operation]:
+    """Operações que desfazem `operations` (de trás para frente)"""
+    undone = []
+    for item in reversed(operations):
+        if item.op == 'update':
+            undone.append(Operation('update', item.table, item.id, item.after, item.before))
+        elif item.op == 'delete':
+            undone.append(Operation('insert', item.table, item.id, item.before))
+        else:
+            undone.append(Operation('delete', item.table, item.id, item.before))
+    return undone
+
+
+def write_log(path: Path, plan: DedupPlan, source: str) -> None:
+    with path.open('w', encoding='utf-8') as out:
+        header = {'op': 'plan', 'rule': plan.rule, 'source': source, 'created_at': datetime.now(timezone.utc).isoformat()}
+        out.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for operation in plan.operations:
+            out.write(json.dumps(operation.to_json(), ensure_ascii=False, default=str) + '\n')
+
+
+def read_log(path: Path) -> list[Operation]:
+    with path.open(encoding='utf-8') as log:
+        items = [json.loads(line) for line in log if line.strip()]
+    return [Operation.from_json(item) for item in items if item.get('op') != 'plan']
+
+
+@contextmanager
+def _target(args: argparse.Namespace) -> Iterator[SnapshotTarget | PostgresTarget]:
+    if args.postgres:
+        target = PostgresTarget(args.postgres)
+        try:
+            yield target
+        finally:
+            target.close()
+    else:
+        with Snapshot(args.db) as snapshot:
+            yield SnapshotTarget(snapshot)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.dedup',
+        description='Deduplicação em lote de designers, clientes e agendamentos',
+    )
+    parser.add_argument('--db', type=Path, default=Path(DEFAULT_DB), help=f'Cópia local (padrão: {DEFAULT_DB})')
+    parser.add_argument('--postgres', metavar='DSN', help='Usar um Postgres local no lugar da cópia')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('plan', 'Mostrar os grupos sem alterar nada'), ('apply', 'Remover as duplicatas')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument(
+            '--keep', choices=sorted(RULES), default='oldest',
+            help='Qual linha sobrevive: ' + '; '.join(f'{key}: {rule.description}' for key, rule in RULES.items()),
+        )
+        command.add_argument('--log', type=Path, help=f'Log das alterações (padrão: {CACHE_DIR}/dedup-<data>.jsonl)')
+    undo = commands.add_parser('undo', help='Desfazer um apply a partir do log')
+    undo.add_argument('log', type=Path)
+    args = parser.parse_args(argv)
+
+    try:
+        with _target(args) as target:
+            started = time.perf_counter()
+            if args.command == 'undo':
+                operations = inverse(read_log(args.log))
+                apply_operations(target, operations)
+                print(f"↩️  {len(operations)} operação(ões) desfeita(s) ({(time.perf_counter() - started) * 1000:.0f} ms)")
+                return 0
+
+            tables = target.tables()
+            loaded = time.perf_counter()
+            plan = plan_dedup(tables, args.keep)
+            planned = time.perf_counter()
+            rows = sum(len(items) for items in tables.values())
+            print(f"🔍 {rows} linha(s) lidas em {(loaded - started) * 1000:.0f} ms, agrupadas em {(planned - loaded) * 1000:.0f} ms")
+            summary = plan.summary()
+            for table in ('nail_designers', 'clients', 'appointments'):
+                groups, removed = summary.get(table, (0, 0))
+                print(f"   {table}: {groups} grupo(s), {removed} linha(s) a remover")
+            rewrites = sum(item.op == 'update' and 'designer_id' in item.after for item in plan.operations)
+            print(f"   {rewrites} referência(s) a reescrever, regra '{args.keep}'")
+            if args.command == 'plan':
+                for merge in plan.merges[:20]:
+                    print(f"   👥 {merge.table}: mantém {merge.survivor}, remove {', '.join(merge.removed)}")
+                return 0
+
+            if args.log is None:
+                args.log = Path(CACHE_DIR) / f"dedup-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+            args.log.parent.mkdir(parents=True, exist_ok=True)
+            write_log(args.log, plan, args.postgres or str(args.db))
+            apply_operations(target, plan.operations)
+            print(f"✅ {len(plan.operations)} operação(ões) aplicada(s) em {(time.perf_counter() - planned) * 1000:.0f} ms; log em {args.log}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
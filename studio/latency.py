@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Percentis de latência para os benchmarks e o gerador de carga de studio
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Percentil q (0-100) de uma lista já ordenada, pelo método nearest-rank"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass(frozen=True)
+class Latency:
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def of(cls, samples: Iterable[float]) -> 'Latency':
+        ordered = sorted(samples)
+        if not ordered:
+            return cls(0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return cls(
+            count=len(ordered),
+            mean=sum(ordered) / len(ordered),
+            p50=percentile(ordered, 50),
+            p95=percentile(ordered, 95),
+            p99=percentile(ordered, 99),
+            max=ordered[-1],
+        )
+
+    def describe(self, scale: float = 1000.0, unit: str = 'ms') -> str:
+        return (
+            f'p50 {self.p50 * scale:.2f} {unit}, p95 {self.p95 * scale:.2f} {unit}, '
+            f'p99 {self.p99 * scale:.2f} {unit} (média {self.mean * scale:.2f}, máx {self.max * scale:.2f}, n={self.count})'
+        )
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de carga do fluxo de agendamento (asyncio) com relatório de latência
+
+Repete, para cada cliente virtual, a sequência de chamadas que o
+BookingPage faz até gravar um agendamento:
+
+  designers     getNailDesigners (nail_designers, order=created_at.desc)
+  services      serviceService.getByDesignerId
+  appointments  getSupabaseAppointments (a tabela inteira, como hoje)
+  availability  availabilityService.getByDesignerId (bloqueios)
+  check         checkTimeConflict (designer, data, horário, pending/confirmed)
+  insert        appointmentService.create (POST com return=representation)
+
+contra um PostgrestStandIn num processo separado, semeado com as colunas
+e DEFAULT de supabase-schema.sql e create-clients-table.sql. Cada cliente
+virtual usa a sua conexão keep-alive, como um navegador, e escolhe entre
+os primeiros horários livres (studio.slots) do designer, com os designers
+mais populares recebendo mais clientes.
+
+O relatório traz p50/p95/p99 por etapa, vazão e a taxa de agendamento
+duplo: agendamentos ativos no mesmo designer/data/horário que passaram
+pelo checkTimeConflict ao mesmo tempo. `--unique-slot` simula um índice
+único parcial em (designer_id, date, time) e mostra o insert recusado com
+409 no lugar do duplo. `--save` grava o resultado em JSON e `--compare`
+falha (código 1) se o p95 de alguma etapa piorar além de `--tolerance` ou
+se a taxa de agendamento duplo subir.
+
+Uso:
+    python -m studio.loadgen [--designers 20] [--clients 500] [--concurrency 50] [--think 0.05]
+    python -m studio.loadgen --save baseline.json
+    python -m studio.loadgen --compare baseline.json [--tolerance 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Sequence
+from urllib.parse import urlencode, urlsplit
+
+from .conflicts import ConflictIndex
+from .latency import Latency
+from .postgrest import PostgrestClient
+from .slots import SlotEngine, load_calendar
+from .standin import SCHEMA_FILES, PostgrestStandIn, UniqueConstraint, schema_defaults
+
+REPO = Path(__file__).resolve().parent.parent
+STEPS = ('designers', 'services', 'appointments', 'availability', 'check', 'insert')
+# Os status que checkTimeConflict considera ocupando o horário
+ACTIVE = ('pending', 'confirmed')
+SERVICES = (('Manicure', 40, 35.0), ('Pedicure', 50, 40.0), ('Alongamento em gel', 120, 150.0), ('Esmaltação em gel', 60, 70.0))
+KEY = 'loadgen'
+
+
+@dataclass
+class LoadConfig:
+    designers: int = 20
+    clients: int = 500
+    concurrency: int = 50
+    days: int = 7
+    booked: float = 0.3  # Fração dos horários já ocupados na semente
+    blocks: int = 3  # Bloqueios por designer
+    choices: int = 3  # Entre quantos dos primeiros horários livres cada cliente escolhe
+    think: float = 0.0  # Segundos entre ver os horários e confirmar
+    unique_slot: bool = False
+    seed: int = 7
+    start: str = field(default_factory=lambda: (date.today() + timedelta(days=1)).isoformat())
+
+
+# --- semente ---------------------------------------------------------------
+
+def _schema() -> dict:
+    return schema_defaults(REPO / name for name in SCHEMA_FILES)
+
+
+def _row(defaults: dict, values: dict) -> dict:
+    row = {column: make() if make else None for column, make in defaults.items()}
+    row.update(values)
+    return row
+
+
+def seed_tables(config: LoadConfig) -> dict[str, list[dict]]:
+    """Designers, serviços, bloqueios e agendamentos já existentes, com as colunas do schema"""
+    rng = random.Random(config.seed)
+    schema = _schema()
+    calendar = load_calendar()
+    start = date.fromisoformat(config.start)
+    tables: dict[str, list[dict]] = {name: [] for name in schema}
+    for index in range(config.designers):
+        designer = _row(schema['nail_designers'], {
+            'name': f'Designer {index + 1}', 'email': f'designer{index + 1}@studio.test',
+            'password': 'loadgen', 'phone': f'1199{index:07d}',
+            'created_at': f'2025-01-01T00:00:{index % 60:02d}+00:00',
+        })
+        tables['nail_designers'].append(designer)
+        for name, duration, price in SERVICES:
+            tables['services'].append(_row(schema['services'], {
+                'designer_id': designer['id'], 'name': name, 'duration': duration, 'price': price,
+            }))
+        for offset in range(config.days):
+            day = start + timedelta(days=offset)
+            for slot in calendar.for_day(day).times:
+                if rng.random() < config.booked:
+                    name, _, price = rng.choice(SERVICES)
+                    tables['appointments'].append(_row(schema['appointments'], {
+                        'designer_id': designer['id'], 'client_name': 'Semente', 'client_phone': '11900000000',
+                        'service': name, 'date': day.isoformat(), 'time': slot, 'price': price,
+                        'status': rng.choice(('pending', 'confirmed')),
+                    }))
+        for _ in range(config.blocks):
+            day = start + timedelta(days=rng.randrange(config.days))
+            hour = rng.randrange(9, 18)
+            tables['availability'].append(_row(schema['availability'], {
+                'designer_id': designer['id'], 'specific_date': day.isoformat(),
+                'start_time': f'{hour:02d}:00', 'end_time': f'{hour + 1:02d}:00', 'is_available': False,
+            }))
+    return tables
+
+
+def _serve(tables: dict, unique_slot: bool, ready, stop) -> None:
+    """Processo do stand-in: o gerador de carga não disputa o GIL com o servidor"""
+    unique = [UniqueConstraint('appointments', ('designer_id', 'date', 'time'), lambda row: row.get('status') in ACTIVE)]
+    with PostgrestStandIn(tables, defaults=_schema(), unique=unique if unique_slot else ()) as server:
+        ready.send(server.url)
+        stop.wait()
+
+
+# --- cliente HTTP assíncrono -----------------------------------------------
+
+class AsyncSession:
+    """Uma conexão HTTP/1.1 keep-alive por cliente virtual, só com asyncio"""
+
+    def __init__(self, url: str, key: str = KEY):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError('o gerador de carga só fala http (stand-in ou PostgREST local)')
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.key = key
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.requests = 0
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader = self.writer = None
+
+    async def request(
+        self,
+        method: str,
+        table: str,
+        params: Sequence[tuple[str, str]] = (),
+        body: object = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, object]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        all_headers = {
+            'Host': f'{self.host}:{self.port}',
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}',
+            'Accept': 'application/json',
+            'Content-Length': str(len(data)),
+        }
+        if body is not None:
+            all_headers['Content-Type'] = 'application/json'
+        all_headers.update(headers or {})
+        lines = [f'{method} /rest/v1/{table}?{urlencode(params, safe=",.()*:")} HTTP/1.1']
+        lines += [f'{name}: {value}' for name, value in all_headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + data)
+        await self.writer.drain()
+        self.requests += 1
+
+        status = int((await self.reader.readline()).split()[1])
+        length, close = 0, False
+        while (line := await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+            elif name.lower() == 'connection' and value.strip().lower() == 'close':
+                close = True
+        payload = await self.reader.readexactly(length) if length else b''
+        if close:
+            await self.close()
+        return status, json.loads(payload) if payload else None
+
+
+# --- fluxo -----------------------------------------------------------------
+
+@dataclass
+class LoadStats:
+    samples: dict[str, list[float]] = field(default_factory=lambda: {step: [] for step in STEPS})
+    outcomes: Counter = field(default_factory=Counter)
+    requests: int = 0
+
+
+class BookingFlow:
+    """A sequência de chamadas do BookingPage para um cliente virtual"""
+
+    def __init__(self, session: AsyncSession, config: LoadConfig, stats: LoadStats, rng: random.Random):
+        self.session = session
+        self.config = config
+        self.stats = stats
+        self.rng = rng
+
+    async def _step(self, step: str, method: str, table: str, params: Sequence[tuple[str, str]], **extra) -> tuple[int, object]:
+        started = time.perf_counter()
+        status, body = await self.session.request(method, table, params, **extra)
+        self.stats.samples[step].append(time.perf_counter() - started)
+        return status, body
+
+    async def run(self, client: int) -> str:
+        _, designers = await self._step('designers', 'GET', 'nail_designers', [('select', '*'), ('order', 'created_at.desc')])
+        active = [row for row in designers if row.get('is_active') is not False]
+        if not active:
+            return 'sem designer'
+        # Poucos designers concentram a procura (como na vida real)
+        designer = self.rng.choices(active, weights=[1 / (rank + 1) for rank in range(len(active))])[0]
+        designer_id = designer['id']
+        _, services = await self._step('services', 'GET', 'services', [
+            ('select', '*'), ('designer_id', f'eq.{designer_id}'), ('order', 'created_at.desc'),
+        ])
+        _, appointments = await self._step('appointments', 'GET', 'appointments', [
+            ('select', '*'), ('order', 'date.asc,time.asc'),
+        ])
+        _, blocks = await self._step('availability', 'GET', 'availability', [
+            ('select', '*'), ('designer_id', f'eq.{designer_id}'), ('order', 'day_of_week.asc,start_time.asc'),
+        ])
+
+        mine = [row for row in appointments if row.get('designer_id') == designer_id]
+        engine = SlotEngine.from_rows(mine, blocks, services)
+        free = engine.free_slots(designer_id, date.fromisoformat(self.config.start), self.config.days)
+        candidates = [(day, slot) for day in sorted(free) for slot in free[day]][:self.config.choices]
+        if not candidates or not services:
+            return 'sem horário'
+        day, slot = self.rng.choice(candidates)
+        service = self.rng.choice(services)
+        if self.config.think:
+            await asyncio.sleep(self.config.think)
+
+        appointment_id = str(uuid.uuid4())
+        _, taken = await self._step('check', 'GET', 'appointments', [
+            ('select', 'id'), ('designer_id', f'eq.{designer_id}'), ('date', f'eq.{day.isoformat()}'),
+            ('time', f'eq.{slot}'), ('status', f'in.({",".join(ACTIVE)})'), ('limit', '1'), ('id', f'neq.{appointment_id}'),
+        ])
+        if taken:
+            return 'horário ocupado'
+        status, _ = await self._step('insert', 'POST', 'appointments', [('select', '*')], body={
+            'id': appointment_id, 'designer_id': designer_id, 'client_name': f'Cliente {client + 1}',
+            'client_phone': f'1198{client:07d}', 'client_email': None, 'service': service['name'],
+            'date': day.isoformat(), 'time': slot, 'price': service['price'], 'status': 'pending',
+        }, headers={'Prefer': 'return=representation', 'Accept': 'application/vnd.pgrst.object+json'})
+        if status == 201:
+            return 'agendado'
+        return 'recusado (409)' if status == 409 else f'erro HTTP {status}'
+
+
+async def run_load(url: str, config: LoadConfig) -> tuple[LoadStats, float]:
+    stats = LoadStats()
+    clients: asyncio.Queue[int] = asyncio.Queue()
+    for client in range(config.clients):
+        clients.put_nowait(client)
+
+    async def worker(index: int) -> None:
+        session = AsyncSession(url)
+        flow = BookingFlow(session, config, stats, random.Random(config.seed * 1000 + index))
+        try:
+            while True:
+                try:
+                    client = clients.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    stats.outcomes[await flow.run(client)] += 1
+                except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                    stats.outcomes[f'erro: {type(e).__name__}'] += 1
+                    await session.close()
+        finally:
+            stats.requests += session.requests
+            await session.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(config.concurrency)))
+    return stats, time.perf_counter() - started
+
+
+@dataclass
+class LoadReport:
+    config: dict
+    steps: dict[str, dict]
+    elapsed: float
+    bookings: int
+    throughput: float
+    requests_per_second: float
+    outcomes: dict[str, int]
+    double_bookings: int
+    double_booking_rate: float
+    overlaps: int
+
+
+def integrity(url: str) -> tuple[int, int, list[dict]]:
+    """(agendamentos duplos no mesmo horário, sobreposições pela duração, linhas)"""
+    client = PostgrestClient(url, KEY)
+    appointments = client.select('appointments', [('status', f'in.({",".join(ACTIVE)})')])
+    services = client.select('services', columns='designer_id,name,duration')
+    slots = Counter((row['designer_id'], row['date'], row['time']) for row in appointments)
+    doubles = sum(count - 1 for count in slots.values() if count > 1)
+    overlaps = len(ConflictIndex.from_rows(appointments, services).sweep())
+    return doubles, overlaps, appointments
+
+
+def benchmark(config: LoadConfig) -> LoadReport:
+    tables = seed_tables(config)
+    ready, sender = multiprocessing.Pipe(duplex=False)
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(tables, config.unique_slot, sender, stop), daemon=True)
+    server.start()
+    try:
+        url = ready.recv()
+        stats, elapsed = asyncio.run(run_load(url, config))
+        doubles, overlaps, _ = integrity(url)
+    finally:
+        stop.set()
+        server.join(timeout=5)
+    bookings = stats.outcomes.get('agendado', 0)
+    return LoadReport(
+        config=asdict(config),
+        steps={step: asdict(Latency.of(samples)) for step, samples in stats.samples.items()},
+        elapsed=elapsed,
+        bookings=bookings,
+        throughput=bookings / elapsed if elapsed else 0.0,
+        requests_per_second=stats.requests / elapsed if elapsed else 0.0,
+        outcomes=dict(stats.outcomes),
+        double_bookings=doubles,
+        double_booking_rate=doubles / bookings if bookings else 0.0,
+        overlaps=overlaps,
+    )
+
+
+def regressions(report: LoadReport, baseline: dict, tolerance: float) -> list[str]:
+    """O que piorou em relação ao baseline salvo com --save"""
+    found = []
+    for step, current in report.steps.items():
+        before = baseline.get('steps', {}).get(step)
+        if before and before['p95'] and current['p95'] > before['p95'] * (1 + tolerance):
+            found.append(f"{step}: p95 {before['p95'] * 1000:.2f} ms -> {current['p95'] * 1000:.2f} ms")
+    if report.double_booking_rate > baseline.get('double_booking_rate', 0.0):
+        found.append(
+            f"agendamento duplo: {baseline.get('double_booking_rate', 0.0):.2%} -> {report.double_booking_rate:.2%}"
+        )
+    return found
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.loadgen',
+        description='Carga no fluxo de agendamento contra o PostgREST local, com p50/p95/p99 por etapa',
+    )
+    parser.add_argument('--designers', type=int, default=defaults.designers)
+    parser.add_argument('--clients', type=int, default=defaults.clients, help='Agendamentos a tentar')
+    parser.add_argument('--concurrency', type=int, default=defaults.concurrency, help='Clientes virtuais simultâneos')
+    parser.add_argument('--days', type=int, default=defaults.days, help='Dias de agenda oferecidos')
+    parser.add_argument('--booked', type=float, default=defaults.booked, help='Fração dos horários já ocupados')
+    parser.add_argument('--think', type=float, default=defaults.think, help='Segundos entre ver os horários e confirmar')
+    parser.add_argument('--unique-slot', action='store_true', help='Simular índice único em (designer_id, date, time)')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--save', type=Path, help='Gravar o resultado em JSON')
+    parser.add_argument('--compare', type=Path, help='Comparar com um resultado salvo e falhar se piorar')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Piora aceita no p95 (padrão: 0.25)')
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        designers=args.designers, clients=args.clients, concurrency=args.concurrency, days=args.days,
+        booked=args.booked, think=args.think, unique_slot=args.unique_slot, seed=args.seed,
+    )
+    report = benchmark(config)
+    print(f"📊 {config.clients} cliente(s), {config.concurrency} simultâneo(s), {config.designers} designer(s)")
+    for step in STEPS:
+        print(f"   {step:<13} {Latency(**report.steps[step]).describe()}")
+    print(
+        f"   {report.bookings} agendamento(s) em {report.elapsed:.2f} s: "
+        f"{report.throughput:.1f} agendamentos/s, {report.requests_per_second:.0f} requisições/s"
+    )
+    print(f"   resultados: {', '.join(f'{name} {count}' for name, count in sorted(report.outcomes.items()))}")
+    print(
+        f"   {'⚠️ ' if report.double_bookings else '✅'} agendamento duplo: {report.double_bookings} "
+        f"({report.double_booking_rate:.2%}); sobreposições pela duração (inclui os duplos): {report.overlaps}"
+    )
+    if args.save:
+        args.save.write_text(json.dumps(asdict(report), indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"💾 Resultado em {args.save}")
+    if args.compare:
+        found = regressions(report, json.loads(args.compare.read_text(encoding='utf-8')), args.tolerance)
+        for item in found:
+            print(f"❌ {item}")
+        if found:
+            return 1
+        print(f"✅ Dentro da tolerância de {args.tolerance:.0%} em relação a {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
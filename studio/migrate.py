@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrações a partir dos scripts .sql da raiz
+
+Os scripts soltos na raiz (supabase-schema.sql, fix-*.sql, whatsapp-*.sql)
+são colados à mão no SQL Editor do Supabase, sem registro do que já rodou,
+e vários se sobrepõem ou se desfazem (disable-availability-rls.sql desliga
+o RLS que apply-availability-rls-fix.sql liga). Aqui:
+
+- studio/migrations.toml fixa a ordem em lotes e o que fica de fora, com o
+  motivo; um .sql da raiz que não esteja em nenhum dos dois trava o plano;
+- cada arquivo tem um checksum (sha256, fim de linha normalizado) gravado
+  em studio_migrations quando é aplicado. O que já está lá com o mesmo
+  checksum é pulado; um arquivo editado depois de aplicado trava o apply
+  (o caminho é um script novo, ou `baseline` depois de aplicar a diferença
+  à mão);
+- cada lote roda numa transação só, sob um advisory lock: ou o lote todo
+  entra, ou nada. BEGIN/COMMIT de dentro dos scripts são removidos;
+- cada comando é cronometrado, para que DDL e índices lentos apareçam num
+  Postgres local antes de chegar à produção. `--rehearse` roda tudo e
+  desfaz no fim. O primeiro lote (supabase-local-auth.sql) cria auth.uid()
+  e os papéis do Supabase quando eles não existem, para que as políticas
+  de RLS rodem num Postgres comum.
+
+Uso:
+    python -m studio.migrate plan
+    python -m studio.migrate status [--postgres DSN]
+    python -m studio.migrate apply [--postgres DSN] [--rehearse] [--slow MS] [--report ARQUIVO]
+    python -m studio.migrate baseline [--postgres DSN] [ARQUIVO ...]
+
+Sem `--postgres` vale a variável DATABASE_URL. Requer psycopg.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import tomllib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+REPO = Path(__file__).resolve().parent.parent
+MANIFEST = Path(__file__).resolve().parent / 'migrations.toml'
+TABLE = 'studio_migrations'
+LOCK_KEY = 0x57_0D_10  # pg_advisory_xact_lock: um apply por vez no mesmo banco
+
+_DOLLAR = re.compile(r'\$([A-Za-z_][A-Za-z0-9_]*)?\$')
+_TRANSACTION = re.compile(r'(BEGIN|START\s+TRANSACTION|COMMIT|END)(\s+(WORK|TRANSACTION))?', re.I)
+_ROLLBACK = re.compile(r'(ROLLBACK|ABORT)\b', re.I)
+_OUTSIDE_TRANSACTION = re.compile(
+    r'((CREATE\s+(UNIQUE\s+)?|DROP\s+)INDEX\s+CONCURRENTLY|REINDEX\b.*\bCONCURRENTLY'
+    r'|VACUUM|(CREATE|DROP)\s+(DATABASE|TABLESPACE)|ALTER\s+SYSTEM)\b',
+    re.I | re.S,
+)
+
+
+class MigrationError(ValueError):
+    """migrations.toml ou script inválido, ou comando recusado pelo Postgres"""
+
+
+@dataclass(frozen=True)
+class Statement:
+    sql: str
+    line: int
+
+    @property
+    def preview(self) -> str:
+        text = ' '.join(self.sql.split())
+        return text if len(text) <= 72 else text[:71] + '…'
+
+
+def _skip_quoted(text: str, i: int, quote: str, backslash: bool) -> int:
+    """Posição logo depois do fechamento da string/identificador aberto em i"""
+    i += 1
+    while i < len(text):
+        c = text[i]
+        if backslash and c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            if text.startswith(quote, i + 1):
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return -1
+
+
+def _skip_block_comment(text: str, i: int) -> int:
+    """Fim de um comentário /* */ (o Postgres aceita comentários aninhados)"""
+    depth = 0
+    while i < len(text):
+        if text.startswith('/*', i):
+            depth += 1
+            i += 2
+        elif text.startswith('*/', i):
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    return -1
+
+
+def split_statements(text: str) -> list[Statement]:
+    """Quebra um script em comandos no `;` de nível zero
+
+    Respeita comentários, strings ('...', E'...'), identificadores "..." e
+    corpos $$ ... $$ / $tag$ ... $tag$ de funções e blocos DO.
+    """
+    newlines = [index for index, c in enumerate(text) if c == '\n']
+
+    def line(index: int) -> int:
+        return bisect.bisect_left(newlines, index) + 1
+
+    statements = []
+    start = None
+    i, size = 0, len(text)
+    while i < size:
+        c = text[i]
+        if c.isspace():
+            i += 1
+            continue
+        if text.startswith('--', i):
+            end = text.find('\n', i)
+            i = size if end < 0 else end + 1
+            continue
+        if text.startswith('/*', i):
+            end = _skip_block_comment(text, i)
+            if end < 0:
+                raise MigrationError(f'linha {line(i)}: comentário /* sem fechamento')
+            i = end
+            continue
+        if start is None:
+            start = i
+        if c == ';':
+            if sql := text[start:i].strip():
+                statements.append(Statement(sql, line(start)))
+            start = None
+            i += 1
+            continue
+        end = None
+        if c == "'":
+            escaped = i > 0 and text[i - 1] in 'eE' and not (i > 1 and (text[i - 2].isalnum() or text[i - 2] == '_'))
+            end = _skip_quoted(text, i, "'", escaped)
+        elif c == '"':
+            end = _skip_quoted(text, i, '"', False)
+        elif c == '$' and not (i > 0 and (text[i - 1].isalnum() or text[i - 1] == '_')):
+            if match := _DOLLAR.match(text, i):
+                tag = match.group(0)
+                end = text.find(tag, match.end())
+                end = -1 if end < 0 else end + len(tag)
+        if end is None:
+            i += 1
+        elif end < 0:
+            raise MigrationError(f'linha {line(i)}: {text[i:i + 12]!r}… sem fechamento')
+        else:
+            i = end
+    if start is not None and (sql := text[start:].strip()):
+        statements.append(Statement(sql, line(start)))
+    return statements
+
+
+def checksum(data: bytes) -> str:
+    return hashlib.sha256(data.replace(b'\r\n', b'\n')).hexdigest()
+
+
+@dataclass
+class Migration:
+    name: str
+    batch: str
+    checksum: str
+    statements: list[Statement]
+    dropped: list[Statement] = field(default_factory=list)
+
+
+@dataclass
+class Batch:
+    name: str
+    description: str
+    extensions: tuple[str, ...]
+    migrations: list[Migration]
+
+
+@dataclass
+class Plan:
+    batches: list[Batch]
+    skipped: dict[str, str]
+
+    def migrations(self) -> Iterator[Migration]:
+        for batch in self.batches:
+            yield from batch.migrations
+
+    def find(self, name: str) -> Migration:
+        for migration in self.migrations():
+            if migration.name == name:
+                return migration
+        raise MigrationError(f'{name}: fora dos lotes de {MANIFEST.name}')
+
+
+def read_migration(path: Path, batch: str) -> Migration:
+    data = path.read_bytes()
+    try:
+        text = data.decode('utf-8-sig')
+        statements = split_statements(text)
+    except (UnicodeDecodeError, MigrationError) as e:
+        raise MigrationError(f'{path.name}: {e}') from None
+
+    kept, dropped = [], []
+    for statement in statements:
+        where = f'{path.name}:{statement.line}'
+        if statement.sql.startswith('\\'):
+            raise MigrationError(f'{where}: comando do psql ({statement.preview}) não roda fora do psql')
+        if _ROLLBACK.match(statement.sql):
+            raise MigrationError(f'{where}: {statement.preview} desfaria o lote inteiro')
+        if _OUTSIDE_TRANSACTION.match(statement.sql):
+            raise MigrationError(f'{where}: {statement.preview} não roda dentro de transação')
+        (dropped if _TRANSACTION.fullmatch(statement.sql) else kept).append(statement)
+    if not kept:
+        raise MigrationError(f'{path.name}: sem comandos; mova para [skip] em {MANIFEST.name}')
+    return Migration(path.name, batch, checksum(data), kept, dropped)
+
+
+def load_plan(root: Path = REPO, manifest: Path = MANIFEST) -> Plan:
+    with open(manifest, 'rb') as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise MigrationError(f'{manifest.name}: {e}') from None
+
+    skipped = {str(name): str(reason) for name, reason in data.get('skip', {}).items()}
+    problems, seen = [], set(skipped)
+    batches = []
+    for number, item in enumerate(data.get('batches', []), 1):
+        name = str(item.get('name', number))
+        migrations = []
+        for filename in item.get('files', []):
+            if filename in seen:
+                problems.append(f'{filename}: aparece mais de uma vez')
+                continue
+            seen.add(filename)
+            path = root / filename
+            if not path.is_file():
+                problems.append(f'{filename}: arquivo não encontrado')
+                continue
+            try:
+                migrations.append(read_migration(path, name))
+            except (OSError, MigrationError) as e:
+                problems.append(str(e))
+        batches.append(Batch(name, item.get('description', ''), tuple(item.get('extensions', ())), migrations))
+
+    problems += [f'{name}: em [skip] mas não existe' for name in skipped if not (root / name).is_file()]
+    problems += [
+        f'{path.name}: fora de {manifest.name}; coloque num lote ou em [skip]'
+        for path in sorted(root.glob('*.sql')) if path.name not in seen
+    ]
+    if problems:
+        raise MigrationError(f'{manifest.name}:\n   ' + '\n   '.join(problems))
+    return Plan(batches, skipped)
+
+
+@dataclass(frozen=True)
+class Applied:
+    checksum: str
+    batch: str
+    applied_at: object
+    duration_ms: float | None
+    baseline: bool
+
+
+def classify(plan: Plan, applied: dict[str, Applied]) -> dict[str, str]:
+    """'applied', 'pending' ou 'changed' para cada arquivo dos lotes"""
+    states = {}
+    for migration in plan.migrations():
+        record = applied.get(migration.name)
+        if record is None:
+            states[migration.name] = 'pending'
+        elif record.checksum != migration.checksum:
+            states[migration.name] = 'changed'
+        else:
+            states[migration.name] = 'applied'
+    return states
+
+
+@dataclass
+class Timing:
+    migration: str
+    line: int
+    sql: str
+    ms: float
+    rows: int
+
+
+@dataclass
+class BatchResult:
+    name: str
+    migrations: list[str]
+    ms: float
+    skipped: str = ''
+
+
+class Database:
+    """Conexão com o Postgres e a tabela de controle studio_migrations"""
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError:
+            try:
+                import psycopg2 as psycopg
+            except ImportError:
+                raise MigrationError('--postgres requer psycopg: pip install "psycopg[binary]"') from None
+        self.error = psycopg.Error
+        try:
+            self.db = psycopg.connect(dsn)
+        except psycopg.Error as e:
+            raise MigrationError(f'sem conexão com o Postgres: {_message(e)}') from None
+
+    def close(self) -> None:
+        self.db.close()
+
+    @contextmanager
+    def transaction(self, commit: bool = True) -> Iterator[Any]:
+        """Cursor numa transação; erro do driver vira MigrationError e desfaz tudo
+
+        Com `commit=False` a transação fica aberta para o próximo bloco
+        (o ensaio do apply desfaz tudo no fim).
+        """
+        try:
+            with self.db.cursor() as cursor:
+                yield cursor
+        except self.error as e:
+            self.db.rollback()
+            raise MigrationError(f'Postgres: {_message(e)}') from None
+        except BaseException:
+            self.db.rollback()
+            raise
+        if commit:
+            self.db.commit()
+
+    def setup(self) -> None:
+        with self.transaction() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TABLE} (
+                    filename TEXT PRIMARY KEY,
+                    checksum TEXT NOT NULL,
+                    batch TEXT NOT NULL,
+                    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    duration_ms DOUBLE PRECISION,
+                    baseline BOOLEAN NOT NULL DEFAULT FALSE
+                )
+            """)
+
+    def _applied(self, cursor) -> dict[str, Applied]:
+        cursor.execute(f'SELECT filename, checksum, batch, applied_at, duration_ms, baseline FROM {TABLE}')
+        return {row[0]: Applied(*row[1:]) for row in cursor.fetchall()}
+
+    def applied(self) -> dict[str, Applied]:
+        with self.transaction() as cursor:
+            return self._applied(cursor)
+
+    def extensions(self) -> set[str]:
+        with self.transaction() as cursor:
+            cursor.execute('SELECT extname FROM pg_extension')
+            return {row[0] for row in cursor.fetchall()}
+
+    def record(self, cursor, migration: Migration, duration_ms: float | None, baseline: bool) -> None:
+        cursor.execute(
+            f"""INSERT INTO {TABLE} (filename, checksum, batch, duration_ms, baseline)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (filename) DO UPDATE SET
+                    checksum = EXCLUDED.checksum, batch = EXCLUDED.batch, applied_at = NOW(),
+                    duration_ms = EXCLUDED.duration_ms, baseline = EXCLUDED.baseline""",
+            (migration.name, migration.checksum, migration.batch, duration_ms, baseline),
+        )
+
+    def _begin(self, cursor, lock_timeout: str | None, statement_timeout: str | None) -> None:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (LOCK_KEY,))
+        if lock_timeout:
+            cursor.execute(f"SET LOCAL lock_timeout = '{_interval(lock_timeout)}'")
+        if statement_timeout:
+            cursor.execute(f"SET LOCAL statement_timeout = '{_interval(statement_timeout)}'")
+
+    def apply(
+        self,
+        plan: Plan,
+        *,
+        rehearse: bool = False,
+        lock_timeout: str | None = '10s',
+        statement_timeout: str | None = None,
+        timings: list[Timing] | None = None,
+    ) -> list[BatchResult]:
+        """Aplica os arquivos pendentes, um lote por transação
+
+        Com `rehearse` tudo roda numa transação só, desfeita no fim.
+        Arquivos alterados depois de aplicados travam tudo antes do primeiro
+        comando. Os tempos de cada comando vão para `timings`, inclusive os
+        do lote que falhou.
+        """
+        timings = [] if timings is None else timings
+        changed = [name for name, state in classify(plan, self.applied()).items() if state == 'changed']
+        if changed:
+            raise MigrationError(
+                f"alterado(s) depois de aplicado(s): {', '.join(changed)}; "
+                'crie um script novo ou registre com baseline'
+            )
+        installed = self.extensions()
+        results = []
+        for batch in plan.batches:
+            missing = [name for name in batch.extensions if name not in installed]
+            if missing:
+                results.append(BatchResult(batch.name, [], 0.0, f"faltam extensões: {', '.join(missing)}"))
+                continue
+            with self.transaction(commit=not rehearse) as cursor:
+                self._begin(cursor, lock_timeout, statement_timeout)
+                # Relido sob o lock: outro apply pode ter terminado enquanto esperávamos
+                states = classify(plan, self._applied(cursor))
+                pending = [m for m in batch.migrations if states[m.name] == 'pending']
+                started = time.perf_counter()
+                for migration in pending:
+                    duration = self._run(cursor, migration, timings)
+                    self.record(cursor, migration, duration, baseline=False)
+            results.append(BatchResult(batch.name, [m.name for m in pending], (time.perf_counter() - started) * 1000))
+        if rehearse:
+            self.db.rollback()
+        return results
+
+    def _run(self, cursor, migration: Migration, timings: list[Timing]) -> float:
+        total = 0.0
+        for statement in migration.statements:
+            started = time.perf_counter()
+            try:
+                cursor.execute(statement.sql)
+            except self.error as e:
+                ms = (time.perf_counter() - started) * 1000
+                timings.append(Timing(migration.name, statement.line, statement.preview, ms, -1))
+                raise MigrationError(f'{migration.name}:{statement.line}: {_message(e)}\n   {statement.preview}') from None
+            ms = (time.perf_counter() - started) * 1000
+            timings.append(Timing(migration.name, statement.line, statement.preview, ms, cursor.rowcount))
+            total += ms
+        return total
+
+    def baseline(self, migrations: Sequence[Migration]) -> None:
+        """Registra como aplicados sem rodar (o banco já tem o efeito deles)"""
+        with self.transaction() as cursor:
+            self._begin(cursor, None, None)
+            for migration in migrations:
+                self.record(cursor, migration, None, baseline=True)
+
+
+def _message(error: Exception) -> str:
+    """Primeira linha da mensagem do driver (as seguintes repetem o comando)"""
+    text = str(error).strip()
+    return text.splitlines()[0] if text else type(error).__name__
+
+
+def _interval(value: str) -> str:
+    if not re.fullmatch(r'\d+\s*(ms|s|min|h)?', value.strip()):
+        raise MigrationError(f'tempo inválido: {value!r} (ex.: 500ms, 10s, 2min)')
+    return value.strip()
+
+
+def print_plan(plan: Plan) -> None:
+    for batch in plan.batches:
+        extensions = f" (requer {', '.join(batch.extensions)})" if batch.extensions else ''
+        print(f"📦 {batch.name}: {batch.description}{extensions}")
+        for migration in batch.migrations:
+            dropped = f", {len(migration.dropped)} BEGIN/COMMIT removido(s)" if migration.dropped else ''
+            print(f"   {migration.checksum[:12]}  {migration.name}  {len(migration.statements)} comando(s){dropped}")
+    print(f"⏭️  {len(plan.skipped)} fora do plano:")
+    for name, reason in plan.skipped.items():
+        print(f"   {name}: {reason}")
+
+
+def print_status(plan: Plan, applied: dict[str, Applied]) -> None:
+    states = classify(plan, applied)
+    icons = {'applied': '✅', 'pending': '⏳', 'changed': '✏️ '}
+    for migration in plan.migrations():
+        state = states[migration.name]
+        line = f"{icons[state]} {migration.batch:<9} {migration.name}"
+        record = applied.get(migration.name)
+        if record is not None:
+            when = f"{record.applied_at:%Y-%m-%d %H:%M}"
+            line += f"  ({'baseline' if record.baseline else 'aplicado'} em {when})"
+        if state == 'changed':
+            line += f"  checksum {record.checksum[:12]} → {migration.checksum[:12]}"
+        print(line)
+    for name in sorted(set(applied) - set(states)):
+        print(f"❓ registrado em {TABLE} mas fora dos lotes: {name}")
+    counts = {state: sum(value == state for value in states.values()) for state in icons}
+    print(f"📊 {counts['applied']} aplicado(s), {counts['pending']} pendente(s), {counts['changed']} alterado(s)")
+
+
+def print_timings(timings: list[Timing], slow_ms: float, top: int) -> None:
+    """Todos os comandos acima de `slow_ms`, completando até `top` com os mais lentos"""
+    if not timings:
+        return
+    ranked = sorted(timings, key=lambda t: t.ms, reverse=True)
+    slow = sum(t.ms >= slow_ms for t in ranked)
+    print(f"⏱️  {len(timings)} comando(s), {slow} acima de {slow_ms:.0f} ms:")
+    for timing in ranked[:max(top, slow)]:
+        icon = '🐢' if timing.ms >= slow_ms else '  '
+        rows = f"  {timing.rows} linha(s)" if timing.rows > 0 else ''
+        print(f"   {icon} {timing.ms:8.1f} ms  {timing.migration}:{timing.line}  {timing.sql}{rows}")
+
+
+def write_report(path: Path, results: list[BatchResult], timings: list[Timing], rehearse: bool) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'rehearse': rehearse,
+        'batches': [asdict(result) for result in results],
+        'statements': [asdict(timing) for timing in timings],
+    }
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.migrate',
+        description='Aplica os scripts .sql da raiz em lotes, com checksum e tempo por comando',
+    )
+    parser.add_argument('--postgres', metavar='DSN', default=os.environ.get('DATABASE_URL'),
+                        help='Banco alvo (padrão: $DATABASE_URL)')
+    parser.add_argument('--manifest', type=Path, default=MANIFEST, help=f'Ordem dos lotes (padrão: {MANIFEST.name})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('plan', help='Mostrar lotes e checksums sem conectar')
+    commands.add_parser('status', help='Comparar o plano com o que já foi aplicado')
+    apply = commands.add_parser('apply', help='Aplicar os arquivos pendentes')
+    apply.add_argument('--rehearse', action='store_true', help='Rodar tudo numa transação e desfazer no fim')
+    apply.add_argument('--slow', type=float, default=200.0, metavar='MS', help='Destacar comandos acima disso (padrão: 200)')
+    apply.add_argument('--top', type=int, default=10, help='Quantos comandos listar no mínimo (padrão: 10)')
+    apply.add_argument('--lock-timeout', default='10s', help="lock_timeout de cada lote; '0' desliga (padrão: 10s)")
+    apply.add_argument('--statement-timeout', help='statement_timeout de cada lote (padrão: nenhum)')
+    apply.add_argument('--report', type=Path, help='Gravar os tempos por comando em JSON')
+    baseline = commands.add_parser('baseline', help='Registrar como aplicados sem rodar (banco já atualizado à mão)')
+    baseline.add_argument('files', nargs='*', help='Arquivos (padrão: todos os pendentes)')
+    args = parser.parse_args(argv)
+
+    try:
+        plan = load_plan(manifest=args.manifest)
+        if args.command == 'plan':
+            print_plan(plan)
+            return 0
+        if not args.postgres:
+            raise MigrationError('informe --postgres DSN ou a variável DATABASE_URL')
+
+        database = Database(args.postgres)
+        try:
+            database.setup()
+            if args.command == 'status':
+                print_status(plan, database.applied())
+                return 0
+
+            if args.command == 'baseline':
+                states = classify(plan, database.applied())
+                names = args.files or [name for name, state in states.items() if state == 'pending']
+                migrations = [plan.find(name) for name in names]
+                database.baseline(migrations)
+                print(f"📌 {len(migrations)} arquivo(s) registrado(s) sem rodar: {', '.join(names) or 'nenhum'}")
+                return 0
+
+            timings: list[Timing] = []
+            started = time.perf_counter()
+            try:
+                results = database.apply(
+                    plan,
+                    rehearse=args.rehearse,
+                    lock_timeout=None if args.lock_timeout == '0' else args.lock_timeout,
+                    statement_timeout=args.statement_timeout,
+                    timings=timings,
+                )
+            except MigrationError:
+                print_timings(timings, args.slow, args.top)
+                raise
+            for result in results:
+                if result.skipped:
+                    print(f"⏭️  {result.name}: {result.skipped}")
+                elif result.migrations:
+                    print(f"📦 {result.name}: {len(result.migrations)} arquivo(s) em {result.ms:.0f} ms ({', '.join(result.migrations)})")
+            print_timings(timings, args.slow, args.top)
+            if args.report:
+                write_report(args.report, results, timings, args.rehearse)
+            applied = sum(len(result.migrations) for result in results)
+            verb = 'ensaiado(s) e desfeito(s)' if args.rehearse else 'aplicado(s)'
+            print(f"✅ {applied} arquivo(s) {verb} em {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            database.close()
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
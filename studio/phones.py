@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telefone canônico (E.164) para o login por telefone
+
+getNailDesignerByPhone e getClientByPhone fazem `.eq('phone', telefone)`
+com o texto digitado, então "(11) 99999-9999" e "11999999999" não se
+encontram e a pessoa tenta de novo, multiplicando as chamadas. Aqui:
+
+- `canonical_phone` leva qualquer forma de um número brasileiro para
+  +55DDDNÚMERO (celular antigo de 8 dígitos ganha o 9); números de outros
+  países só são aceitos com + explícito. As mesmas regras estão em
+  phone_to_e164 (add-phone-e164-columns.sql) e em src/utils/phoneUtils.ts;
+- `check` confere phone_e164 em nail_designers e clients (quem preenche as
+  linhas antigas é o próprio add-phone-e164-columns.sql) e relata linhas
+  ainda vazias, números inválidos, telefones repetidos e linhas em que o
+  banco e `canonical_phone` discordam;
+- `PhoneLookup` busca pela coluna indexada, uma requisição por login. Só
+  as respostas negativas ficam num cache TTL + LRU, por pouco tempo: quem
+  digitou um número que não existe e tenta de novo em outro formato não
+  vai ao banco, e quem acabou de se cadastrar entra logo. Linhas
+  encontradas não são guardadas, porque senha e is_active precisam vir
+  do banco a cada login;
+- `bench` compara, contra o PostgREST local de studio.standin, a busca
+  exata de hoje (com as novas tentativas que um erro de formato causa) e a
+  busca canônica, sem e com o cache de respostas negativas.
+
+Uso:
+    python -m studio.phones normalize TELEFONE...
+    python -m studio.phones check [dump.json | snapshot.sqlite]
+    python -m studio.phones bench [--designers 200] [--clients 2000] [--logins 1500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Mapping, Sequence
+
+from .latency import Latency
+from .postgrest import PostgrestClient, PostgrestError
+from .standin import PostgrestStandIn
+from .tables import load_dump
+
+COUNTRY_CODE = '55'
+PHONE_TABLES = ('nail_designers', 'clients')
+NATIONAL = re.compile(r'[1-9][1-9]\d{8,9}')
+NON_DIGITS = re.compile(r'\D')
+
+CACHE_SIZE = 4096
+LOOKUP_TTL = 300.0
+NEGATIVE_TTL = 15.0
+
+
+def canonical_phone(raw: object) -> str | None:
+    """Telefone em E.164 (+5511999999999) ou None se não der para saber qual é"""
+    if raw is None:
+        return None
+    text = str(raw).strip()
+    digits = NON_DIGITS.sub('', text)
+    international = text.startswith('+')
+    if not international and digits.startswith('00'):
+        digits, international = digits[2:], True
+    if international:
+        if not digits.startswith(COUNTRY_CODE):
+            return f'+{digits}' if 8 <= len(digits) <= 15 else None
+        digits = digits[len(COUNTRY_CODE):]
+    else:
+        if digits.startswith('0'):
+            digits = digits[1:]  # Prefixo de longa distância: 0 DDD número ou 0 XX DDD número
+            if len(digits) in (12, 13):
+                digits = digits[2:]  # Código da operadora
+        elif len(digits) in (12, 13) and digits.startswith(COUNTRY_CODE):
+            digits = digits[len(COUNTRY_CODE):]  # 55 sem o +, copiado da agenda
+    if len(digits) == 10 and digits[2] in '6789':
+        digits = f'{digits[:2]}9{digits[2:]}'
+    if not NATIONAL.fullmatch(digits) or (len(digits) == 11 and digits[2] != '9'):
+        return None
+    return f'+{COUNTRY_CODE}{digits}'
+
+
+def phone_variants(e164: str) -> list[str]:
+    """Formas em que o mesmo número costuma estar gravado em `phone` (linhas sem phone_e164)"""
+    if not e164.startswith(f'+{COUNTRY_CODE}'):
+        return [e164, e164[1:]]
+    national = e164[len(COUNTRY_CODE) + 1:]
+    area, number = national[:2], national[2:]
+    numbers = [number]
+    if len(number) == 9:
+        numbers.append(number[1:])  # Cadastro anterior ao nono dígito
+    found: list[str] = []
+    for item in numbers:
+        head, tail = item[:-4], item[-4:]
+        for form in (
+            f'{area}{item}', f'({area}) {head}-{tail}', f'({area}){head}-{tail}', f'{area} {head}-{tail}',
+            f'{area} {item}', f'0{area}{item}', f'+{COUNTRY_CODE}{area}{item}', f'{COUNTRY_CODE}{area}{item}',
+            f'+{COUNTRY_CODE} {area} {head}-{tail}', f'+{COUNTRY_CODE} ({area}) {head}-{tail}',
+        ):
+            if form not in found:
+                found.append(form)
+    return found
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Dicionário com validade por entrada e descarte do menos usado (LRU)"""
+
+    def __init__(self, maxsize: int = CACHE_SIZE, ttl: float = LOOKUP_TTL, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: object = _MISSING) -> object:
+        """Valor guardado ou `default` (`_MISSING` distingue um None guardado de uma falta)"""
+        with self.lock:
+            found = self.entries.get(key)
+            if found is None or found[0] <= self.clock():
+                if found is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return found[1]
+
+    def put(self, key: Hashable, value: object, ttl: float | None = None) -> None:
+        with self.lock:
+            self.entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+class PhoneLookup:
+    """Designer/cliente por telefone: coluna phone_e164 indexada, com cache de faltas
+
+    Um número encontrado é sempre relido (uma requisição, pelo índice), então
+    troca de senha, bloqueio e troca de telefone valem na hora. Um número sem
+    dono fica `negative_ttl` segundos no cache (0 desliga). Se a coluna ainda
+    não existe (add-phone-e164-columns.sql não rodou), cai para
+    `phone=in.(variantes)` e continua assim até o processo reiniciar. Quem
+    cadastra ou altera um telefone deve chamar `invalidate`.
+    """
+
+    def __init__(self, client: PostgrestClient, cache: TTLCache | None = None, negative_ttl: float = NEGATIVE_TTL):
+        self.client = client
+        self.cache = cache if cache is not None else TTLCache(ttl=negative_ttl)
+        self.negative_ttl = negative_ttl
+        self.legacy = False
+        self.requests = 0
+
+    def designer_by_phone(self, phone: str) -> dict | None:
+        return self.find('nail_designers', phone)
+
+    def client_by_phone(self, phone: str) -> dict | None:
+        return self.find('clients', phone)
+
+    def find(self, table: str, phone: str) -> dict | None:
+        key = canonical_phone(phone)
+        if key is None:
+            return None
+        if self.negative_ttl > 0 and self.cache.get((table, key)) is None:
+            return None  # Ninguém tinha este número há pouco
+        row = self._fetch(table, key)
+        if row is None and self.negative_ttl > 0:
+            self.cache.put((table, key), None, self.negative_ttl)
+        return row
+
+    def invalidate(self, phone: str) -> None:
+        key = canonical_phone(phone)
+        if key is not None:
+            for table in PHONE_TABLES:
+                self.cache.invalidate((table, key))
+
+    def _fetch(self, table: str, key: str) -> dict | None:
+        if not self.legacy:
+            self.requests += 1
+            try:
+                rows = self.client.select(table, [('phone_e164', f'eq.{key}')], order='created_at.asc', limit=1)
+                return rows[0] if rows else None
+            except PostgrestError as e:
+                if e.status != 400 or 'phone_e164' not in str(e):
+                    raise
+                self.legacy = True
+        self.requests += 1
+        variants = ','.join(_quote(item) for item in phone_variants(key))
+        rows = self.client.select(table, [('phone', f'in.({variants})')], order='created_at.asc', limit=1)
+        return rows[0] if rows else None
+
+
+@dataclass
+class PhoneCheck:
+    table: str
+    rows: int = 0
+    pending: list[str] = field(default_factory=list)  # ids com phone_e164 vazio e telefone válido
+    mismatched: dict[str, tuple[str, str]] = field(default_factory=dict)  # id -> (gravado, esperado)
+    invalid: list[tuple[str, object]] = field(default_factory=list)  # (id, phone)
+    duplicates: dict[str, list[str]] = field(default_factory=dict)  # phone_e164 -> ids
+
+
+def check_phones(table: str, rows: Iterable[Mapping]) -> PhoneCheck:
+    """Compara phone_e164 de cada linha com `canonical_phone` e junta os telefones repetidos"""
+    check = PhoneCheck(table)
+    owners: dict[str, list[str]] = {}
+    for row in rows:
+        check.rows += 1
+        key = canonical_phone(row.get('phone'))
+        if key is None:
+            if row.get('phone'):
+                check.invalid.append((str(row['id']), row.get('phone')))
+            continue
+        owners.setdefault(key, []).append(str(row['id']))
+        stored = row.get('phone_e164')
+        if stored is None:
+            check.pending.append(str(row['id']))
+        elif stored != key:
+            check.mismatched[str(row['id'])] = (stored, key)
+    check.duplicates = {key: ids for key, ids in owners.items() if len(ids) > 1}
+    return check
+
+
+# --- benchmark -------------------------------------------------------------
+
+def _formats(e164: str) -> list[str]:
+    """Como a mesma pessoa digita o número na tela de login"""
+    national = e164[3:]
+    area, number = national[:2], national[2:]
+    return [
+        f'({area}) {number[:-4]}-{number[-4:]}',
+        f'{area}{number}',
+        f'{area} {number[:-4]}-{number[-4:]}',
+        f'+55 {area} {number}',
+        f'0{area}{number}',
+    ]
+
+
+def synthetic_tables(designers: int, clients: int, seed: int = 7) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    numbers: set[str] = set()
+    while len(numbers) < designers + clients:
+        numbers.add(f'+55{rng.choice([11, 21, 31, 41, 51, 61, 71, 81, 85, 92])}9{rng.randrange(10**8):08d}')
+    ordered = sorted(numbers)
+    rng.shuffle(ordered)
+    tables: dict[str, list[dict]] = {'nail_designers': [], 'clients': []}
+    for index, e164 in enumerate(ordered):
+        table = 'nail_designers' if index < designers else 'clients'
+        tables[table].append({
+            'id': f'{index:08d}-0000-4000-8000-000000000000',
+            'name': f'Pessoa {index}',
+            'phone': rng.choice(_formats(e164)),
+            'phone_e164': e164,  # Como depois de add-phone-e164-columns.sql
+            'password': '123456',
+            'created_at': f'2025-01-01T00:00:{index % 60:02d}+00:00',
+        })
+    return tables
+
+
+def _logins(
+    tables: Mapping[str, list[dict]],
+    count: int,
+    seed: int,
+    strangers: float = 0.1,
+) -> list[tuple[str, str, list[str]]]:
+    """(tabela, número, formas que a pessoa tenta em ordem) com poucas pessoas concentrando os logins
+
+    Uma fração `strangers` digita um número sem cadastro e tenta todas as
+    formas antes de desistir: é o caso em que o cache de faltas trabalha.
+    """
+    rng = random.Random(seed)
+    people = [(table, canonical_phone(row['phone'])) for table in PHONE_TABLES for row in tables[table]]
+    known = {e164 for _, e164 in people}
+    unknown: list[tuple[str, str]] = []
+    while len(unknown) < max(1, len(people) // 20):
+        e164 = f'+55{rng.choice([11, 21, 31])}9{rng.randrange(10**8):08d}'
+        if e164 not in known:
+            unknown.append((rng.choice(PHONE_TABLES), e164))
+    rng.shuffle(people)
+    weights = [1 / (rank + 1) for rank in range(len(people))]
+    logins = []
+    for _ in range(count):
+        pool = unknown if rng.random() < strangers else people
+        table, e164 = rng.choices(pool, weights=weights[:len(pool)])[0]
+        attempts = _formats(e164)
+        rng.shuffle(attempts)
+        logins.append((table, e164, attempts[:3]))
+    return logins
+
+
+@dataclass
+class BenchSide:
+    name: str
+    latency: Latency
+    requests: int
+    found: int
+    logins: int
+
+    def describe(self) -> str:
+        return (
+            f'{self.name}: {self.latency.describe()}; '
+            f'{self.requests / self.logins:.2f} requisição(ões)/login, {self.found / self.logins:.1%} encontrados'
+        )
+
+
+def _bench_lookup(name: str, lookup: PhoneLookup, attempts: Sequence[tuple[str, str, list[str]]]) -> BenchSide:
+    """Login pela busca canônica: quem não é encontrado tenta as outras formas"""
+    samples, found = [], 0
+    for table, _, typed in attempts:
+        started = time.perf_counter()
+        for text in typed:
+            if lookup.find(table, text) is not None:
+                found += 1
+                break
+        samples.append(time.perf_counter() - started)
+    return BenchSide(name, Latency.of(samples), lookup.requests, found, len(attempts))
+
+
+def run_bench(
+    designers: int,
+    clients: int,
+    logins: int,
+    seed: int = 7,
+) -> tuple[BenchSide, BenchSide, BenchSide, TTLCache]:
+    """Antes, depois sem cache e depois com o cache de faltas (mais o cache usado)"""
+    tables = synthetic_tables(designers, clients, seed)
+    attempts = _logins(tables, logins, seed + 1)
+    with PostgrestStandIn(tables) as server:
+        client = PostgrestClient(server.url, 'bench')
+
+        samples, requests, found = [], 0, 0
+        for table, _, typed in attempts:
+            started = time.perf_counter()
+            for text in typed:  # Hoje: .eq('phone', texto); errou o formato, tenta de novo
+                requests += 1
+                if client.select(table, [('phone', f'eq.{text}')], limit=1):
+                    found += 1
+                    break
+            samples.append(time.perf_counter() - started)
+        before = BenchSide('antes (eq exato + novas tentativas)', Latency.of(samples), requests, found, logins)
+
+        plain = _bench_lookup('depois (E.164, sem cache)', PhoneLookup(client, negative_ttl=0), attempts)
+        lookup = PhoneLookup(client)
+        cached = _bench_lookup('depois (E.164 + cache de faltas)', lookup, attempts)
+    return before, plain, cached, lookup.cache
+
+
+def _load_rows(source: Path | None) -> dict[str, list[dict]]:
+    if source is not None:
+        tables = load_dump(source)
+        return {table: tables.get(table, []) for table in PHONE_TABLES}
+    client = PostgrestClient.from_env()
+    rows = {}
+    for table in PHONE_TABLES:
+        try:
+            rows[table] = list(client.scan(table, 'id,phone,phone_e164'))
+        except PostgrestError as e:
+            if e.status != 400:
+                raise
+            rows[table] = list(client.scan(table, 'id,phone'))  # Coluna ainda não criada
+    return rows
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.phones',
+        description='Telefone canônico (E.164) para o login por telefone',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    normalize = commands.add_parser('normalize', help='Mostrar a forma canônica de cada telefone')
+    normalize.add_argument('phones', nargs='+', metavar='telefone')
+    check = commands.add_parser('check', help='Conferir phone_e164 em nail_designers e clients')
+    check.add_argument('source', type=Path, nargs='?', help='Dump JSON ou cópia .sqlite (padrão: Supabase)')
+    bench = commands.add_parser('bench', help='Latência do login por telefone, antes e depois')
+    bench.add_argument('--designers', type=int, default=200)
+    bench.add_argument('--clients', type=int, default=2000)
+    bench.add_argument('--logins', type=int, default=1500)
+    bench.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if args.command == 'normalize':
+        for phone in args.phones:
+            key = canonical_phone(phone)
+            print(f"{'📞' if key else '❌'} {phone} -> {key or 'inválido'}")
+        return 0
+
+    if args.command == 'bench':
+        before, plain, cached, cache = run_bench(args.designers, args.clients, args.logins, args.seed)
+        print(f"📊 {args.logins} login(s), {args.designers} designer(s), {args.clients} cliente(s)")
+        for side in (before, plain, cached):
+            print(f"   {side.describe()}")
+        print(f"   cache de faltas: {cache.hits} acerto(s), {cache.misses} consulta(s) sem acerto, {len(cache)} entrada(s)")
+        return 0
+
+    try:
+        rows = _load_rows(args.source)
+    except (OSError, ValueError, PostgrestError) as e:
+        print(f"❌ {e}")
+        return 1
+    checks = [check_phones(table, rows[table]) for table in PHONE_TABLES]
+    for check in checks:
+        print(
+            f"📋 {check.table}: {check.rows} linha(s), {len(check.pending)} sem phone_e164, "
+            f"{len(check.mismatched)} divergente(s), {len(check.invalid)} inválida(s)"
+        )
+        for key, (stored, expected) in sorted(check.mismatched.items())[:20]:
+            print(f"   ≠  {key}: {stored} (esperado {expected})")
+        for key, phone in check.invalid[:20]:
+            print(f"   ⚠️  {key}: {phone!r}")
+        for phone, ids in sorted(check.duplicates.items()):
+            print(f"   👥 {phone}: {len(ids)} linhas ({', '.join(ids)})")
+    if any(check.pending for check in checks):
+        print("💡 Linhas sem phone_e164: rode add-phone-e164-columns.sql (python -m studio.migrate apply)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
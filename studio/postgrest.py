@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cliente mínimo da API REST do Supabase (PostgREST), só com a stdlib
+
+Usa as mesmas variáveis do frontend (VITE_SUPABASE_URL e
+VITE_SUPABASE_ANON_KEY); SUPABASE_URL/SUPABASE_KEY também valem, para
+rodar com a service key fora do navegador.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Iterator, Mapping, Sequence
+
+DEFAULT_TIMEOUT = 30.0
+
+
+class PostgrestError(RuntimeError):
+    """Resposta de erro do PostgREST (status HTTP + mensagem do corpo)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f'HTTP {status}: {message}')
+        self.status = status
+
+
+@dataclass
+class PostgrestClient:
+    url: str
+    key: str
+    timeout: float = DEFAULT_TIMEOUT
+
+    @classmethod
+    def from_env(cls) -> 'PostgrestClient':
+        url = os.environ.get('SUPABASE_URL') or os.environ.get('VITE_SUPABASE_URL')
+        key = os.environ.get('SUPABASE_KEY') or os.environ.get('VITE_SUPABASE_ANON_KEY')
+        if not url or not key:
+            raise ValueError('Defina SUPABASE_URL e SUPABASE_KEY (ou as variáveis VITE_ do .env)')
+        return cls(url.rstrip('/'), key)
+
+    def _headers(self) -> dict[str, str]:
+        return {
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}',
+            'Accept': 'application/json',
+        }
+
+    def select(
+        self,
+        table: str,
+        filters: Mapping[str, str] | Sequence[tuple[str, str]] = (),
+        columns: str = '*',
+        order: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """GET /rest/v1/<tabela> com filtros no formato do PostgREST (ex.: {'date': 'gte.2025-12-01'})"""
+        params = list(filters.items()) if isinstance(filters, Mapping) else list(filters)
+        params.append(('select', columns))
+        if order:
+            params.append(('order', order))
+        if limit is not None:
+            params.append(('limit', str(limit)))
+        return self._request('GET', table, params)
+
+    def scan(self, table: str, columns: str = '*', page_size: int = 1000) -> Iterator[dict]:
+        """Todas as linhas da tabela, paginando por keyset em id (sem OFFSET)"""
+        last_id = None
+        while True:
+            filters = [('id', f'gt.{last_id}')] if last_id is not None else []
+            rows = self.select(table, filters, columns=columns, order='id.asc', limit=page_size)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+
+    def insert(
+        self,
+        table: str,
+        rows: Sequence[Mapping],
+        on_conflict: str | None = None,
+        ignore_duplicates: bool = False,
+    ) -> None:
+        """POST /rest/v1/<tabela> com várias linhas numa requisição (upsert com `on_conflict`)"""
+        params = [('on_conflict', on_conflict)] if on_conflict else []
+        prefer = ['return=minimal']
+        if on_conflict:
+            prefer.append('resolution=ignore-duplicates' if ignore_duplicates else 'resolution=merge-duplicates')
+        self._request('POST', table, params, [dict(row) for row in rows], {'Prefer': ','.join(prefer)})
+
+    def rpc(self, function: str, args: Mapping) -> object:
+        """POST /rest/v1/rpc/<função> (funções SQL expostas pelo PostgREST)"""
+        return self._request('POST', f'rpc/{function}', [], dict(args))
+
+    def update(self, table: str, filters: Mapping[str, str] | Sequence[tuple[str, str]], values: Mapping) -> None:
+        """PATCH /rest/v1/<tabela> nas linhas que batem com os filtros"""
+        params = list(filters.items()) if isinstance(filters, Mapping) else list(filters)
+        if not params:
+            raise ValueError('update sem filtro alteraria a tabela inteira')
+        self._request('PATCH', table, params, values, {'Prefer': 'return=minimal'})
+
+    def _request(
+        self,
+        method: str,
+        table: str,
+        params: Sequence[tuple[str, str]],
+        body: object = None,
+        headers: Mapping[str, str] | None = None,
+    ):
+        query = urllib.parse.urlencode(params, safe=',.()*:')
+        data = None
+        all_headers = self._headers()
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            all_headers['Content-Type'] = 'application/json'
+        all_headers.update(headers or {})
+        request = urllib.request.Request(
+            f'{self.url}/rest/v1/{table}?{query}', data=data, headers=all_headers, method=method,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            message = e.read().decode('utf-8', errors='replace')
+            raise PostgrestError(e.code, message) from None
+        return json.loads(payload) if payload else None
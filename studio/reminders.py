@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador de lembretes de WhatsApp com heap, no lugar dos triggers e do polling
+
+Hoje cada agendamento novo dispara whatsapp-auto-reminders.sql, que insere
+duas linhas em whatsapp_logs (24h e 6h antes), cada uma com sua própria
+subconsulta a nail_designers; e o NotificationService reenvia a fila a cada
+30 s, um item por vez. Aqui os lembretes ficam num min-heap ordenado por
+`scheduled_for` e o serviço dorme exatamente até o próximo vencer. Os que
+vencem juntos saem em lote, em paralelo, por um pool de conexões
+keep-alive com o webhook do n8n.
+
+- Cada lembrete tem uma chave de idempotência (`<agendamento>:<tipo>`),
+  enviada no cabeçalho Idempotency-Key; chaves já enviadas (inclusive as
+  que estão em whatsapp_logs com status 'sent') não são reenviadas.
+- Falha de rede, 429 e 5xx voltam para o heap com backoff exponencial;
+  depois de MAX_ATTEMPTS tentativas (ou num 4xx) o lembrete vai para
+  `failed`.
+- Remarcar ou cancelar um agendamento invalida as entradas dele no heap
+  sem varrer nada (remoção preguiçosa, como na receita do heapq). Cada
+  agendamento de uma chave ganha uma geração nova; um envio em andamento
+  de uma geração antiga não volta para o heap quando falha.
+
+Uso:
+    python -m studio.reminders dump.json [--webhook URL | --stand-in] [--concurrency 8] [--until-idle]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import heapq
+import itertools
+import json
+import os
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from pathlib import Path
+from typing import Callable, Iterable, Mapping, Sequence
+from urllib.parse import urlsplit
+
+from .standin import WebhookStandIn
+from .tables import TABLES, Row, load_dump, occupies, parse_date, parse_time
+
+# Tipo de mensagem (whatsapp_logs.message_type) e antecedência
+REMINDERS = (
+    ('reminder_24h', timedelta(hours=24)),
+    ('reminder_6h', timedelta(hours=6)),
+)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 10.0
+MAX_ATTEMPTS = 5  # Mesmo limite da fila do NotificationService
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+# Respostas que valem nova tentativa (além de erro de rede)
+RETRY_STATUS = frozenset({408, 425, 429})
+
+
+def reminder_key(appointment_id: object, kind: str) -> str:
+    return f'{appointment_id}:{kind}'
+
+
+@dataclass
+class Reminder:
+    key: str
+    appointment_id: str
+    kind: str
+    due: datetime
+    payload: dict
+    attempts: int = 0
+    last_error: str = ''
+    generation: int = 0
+
+
+def appointment_start(row: Row) -> datetime:
+    day = parse_date(row['date'])
+    minutes = parse_time(row['time'])
+    return datetime(day.year, day.month, day.day, minutes // 60, minutes % 60)
+
+
+def build_reminders(row: Row, designer_name: str, now: datetime) -> list[Reminder]:
+    """Lembretes de um agendamento; os já vencidos (mas antes do horário) saem agora"""
+    if not occupies(row) or not row.get('date') or not row.get('time'):
+        return []
+    start = appointment_start(row)
+    if start <= now:
+        return []
+    appointment_id = str(row.get('id'))
+    reminders = []
+    for kind, ahead in REMINDERS:
+        due = max(start - ahead, now)
+        reminders.append(Reminder(
+            key=reminder_key(appointment_id, kind),
+            appointment_id=appointment_id,
+            kind=kind,
+            due=due,
+            payload={
+                'appointment_id': appointment_id,
+                'phone': row.get('client_phone'),
+                'message_type': kind,
+                'scheduled_for': (start - ahead).isoformat(),
+                'template_parameters': {
+                    'client_name': row.get('client_name'),
+                    'service': row.get('service'),
+                    'date': str(row['date']),
+                    'time': str(row['time']),
+                    'designer_name': designer_name,
+                },
+            },
+        ))
+    return reminders
+
+
+class WebhookClient:
+    """POST JSON no webhook por um pool de conexões HTTP keep-alive
+
+    As conexões do http.client são bloqueantes; cada envio roda numa thread
+    do executor, com no máximo `concurrency` envios (e conexões) ao mesmo
+    tempo. Uma conexão que falha é descartada, as outras são reaproveitadas.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        username: str = '',
+        password: str = '',
+    ):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'URL de webhook inválida: {url}')
+        self.url = url
+        self._connection = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self._timeout = timeout
+        self._headers = {'Content-Type': 'application/json'}
+        if username and password:
+            credentials = base64.b64encode(f'{username}:{password}'.encode('utf-8')).decode('ascii')
+            self._headers['Authorization'] = f'Basic {credentials}'
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix='webhook')
+
+    @classmethod
+    def from_env(cls, url: str | None = None, concurrency: int = DEFAULT_CONCURRENCY) -> 'WebhookClient':
+        url = url or os.environ.get('N8N_WEBHOOK_URL') or os.environ.get('VITE_N8N_WEBHOOK_URL')
+        if not url:
+            raise ValueError('Defina N8N_WEBHOOK_URL (ou VITE_N8N_WEBHOOK_URL) ou use --webhook')
+        return cls(
+            url,
+            concurrency,
+            username=os.environ.get('VITE_N8N_USERNAME', ''),
+            password=os.environ.get('VITE_N8N_PASSWORD', ''),
+        )
+
+    def _post(self, body: bytes, key: str) -> int:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connection(self._host, self._port, timeout=self._timeout)
+        try:
+            connection.request('POST', self._path, body, {**self._headers, 'Idempotency-Key': key})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, HTTPException):
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        return response.status
+
+    async def post(self, payload: Mapping, key: str) -> int:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._post, body, key)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+@dataclass
+class SchedulerStats:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    superseded: int = 0
+    batches: int = 0
+
+
+class ReminderScheduler:
+    """Min-heap de lembretes por vencimento, com envio em lote quando vencem"""
+
+    def __init__(
+        self,
+        client: WebhookClient,
+        clock: Callable[[], datetime] = datetime.now,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff: float = BACKOFF_BASE,
+        max_backoff: float = BACKOFF_MAX,
+        sent: Iterable[str] = (),
+        on_sent: Callable[[Reminder], None] | None = None,
+    ):
+        self.client = client
+        self.clock = clock
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_sent = on_sent
+        # Chaves já entregues: nunca voltam para o heap
+        self.sent: set[str] = set(sent)
+        self.failed: list[Reminder] = []
+        self.stats = SchedulerStats()
+        # Entradas [vencimento, sequência, lembrete]; lembrete None = cancelada
+        self._heap: list[list] = []
+        self._entries: dict[str, list] = {}
+        # Lembrete vigente (com a geração) de cada chave na fila ou em envio;
+        # as chaves em envio continuam em _by_appointment para que o
+        # cancelamento as pegue
+        self._current: dict[str, Reminder] = {}
+        self._by_appointment: dict[str, set[str]] = {}
+        self._counter = itertools.count()
+        self._generations = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._inflight: set[asyncio.Task] = set()
+        self._error: BaseException | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, reminder: Reminder) -> bool:
+        """Agenda (ou reagenda) um lembrete; False se a chave já foi enviada"""
+        if reminder.key in self.sent:
+            return False
+        self.cancel(reminder.key)
+        reminder.generation = next(self._generations)
+        self._current[reminder.key] = reminder
+        self._by_appointment.setdefault(reminder.appointment_id, set()).add(reminder.key)
+        self._enqueue(reminder)
+        return True
+
+    def _enqueue(self, reminder: Reminder) -> None:
+        entry = [reminder.due, next(self._counter), reminder]
+        self._entries[reminder.key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()  # Vence antes do que o laço estava esperando
+
+    def is_current(self, reminder: Reminder) -> bool:
+        current = self._current.get(reminder.key)
+        return current is not None and current.generation == reminder.generation
+
+    def cancel(self, key: str) -> bool:
+        """Tira a chave da fila; se estiver em envio, a próxima tentativa não acontece"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[2] = None
+        reminder = self._current.pop(key, None)
+        if reminder is None:
+            return False
+        keys = self._by_appointment.get(reminder.appointment_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_appointment[reminder.appointment_id]
+        return True
+
+    def cancel_appointment(self, appointment_id: object) -> int:
+        """Cancela os lembretes do agendamento, na fila ou em envio"""
+        keys = list(self._by_appointment.get(str(appointment_id), ()))
+        for key in keys:
+            self.cancel(key)
+        return len(keys)
+
+    def schedule_appointment(self, row: Row, designer_name: str = '') -> list[Reminder]:
+        """Inclusão, remarcação ou cancelamento de um agendamento"""
+        self.cancel_appointment(row.get('id'))
+        reminders = [
+            reminder for reminder in build_reminders(row, designer_name, self.clock())
+            if self.push(reminder)
+        ]
+        return reminders
+
+    def next_due(self) -> datetime | None:
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: datetime) -> list[Reminder]:
+        due = []
+        heap = self._heap
+        while heap and (heap[0][2] is None or heap[0][0] <= now):
+            entry = heapq.heappop(heap)
+            reminder = entry[2]
+            if reminder is not None:
+                del self._entries[reminder.key]
+                due.append(reminder)
+        return due
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _dispatch(self, reminder: Reminder) -> None:
+        reminder.attempts += 1
+        try:
+            status = await self.client.post(reminder.payload, reminder.key)
+            retry = status >= 500 or status in RETRY_STATUS
+            reminder.last_error = '' if status < 300 else f'HTTP {status}'
+        except (OSError, HTTPException) as e:
+            status = 0
+            retry = True
+            reminder.last_error = str(e) or type(e).__name__
+
+        current = self.is_current(reminder)
+        if 200 <= status < 300:
+            self.stats.sent += 1
+            if current:
+                # Remarcado durante o envio: a geração nova ainda precisa sair
+                self.sent.add(reminder.key)
+                self.cancel(reminder.key)
+            if self.on_sent:
+                self.on_sent(reminder)
+        elif not current:
+            self.stats.superseded += 1  # Remarcado ou cancelado durante o envio
+        elif retry and reminder.attempts < self.max_attempts:
+            reminder.due = self.clock() + timedelta(seconds=self._retry_delay(reminder.attempts))
+            self.stats.retried += 1
+            self._enqueue(reminder)
+        else:
+            self.cancel(reminder.key)
+            self.failed.append(reminder)
+            self.stats.failed += 1
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        if not task.cancelled() and task.exception() and self._error is None:
+            self._error = task.exception()  # Bug, não falha de envio: run() repassa
+        self._wakeup.set()
+
+    async def run(self, until_idle: bool = False, stop: asyncio.Event | None = None) -> None:
+        """Laço principal: dorme até o próximo vencimento (ou até o heap mudar)"""
+        while not (stop and stop.is_set()):
+            if self._error is not None:
+                raise self._error
+            self._wakeup.clear()
+            due = self.next_due()
+            if due is None:
+                if until_idle and not self._inflight:
+                    break
+                timeout = None
+            else:
+                timeout = (due - self.clock()).total_seconds()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except TimeoutError:
+                    pass
+                continue
+
+            batch = self.pop_due(self.clock())
+            if batch:
+                self.stats.batches += 1
+            for reminder in batch:
+                task = asyncio.create_task(self._dispatch(reminder))
+                self._inflight.add(task)
+                task.add_done_callback(self._done)
+        if self._inflight:
+            await asyncio.gather(*self._inflight)
+
+
+def sent_keys(logs: Iterable[Row]) -> set[str]:
+    """Chaves dos lembretes que whatsapp_logs já registra como enviados"""
+    return {
+        reminder_key(row['appointment_id'], row['message_type'])
+        for row in logs
+        if row.get('status') == 'sent' and row.get('appointment_id') and row.get('message_type')
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.reminders',
+        description='Envia os lembretes de WhatsApp na hora certa pelo webhook do n8n',
+    )
+    parser.add_argument('dump', type=Path, help='JSON com appointments, nail_designers e (opcional) whatsapp_logs')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--webhook', help='URL do webhook (padrão: N8N_WEBHOOK_URL)')
+    target.add_argument('--stand-in', action='store_true', help='Enviar para um webhook local de teste')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Envios simultâneos')
+    parser.add_argument('--now', type=datetime.fromisoformat, help='Fingir que agora é esta data/hora')
+    parser.add_argument('--until-idle', action='store_true', help='Sair quando não houver mais lembretes')
+    args = parser.parse_args(argv)
+
+    try:
+        # whatsapp_logs só existe no dump JSON; a cópia local não a espelha
+        tables = load_dump(args.dump, TABLES + ('whatsapp_logs',))
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    clock = datetime.now
+    if args.now:
+        shift = args.now - datetime.now()
+        clock = lambda: datetime.now() + shift  # noqa: E731
+
+    async def serve(url: str | None) -> ReminderScheduler:
+        client = WebhookClient.from_env(url, args.concurrency)
+        scheduler = ReminderScheduler(client, clock, sent=sent_keys(tables['whatsapp_logs']))
+        names = {str(row.get('id')): row.get('name') or '' for row in tables['nail_designers']}
+        started = time.perf_counter()
+        for row in tables['appointments']:
+            scheduler.schedule_appointment(row, names.get(str(row.get('designer_id')), ''))
+        print(f"⏰ {len(scheduler)} lembrete(s) no heap ({(time.perf_counter() - started) * 1000:.1f} ms), próximo: {scheduler.next_due()}")
+        try:
+            await scheduler.run(until_idle=args.until_idle)
+        finally:
+            client.close()
+        return scheduler
+
+    try:
+        if args.stand_in:
+            with WebhookStandIn() as stand_in:
+                scheduler = asyncio.run(serve(stand_in.url))
+                print(f"📨 Webhook local recebeu {len(stand_in.state.received)} lembrete(s)")
+        else:
+            scheduler = asyncio.run(serve(args.webhook))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\n⏹️ Agendador parado")
+        return 0
+
+    stats = scheduler.stats
+    print(f"✅ {stats.sent} enviado(s) em {stats.batches} lote(s), {stats.retried} nova(s) tentativa(s), {stats.failed} falha(s)")
+    for reminder in scheduler.failed:
+        print(f"   ❌ {reminder.key}: {reminder.last_error}")
+    return 1 if scheduler.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rollups de estatísticas em colunas NumPy, materializados na cópia local
+
+Statistics.tsx e o SuperAdminDashboard recalculam tudo no navegador: um
+`allAppointments.filter(...)` por designer e vários `reduce` para receita e
+contagem de ativos/cancelados. Aqui os agendamentos viram colunas NumPy
+(designer codificado em inteiros, data em datetime64[D], status em códigos,
+preço em centavos) e os agregados saem de group-bys vetorizados
+(np.unique + np.bincount):
+
+- por designer e dia: quantidade por status e receita (sem cancelados,
+  como em Statistics.tsx);
+- por designer e mês: o mesmo, somado a partir das mesmas colunas.
+
+Os resultados ficam em tabelas rollup_daily/rollup_monthly do mesmo
+arquivo SQLite de studio.snapshot. Depois de criados, todo Snapshot aberto
+nesse arquivo os mantém em dia: cada escrita em appointments (sync,
+import, reconcile, studio.dedup) vira um delta (linha antiga com peso -1,
+nova com +1) somado aos rollups na mesma transação. Os painéis só leem
+agregados prontos, e a janela de 30 dias é a soma de no máximo 30 linhas
+indexadas.
+
+Requer numpy.
+
+Uso:
+    python -m studio.rollups rebuild [--db ARQUIVO]
+    python -m studio.rollups sync [--db ARQUIVO]
+    python -m studio.rollups show --designer <id> [--date D] [--window 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .postgrest import PostgrestClient, PostgrestError
+from .snapshot import DEFAULT_DB, Change, Snapshot
+from .tables import CANCELLED, Row
+
+# Códigos de status nas colunas; 'canceled' conta como cancelado
+STATUSES = ('pending', 'confirmed', 'completed', 'cancelled', 'other')
+_STATUS_CODE = {name: code for code, name in enumerate(STATUSES)}
+_STATUS_CODE.update({name: _STATUS_CODE['cancelled'] for name in CANCELLED})
+_CANCELLED_CODE = _STATUS_CODE['cancelled']
+_OTHER_CODE = _STATUS_CODE['other']
+
+WINDOW_DAYS = 30
+_COUNTS = ', '.join(STATUSES)
+
+
+@dataclass
+class AppointmentColumns:
+    """Agendamentos em colunas; `weight` é +1 (soma) ou -1 (desfaz uma versão antiga)"""
+
+    designers: np.ndarray  # ids únicos; `designer` indexa aqui
+    designer: np.ndarray
+    day: np.ndarray
+    status: np.ndarray
+    cents: np.ndarray
+    weight: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row], weight: int = 1) -> 'AppointmentColumns':
+        rows = [row for row in rows if row.get('date') and row.get('designer_id')]
+        designers, designer = np.unique(
+            np.array([str(row['designer_id']) for row in rows], dtype=object).astype(str),
+            return_inverse=True,
+        )
+        return cls(
+            designers=designers,
+            designer=designer.astype(np.int32),
+            day=np.array([str(row['date'])[:10] for row in rows], dtype='datetime64[D]'),
+            status=np.array(
+                [_STATUS_CODE.get(str(row.get('status') or 'pending'), _OTHER_CODE) for row in rows],
+                dtype=np.int8,
+            ),
+            cents=np.rint(np.array([float(row.get('price') or 0) for row in rows]) * 100).astype(np.int64),
+            weight=np.full(len(rows), weight, dtype=np.int64),
+        )
+
+    @classmethod
+    def concat(cls, parts: Sequence['AppointmentColumns']) -> 'AppointmentColumns':
+        designers, remap = np.unique(np.concatenate([part.designers for part in parts]), return_inverse=True)
+        codes, offset = [], 0
+        for part in parts:
+            codes.append(remap[offset:offset + len(part.designers)][part.designer])
+            offset += len(part.designers)
+        return cls(
+            designers=designers,
+            designer=np.concatenate(codes).astype(np.int32),
+            day=np.concatenate([part.day for part in parts]),
+            status=np.concatenate([part.status for part in parts]),
+            cents=np.concatenate([part.cents for part in parts]),
+            weight=np.concatenate([part.weight for part in parts]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.designer)
+
+
+@dataclass
+class Rollup:
+    """Agregados por (designer, período): contagens por status e receita em centavos"""
+
+    designer_ids: np.ndarray
+    periods: np.ndarray
+    counts: np.ndarray  # (grupos, len(STATUSES))
+    revenue: np.ndarray
+
+    def rows(self) -> list[tuple]:
+        return [
+            (str(designer), str(period), *map(int, counts), int(revenue))
+            for designer, period, counts, revenue in zip(self.designer_ids, self.periods, self.counts, self.revenue)
+        ]
+
+
+def group(columns: AppointmentColumns, unit: str = 'D') -> Rollup:
+    """Group-by (designer, dia ou mês) com np.unique + np.bincount"""
+    if not len(columns):
+        empty = np.array([], dtype=str)
+        return Rollup(empty, empty, np.zeros((0, len(STATUSES)), dtype=np.int64), np.zeros(0, dtype=np.int64))
+    period = columns.day.astype(f'datetime64[{unit}]')
+    ticks = period.astype(np.int64)
+    span = int(ticks.max() - ticks.min()) + 1
+    key = columns.designer.astype(np.int64) * span + (ticks - ticks.min())
+    keys, inverse = np.unique(key, return_inverse=True)
+    groups = len(keys)
+
+    width = len(STATUSES)
+    counts = np.bincount(
+        inverse * width + columns.status, weights=columns.weight, minlength=groups * width,
+    ).reshape(groups, width)
+    paid = columns.status != _CANCELLED_CODE
+    revenue = np.bincount(inverse, weights=columns.cents * columns.weight * paid, minlength=groups)
+
+    designer = keys // span
+    first = (keys % span + ticks.min()).astype(f'datetime64[{unit}]')
+    return Rollup(
+        designer_ids=columns.designers[designer],
+        periods=np.datetime_as_string(first, unit=unit),
+        counts=np.rint(counts).astype(np.int64),
+        revenue=np.rint(revenue).astype(np.int64),
+    )
+
+
+class MaterializedRollups:
+    """Tabelas rollup_daily e rollup_monthly dentro do SQLite da cópia local"""
+
+    TABLES = {'rollup_daily': 'D', 'rollup_monthly': 'M'}
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.db = snapshot.db
+        exists = self.db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_daily'").fetchone()
+        with self.db:
+            for table in self.TABLES:
+                counts = ', '.join(f'{name} INTEGER NOT NULL DEFAULT 0' for name in STATUSES)
+                self.db.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} (designer_id TEXT NOT NULL, period TEXT NOT NULL, '
+                    f'{counts}, revenue_cents INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (designer_id, period))'
+                )
+        if exists is None:
+            self.rebuild()  # Começa do que a cópia já tem; daí em diante, pelo delta
+        snapshot.listen('appointments', self.apply)
+        snapshot.rollups = self
+
+    @classmethod
+    def of(cls, snapshot: Snapshot) -> 'MaterializedRollups':
+        """Os rollups da cópia local, criando as tabelas na primeira vez"""
+        return snapshot.rollups if snapshot.rollups is not None else cls(snapshot)
+
+    def _write(self, table: str, rollup: Rollup, add: bool) -> None:
+        names = (*STATUSES, 'revenue_cents')
+        if add:
+            update = ', '.join(f'{name} = {name} + excluded.{name}' for name in names)
+        else:
+            update = ', '.join(f'{name} = excluded.{name}' for name in names)
+        self.db.executemany(
+            f'INSERT INTO {table} (designer_id, period, {_COUNTS}, revenue_cents) '
+            f'VALUES ({", ".join("?" * (len(names) + 2))}) '
+            f'ON CONFLICT(designer_id, period) DO UPDATE SET {update}',
+            rollup.rows(),
+        )
+
+    def rebuild(self) -> int:
+        """Recalcula tudo a partir de snapshot.appointments"""
+        columns = AppointmentColumns.from_rows(self.snapshot.table('appointments'))
+        with self.db:
+            for table, unit in self.TABLES.items():
+                self.db.execute(f'DELETE FROM {table}')
+                self._write(table, group(columns, unit), add=False)
+        return len(columns)
+
+    def apply(self, changes: Iterable[Change]) -> int:
+        """Soma o delta de uma leva de mudanças (antiga com -1, nova com +1)"""
+        changes = list(changes)
+        old = [before for before, _ in changes if before is not None]
+        new = [after for _, after in changes if after is not None]
+        parts = [part for part in (
+            AppointmentColumns.from_rows(old, weight=-1),
+            AppointmentColumns.from_rows(new, weight=1),
+        ) if len(part)]
+        if not parts:
+            return 0
+        columns = AppointmentColumns.concat(parts)
+        for table, unit in self.TABLES.items():
+            self._write(table, group(columns, unit), add=True)
+            empty = ' AND '.join(f'{name} = 0' for name in STATUSES)
+            self.db.execute(f'DELETE FROM {table} WHERE {empty}')
+        return len(columns)
+
+    # --- leitura dos painéis -------------------------------------------------
+
+    def _read(self, table: str, designer_id: str, start: str, end: str) -> list[dict]:
+        cursor = self.db.execute(
+            f'SELECT period, {_COUNTS}, revenue_cents FROM {table} '
+            f'WHERE designer_id = ? AND period BETWEEN ? AND ? ORDER BY period',
+            (designer_id, start, end),
+        )
+        return [dict(row) for row in cursor]
+
+    def daily(self, designer_id: str, start: date, end: date) -> list[dict]:
+        return self._read('rollup_daily', designer_id, start.isoformat(), end.isoformat())
+
+    def monthly(self, designer_id: str, start: str = '0000-00', end: str = '9999-12') -> list[dict]:
+        return self._read('rollup_monthly', designer_id, start, end)
+
+    def window(self, designer_id: str, first: date, days: int = WINDOW_DAYS) -> dict:
+        """Totais de `days` dias a partir de `first` (para trás, use first = hoje - days)"""
+        rows = self.daily(designer_id, first, first + timedelta(days=days - 1))
+        totals = {name: sum(row[name] for row in rows) for name in (*STATUSES, 'revenue_cents')}
+        active = sum(totals[name] for name in STATUSES if name != 'cancelled')
+        total = active + totals['cancelled']
+        totals['active'] = active
+        totals['average_ticket_cents'] = totals['revenue_cents'] // active if active else 0
+        totals['cancellation_rate'] = totals['cancelled'] / total if total else 0.0
+        return totals
+
+
+def _money(cents: int) -> str:
+    return f'R$ {cents / 100:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.rollups',
+        description='Estatísticas pré-calculadas por designer (dia, mês, janelas de 30 dias)',
+    )
+    parser.add_argument('--db', type=Path, default=Path(DEFAULT_DB), help=f'Cópia local (padrão: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rebuild', help='Recalcular todos os rollups a partir da cópia local')
+    commands.add_parser('sync', help='Sincronizar appointments (os rollups seguem pelo delta)')
+    show = commands.add_parser('show', help='Mostrar os agregados de um designer')
+    show.add_argument('--designer', required=True)
+    show.add_argument('--date', type=date.fromisoformat, default=date.today(), help='Início da janela (padrão: hoje)')
+    show.add_argument('--window', type=int, default=WINDOW_DAYS, help=f'Dias da janela (padrão: {WINDOW_DAYS})')
+    args = parser.parse_args(argv)
+
+    with Snapshot(args.db) as snapshot:
+        rollups = MaterializedRollups.of(snapshot)
+        started = time.perf_counter()
+        if args.command == 'rebuild':
+            count = rollups.rebuild()
+            print(f"📊 Rollups recalculados a partir de {count} agendamento(s) ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        elif args.command == 'sync':
+            try:
+                stats = snapshot.sync_table(PostgrestClient.from_env(), 'appointments')
+            except (OSError, ValueError, PostgrestError) as e:
+                print(f"❌ {e}")
+                return 1
+            print(f"🔄 appointments: {stats.fetched} linha(s), rollups atualizados ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        else:
+            totals = rollups.window(args.designer, args.date, args.window)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"📊 {args.designer}: {args.window} dia(s) a partir de {args.date.isoformat()}")
+            print(f"   Receita {_money(totals['revenue_cents'])}, {totals['active']} ativo(s), "
+                  f"ticket médio {_money(totals['average_ticket_cents'])}, "
+                  f"cancelamento {totals['cancellation_rate'] * 100:.1f}%")
+            for row in rollups.monthly(args.designer)[-6:]:
+                print(f"   {row['period']}: {_money(row['revenue_cents'])}, "
+                      + ', '.join(f"{name} {row[name]}" for name in STATUSES if row[name]))
+            print(f"⏱️ {elapsed:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
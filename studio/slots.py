@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de horários livres por designer e data
+
+O BookingPage.tsx calcula os horários livres de uma data por vez, com vários
+`defaultTimeSlots.filter(...)` aninhando buscas em agendamentos e bloqueios.
+Aqui cada (designer, data) vira um bitmap de 1440 bits (um por minuto do
+dia) com tudo que está ocupado: bloqueios da tabela availability e
+agendamentos ativos com a duração do serviço. Cada horário do conjunto do
+dia também é um bitmap ([início, início + duração)), então "o horário está
+livre" é um AND de inteiros.
+
+Os bitmaps são montados uma vez a partir das linhas das tabelas e mantidos
+por incremento: incluir, mover ou cancelar um agendamento (ou um bloqueio)
+só recalcula o dia afetado.
+
+Os conjuntos de horários (normal, dezembro de 2025...) são dados, em
+studio/slot_sets.toml, e não ramos no código.
+
+Uso:
+    python -m studio.slots dump.json --designer <id> [--from 2025-12-01] [--days 30] [--duration 90]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tomllib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .tables import (
+    MINUTES_PER_DAY,
+    Row,
+    ServiceCatalog,
+    block_end,
+    is_block,
+    load_dump,
+    occupies,
+    parse_date,
+    parse_time,
+)
+
+SLOT_SETS = Path(__file__).resolve().parent / 'slot_sets.toml'
+
+
+class CalendarError(ValueError):
+    """slot_sets.toml inválido: horário mal escrito, temporada sem datas..."""
+
+
+def span_mask(start: int, end: int) -> int:
+    """Bits dos minutos [start, end) do dia"""
+    start = max(0, start)
+    end = min(MINUTES_PER_DAY, end)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+@dataclass(frozen=True)
+class SlotSet:
+    name: str
+    times: tuple[str, ...]
+
+    def masks(self, duration: int) -> tuple[tuple[str, int], ...]:
+        """(horário, bitmap dos minutos que ele ocupa) para uma duração"""
+        return _slot_masks(self.times, duration)
+
+
+@lru_cache(maxsize=64)
+def _slot_masks(times: tuple[str, ...], duration: int) -> tuple[tuple[str, int], ...]:
+    return tuple((slot, span_mask(parse_time(slot), parse_time(slot) + duration)) for slot in times)
+
+
+@dataclass(frozen=True)
+class Season:
+    slots: SlotSet
+    start: date
+    end: date
+    description: str = ''
+
+
+@dataclass(frozen=True)
+class SlotCalendar:
+    """Conjunto de horários de cada data: a primeira temporada que cobre a data, ou o padrão"""
+
+    default: SlotSet
+    seasons: tuple[Season, ...] = ()
+
+    def for_day(self, day: date) -> SlotSet:
+        for season in self.seasons:
+            if season.start <= day <= season.end:
+                return season.slots
+        return self.default
+
+
+def _slot_set(data: dict, where: str) -> SlotSet:
+    times = data.get('slots')
+    if not isinstance(times, list) or not times:
+        raise CalendarError(f'{where}: lista de horários (slots) obrigatória')
+    for value in times:
+        try:
+            minutes = parse_time(value)
+        except ValueError:
+            minutes = -1
+        if not 0 <= minutes < MINUTES_PER_DAY:
+            raise CalendarError(f'{where}: horário inválido {value!r}')
+    return SlotSet(str(data.get('name', where)), tuple(sorted(times, key=parse_time)))
+
+
+def load_calendar(path: Path = SLOT_SETS) -> SlotCalendar:
+    with open(path, 'rb') as f:
+        try:
+            data = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise CalendarError(f'{path.name}: {e}') from None
+    if 'default' not in data:
+        raise CalendarError(f'{path.name}: conjunto [default] obrigatório')
+
+    seasons = []
+    for number, item in enumerate(data.get('seasons', []), 1):
+        where = f"{path.name}: temporada {item.get('name', number)}"
+        if not isinstance(item.get('start'), date) or not isinstance(item.get('end'), date):
+            raise CalendarError(f'{where}: start e end são datas obrigatórias')
+        if item['end'] < item['start']:
+            raise CalendarError(f'{where}: end antes de start')
+        seasons.append(Season(_slot_set(item, where), item['start'], item['end'], item.get('description', '')))
+    return SlotCalendar(_slot_set(data['default'], f'{path.name}: default'), tuple(seasons))
+
+
+def _weekday(day: date) -> int:
+    """day_of_week do banco: 0 = domingo, 6 = sábado"""
+    return (day.weekday() + 1) % 7
+
+
+@dataclass
+class DayIndex:
+    """Ocupação de um designer num dia: bitmaps por bloqueio e por agendamento"""
+
+    blocks: dict[str, int] = field(default_factory=dict)
+    appointments: dict[str, int] = field(default_factory=dict)
+    busy: int = 0
+
+    def refresh(self) -> None:
+        busy = 0
+        for mask in self.blocks.values():
+            busy |= mask
+        for mask in self.appointments.values():
+            busy |= mask
+        self.busy = busy
+
+    def __bool__(self) -> bool:
+        return bool(self.blocks or self.appointments)
+
+
+@dataclass
+class DesignerIndex:
+    days: dict[date, DayIndex] = field(default_factory=dict)
+    # Bloqueios semanais (day_of_week sem specific_date), por dia da semana
+    weekly: list[DayIndex] = field(default_factory=lambda: [DayIndex() for _ in range(7)])
+
+    def busy(self, day: date) -> int:
+        found = self.days.get(day)
+        weekly = self.weekly[_weekday(day)].busy
+        return weekly | found.busy if found else weekly
+
+
+class SlotEngine:
+    """Índice de ocupação de todos os designers, atualizado linha a linha"""
+
+    def __init__(self, calendar: SlotCalendar | None = None, services: ServiceCatalog | None = None):
+        self.calendar = calendar or load_calendar()
+        self.services = services or ServiceCatalog()
+        self.designers: dict[str, DesignerIndex] = {}
+        # Onde cada linha está indexada, para mover/remover sem varrer nada
+        self._appointments: dict[str, tuple[str, date]] = {}
+        self._blocks: dict[str, tuple[str, date | int]] = {}
+
+    @classmethod
+    def from_rows(
+        cls,
+        appointments: Iterable[Row] = (),
+        availability: Iterable[Row] = (),
+        services: Iterable[Row] = (),
+        calendar: SlotCalendar | None = None,
+    ) -> 'SlotEngine':
+        engine = cls(calendar, ServiceCatalog.from_rows(services))
+        touched: dict[int, DayIndex] = {}
+        for day in map(engine._add_block, availability):
+            if day is not None:
+                touched[id(day)] = day
+        for day in map(engine._add_appointment, appointments):
+            if day is not None:
+                touched[id(day)] = day
+        # Um refresh por dia, não um por linha
+        for day in touched.values():
+            day.refresh()
+        return engine
+
+    def _designer(self, designer_id: object) -> DesignerIndex:
+        key = str(designer_id)
+        found = self.designers.get(key)
+        if found is None:
+            found = self.designers[key] = DesignerIndex()
+        return found
+
+    def _day(self, designer: str, key: date | int) -> DayIndex:
+        index = self._designer(designer)
+        if isinstance(key, int):
+            return index.weekly[key]
+        found = index.days.get(key)
+        if found is None:
+            found = index.days[key] = DayIndex()
+        return found
+
+    def _add_appointment(self, row: Row) -> DayIndex | None:
+        if not occupies(row) or not row.get('date') or not row.get('time'):
+            return None
+        designer = str(row.get('designer_id'))
+        day = parse_date(row['date'])
+        start = parse_time(row['time'])
+        duration = self.services.duration(designer, row.get('service'))
+        key = str(row.get('id') or f'{designer}/{day}/{start}')
+        self._appointments[key] = (designer, day)
+        target = self._day(designer, day)
+        target.appointments[key] = span_mask(start, start + duration)
+        return target
+
+    def _add_block(self, row: Row) -> DayIndex | None:
+        if not is_block(row) or not row.get('start_time') or not row.get('end_time'):
+            return None
+        designer = str(row.get('designer_id'))
+        if row.get('specific_date'):
+            where: date | int = parse_date(row['specific_date'])
+        elif row.get('day_of_week') is not None:
+            where = int(row['day_of_week'])
+        else:
+            return None
+        key = str(row.get('id') or f'{designer}/{where}/{row["start_time"]}')
+        self._blocks[key] = (designer, where)
+        target = self._day(designer, where)
+        target.blocks[key] = span_mask(parse_time(row['start_time']), block_end(row['end_time']))
+        return target
+
+    def _drop(self, located: tuple[str, date | int] | None, key: str, kind: str) -> None:
+        if located is None:
+            return
+        designer, where = located
+        index = self.designers[designer]
+        target = index.weekly[where] if isinstance(where, int) else index.days[where]
+        getattr(target, kind).pop(key, None)
+        target.refresh()
+        if not isinstance(where, int) and not target:
+            del index.days[where]
+
+    def put_appointment(self, row: Row) -> None:
+        """Inclui ou atualiza um agendamento (mudança de data, horário, status ou serviço)"""
+        key = str(row.get('id'))
+        self._drop(self._appointments.pop(key, None), key, 'appointments')
+        target = self._add_appointment(row)
+        if target is not None:
+            target.refresh()
+
+    def drop_appointment(self, appointment_id: object) -> None:
+        key = str(appointment_id)
+        self._drop(self._appointments.pop(key, None), key, 'appointments')
+
+    def put_block(self, row: Row) -> None:
+        """Inclui ou atualiza uma linha de availability (bloquear/liberar alterna is_available)"""
+        key = str(row.get('id'))
+        self._drop(self._blocks.pop(key, None), key, 'blocks')
+        target = self._add_block(row)
+        if target is not None:
+            target.refresh()
+
+    def drop_block(self, availability_id: object) -> None:
+        key = str(availability_id)
+        self._drop(self._blocks.pop(key, None), key, 'blocks')
+
+    def busy(self, designer_id: object, day: date) -> int:
+        index = self.designers.get(str(designer_id))
+        return index.busy(day) if index else 0
+
+    def is_free(self, designer_id: object, day: date, time: str, duration: int = 1) -> bool:
+        start = parse_time(time)
+        return not self.busy(designer_id, day) & span_mask(start, start + duration)
+
+    def free_slots(
+        self,
+        designer_id: object,
+        start: date,
+        days: int = 1,
+        duration: int | None = None,
+    ) -> dict[date, list[str]]:
+        """Horários livres de um designer em `days` datas a partir de `start`
+
+        Sem `duration` vale a regra do BookingPage: só o minuto de início do
+        horário precisa estar livre. Com `duration` (minutos do serviço
+        escolhido) o intervalo inteiro precisa caber sem sobreposição.
+        """
+        index = self.designers.get(str(designer_id)) or DesignerIndex()
+        width = max(1, duration or 1)
+        found = {}
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            busy = index.busy(day)
+            slots = self.calendar.for_day(day).masks(width)
+            found[day] = [slot for slot, mask in slots if not busy & mask] if busy else [slot for slot, _ in slots]
+        return found
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.slots',
+        description='Horários livres de um designer nos próximos dias',
+    )
+    parser.add_argument('dump', type=Path, help='JSON com as tabelas (appointments, availability, services)')
+    parser.add_argument('--designer', required=True, help='Id do designer')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, default=date.today(), help='Primeira data (padrão: hoje)')
+    parser.add_argument('--days', type=int, default=30, help='Quantidade de dias (padrão: 30)')
+    parser.add_argument('--duration', type=int, help='Duração do serviço em minutos')
+    parser.add_argument('--slot-sets', type=Path, default=SLOT_SETS, help='Arquivo com os conjuntos de horários')
+    args = parser.parse_args(argv)
+
+    try:
+        tables = load_dump(args.dump)
+        calendar = load_calendar(args.slot_sets)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    started = time.perf_counter()
+    engine = SlotEngine.from_rows(tables['appointments'], tables['availability'], tables['services'], calendar)
+    built = time.perf_counter()
+    free = engine.free_slots(args.designer, args.start, args.days, args.duration)
+    answered = time.perf_counter()
+
+    for day, times in free.items():
+        slot_set = calendar.for_day(day)
+        label = f' [{slot_set.name}]' if slot_set is not calendar.default else ''
+        print(f"📅 {day.isoformat()}{label}: {', '.join(times) if times else '🚫 sem horários'}")
+    print(
+        f"\n⏱️ Índice montado em {(built - started) * 1000:.1f} ms, "
+        f"consulta de {args.days} dia(s) em {(answered - built) * 1000:.2f} ms"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cópia local (SQLite) das tabelas do Supabase com sincronização incremental
+
+appointmentService.getAll, clientService.getAll, getNailDesigners e os
+scripts check-*/debug-*/diagnose-* fazem `select('*')` na tabela inteira a
+cada execução. Aqui nail_designers, services, appointments, availability e
+clients ficam espelhadas em .studio-cache/snapshot.sqlite:
+
+- cada tabela guarda uma marca d'água (updated_at, id) da última linha
+  recebida; a sincronização só pede as linhas depois dela, em páginas por
+  keyset (order=updated_at,id e filtro `> marca`), sem OFFSET;
+- cada página é gravada numa transação junto com a nova marca, então uma
+  sincronização interrompida continua de onde parou;
+- `--full` relê só os ids (também por keyset) para remover as linhas que
+  sumiram no Supabase, que o updated_at não mostra;
+- a coluna password não é copiada;
+- phone_e164 é calculada aqui a partir de phone (studio.phones), então a
+  busca por telefone funciona mesmo antes de add-phone-e164-columns.sql.
+
+Os diagnósticos e relatórios leem a cópia local com os helpers de
+Snapshot (consultas indexadas) ou passando o .sqlite no lugar do dump JSON
+para os outros comandos de studio.
+
+Uso:
+    python -m studio.snapshot sync [--full] [--db ARQUIVO] [tabelas...]
+    python -m studio.snapshot import dump.json [--db ARQUIVO]
+    python -m studio.snapshot info [--db ARQUIVO]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+from .phones import canonical_phone
+from .postgrest import PostgrestClient, PostgrestError
+from .tables import Row, load_dump
+
+CACHE_DIR = '.studio-cache'
+DEFAULT_DB = f'{CACHE_DIR}/snapshot.sqlite'
+PAGE_SIZE = 1000
+SNAPSHOT_VERSION = 1
+
+# Colunas espelhadas (supabase-schema.sql, create-clients-table.sql e os
+# ALTER TABLE posteriores); password fica de fora de propósito
+SCHEMA: dict[str, dict[str, str]] = {
+    'nail_designers': {
+        'id': 'TEXT', 'name': 'TEXT', 'email': 'TEXT', 'phone': 'TEXT', 'pix_key': 'TEXT',
+        'is_active': 'BOOLEAN', 'slug': 'TEXT', 'bio': 'TEXT', 'photo_url': 'TEXT',
+        'created_at': 'TEXT', 'updated_at': 'TEXT',
+    },
+    'services': {
+        'id': 'TEXT', 'designer_id': 'TEXT', 'name': 'TEXT', 'duration': 'INTEGER', 'price': 'REAL',
+        'category': 'TEXT', 'description': 'TEXT', 'created_at': 'TEXT', 'updated_at': 'TEXT',
+    },
+    'appointments': {
+        'id': 'TEXT', 'designer_id': 'TEXT', 'client_name': 'TEXT', 'client_phone': 'TEXT',
+        'client_email': 'TEXT', 'service': 'TEXT', 'date': 'TEXT', 'time': 'TEXT', 'price': 'REAL',
+        'status': 'TEXT', 'created_at': 'TEXT', 'updated_at': 'TEXT',
+    },
+    'availability': {
+        'id': 'TEXT', 'designer_id': 'TEXT', 'day_of_week': 'INTEGER', 'start_time': 'TEXT',
+        'end_time': 'TEXT', 'specific_date': 'TEXT', 'is_available': 'BOOLEAN',
+        'created_at': 'TEXT', 'updated_at': 'TEXT',
+    },
+    'clients': {
+        'id': 'TEXT', 'name': 'TEXT', 'email': 'TEXT', 'phone': 'TEXT', 'is_active': 'BOOLEAN',
+        'created_at': 'TEXT', 'updated_at': 'TEXT',
+    },
+}
+
+# Colunas calculadas na cópia local: nome -> (coluna de origem, função)
+DERIVED: dict[str, dict[str, tuple[str, Callable[[object], object]]]] = {
+    'nail_designers': {'phone_e164': ('phone', canonical_phone)},
+    'clients': {'phone_e164': ('phone', canonical_phone)},
+}
+
+INDEXES = (
+    ('nail_designers', ('phone',)),
+    ('nail_designers', ('phone_e164',)),
+    ('nail_designers', ('email',)),
+    ('nail_designers', ('slug',)),
+    ('services', ('designer_id',)),
+    ('appointments', ('designer_id', 'date', 'time')),
+    ('appointments', ('date',)),
+    ('appointments', ('status',)),
+    ('appointments', ('client_phone',)),
+    ('availability', ('designer_id', 'specific_date')),
+    ('clients', ('phone',)),
+    ('clients', ('phone_e164',)),
+    ('clients', ('email',)),
+)
+# Toda tabela tem o índice da marca d'água
+WATERMARK_INDEX = ('updated_at', 'id')
+# Ids por consulta ao buscar as versões antigas para os listeners
+CHANGE_BATCH = 500
+
+# (linha antiga ou None se nova, linha nova ou None se removida)
+Change = tuple[dict | None, dict | None]
+
+
+def _columns(table: str) -> list[str]:
+    return list(SCHEMA[table])
+
+
+def _quote(value: str) -> str:
+    """Valor entre aspas para filtros do PostgREST (timestamps têm ':', '.' e '+')"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+@dataclass
+class TableSync:
+    table: str
+    fetched: int = 0
+    pages: int = 0
+    removed: int = 0
+    elapsed: float = 0.0
+
+
+class Snapshot:
+    """Arquivo SQLite com as tabelas espelhadas e as consultas mais usadas"""
+
+    def __init__(self, path: Path | str = DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.listeners: dict[str, list[Callable[[list[Change]], None]]] = {}
+        self.rollups = None
+        self._create()
+        self._attach_rollups()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _create(self) -> None:
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS _sync ('
+                'name TEXT PRIMARY KEY, updated_at TEXT, last_id TEXT, synced_at TEXT, version INTEGER)'
+            )
+            for table, columns in SCHEMA.items():
+                definition = ', '.join(
+                    f'{name} {kind}{" PRIMARY KEY" if name == "id" else ""}' for name, kind in columns.items()
+                )
+                derived = DERIVED.get(table, {})
+                definition += ''.join(f', {name} TEXT' for name in derived)
+                self.db.execute(f'CREATE TABLE IF NOT EXISTS {table} ({definition})')
+                existing = {row['name'] for row in self.db.execute(f'PRAGMA table_info({table})')}
+                for name, (source, function) in derived.items():
+                    if name not in existing:  # Cópia criada antes da coluna existir
+                        self.db.execute(f'ALTER TABLE {table} ADD COLUMN {name} TEXT')
+                        self.db.executemany(
+                            f'UPDATE {table} SET {name} = ? WHERE id = ?',
+                            [(function(row[source]), row['id']) for row in self.db.execute(f'SELECT id, {source} FROM {table}')],
+                        )
+                self.db.execute(
+                    f'CREATE INDEX IF NOT EXISTS idx_{table}_watermark ON {table}({", ".join(WATERMARK_INDEX)})'
+                )
+            for table, columns in INDEXES:
+                name = f'idx_{table}_{"_".join(columns)}'
+                self.db.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table}({", ".join(columns)})')
+
+    def _attach_rollups(self) -> None:
+        """Com rollups materializados no arquivo, toda escrita em appointments os atualiza
+
+        Assim sync, import, reconcile e studio.dedup não deixam rollup_daily e
+        rollup_monthly para trás (a marca d'água andaria sem eles).
+        """
+        found = self.db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_daily'")
+        if found.fetchone() is None:
+            return
+        try:
+            from .rollups import MaterializedRollups  # rollups importa este módulo
+        except ImportError:
+            self.close()
+            raise ValueError(f'{self.path}: tem rollups materializados, que requerem numpy: pip install numpy') from None
+        MaterializedRollups.of(self)
+
+    # --- escrita ---------------------------------------------------------
+
+    def listen(self, table: str, callback: Callable[[list[Change]], None]) -> None:
+        """Chama `callback` com (linha antiga, linha nova) de cada página gravada na tabela
+
+        Roda dentro da transação da página: o que o callback gravar no mesmo
+        arquivo (ex.: rollups materializados) é confirmado junto com as linhas.
+        """
+        self.listeners.setdefault(table, []).append(callback)
+
+    def by_ids(self, table: str, ids: Sequence[str]) -> dict[str, dict]:
+        """Linhas atuais com esses ids, em consultas de até CHANGE_BATCH ids"""
+        found = {}
+        for start in range(0, len(ids), CHANGE_BATCH):
+            chunk = ids[start:start + CHANGE_BATCH]
+            cursor = self.db.execute(f'SELECT * FROM {table} WHERE id IN ({", ".join("?" * len(chunk))})', chunk)
+            found.update((row['id'], row) for row in self._rows(table, cursor))
+        return found
+
+    def upsert(self, table: str, rows: Iterable[Row]) -> int:
+        rows = list(rows)
+        listeners = self.listeners.get(table)
+        if listeners:
+            before = self.by_ids(table, [str(row['id']) for row in rows])
+            changes = [(before.get(str(row['id'])), dict(row)) for row in rows]
+        count = self._upsert(table, rows)
+        if listeners:
+            for callback in listeners:
+                callback(changes)
+        return count
+
+    def delete(self, table: str, ids: Sequence[str]) -> int:
+        listeners = self.listeners.get(table)
+        if listeners:
+            before = self.by_ids(table, ids)
+        self.db.executemany(f'DELETE FROM {table} WHERE id = ?', [(key,) for key in ids])
+        if listeners:
+            changes = [(row, None) for row in before.values()]
+            for callback in listeners:
+                callback(changes)
+        return len(ids)
+
+    def _upsert(self, table: str, rows: Sequence[Row]) -> int:
+        derived = DERIVED.get(table, {})
+        columns = _columns(table) + list(derived)
+        updates = ', '.join(f'{name} = excluded.{name}' for name in columns if name != 'id')
+        sql = (
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT(id) DO UPDATE SET {updates}'
+        )
+        values = [
+            tuple(row.get(name) for name in SCHEMA[table])
+            + tuple(function(row.get(source)) for source, function in derived.values())
+            for row in rows
+        ]
+        self.db.executemany(sql, values)
+        return len(values)
+
+    def watermark(self, table: str) -> tuple[str | None, str | None]:
+        found = self.db.execute('SELECT updated_at, last_id FROM _sync WHERE name = ?', (table,)).fetchone()
+        return (found['updated_at'], found['last_id']) if found else (None, None)
+
+    def _set_watermark(self, table: str, updated_at: str | None, last_id: str | None) -> None:
+        self.db.execute(
+            'INSERT INTO _sync (name, updated_at, last_id, synced_at, version) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at, last_id = excluded.last_id, '
+            'synced_at = excluded.synced_at, version = excluded.version',
+            (table, updated_at, last_id, datetime.now(timezone.utc).isoformat(), SNAPSHOT_VERSION),
+        )
+
+    def sync_table(self, client: PostgrestClient, table: str, page_size: int = PAGE_SIZE) -> TableSync:
+        """Baixa só as linhas com (updated_at, id) depois da marca d'água, página por página"""
+        stats = TableSync(table)
+        started = time.perf_counter()
+        updated_at, last_id = self.watermark(table)
+        columns = ','.join(_columns(table))
+        while True:
+            filters = []
+            if updated_at is not None:
+                mark = _quote(updated_at)
+                filters.append(('or', f'(updated_at.gt.{mark},and(updated_at.eq.{mark},id.gt.{_quote(last_id or "")}))'))
+            rows = client.select(table, filters, columns=columns, order='updated_at.asc,id.asc', limit=page_size)
+            rows = [row for row in rows if row.get('updated_at') is not None]
+            if rows:
+                updated_at, last_id = rows[-1]['updated_at'], rows[-1]['id']
+                with self.db:
+                    self.upsert(table, rows)
+                    self._set_watermark(table, updated_at, last_id)
+                stats.fetched += len(rows)
+                stats.pages += 1
+            if len(rows) < page_size:
+                break
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def reconcile(self, client: PostgrestClient, table: str, page_size: int = PAGE_SIZE) -> TableSync:
+        """Sincronização completa: todas as linhas por keyset em id, removendo as que sumiram
+
+        Também pega linhas com updated_at nulo, que a marca d'água nunca vê.
+        """
+        stats = TableSync(table)
+        started = time.perf_counter()
+        columns = ','.join(_columns(table))
+        seen: set[str] = set()
+        last_id = None
+        while True:
+            filters = [('id', f'gt.{_quote(last_id)}')] if last_id is not None else []
+            rows = client.select(table, filters, columns=columns, order='id.asc', limit=page_size)
+            if rows:
+                last_id = rows[-1]['id']
+                seen.update(str(row['id']) for row in rows)
+                with self.db:
+                    self.upsert(table, rows)
+                stats.fetched += len(rows)
+                stats.pages += 1
+            if len(rows) < page_size:
+                break
+        with self.db:
+            local = [row[0] for row in self.db.execute(f'SELECT id FROM {table}')]
+            stats.removed = self.delete(table, [key for key in local if key not in seen])
+            mark = self.db.execute(
+                f'SELECT updated_at, id FROM {table} WHERE updated_at IS NOT NULL '
+                f'ORDER BY updated_at DESC, id DESC LIMIT 1'
+            ).fetchone()
+            self._set_watermark(table, mark['updated_at'] if mark else None, mark['id'] if mark else None)
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def import_tables(self, tables: dict[str, list[dict]]) -> dict[str, int]:
+        """Carrega um dump JSON (mesmo formato de tables.load_dump) e posiciona as marcas d'água"""
+        counts = {}
+        with self.db:
+            for table in SCHEMA:
+                rows = tables.get(table) or []
+                counts[table] = self.upsert(table, rows)
+                marked = [row for row in rows if row.get('updated_at')]
+                if marked:
+                    last = max(marked, key=lambda row: (str(row['updated_at']), str(row['id'])))
+                    self._set_watermark(table, str(last['updated_at']), str(last['id']))
+        return counts
+
+    # --- leitura ---------------------------------------------------------
+
+    def _rows(self, table: str, cursor: sqlite3.Cursor) -> list[dict]:
+        booleans = [name for name, kind in SCHEMA[table].items() if kind == 'BOOLEAN']
+        rows = []
+        for row in cursor:
+            item = dict(row)
+            for name in booleans:
+                if item[name] is not None:
+                    item[name] = bool(item[name])
+            rows.append(item)
+        return rows
+
+    def _select(self, table: str, where: Sequence[tuple[str, object]] = (), order: str = 'id') -> list[dict]:
+        clauses = ' AND '.join(clause for clause, _ in where)
+        sql = f'SELECT * FROM {table}' + (f' WHERE {clauses}' if clauses else '') + f' ORDER BY {order}'
+        params: list[object] = []
+        for _, value in where:
+            if isinstance(value, (list, tuple)):
+                params.extend(value)
+            elif value is not None:
+                params.append(value)
+        return self._rows(table, self.db.execute(sql, params))
+
+    def table(self, table: str) -> list[dict]:
+        return self._select(table)
+
+    def tables(self) -> dict[str, list[dict]]:
+        return {table: self.table(table) for table in SCHEMA}
+
+    def designers(self, active_only: bool = False) -> list[dict]:
+        return self._select('nail_designers', [('is_active = 1', None)] if active_only else [], 'name')
+
+    def _by_phone(self, table: str, phone: str) -> list[dict]:
+        key = canonical_phone(phone)
+        return self._select(table, [('phone_e164 = ?', key)] if key else [('phone = ?', phone)], 'created_at, id')
+
+    def designer_by_phone(self, phone: str) -> dict | None:
+        found = self._by_phone('nail_designers', phone)
+        return found[0] if found else None
+
+    def designer_by_email(self, email: str) -> dict | None:
+        found = self._select('nail_designers', [('email = ?', email)])
+        return found[0] if found else None
+
+    def client_by_phone(self, phone: str) -> dict | None:
+        found = self._by_phone('clients', phone)
+        return found[0] if found else None
+
+    def client_by_email(self, email: str) -> dict | None:
+        found = self._select('clients', [('email = ?', email)])
+        return found[0] if found else None
+
+    def services(self, designer_id: str) -> list[dict]:
+        return self._select('services', [('designer_id = ?', designer_id)], 'name')
+
+    def appointments(
+        self,
+        designer_id: str | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        statuses: Sequence[str] = (),
+    ) -> list[dict]:
+        where: list[tuple[str, object]] = []
+        if designer_id is not None:
+            where.append(('designer_id = ?', designer_id))
+        if start is not None:
+            where.append(('date >= ?', start.isoformat()))
+        if end is not None:
+            where.append(('date <= ?', end.isoformat()))
+        if statuses:
+            where.append((f'status IN ({", ".join("?" * len(statuses))})', tuple(statuses)))
+        return self._select('appointments', where, 'date, time, id')
+
+    def availability(self, designer_id: str, start: date | None = None, end: date | None = None) -> list[dict]:
+        where: list[tuple[str, object]] = [('designer_id = ?', designer_id)]
+        if start is not None:
+            where.append(('(specific_date IS NULL OR specific_date >= ?)', start.isoformat()))
+        if end is not None:
+            where.append(('(specific_date IS NULL OR specific_date <= ?)', end.isoformat()))
+        return self._select('availability', where, 'specific_date, start_time, id')
+
+    def counts(self) -> Iterator[tuple[str, int, str | None, str | None]]:
+        """(tabela, linhas, marca d'água, última sincronização)"""
+        for table in SCHEMA:
+            count = self.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            found = self.db.execute('SELECT updated_at, synced_at FROM _sync WHERE name = ?', (table,)).fetchone()
+            yield table, count, found['updated_at'] if found else None, found['synced_at'] if found else None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.snapshot',
+        description='Cópia local (SQLite) das tabelas do Supabase',
+    )
+    parser.add_argument('--db', type=Path, default=Path(DEFAULT_DB), help=f'Arquivo SQLite (padrão: {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    sync = commands.add_parser('sync', help='Baixar as linhas novas/alteradas do Supabase')
+    sync.add_argument('tables', nargs='*', metavar='tabela', help=f'Padrão: todas ({", ".join(SCHEMA)})')
+    sync.add_argument('--full', action='store_true', help='Reler tudo e remover as linhas apagadas no Supabase')
+    sync.add_argument('--page', type=int, default=PAGE_SIZE, help=f'Linhas por página (padrão: {PAGE_SIZE})')
+    imported = commands.add_parser('import', help='Carregar um dump JSON')
+    imported.add_argument('dump', type=Path)
+    commands.add_parser('info', help='Linhas e marcas d\'água de cada tabela')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(getattr(args, 'tables', ())) - set(SCHEMA))
+    if unknown:
+        parser.error(f'tabela(s) desconhecida(s): {", ".join(unknown)}')
+
+    with Snapshot(args.db) as snapshot:
+        if args.command == 'sync':
+            try:
+                client = PostgrestClient.from_env()
+                for table in args.tables or list(SCHEMA):
+                    stats = (snapshot.reconcile if args.full else snapshot.sync_table)(client, table, args.page)
+                    removed = f", {stats.removed} removida(s)" if args.full else ''
+                    print(f"🔄 {table}: {stats.fetched} linha(s) em {stats.pages} página(s){removed} ({stats.elapsed * 1000:.0f} ms)")
+            except (OSError, ValueError, PostgrestError) as e:
+                print(f"❌ {e}")
+                return 1
+        elif args.command == 'import':
+            try:
+                counts = snapshot.import_tables(load_dump(args.dump))
+            except (OSError, ValueError) as e:
+                print(f"❌ {e}")
+                return 1
+            for table, count in counts.items():
+                print(f"📥 {table}: {count} linha(s)")
+        else:
+            for table, count, mark, synced in snapshot.counts():
+                print(f"📋 {table}: {count} linha(s), marca {mark or '-'}, sincronizado em {synced or 'nunca'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidores locais que fazem o papel do n8n e do Supabase em testes
+
+WebhookStandIn aceita POST em qualquer caminho, guarda cada corpo JSON
+recebido e responde 200. Requisições repetidas com o mesmo
+Idempotency-Key são contadas mas não entram de novo em `received`, como o
+workflow do n8n deveria fazer. `fail_rate` faz uma fração das chamadas
+responder 503, para exercitar retry e backoff.
+
+PostgrestStandIn serve tabelas em memória em /rest/v1/<tabela> com o
+subconjunto do PostgREST que as ferramentas usam: filtros col=op.valor
+(eq, neq, gt, gte, lt, lte, in, is), or=(...) com and(...) aninhado,
+select, order e limit; PATCH aplica os mesmos filtros. POST insere com
+os DEFAULT das colunas (lidos de supabase-schema.sql por `schema_defaults`),
+aceita on_conflict com resolution=ignore-duplicates/merge-duplicates e, se
+pedido, recusa com 409 linhas que violem uma restrição única, como o
+Postgres faria com um índice único parcial. POST em /rest/v1/rpc/<nome>
+chama a função Python registrada em `functions` com as tabelas e o corpo.
+`max_rows` corta cada GET como o db-max-rows do Supabase (1000 linhas), para
+exercitar a paginação de quem lê tabelas inteiras.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import urllib.parse
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCHEMA_FILES = ('supabase-schema.sql', 'create-clients-table.sql')
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # O padrão (5) descarta conexões numa rajada de clientes e o SYN só volta em 1 s
+    request_queue_size = 128
+
+
+@dataclass
+class StandInState:
+    received: list[dict] = field(default_factory=list)
+    keys: set[str] = field(default_factory=set)
+    duplicates: int = 0
+    failures: int = 0
+    fail_rate: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive: o cliente reaproveita a conexão
+    # Cabeçalho e corpo saem em dois send(): sem isso, Nagle + ACK atrasado somam 40 ms
+    disable_nagle_algorithm = True
+    state: StandInState
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da stdlib
+        pass
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):  # noqa: N802 - nome exigido pelo http.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        state = self.state
+        with state.lock:
+            if state.fail_rate and random.random() < state.fail_rate:
+                state.failures += 1
+                failed = True
+            else:
+                failed = False
+                key = self.headers.get('Idempotency-Key')
+                if key and key in state.keys:
+                    state.duplicates += 1
+                else:
+                    if key:
+                        state.keys.add(key)
+                    state.received.append(json.loads(body or b'null'))
+        if failed:
+            self._reply(503, {'error': 'indisponível'})
+        else:
+            self._reply(200, {'ok': True})
+
+
+class WebhookStandIn:
+    """Webhook local em 127.0.0.1, rodando numa thread (use com `with`)"""
+
+    def __init__(self, port: int = 0, fail_rate: float = 0.0):
+        self.state = StandInState(fail_rate=fail_rate)
+        handler = type('Handler', (_WebhookHandler,), {'state': self.state})
+        self.server = LocalHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/webhook/lembretes'
+
+    def __enter__(self) -> 'WebhookStandIn':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _split_top(text: str) -> list[str]:
+    """Separa por vírgula fora de parênteses e aspas"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _compare(value: object, op: str, raw: str) -> bool:
+    if op == 'is':
+        return value is None if raw == 'null' else str(value).lower() == raw
+    if op == 'in':
+        return str(value) in {_unquote(item) for item in _split_top(raw.strip('()'))}
+    if value is None:
+        return op == 'neq'
+    raw = _unquote(raw)
+    if isinstance(value, bool):
+        left, right = str(value).lower(), raw.lower()
+    elif isinstance(value, (int, float)):
+        left, right = value, float(raw)
+    else:
+        left, right = str(value), raw
+    return {
+        'eq': left == right,
+        'neq': left != right,
+        'gt': left > right,
+        'gte': left >= right,
+        'lt': left < right,
+        'lte': left <= right,
+    }[op]
+
+
+def _condition(text: str) -> Callable[[dict], bool]:
+    """`col.op.valor`, `and(...)` ou `or(...)` de dentro de um or=(...)"""
+    for group, combine in (('and(', all), ('or(', any)):
+        if text.startswith(group) and text.endswith(')'):
+            inner = [_condition(part) for part in _split_top(text[len(group):-1])]
+            return lambda row, inner=inner, combine=combine: combine(check(row) for check in inner)
+    column, op, raw = text.split('.', 2)
+    return lambda row: _compare(row.get(column), op, raw)
+
+
+def _filter(column: str, expression: str) -> Callable[[dict], bool]:
+    if column in ('or', 'and'):
+        return _condition(f'{column}{expression}')
+    op, raw = expression.split('.', 1)
+    return lambda row: _compare(row.get(column), op, raw)
+
+
+def _sort_key(value: object) -> tuple:
+    # None por último (padrão do PostgREST em ordem crescente)
+    return (value is None, value if isinstance(value, (int, float)) and not isinstance(value, bool) else str(value))
+
+
+def query_rows(rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+    """Aplica filtros, order, limit e select do PostgREST a uma lista de linhas"""
+    checks = []
+    order = limit = None
+    columns = '*'
+    for name, value in params:
+        if name == 'select':
+            columns = value
+        elif name == 'order':
+            order = value
+        elif name == 'limit':
+            limit = int(value)
+        else:
+            checks.append(_filter(name, value))
+    found = [row for row in rows if all(check(row) for check in checks)]
+    if order:
+        for item in reversed(order.split(',')):
+            column, _, direction = item.partition('.')
+            found.sort(key=lambda row: _sort_key(row.get(column)), reverse=direction.startswith('desc'))
+    if limit is not None:
+        found = found[:limit]
+    if columns != '*':
+        names = [name.strip() for name in columns.split(',')]
+        found = [{name: row.get(name) for name in names} for row in found]
+    return found
+
+
+Default = Callable[[], object]
+
+_TABLE = re.compile(r'CREATE TABLE IF NOT EXISTS (?:public\.)?(\w+)\s*\((.*?)\);', re.S | re.I)
+_COLUMN = re.compile(r'(\w+)\s+\w+.*?(?:\bDEFAULT\s+(.+?))?(?:\s+(?:PRIMARY|NOT|UNIQUE|CHECK|REFERENCES)\b.*)?$', re.S | re.I)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _default(expression: str) -> Default | None:
+    expression = expression.strip()
+    lowered = expression.lower()
+    if lowered in ('uuid_generate_v4()', 'gen_random_uuid()'):
+        return lambda: str(uuid.uuid4())
+    if lowered in ('now()', 'current_timestamp'):
+        return _now
+    if lowered in ('true', 'false'):
+        return lambda value=lowered == 'true': value
+    if expression.startswith("'"):
+        return lambda value=expression.split("'")[1]: value
+    try:
+        return lambda value=float(expression) if '.' in expression else int(expression): value
+    except ValueError:
+        return None
+
+
+def schema_defaults(paths: Iterable[Path]) -> dict[str, dict[str, Default | None]]:
+    """Colunas de cada CREATE TABLE e o DEFAULT de cada uma (None se não tiver)"""
+    tables: dict[str, dict[str, Default | None]] = {}
+    for path in paths:
+        text = re.sub(r'--[^\n]*', '', Path(path).read_text(encoding='utf-8'))
+        for name, body in _TABLE.findall(text):
+            columns = tables.setdefault(name, {})
+            for definition in _split_top(body):
+                definition = ' '.join(definition.split())
+                if not definition or definition.split()[0].upper() in ('PRIMARY', 'UNIQUE', 'CHECK', 'CONSTRAINT', 'FOREIGN'):
+                    continue
+                match = _COLUMN.match(definition)
+                if match:
+                    columns[match.group(1)] = _default(match.group(2)) if match.group(2) else None
+    return tables
+
+
+@dataclass(frozen=True)
+class UniqueConstraint:
+    """Índice único (parcial, com `where`) verificado a cada insert"""
+    table: str
+    columns: tuple[str, ...]
+    where: Callable[[dict], bool] | None = None
+
+    def key(self, row: dict) -> tuple | None:
+        if self.where is not None and not self.where(row):
+            return None
+        return tuple(str(row.get(column)) for column in self.columns)
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    tables: dict[str, list[dict]]
+    lock: threading.Lock
+    defaults: dict[str, dict[str, Default | None]]
+    unique: Sequence[UniqueConstraint]
+    functions: dict[str, Callable[[dict[str, list[dict]], dict], object]]
+    max_rows: int | None
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da stdlib
+        pass
+
+    def _reply(self, status: int, body: object) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802 - nome exigido pelo http.server
+        url = urllib.parse.urlsplit(self.path)
+        table = url.path.removeprefix('/rest/v1/')
+        if table not in self.tables:
+            self._reply(404, {'message': f'relation "{table}" does not exist'})
+            return
+        params = urllib.parse.parse_qsl(url.query, keep_blank_values=True)
+        try:
+            with self.lock:
+                rows = query_rows(self.tables[table], params)
+        except (ValueError, KeyError) as e:
+            self._reply(400, {'message': f'filtro inválido: {e}'})
+            return
+        self._reply(200, rows[:self.max_rows])
+
+    def do_POST(self):  # noqa: N802 - nome exigido pelo http.server
+        url = urllib.parse.urlsplit(self.path)
+        table = url.path.removeprefix('/rest/v1/')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'[]')
+        if table.startswith('rpc/'):
+            function = self.functions.get(table.removeprefix('rpc/'))
+            if function is None:
+                self._reply(404, {'message': f'function {table.removeprefix("rpc/")} does not exist'})
+                return
+            with self.lock:
+                result = function(self.tables, body)
+            self._reply(200, result)
+            return
+        if table not in self.tables:
+            self._reply(404, {'message': f'relation "{table}" does not exist'})
+            return
+        defaults = self.defaults.get(table, {})
+        rows = []
+        for item in body if isinstance(body, list) else [body]:
+            row = {column: make() if make else None for column, make in defaults.items() if column not in item}
+            row.update(item)
+            rows.append(row)
+        constraints = [constraint for constraint in self.unique if constraint.table == table]
+        params = dict(urllib.parse.parse_qsl(url.query))
+        prefer = self.headers.get('Prefer') or ''
+        with self.lock:
+            if params.get('on_conflict'):
+                conflict = UniqueConstraint(table, tuple(params['on_conflict'].split(',')))
+                existing = {conflict.key(row): row for row in self.tables[table]}
+                fresh = []
+                for row in rows:
+                    found = existing.get(conflict.key(row))
+                    if found is None:
+                        existing[conflict.key(row)] = row
+                        fresh.append(row)
+                    elif 'merge-duplicates' in prefer:
+                        found.update({column: value for column, value in row.items() if column != 'id'})
+                rows = fresh
+            for constraint in constraints:
+                taken = {constraint.key(row) for row in self.tables[table]}
+                for row in rows:
+                    key = constraint.key(row)
+                    if key is not None and key in taken:
+                        self._reply(409, {
+                            'code': '23505',
+                            'message': f'duplicate key value violates unique constraint on {table}({", ".join(constraint.columns)})',
+                        })
+                        return
+                    taken.add(key)
+            self.tables[table].extend(rows)
+        if 'return=representation' not in prefer:
+            self.send_response(201)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif 'vnd.pgrst.object' in (self.headers.get('Accept') or ''):
+            self._reply(201, rows[0] if len(rows) == 1 else {'message': 'JSON object requested, multiple rows returned'})
+        else:
+            self._reply(201, rows)
+
+    def do_PATCH(self):  # noqa: N802 - nome exigido pelo http.server
+        url = urllib.parse.urlsplit(self.path)
+        table = url.path.removeprefix('/rest/v1/')
+        length = int(self.headers.get('Content-Length') or 0)
+        values = json.loads(self.rfile.read(length) or b'{}')
+        if table not in self.tables:
+            self._reply(404, {'message': f'relation "{table}" does not exist'})
+            return
+        checks = [_filter(name, value) for name, value in urllib.parse.parse_qsl(url.query)]
+        with self.lock:
+            for row in self.tables[table]:
+                if all(check(row) for check in checks):
+                    row.update(values)
+        self.send_response(204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class PostgrestStandIn:
+    """API REST do Supabase em memória, em 127.0.0.1 (use com `with`)"""
+
+    def __init__(
+        self,
+        tables: dict[str, list[dict]],
+        port: int = 0,
+        defaults: dict[str, dict[str, Default | None]] | None = None,
+        unique: Sequence[UniqueConstraint] = (),
+        functions: dict[str, Callable[[dict[str, list[dict]], dict], object]] | None = None,
+        max_rows: int | None = None,
+    ):
+        self.tables = tables
+        self.lock = threading.Lock()
+        handler = type('Handler', (_PostgrestHandler,), {
+            'tables': tables, 'lock': self.lock, 'defaults': defaults or {}, 'unique': tuple(unique),
+            'functions': functions or {}, 'max_rows': max_rows,
+        })
+        self.server = LocalHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'PostgrestStandIn':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
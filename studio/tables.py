@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linhas das tabelas do supabase-schema.sql como o PostgREST devolve
+
+Datas chegam como 'YYYY-MM-DD', horários como 'HH:MM' ou 'HH:MM:SS' e os
+status em texto. Aqui ficam as conversões e as regras que o frontend repete
+em vários componentes (agendamento cancelado não ocupa horário, duração
+vem de services pelo nome do serviço).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+Row = Mapping[str, object]
+
+TABLES = ('nail_designers', 'services', 'appointments', 'availability', 'clients')
+SNAPSHOT_SUFFIXES = ('.sqlite', '.db')
+# O frontend aceita as duas grafias
+CANCELLED = frozenset({'cancelled', 'canceled'})
+# Status que checkTimeConflict considera reserva firme
+BOOKED = frozenset({'pending', 'confirmed'})
+# Duração usada quando o serviço do agendamento não está em services
+DEFAULT_DURATION = 60
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_date(value: object) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def parse_time(value: object) -> int:
+    """Minutos desde a meia-noite de 'HH:MM' ou 'HH:MM:SS'"""
+    hours, minutes = str(value).split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_time(minutes: int) -> str:
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def block_end(value: object) -> int:
+    """Fim de um bloqueio em minutos; '23:59' é o fim do dia (bloqueio de dia inteiro)"""
+    minutes = parse_time(value)
+    return MINUTES_PER_DAY if minutes == MINUTES_PER_DAY - 1 else minutes
+
+
+def occupies(row: Row) -> bool:
+    """Agendamento que ainda ocupa o horário (tudo menos cancelado)"""
+    return str(row.get('status') or 'pending') not in CANCELLED
+
+
+def is_block(row: Row) -> bool:
+    """Linha de availability que bloqueia horários (is_available = false)"""
+    return row.get('is_available') in (False, 'false')
+
+
+@dataclass
+class ServiceCatalog:
+    """Duração dos serviços por (designer, nome), com o nome sozinho como reserva"""
+
+    by_designer: dict[tuple[str, str], int] = field(default_factory=dict)
+    by_name: dict[str, int] = field(default_factory=dict)
+    default: int = DEFAULT_DURATION
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row], default: int = DEFAULT_DURATION) -> 'ServiceCatalog':
+        catalog = cls(default=default)
+        for row in rows:
+            name = str(row.get('name') or '').strip().lower()
+            if not name or not row.get('duration'):
+                continue
+            duration = int(row['duration'])
+            catalog.by_designer[(str(row.get('designer_id')), name)] = duration
+            catalog.by_name.setdefault(name, duration)
+        return catalog
+
+    def duration(self, designer_id: object, service: object) -> int:
+        name = str(service or '').strip().lower()
+        found = self.by_designer.get((str(designer_id), name))
+        if found is None:
+            found = self.by_name.get(name, self.default)
+        return found
+
+
+def load_dump(path: Path, tables: Sequence[str] = TABLES) -> dict[str, list[dict]]:
+    """Tabelas exportadas em JSON: {"appointments": [...], "availability": [...], ...}
+
+    Um .sqlite de `python -m studio.snapshot` também serve; as tabelas que a
+    cópia local não espelha (whatsapp_logs, por exemplo) vêm vazias.
+    """
+    if Path(path).suffix in SNAPSHOT_SUFFIXES:
+        from .snapshot import Snapshot  # snapshot importa este módulo
+
+        if not Path(path).exists():
+            raise FileNotFoundError(f'{path}: cópia local não existe (rode python -m studio.snapshot sync)')
+        with Snapshot(path) as snapshot:
+            mirrored = snapshot.tables()
+        return {name: mirrored.get(name, []) for name in tables}
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f'{path}: esperado um objeto com uma lista por tabela')
+    return {name: list(data.get(name) or []) for name in tables}
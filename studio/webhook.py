@@ -0,0 +1,721 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingestão em lote do webhook do WhatsApp (recibos de entrega e mensagens recebidas)
+
+A Edge Function whatsapp-webhook trata cada evento dentro da requisição da
+Meta: um PATCH em whatsapp_logs por recibo, um INSERT por mensagem, e só
+então responde. Com a Meta entregando em rajadas, cada evento vira uma ida
+ao banco, a resposta demora e a Meta reenvia o que não foi confirmado a
+tempo, gerando mais escrita. Aqui:
+
+- o POST é confirmado na hora: os eventos são lidos, descartados se já
+  foram vistos (reenvio da Meta, por message_id e status) e vão para uma
+  fila limitada em memória. Fila cheia responde 503 com Retry-After, e a
+  Meta reenvia depois (contrapressão em vez de memória sem limite);
+- uma thread esvazia a fila quando junta `max_batch` eventos ou quando o
+  mais antigo espera `max_delay` segundos, e grava o lote com duas
+  requisições: um insert de várias linhas com on_conflict=message_id para
+  as mensagens recebidas e a função apply_whatsapp_statuses para os
+  recibos (whatsapp-webhook-batch.sql);
+- recibos do mesmo message_id no lote viram uma linha só, com o status
+  mais adiantado (sent < delivered < read < failed), que também nunca
+  volta atrás no banco;
+- falha de rede ou 5xx repete o lote com espera crescente; a fila enche
+  nesse meio tempo e a contrapressão chega à Meta. Um lote recusado (4xx)
+  ou que esgota as tentativas vai para um arquivo de dead letter (JSON
+  Lines) e sai da lista de vistos, para que um reenvio da Meta seja gravado.
+
+`bench` compara, contra o PostgREST local de studio.standin num processo
+separado, a gravação evento a evento de hoje e a gravação em lote, com
+rajadas, eventos fora de ordem e reenvios.
+
+Uso:
+    python -m studio.webhook serve [--port 8787] [--verify-token TOKEN] [--batch 500] [--delay 0.2] [--dead-letter ARQUIVO]
+    python -m studio.webhook bench [--messages 1000] [--senders 20] [--retry-rate 0.1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Sequence
+
+from .latency import Latency
+from .phones import TTLCache
+from .postgrest import PostgrestClient, PostgrestError
+from .snapshot import CACHE_DIR
+from .standin import LocalHTTPServer, PostgrestStandIn, schema_defaults
+
+REPO = Path(__file__).resolve().parent.parent
+LOGS = 'whatsapp_logs'
+STATUS_FUNCTION = 'apply_whatsapp_statuses'
+STATUS_RANK = {'sent': 1, 'delivered': 2, 'read': 3, 'failed': 4}
+STATUS_COLUMNS = ('delivered_at', 'read_at', 'error_message', 'error_code')
+
+DEFAULT_BATCH = 500  # Eventos por gravação
+DEFAULT_DELAY = 0.2  # Segundos que o evento mais antigo espera na fila
+DEFAULT_QUEUE = 2000  # POSTs aguardando gravação antes do 503
+PUT_TIMEOUT = 0.05  # Quanto o POST espera por espaço na fila
+SEEN_SIZE = 200_000  # Eventos lembrados para descartar reenvios
+SEEN_TTL = 24 * 60 * 60.0  # A Meta reenvia por até um dia
+FLUSH_ATTEMPTS = 6
+RETRY_BASE = 0.2
+RETRY_MAX = 5.0
+DEAD_LETTER = f'{CACHE_DIR}/webhook-dead-letter.jsonl'
+
+
+# --- eventos ---------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Event:
+    """Um recibo ('status') ou uma mensagem recebida ('message') do payload da Meta"""
+    kind: str
+    key: tuple
+    row: dict
+
+
+def _iso(timestamp: object) -> str | None:
+    if timestamp in (None, ''):
+        return None
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).isoformat()
+
+
+def status_row(status: dict) -> dict:
+    """As colunas que updateMessageStatus grava para um recibo"""
+    row = {'message_id': status['id'], 'delivery_status': status['status']}
+    row.update(dict.fromkeys(STATUS_COLUMNS))
+    when = _iso(status.get('timestamp'))
+    if status['status'] == 'delivered':
+        row['delivered_at'] = when
+    elif status['status'] == 'read':
+        row['read_at'] = when
+    elif status['status'] == 'failed':
+        error = (status.get('errors') or [{}])[0]
+        row['error_message'] = error.get('title') or 'Falha na entrega'
+        row['error_code'] = str(error.get('code') or 'DELIVERY_FAILED')
+    return row
+
+
+def message_row(message: dict) -> dict:
+    """A linha que processIncomingMessage insere para uma mensagem recebida"""
+    return {
+        'phone': message['from'],
+        'message_type': 'incoming',
+        'message_id': message['id'],
+        'status': 'received',
+        'template_parameters': {
+            'text': (message.get('text') or {}).get('body', ''),
+            'type': message.get('type'),
+            'timestamp': message.get('timestamp'),
+        },
+    }
+
+
+def parse_payload(payload: dict) -> list[Event]:
+    """entry -> changes (field 'messages') -> statuses/messages, como na Edge Function"""
+    events = []
+    for entry in payload.get('entry') or []:
+        for change in entry.get('changes') or []:
+            if change.get('field') != 'messages':
+                continue
+            value = change.get('value') or {}
+            for status in value.get('statuses') or []:
+                if status.get('id') and status.get('status') in STATUS_RANK:
+                    events.append(Event('status', ('status', status['id'], status['status']), status_row(status)))
+            for message in value.get('messages') or []:
+                if message.get('id') and message.get('from'):
+                    events.append(Event('message', ('message', message['id']), message_row(message)))
+    return events
+
+
+def merge_status(current: dict, new: dict) -> dict:
+    """Dois recibos do mesmo message_id: fica o status mais adiantado e o que cada um trouxe"""
+    ahead = STATUS_RANK[new['delivery_status']] >= STATUS_RANK[current['delivery_status']]
+    merged = dict(current)
+    merged['delivery_status'] = (new if ahead else current)['delivery_status']
+    for column in ('delivered_at', 'read_at'):
+        found = [value for value in (current[column], new[column]) if value]
+        merged[column] = min(found) if found else None
+    for column in ('error_message', 'error_code'):
+        merged[column] = new[column] or current[column]
+    return merged
+
+
+def coalesce(events: Sequence[Event]) -> tuple[list[dict], list[dict]]:
+    """Mensagens (uma por message_id) e recibos (um por message_id) de um lote"""
+    messages: dict[str, dict] = {}
+    statuses: dict[str, dict] = {}
+    for event in events:
+        message_id = event.row['message_id']
+        if event.kind == 'message':
+            messages.setdefault(message_id, event.row)
+        elif message_id in statuses:
+            statuses[message_id] = merge_status(statuses[message_id], event.row)
+        else:
+            statuses[message_id] = event.row
+    return list(messages.values()), list(statuses.values())
+
+
+def apply_statuses(tables: dict[str, list[dict]], args: dict) -> int:
+    """apply_whatsapp_statuses (whatsapp-webhook-batch.sql) para o PostgrestStandIn"""
+    by_message: dict[str, list[dict]] = {}
+    for row in tables[LOGS]:
+        if row.get('message_id'):
+            by_message.setdefault(row['message_id'], []).append(row)
+    updated = 0
+    for status in args['statuses']:
+        for row in by_message.get(status['message_id'], []):
+            if STATUS_RANK[status['delivery_status']] >= STATUS_RANK.get(row.get('delivery_status'), 0):
+                row['delivery_status'] = status['delivery_status']
+            row['delivered_at'] = row.get('delivered_at') or status['delivered_at']
+            row['read_at'] = row.get('read_at') or status['read_at']
+            row['error_message'] = status['error_message'] or row.get('error_message')
+            row['error_code'] = status['error_code'] or row.get('error_code')
+            updated += 1
+    return updated
+
+
+# --- fila e gravação -------------------------------------------------------
+
+@dataclass
+class IngestStats:
+    payloads: int = 0
+    events: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    flushes: int = 0
+    writes: int = 0
+    written: int = 0
+    retries: int = 0
+    lost: int = 0
+    flush_sizes: list[int] = field(default_factory=list)
+
+
+class Ingestor:
+    """Fila limitada entre o webhook e o banco, esvaziada por tamanho ou por tempo"""
+
+    def __init__(
+        self,
+        client: PostgrestClient,
+        max_batch: int = DEFAULT_BATCH,
+        max_delay: float = DEFAULT_DELAY,
+        queue_size: int = DEFAULT_QUEUE,
+        put_timeout: float = PUT_TIMEOUT,
+        seen: TTLCache | None = None,
+        dead_letter: Path | None = None,
+    ):
+        self.client = client
+        self.dead_letter = dead_letter
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.put_timeout = put_timeout
+        self.queue: queue.Queue[list[Event]] = queue.Queue(maxsize=queue_size)
+        self.seen = seen if seen is not None else TTLCache(SEEN_SIZE, SEEN_TTL)
+        self.stats = IngestStats()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def snapshot(self) -> IngestStats:
+        """Cópia coerente dos contadores (a thread de gravação continua mexendo neles)"""
+        with self.lock:
+            return replace(self.stats, flush_sizes=list(self.stats.flush_sizes))
+
+    def stop(self) -> None:
+        """Para de receber e grava o que ainda está na fila"""
+        self.stopping.set()
+        self.thread.join()
+
+    def offer(self, payload: dict) -> bool:
+        """Enfileira os eventos novos do payload; False se a fila continuar cheia (responder 503)"""
+        events = parse_payload(payload)
+        with self.lock:
+            self.stats.payloads += 1
+            fresh = []
+            for event in events:
+                if self.seen.get(event.key, None) is None:
+                    self.seen.put(event.key, True)
+                    fresh.append(event)
+            self.stats.duplicates += len(events) - len(fresh)
+        if not fresh:
+            return True
+        try:
+            self.queue.put(fresh, timeout=self.put_timeout)
+        except queue.Full:
+            with self.lock:  # A Meta vai reenviar: o reenvio não pode ser tomado por duplicata
+                for event in fresh:
+                    self.seen.invalidate(event.key)
+                self.stats.rejected += 1
+            return False
+        with self.lock:
+            self.stats.events += len(fresh)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = list(self.queue.get(timeout=0.1))
+            except queue.Empty:
+                if self.stopping.is_set():
+                    return
+                continue
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.extend(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def flush(self, events: Sequence[Event]) -> None:
+        """Grava um lote: insert das mensagens e apply_whatsapp_statuses dos recibos"""
+        messages, statuses = coalesce(events)
+        with self.lock:
+            self.stats.flushes += 1
+            self.stats.flush_sizes.append(len(events))
+        error: Exception | None = None
+        for attempt in range(FLUSH_ATTEMPTS):
+            try:
+                if messages:
+                    self.client.insert(LOGS, messages, on_conflict='message_id', ignore_duplicates=True)
+                    with self.lock:
+                        self.stats.writes += 1
+                        self.stats.written += len(messages)
+                    messages = []
+                if statuses:
+                    self.client.rpc(STATUS_FUNCTION, {'statuses': statuses})
+                    with self.lock:
+                        self.stats.writes += 1
+                        self.stats.written += len(statuses)
+                    statuses = []
+                return
+            except PostgrestError as e:
+                error = e
+                if e.status < 500:
+                    print(f"❌ Lote recusado pelo banco: {e}")
+                    break
+            except OSError as e:
+                error = e
+            with self.lock:
+                self.stats.retries += 1
+            wait = min(RETRY_BASE * 2 ** attempt, RETRY_MAX)
+            print(f"⚠️  Falha ao gravar o lote ({error}); nova tentativa em {wait:.1f} s")
+            time.sleep(wait)
+        self._drop(events, messages, statuses, error)
+
+    def _drop(self, events: Sequence[Event], messages: list[dict], statuses: list[dict], error: Exception | None) -> None:
+        """Lote que não foi gravado: dead letter e fora dos vistos, para o reenvio da Meta entrar"""
+        unwritten = {kind for kind, rows in (('message', messages), ('status', statuses)) if rows}
+        with self.lock:
+            for event in events:
+                if event.kind in unwritten:
+                    self.seen.invalidate(event.key)
+            self.stats.lost += len(messages) + len(statuses)
+        where = ''
+        if self.dead_letter is not None:
+            failed_at = datetime.now(timezone.utc).isoformat()
+            try:
+                self.dead_letter.parent.mkdir(parents=True, exist_ok=True)
+                with self.dead_letter.open('a', encoding='utf-8') as out:
+                    for kind, rows in (('message', messages), ('status', statuses)):
+                        for row in rows:
+                            item = {'failed_at': failed_at, 'error': str(error), 'kind': kind, 'row': row}
+                            out.write(json.dumps(item, ensure_ascii=False) + '\n')
+                where = f'; guardadas em {self.dead_letter}'
+            except OSError as e:
+                where = f'; dead letter falhou: {e}'
+        print(f"❌ {len(messages) + len(statuses)} linha(s) do lote não foram gravadas{where}")
+
+
+# --- servidor --------------------------------------------------------------
+
+class _IngestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    ingestor: Ingestor
+    verify_token: str | None
+
+    def log_message(self, format, *args):  # noqa: A002 - assinatura da stdlib
+        pass
+
+    def _reply(self, status: int, text: str, headers: dict[str, str] | None = None) -> None:
+        data = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802 - nome exigido pelo http.server
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        if params.get('hub.mode') == 'subscribe' and self.verify_token and params.get('hub.verify_token') == self.verify_token:
+            self._reply(200, params.get('hub.challenge', ''))
+        else:
+            self._reply(403, 'Forbidden')
+
+    def _payload(self) -> dict | None:
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, 'JSON inválido')
+            return None
+        return payload if isinstance(payload, dict) else {}
+
+    def do_POST(self):  # noqa: N802 - nome exigido pelo http.server
+        payload = self._payload()
+        if payload is None:
+            return
+        if self.ingestor.offer(payload):
+            self._reply(200, 'OK')
+        else:
+            self._reply(503, 'Fila cheia', {'Retry-After': '1'})
+
+
+class _DirectHandler(_IngestHandler):
+    """O que a Edge Function faz hoje: uma escrita por evento antes de responder"""
+    client: PostgrestClient
+    stats: IngestStats
+    lock: threading.Lock
+
+    def do_POST(self):  # noqa: N802 - nome exigido pelo http.server
+        payload = self._payload()
+        if payload is None:
+            return
+        events = parse_payload(payload)
+        for event in events:
+            if event.kind == 'message':
+                self.client.insert(LOGS, [event.row])
+            else:
+                values = {column: value for column, value in event.row.items() if column != 'message_id' and value is not None}
+                self.client.update(LOGS, {'message_id': f"eq.{event.row['message_id']}"}, values)
+        with self.lock:
+            self.stats.payloads += 1
+            self.stats.events += len(events)
+            self.stats.writes += len(events)
+            self.stats.written += len(events)
+        self._reply(200, 'OK')
+
+
+class IngestServer:
+    """Webhook da Meta em 127.0.0.1 com a fila de gravação (use com `with`)"""
+
+    def __init__(self, ingestor: Ingestor, port: int = 0, host: str = '127.0.0.1', verify_token: str | None = None):
+        self.ingestor = ingestor
+        handler = type('Handler', (_IngestHandler,), {'ingestor': ingestor, 'verify_token': verify_token})
+        self.server = LocalHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'IngestServer':
+        self.ingestor.start()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.ingestor.stop()
+
+
+class DirectServer:
+    """Webhook que grava evento a evento, para comparação no bench (use com `with`)"""
+
+    def __init__(self, client: PostgrestClient, port: int = 0):
+        self.stats = IngestStats()
+        handler = type('Handler', (_DirectHandler,), {
+            'client': client, 'stats': self.stats, 'lock': threading.Lock(), 'verify_token': None,
+        })
+        self.server = LocalHTTPServer(('127.0.0.1', port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'DirectServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- bench -----------------------------------------------------------------
+
+@dataclass
+class BenchConfig:
+    messages: int = 1000  # Mensagens enviadas (linhas já em whatsapp_logs)
+    replies: float = 0.2  # Fração que recebe resposta da cliente
+    failed: float = 0.05  # Fração que falha na entrega
+    per_payload: int = 3  # Eventos por POST, no máximo
+    retry_rate: float = 0.1  # Fração dos POSTs que a Meta reenvia
+    senders: int = 20  # POSTs simultâneos
+    batch: int = DEFAULT_BATCH
+    delay: float = DEFAULT_DELAY
+    seed: int = 7
+
+
+@dataclass
+class BenchSide:
+    label: str
+    ack: Latency
+    elapsed: float
+    stats: IngestStats
+    mismatches: int
+
+    def describe(self) -> str:
+        stats = self.stats
+        rate = stats.payloads / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.label:<9} ack {self.ack.describe()} | {rate:.0f} POSTs/s | "
+            f"{stats.writes} escrita(s) no banco para {stats.events} evento(s) | "
+            f"{stats.duplicates} reenvio(s) descartado(s), {stats.rejected} 503 | {self.mismatches} divergência(s)"
+        )
+
+
+def _schema() -> dict:
+    return schema_defaults([REPO / 'whatsapp-meta-tables.sql'])
+
+
+def seed_logs(config: BenchConfig) -> tuple[list[dict], list[dict], dict]:
+    """Mensagens já enviadas, a sequência de POSTs da Meta e o estado final esperado"""
+    rng = random.Random(config.seed)
+    columns = _schema()[LOGS]
+    base = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+    logs, events = [], []
+    expected: dict = {'statuses': {}, 'incoming': set()}
+    for index in range(config.messages):
+        message_id = f'wamid.{uuid.UUID(int=rng.getrandbits(128)).hex}'
+        phone = f'5511{rng.randrange(10**9):09d}'
+        row = {column: make() if make else None for column, make in columns.items()}
+        row.update({'phone': phone, 'message_type': 'confirmation', 'message_id': message_id, 'status': 'sent'})
+        logs.append(row)
+        sent = base + timedelta(seconds=index)
+        steps = ['sent', 'failed'] if rng.random() < config.failed else ['sent', 'delivered', 'read']
+        for phase, status in enumerate(steps):
+            body = {'id': message_id, 'status': status, 'timestamp': str(int((sent + timedelta(seconds=phase * 5)).timestamp()))}
+            if status == 'failed':
+                body['errors'] = [{'code': 131026, 'title': 'Message undeliverable'}]
+            # Fases se misturam um pouco: às vezes o 'read' chega antes do 'delivered'
+            events.append((phase + rng.random() * 1.5, {'statuses': [body]}))
+        expected['statuses'][message_id] = steps[-1]
+        if steps[-1] == 'read' and rng.random() < config.replies:
+            reply_id = f'wamid.{uuid.UUID(int=rng.getrandbits(128)).hex}'
+            text = {'from': phone, 'id': reply_id, 'timestamp': str(int(sent.timestamp()) + 30), 'type': 'text', 'text': {'body': 'Confirmado!'}}
+            events.append((2 + rng.random() * 1.5, {'messages': [text]}))
+            expected['incoming'].add(reply_id)
+    events.sort(key=lambda item: item[0])
+    payloads = []
+    position = 0
+    while position < len(events):
+        size = rng.randint(1, config.per_payload)
+        value: dict = {'messaging_product': 'whatsapp'}
+        for _, item in events[position:position + size]:
+            for name, found in item.items():
+                value.setdefault(name, []).extend(found)
+        payloads.append({'object': 'whatsapp_business_account', 'entry': [{'id': 'waba', 'changes': [{'field': 'messages', 'value': value}]}]})
+        position += size
+    retries = [
+        (rng.randrange(index + 1, len(payloads) + 1), payload)
+        for index, payload in enumerate(payloads) if rng.random() < config.retry_rate
+    ]
+    for position, payload in sorted(retries, key=lambda item: item[0], reverse=True):
+        payloads.insert(position, payload)
+    return logs, payloads, expected
+
+
+def _serve(tables: dict, ready, stop) -> None:
+    """Processo do stand-in: o webhook e os remetentes não disputam o GIL com o banco"""
+    with PostgrestStandIn(tables, defaults=_schema(), functions={STATUS_FUNCTION: apply_statuses}) as server:
+        ready.send(server.url)
+        stop.wait()
+
+
+def _send(url: str, payloads: Sequence[dict], senders: int) -> tuple[list[float], float]:
+    """POSTs simultâneos em conexões keep-alive; 503 espera e reenvia, como a Meta"""
+    pending: queue.Queue[dict] = queue.Queue()
+    for payload in payloads:
+        pending.put(payload)
+    parts = urllib.parse.urlsplit(url)
+    samples: list[float] = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port)
+        mine = []
+        while True:
+            try:
+                payload = pending.get_nowait()
+            except queue.Empty:
+                break
+            data = json.dumps(payload).encode('utf-8')
+            while True:
+                started = time.perf_counter()
+                connection.request('POST', '/', data, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                mine.append(time.perf_counter() - started)
+                if response.status != 503:
+                    break
+                time.sleep(0.05)
+        connection.close()
+        with lock:
+            samples.extend(mine)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(senders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def _mismatches(client: PostgrestClient, expected: dict) -> int:
+    """Linhas com status diferente do último da sequência e mensagens recebidas faltando ou repetidas"""
+    rows = client.select(LOGS, columns='message_id,message_type,delivery_status,delivered_at,read_at')
+    found = 0
+    incoming = Counter(row['message_id'] for row in rows if row['message_type'] == 'incoming')
+    for row in rows:
+        status = expected['statuses'].get(row['message_id'])
+        if status is None:
+            continue
+        if row['delivery_status'] != status or (status == 'read' and not (row['delivered_at'] and row['read_at'])):
+            found += 1
+    found += sum(1 for message_id in expected['incoming'] if incoming[message_id] != 1)
+    found += sum(count for message_id, count in incoming.items() if message_id not in expected['incoming'])
+    return found
+
+
+def run_bench(config: BenchConfig) -> tuple[BenchSide, BenchSide]:
+    logs, payloads, expected = seed_logs(config)
+    sides = []
+    for label in ('hoje', 'em lote'):
+        ready, sender = multiprocessing.Pipe(duplex=False)
+        stop = multiprocessing.Event()
+        process = multiprocessing.Process(target=_serve, args=({LOGS: [dict(row) for row in logs]}, sender, stop), daemon=True)
+        process.start()
+        try:
+            client = PostgrestClient(ready.recv(), 'bench')
+            if label == 'hoje':
+                with DirectServer(client) as server:
+                    samples, elapsed = _send(server.url, payloads, config.senders)
+                stats = server.stats
+            else:
+                ingestor = Ingestor(client, max_batch=config.batch, max_delay=config.delay)
+                with IngestServer(ingestor) as server:
+                    samples, elapsed = _send(server.url, payloads, config.senders)
+                stats = ingestor.snapshot()
+            sides.append(BenchSide(label, Latency.of(samples), elapsed, stats, _mismatches(client, expected)))
+        finally:
+            stop.set()
+            process.join(timeout=5)
+    return sides[0], sides[1]
+
+
+# --- CLI -------------------------------------------------------------------
+
+def _verify_token(client: PostgrestClient) -> str | None:
+    rows = client.select('whatsapp_config', {'active': 'eq.true'}, columns='webhook_verify_token', limit=1)
+    return rows[0]['webhook_verify_token'] if rows else None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    defaults = BenchConfig()
+    parser = argparse.ArgumentParser(
+        prog='python -m studio.webhook',
+        description='Webhook do WhatsApp com confirmação imediata e gravação em lote',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='Receber o webhook da Meta e gravar em lote no Supabase')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8787)
+    serve.add_argument('--verify-token', default=os.environ.get('WHATSAPP_VERIFY_TOKEN'),
+                       help='Token da verificação do webhook (padrão: whatsapp_config ativo)')
+    serve.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='Eventos por gravação')
+    serve.add_argument('--delay', type=float, default=DEFAULT_DELAY, help='Espera máxima de um evento na fila (s)')
+    serve.add_argument('--queue', type=int, default=DEFAULT_QUEUE, help='POSTs na fila antes do 503')
+    serve.add_argument('--dead-letter', type=Path, default=Path(DEAD_LETTER),
+                       help=f'Linhas de lotes não gravados (padrão: {DEAD_LETTER})')
+    bench = commands.add_parser('bench', help='Gravação evento a evento contra gravação em lote')
+    bench.add_argument('--messages', type=int, default=defaults.messages)
+    bench.add_argument('--senders', type=int, default=defaults.senders, help='POSTs simultâneos')
+    bench.add_argument('--retry-rate', type=float, default=defaults.retry_rate, help='Fração dos POSTs reenviados')
+    bench.add_argument('--batch', type=int, default=defaults.batch)
+    bench.add_argument('--delay', type=float, default=defaults.delay)
+    bench.add_argument('--seed', type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        config = BenchConfig(
+            messages=args.messages, senders=args.senders, retry_rate=args.retry_rate,
+            batch=args.batch, delay=args.delay, seed=args.seed,
+        )
+        before, after = run_bench(config)
+        print(f"📊 {config.messages} mensagem(ns), {config.senders} POST(s) simultâneo(s), {config.retry_rate:.0%} reenviados")
+        print(f"   {before.describe()}")
+        print(f"   {after.describe()}")
+        sizes = after.stats.flush_sizes
+        if sizes:
+            print(f"   {len(sizes)} lote(s), {sum(sizes) / len(sizes):.0f} evento(s) por lote em média, maior {max(sizes)}")
+        return 0 if after.mismatches == 0 else 1
+
+    try:
+        client = PostgrestClient.from_env()
+        token = args.verify_token or _verify_token(client)
+    except (OSError, ValueError, PostgrestError) as e:
+        print(f"❌ {e}")
+        return 1
+    if not token:
+        print("⚠️  Sem token de verificação: o GET de verificação da Meta vai receber 403")
+    ingestor = Ingestor(
+        client, max_batch=args.batch, max_delay=args.delay, queue_size=args.queue, dead_letter=args.dead_letter,
+    )
+    with IngestServer(ingestor, port=args.port, host=args.host, verify_token=token) as server:
+        print(f"📡 Webhook em {server.url} (lotes de até {args.batch} eventos ou {args.delay:.2f} s)")
+        try:
+            while True:
+                time.sleep(60)
+                stats = ingestor.snapshot()
+                print(
+                    f"   {stats.payloads} POST(s), {stats.events} evento(s), {stats.duplicates} reenvio(s), "
+                    f"{stats.rejected} 503, {stats.writes} escrita(s), {stats.lost} perdida(s)"
+                )
+        except KeyboardInterrupt:
+            print("\n👋 Gravando o que ficou na fila...")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+-- Papéis e auth.uid() do Supabase para um Postgres local
+--
+-- supabase-schema.sql e create-clients-table.sql usam auth.uid() nas
+-- políticas de RLS. No Supabase o schema auth e os papéis anon,
+-- authenticated e service_role já existem e este script não faz nada; num
+-- Postgres local (python -m studio.migrate apply --rehearse) ele cria o
+-- mínimo para os outros scripts rodarem.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+        CREATE ROLE anon NOLOGIN NOINHERIT;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN
+        CREATE ROLE authenticated NOLOGIN NOINHERIT;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        CREATE ROLE service_role NOLOGIN NOINHERIT;
+    END IF;
+END $$;
+
+-- Mesma definição do Supabase: o id do usuário vem do JWT da requisição
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_namespace WHERE nspname = 'auth') THEN
+        CREATE SCHEMA auth;
+        GRANT USAGE ON SCHEMA auth TO anon, authenticated, service_role;
+    END IF;
+    IF to_regprocedure('auth.uid()') IS NULL THEN
+        CREATE FUNCTION auth.uid() RETURNS uuid LANGUAGE sql STABLE AS $uid$
+            SELECT COALESCE(
+                NULLIF(current_setting('request.jwt.claim.sub', true), ''),
+                (NULLIF(current_setting('request.jwt.claims', true), '')::jsonb ->> 'sub')
+            )::uuid
+        $uid$;
+    END IF;
+END $$;
@@ -0,0 +1,93 @@
+import random
+from datetime import date, timedelta
+
+from studio.conflicts import Candidate, ConflictIndex
+from studio.postgrest import PostgrestClient
+from studio.standin import PostgrestStandIn
+from studio.tables import format_time
+
+SERVICES = [
+    {'designer_id': 'd1', 'name': 'Manicure', 'duration': 60},
+    {'designer_id': 'd1', 'name': 'Alongamento', 'duration': 150},
+    {'designer_id': 'd2', 'name': 'Manicure', 'duration': 45},
+]
+DURATION = {'Manicure': 60, 'Alongamento': 150}
+
+
+def appointments(count, seed=3, days=5):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        rows.append({
+            'id': f'{rng.randrange(16**8):08x}-{index:04d}',
+            'designer_id': 'd1',
+            'date': (date(2025, 12, 1) + timedelta(days=rng.randrange(days))).isoformat(),
+            'time': format_time(rng.randrange(8 * 60, 18 * 60, 15)),
+            'service': rng.choice(list(DURATION)),
+            'status': rng.choice(['pending', 'confirmed', 'confirmed', 'cancelled']),
+        })
+    return rows
+
+
+def brute_force(rows, day, start, end, exclude=None):
+    found = []
+    for row in rows:
+        if row['status'] == 'cancelled' or row['date'] != day.isoformat() or row['id'] == exclude:
+            continue
+        hours, minutes = map(int, row['time'].split(':')[:2])
+        begin = hours * 60 + minutes
+        if begin < end and begin + DURATION[row['service']] > start:
+            found.append(row['id'])
+    return sorted(found)
+
+
+def test_conflicts_match_a_plain_scan():
+    rows = appointments(300)
+    index = ConflictIndex.from_rows(rows, SERVICES)
+    rng = random.Random(5)
+    for _ in range(500):
+        day = date(2025, 12, 1) + timedelta(days=rng.randrange(6))
+        start, duration = rng.randrange(7 * 60, 20 * 60, 5), rng.choice([30, 60, 150])
+        exclude = rng.choice(rows)['id'] if rng.random() < 0.3 else None
+        found = index.conflicts('d1', day, format_time(start), duration, exclude)
+        assert sorted(found) == brute_force(rows, day, start, start + duration, exclude)
+
+
+def test_duration_counts_not_only_the_start_time():
+    rows = [
+        {'id': 'longo', 'designer_id': 'd1', 'date': '2025-12-01', 'time': '13:00', 'service': 'Alongamento', 'status': 'confirmed'},
+        {'id': 'outro', 'designer_id': 'd2', 'date': '2025-12-01', 'time': '14:00', 'service': 'Manicure', 'status': 'pending'},
+    ]
+    index = ConflictIndex.from_rows(rows, SERVICES)
+    assert index.conflicts('d1', date(2025, 12, 1), '14:00', 60) == ['longo']
+    assert index.conflicts('d1', date(2025, 12, 1), '15:30', 60) == []
+    assert index.conflicts('d1', date(2025, 12, 1), '14:00', 60, exclude='longo') == []
+    conflicts = index.check([Candidate('d2', date(2025, 12, 1), '13:30', 45, 'novo')])
+    assert [(item.subject, item.conflicting) for item in conflicts] == [('novo', ('outro',))]
+
+
+def test_sweep_reports_each_overlapping_pair_once():
+    rows = appointments(200, seed=9)
+    index = ConflictIndex.from_rows(rows, SERVICES)
+    pairs = {frozenset((conflict.subject, other)) for conflict in index.sweep() for other in conflict.conflicting}
+    expected = set()
+    for row in rows:
+        if row['status'] == 'cancelled':
+            continue
+        hours, minutes = map(int, row['time'].split(':'))
+        start = hours * 60 + minutes
+        for other in brute_force(rows, date.fromisoformat(row['date']), start, start + DURATION[row['service']], row['id']):
+            expected.add(frozenset((row['id'], other)))
+    assert pairs == expected
+
+
+def test_fetch_pages_past_the_row_cap():
+    rows = appointments(230, days=3)  # Vários por dia: a página vira no meio de uma data
+    rows.append({**rows[0], 'id': 'fora', 'date': '2025-11-30'})
+    with PostgrestStandIn({'appointments': rows, 'services': SERVICES}, max_rows=50) as server:
+        client = PostgrestClient(server.url, 'teste')
+        fetched = ConflictIndex.fetch(client, 'd1', date(2025, 12, 1), date(2025, 12, 3), page_size=50)
+    expected = ConflictIndex.from_rows(rows[:-1], SERVICES)
+    assert fetched.days.keys() == expected.days.keys()
+    for key, intervals in expected.days.items():
+        assert sorted(fetched.days[key].bookings, key=repr) == sorted(intervals.bookings, key=repr)
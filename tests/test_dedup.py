@@ -0,0 +1,80 @@
+import pytest
+
+from studio.dedup import (
+    Operation, SnapshotTarget, apply_operations, group_duplicates, inverse, person_keys, plan_dedup, read_log, write_log,
+)
+from studio.snapshot import Snapshot
+
+
+def designer(id, created, **values):
+    return {'id': id, 'name': values.pop('name', 'Ana'), 'created_at': created, 'updated_at': created, **values}
+
+
+DESIGNERS = [
+    designer('d1', '2025-01-01', email='ana@example.com', phone='11999999999'),
+    designer('d2', '2025-02-01', email=' ANA@example.com', pix_key='pix-ana', bio='Oi'),
+    designer('d3', '2025-03-01', phone='(11) 99999-9999', slug='ana'),  # Liga a d1 só pelo telefone
+    designer('d4', '2025-01-01', name='Bia', email='bia@example.com'),
+]
+SERVICES = [{'id': 's1', 'designer_id': 'd2', 'name': 'Unha', 'duration': 60}]
+APPOINTMENTS = [
+    {'id': 'a1', 'designer_id': 'd1', 'date': '2025-03-01', 'time': '10:00', 'client_phone': '11 98888-7777', 'status': 'confirmed'},
+    {'id': 'a2', 'designer_id': 'd3', 'date': '2025-03-01', 'time': '10:00:00', 'client_phone': '(11) 98888-7777', 'status': 'pending'},
+    {'id': 'a3', 'designer_id': 'd2', 'date': '2025-03-01', 'time': '10:00', 'client_phone': '11988887777', 'status': 'cancelled'},
+    {'id': 'a4', 'designer_id': 'd4', 'date': '2025-03-01', 'time': '10:00', 'client_phone': '11988887777', 'status': 'confirmed'},
+]
+TABLES = {'nail_designers': DESIGNERS, 'services': SERVICES, 'appointments': APPOINTMENTS}
+
+
+def test_groups_follow_shared_keys_transitively():
+    groups = group_duplicates(DESIGNERS, person_keys)
+    assert [sorted(row['id'] for row in group) for group in groups] == [['d1', 'd2', 'd3']]
+
+
+def test_plan_merges_designers_remaps_references_and_fills_gaps():
+    plan = plan_dedup(TABLES)
+    merges = {(merge.table, merge.survivor): sorted(merge.removed) for merge in plan.merges}
+    assert merges == {('nail_designers', 'd1'): ['d2', 'd3'], ('appointments', 'a1'): ['a2']}
+
+    # Referências antes das remoções, preenchimento da sobrevivente por último
+    phases = [1 if item.op == 'delete' else 2 if item.table == 'nail_designers' else 0 for item in plan.operations]
+    assert phases == sorted(phases) and set(phases) == {0, 1, 2}
+    rewrites = {item.id: item.after['designer_id'] for item in plan.operations if item.op == 'update' and item.table != 'nail_designers'}
+    assert rewrites == {'s1': 'd1', 'a3': 'd1'}  # a2 é removido, não remapeado
+    [fill] = [item for item in plan.operations if item.table == 'nail_designers' and item.op == 'update']
+    assert fill.after == {'pix_key': 'pix-ana', 'bio': 'Oi', 'slug': 'ana'}
+    assert next(item for item in plan.operations if item.id == 'a2').before['designer_id'] == 'd3'
+
+
+@pytest.mark.parametrize('rule, survivor', [('oldest', 'd1'), ('newest', 'd3'), ('most-complete', 'd2'), ('most-referenced', 'd2')])
+def test_rules_choose_the_survivor(rule, survivor):
+    plan = plan_dedup({**TABLES, 'services': SERVICES + [{'id': 's2', 'designer_id': 'd2', 'name': 'Pé'}]}, rule)
+    assert [merge.survivor for merge in plan.merges if merge.table == 'nail_designers'] == [survivor]
+
+
+def test_apply_then_undo_from_the_log_restores_the_snapshot(tmp_path):
+    with Snapshot(tmp_path / 's.sqlite') as snapshot:
+        snapshot.import_tables(TABLES)
+        before = snapshot.tables()
+        target = SnapshotTarget(snapshot)
+        plan = plan_dedup(target.tables())
+        apply_operations(target, plan.operations)
+        after = snapshot.tables()
+        assert [row['id'] for row in after['nail_designers']] == ['d1', 'd4']
+        assert {row['designer_id'] for row in after['services'] + after['appointments']} == {'d1', 'd4'}
+        assert plan_dedup(after).operations == []
+
+        log = tmp_path / 'dedup.jsonl'
+        write_log(log, plan, 'teste')
+        apply_operations(target, inverse(read_log(log)))
+        assert snapshot.tables() == before
+
+
+def test_a_failed_apply_leaves_nothing_behind(tmp_path):
+    with Snapshot(tmp_path / 's.sqlite') as snapshot:
+        snapshot.import_tables(TABLES)
+        before = snapshot.tables()
+        operations = plan_dedup(before).operations + [Operation('rename', 'services', 's1')]
+        with pytest.raises(ValueError, match='operação desconhecida'):
+            apply_operations(SnapshotTarget(snapshot), operations)
+        assert snapshot.tables() == before
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from codemods.engine import ALREADY_APPLIED, DRIFT, PATCHED, AnchorAutomaton, Edit, OverlapError, apply_edits
+
+
+def brute_force(text, patterns):
+    return sorted(
+        (start, index)
+        for index, pattern in enumerate(patterns)
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    )
+
+
+def test_automaton_finds_every_overlapping_occurrence():
+    rng = random.Random(1)
+    for _ in range(200):
+        patterns = list({''.join(rng.choices('ab', k=rng.randint(1, 4))) for _ in range(5)})
+        text = ''.join(rng.choices('abc', k=60))
+        assert sorted(AnchorAutomaton(patterns).finditer(text)) == brute_force(text, patterns)
+
+
+def test_automaton_reports_nested_anchors():
+    automaton = AnchorAutomaton(['useState', 'State'])
+    assert sorted(automaton.finditer('const [x] = useState(0); // State')) == [(12, 0), (15, 1), (28, 1)]
+
+
+def test_automaton_matches_across_chunk_boundaries():
+    automaton = AnchorAutomaton(['useState', 'State'])
+    text = 'const [x] = useState(0); // State'
+    chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+    assert list(automaton.finditer_chunks(chunks)) == list(automaton.finditer(text))
+
+
+def test_empty_anchor_is_rejected():
+    with pytest.raises(ValueError):
+        AnchorAutomaton(['ok', ''])
+
+
+EDITS = [
+    Edit('import { a }', 'import { a, b }'),
+    Edit('  return x;\n', '  log(x);\n  return x;\n'),
+    Edit('old()', 'novo()'),
+]
+SOURCE = 'import { a } from "m";\nfunction f(x) {\n  old();\n  return x;\n}\nold();\n'
+
+
+def test_single_pass_matches_sequential_replace():
+    expected = SOURCE
+    for edit in EDITS:
+        expected = expected.replace(edit.anchor, edit.replacement)
+    result = apply_edits(SOURCE, EDITS)
+    assert result.output == expected
+    assert all(item.applied for item in result.results)
+    assert result.results[2].starts == [SOURCE.index('old()'), SOURCE.rindex('old()')]
+
+
+def test_count_limits_replacements():
+    result = apply_edits(SOURCE, [Edit('old()', 'novo()', count=1)])
+    assert result.output.count('novo()') == 1 and result.output.count('old()') == 1
+
+
+def test_overlapping_edits_are_refused():
+    with pytest.raises(OverlapError):
+        apply_edits(SOURCE, [Edit('function f(x)', 'function g(x)'), Edit('f(x) {', 'f(y) {')])
+
+
+def test_missing_anchor_is_reported_as_drift():
+    result = apply_edits(SOURCE, [Edit('nada parecido aqui', 'zzz')])
+    assert result.results[0].status == DRIFT and not result.changed
+
+
+def test_second_run_sees_every_edit_already_applied():
+    result = apply_edits(SOURCE, EDITS)
+    assert [item.status for item in result.results] == [PATCHED] * 3
+    again = apply_edits(result.output, EDITS)
+    assert not again.changed
+    assert [item.status for item in again.results] == [ALREADY_APPLIED] * 3
+
+
+def test_crlf_file_keeps_its_line_endings():
+    result = apply_edits(SOURCE.replace('\n', '\r\n'), EDITS)
+    assert result.output == apply_edits(SOURCE, EDITS).output.replace('\n', '\r\n')
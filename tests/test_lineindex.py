@@ -0,0 +1,58 @@
+from codemods.engine import Edit, apply_edits
+from codemods.lineindex import AnchorShape, LineIndex, detect_newline
+
+ANCHOR = '''  if (step === 3) {
+    setOpen(true);
+  }'''
+FILE = 'function f() {\r\n\tif (step  ===  3) {\r\n\t\tsetOpen(true);\r\n\t}\r\n}\r\n'
+
+
+def test_find_ignores_whitespace_crlf_and_indentation():
+    index = LineIndex(FILE)
+    assert detect_newline(FILE) == '\r\n'
+    [(start, end)] = index.find(ANCHOR)
+    assert FILE[start:end] == 'if (step  ===  3) {\r\n\t\tsetOpen(true);\r\n\t}'
+
+
+def test_first_and_last_lines_may_be_partial():
+    text = 'const a = 1; if (ok) {\n  run();\n} else {\n'
+    [(start, end)] = LineIndex(text).find('if (ok) {\n    run();\n}')
+    assert text[start:end] == 'if (ok) {\n  run();\n}'
+
+
+def test_edge_tokens_may_start_or_end_inside_a_line_token():
+    text = '  <select  value={selectedDesigner}>\n'
+    [(start, end)] = LineIndex(text).find('select value={selectedDesigner}')
+    assert text[start:end] == 'select  value={selectedDesigner}'
+
+    text = '<div  className="a">\n\t<span>x</span></div>\n'
+    [(start, end)] = LineIndex(text).find('className="a">\n  <span>x</span')
+    assert text[start:end] == 'className="a">\n\t<span>x</span'
+
+    # Âncora que começa com espaço só casa a partir do início de um token
+    assert LineIndex(text).find(' iv  className="a">') == []
+    result = apply_edits(text, [Edit('div className="a">', 'div className="b">')])
+    assert result.output == '<div className="b">\n\t<span>x</span></div>\n'
+
+
+def test_single_line_anchor_and_repeated_matches():
+    text = 'a(); b();\n  a();  b();\nc();\n'
+    found = LineIndex(text).find('a();   b();')
+    assert [text[start:end] for start, end in found] == ['a(); b();', 'a();  b();']
+    assert LineIndex(text).find('   ') == []
+
+
+def test_adapt_follows_the_target_indentation_and_newline():
+    index = LineIndex(FILE)
+    shape = AnchorShape.from_text(ANCHOR)
+    [(start, _)] = index.find(shape)
+    replacement = '  if (step === 3) {\n    setOpen(true);\n    focus();\n  }'
+    assert index.adapt(replacement, shape, start) == 'if (step === 3) {\r\n\t  setOpen(true);\r\n\t  focus();\r\n\t}'
+
+
+def test_apply_edits_falls_back_to_the_normalized_index():
+    edit = Edit(ANCHOR, '  if (step === 3) {\n    setOpen(true);\n    focus();\n  }')
+    result = apply_edits(FILE, [edit])
+    assert result.results[0].normalized
+    assert 'focus();' in result.output and '\r\n' in result.output and '\n\n' not in result.output
+    assert apply_edits(result.output, [edit]).results[0].present
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from codemods import runner
+from codemods.engine import Edit
+from codemods.manifest import APPLIED, DRIFT, Manifest, content_hash
+from codemods.runner import codemod_id, run_batch
+from codemods.spec import Codemod
+
+ANCHOR = '''  const handleNext = () => {
+    validate(form);
+    setStep(step + 1);
+    track('next');
+  };'''
+DRIFTED = '''function Page() {
+  const handleNext = () => {
+    validate(form);
+    saveDraft(form);
+    setStep(step + 1);
+    analytics.track('next');
+  };
+  return null;
+}
+'''
+FIX = Codemod('fix_next', 'Page.tsx', (Edit(ANCHOR, ANCHOR.replace('validate(form);', 'if (!validate(form)) return;')),))
+SIMPLE = Codemod('fix_simple', 'Simple.tsx', (Edit('let c;', 'let c = 0;'),))
+
+
+@pytest.fixture
+def io_calls(monkeypatch):
+    calls = []
+    for name in ('read_source', 'write_patched', 'write_text'):
+        real = getattr(runner, name)
+
+        def wrapper(*args, _real=real, _name=name, **kwargs):
+            calls.append(_name)
+            return _real(*args, **kwargs)
+        monkeypatch.setattr(runner, name, wrapper)
+    return calls
+
+
+def run(root, codemod, **kwargs):
+    manifest = Manifest.load(root)
+    [report] = run_batch(root, [codemod], jobs=1, manifest=manifest, **kwargs)
+    return report, Manifest.load(root).get(root / codemod.target)
+
+
+def test_unchanged_file_is_neither_read_nor_written(tmp_path, io_calls):
+    (tmp_path / 'Simple.tsx').write_text('let c;\n', encoding='utf-8')
+    report, entry = run(tmp_path, SIMPLE)
+    assert report.changed and io_calls == ['read_source', 'write_patched']
+    assert entry.patches == {codemod_id(SIMPLE): APPLIED}
+    assert entry.sha256 == content_hash('let c = 0;\n')
+
+    io_calls.clear()
+    report, again = run(tmp_path, SIMPLE)
+    assert report.skipped and not report.changed and io_calls == []
+    assert again == entry
+
+
+def test_touched_file_is_read_but_not_rewritten(tmp_path, io_calls):
+    path = tmp_path / 'Simple.tsx'
+    path.write_text('let c;\n', encoding='utf-8')
+    _, entry = run(tmp_path, SIMPLE)
+    os.utime(path, ns=(entry.mtime_ns + 5_000_000_000, entry.mtime_ns + 5_000_000_000))
+
+    io_calls.clear()
+    report, touched = run(tmp_path, SIMPLE)
+    assert report.skipped and io_calls == ['read_source']
+    assert touched.sha256 == entry.sha256 and touched.mtime_ns == entry.mtime_ns + 5_000_000_000
+
+    io_calls.clear()
+    assert run(tmp_path, SIMPLE)[0].skipped and io_calls == []  # Com o mtime novo registrado, nem lê
+
+
+def test_drift_is_recorded_and_retried_with_relocation(tmp_path, io_calls):
+    path = tmp_path / 'Page.tsx'
+    path.write_text(DRIFTED, encoding='utf-8')
+    pid = codemod_id(FIX)
+
+    report, entry = run(tmp_path, FIX)
+    assert report.drift == [pid] and not report.changed
+    assert entry.patches == {pid: DRIFT}
+
+    io_calls.clear()
+    report, _ = run(tmp_path, FIX)
+    assert report.skipped and report.drift == [pid] and io_calls == []  # Sem --relocate o drift fica registrado
+
+    report, entry = run(tmp_path, FIX, relocate_threshold=0.5)
+    assert report.changed and report.drift == [] and io_calls == ['read_source', 'write_patched']
+    assert 'if (!validate(form)) return;' in path.read_text(encoding='utf-8')
+    assert entry.patches == {pid: APPLIED}
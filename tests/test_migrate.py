@@ -0,0 +1,140 @@
+import pytest
+
+from studio.migrate import (
+    REPO, Applied, Database, MigrationError, checksum, classify, load_plan, read_migration, split_statements,
+)
+
+
+def sqls(text):
+    return [statement.sql for statement in split_statements(text)]
+
+
+def test_split_respects_quotes_comments_and_dollar_bodies():
+    text = (
+        "SELECT 'a;b''c', E'x\\';y', \"q;\"\"z\";\n"
+        "-- comentário; ignorado\n"
+        "/* bloco /* aninhado; */ ainda; */\n"
+        "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $$ ; $body$ LANGUAGE sql;\n"
+        "DO $$ BEGIN PERFORM 1; END $$;\n"
+        "SELECT a$b$ FROM t WHERE x = $1;\n"
+        "SELECT 'sem ponto e vírgula no fim'"
+    )
+    assert sqls(text) == [
+        "SELECT 'a;b''c', E'x\\';y', \"q;\"\"z\"",
+        "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $$ ; $body$ LANGUAGE sql",
+        "DO $$ BEGIN PERFORM 1; END $$",
+        "SELECT a$b$ FROM t WHERE x = $1",
+        "SELECT 'sem ponto e vírgula no fim'",
+    ]
+
+
+def test_split_reports_the_first_line_of_each_statement():
+    statements = split_statements("\n-- topo\nSELECT 1;\n\nCREATE TABLE t (\n  id int\n);;\n")
+    assert [statement.line for statement in statements] == [3, 5]
+
+
+@pytest.mark.parametrize('text', ["SELECT 'aberta", 'DO $$ BEGIN', '/* sem fim', 'SELECT "id'])
+def test_split_rejects_unterminated_text(text):
+    with pytest.raises(MigrationError, match='linha 1'):
+        split_statements(text)
+
+
+def test_checksum_ignores_line_endings_only():
+    assert checksum(b'SELECT 1;\r\nSELECT 2;\r\n') == checksum(b'SELECT 1;\nSELECT 2;\n')
+    assert checksum(b'SELECT 1;\n') != checksum(b'SELECT 2;\n')
+
+
+def test_transaction_control_is_stripped(tmp_path):
+    path = tmp_path / 'x.sql'
+    path.write_text('BEGIN;\nCREATE TABLE t (id int);\nCOMMIT;\n', encoding='utf-8')
+    migration = read_migration(path, 'lote')
+    assert [statement.sql for statement in migration.statements] == ['CREATE TABLE t (id int)']
+    assert [statement.sql for statement in migration.dropped] == ['BEGIN', 'COMMIT']
+
+
+@pytest.mark.parametrize('text, message', [
+    ('CREATE INDEX CONCURRENTLY i ON t (id);', 'não roda dentro de transação'),
+    ('VACUUM t;', 'não roda dentro de transação'),
+    ('SELECT 1; ROLLBACK;', 'desfaria o lote'),
+    ('-- só comentário\n', 'sem comandos'),
+])
+def test_scripts_that_cannot_run_in_a_batch_are_rejected(tmp_path, text, message):
+    path = tmp_path / 'x.sql'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(MigrationError, match=message):
+        read_migration(path, 'lote')
+
+
+def test_repo_plan_classifies_every_root_script():
+    plan = load_plan()
+    planned = [migration.name for migration in plan.migrations()]
+    assert sorted(planned + list(plan.skipped)) == sorted(path.name for path in REPO.glob('*.sql'))
+    # Tudo que usa auth.uid() vem depois do lote que o cria num Postgres comum
+    assert planned[0] == 'supabase-local-auth.sql'
+    assert plan.batches[0].name == 'supabase'
+    users = [name for name in planned[1:] if 'auth.uid()' in (REPO / name).read_text(encoding='utf-8')]
+    assert 'supabase-schema.sql' in users
+
+
+def test_unlisted_and_missing_files_stop_the_plan(tmp_path):
+    (tmp_path / 'a.sql').write_text('SELECT 1;', encoding='utf-8')
+    (tmp_path / 'solto.sql').write_text('SELECT 2;', encoding='utf-8')
+    manifest = tmp_path / 'migrations.toml'
+    manifest.write_text('[[batches]]\nname = "x"\nfiles = ["a.sql", "sumiu.sql"]\n', encoding='utf-8')
+    with pytest.raises(MigrationError) as error:
+        load_plan(tmp_path, manifest)
+    assert 'sumiu.sql: arquivo não encontrado' in str(error.value)
+    assert 'solto.sql: fora de migrations.toml' in str(error.value)
+
+
+def test_classify_by_checksum(tmp_path):
+    for name in ('a.sql', 'b.sql', 'c.sql'):
+        (tmp_path / name).write_text(f'SELECT {name!r};', encoding='utf-8')
+    manifest = tmp_path / 'migrations.toml'
+    manifest.write_text('[[batches]]\nname = "x"\nfiles = ["a.sql", "b.sql", "c.sql"]\n', encoding='utf-8')
+    plan = load_plan(tmp_path, manifest)
+    a = plan.find('a.sql')
+    applied = {
+        'a.sql': Applied(a.checksum, 'x', None, 1.0, False),
+        'b.sql': Applied('antigo', 'x', None, 1.0, False),
+    }
+    assert classify(plan, applied) == {'a.sql': 'applied', 'b.sql': 'changed', 'c.sql': 'pending'}
+
+
+class DriverError(Exception):
+    pass
+
+
+class Connection:
+    """Conexão mínima do driver: o cursor falha em todo execute"""
+
+    def __init__(self):
+        self.rolled_back = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, *args):
+        raise DriverError('relation "studio_migrations" does not exist\nLINE 1: ...')
+
+    def rollback(self):
+        self.rolled_back += 1
+
+    def commit(self):
+        raise AssertionError('não deveria confirmar')
+
+
+def test_driver_errors_become_migration_errors():
+    database = Database.__new__(Database)
+    database.error = DriverError
+    database.db = Connection()
+    for call in (database.setup, database.applied, database.extensions):
+        with pytest.raises(MigrationError, match='^Postgres: relation "studio_migrations" does not exist$'):
+            call()
+    assert database.db.rolled_back == 3
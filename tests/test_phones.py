@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from studio.phones import PhoneLookup, TTLCache, canonical_phone, check_phones, main, phone_variants
+from studio.postgrest import PostgrestClient
+from studio.standin import PostgrestStandIn
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('(11) 99999-9999', '+5511999999999'),
+    ('11999999999', '+5511999999999'),
+    ('+55 11 9999-9999', '+5511999999999'),  # Celular antigo ganha o 9
+    ('011 99999-9999', '+5511999999999'),
+    ('0 21 11 99999-9999', '+5511999999999'),  # Código da operadora
+    ('005511999999999', '+5511999999999'),
+    ('5511999999999', '+5511999999999'),
+    ('1133334444', '+551133334444'),
+    ('+1 415 555 0100', '+14155550100'),
+    ('11 8999-999', None),
+    ('1183334444x', '+5511983334444'),
+    ('', None),
+    (None, None),
+])
+def test_canonical_phone(raw, expected):
+    assert canonical_phone(raw) == expected
+
+
+def test_variants_all_canonicalize_back():
+    for e164 in ('+5511999999999', '+551133334444'):
+        variants = phone_variants(e164)
+        assert len(variants) == len(set(variants))
+        assert {canonical_phone(item) for item in variants} == {e164}
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    cache.put('b', None, ttl=1)
+    assert cache.get('b') is None and cache.get('zz') is not None
+    now[0] = 2
+    assert cache.get('b', 'faltou') == 'faltou'
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)  # 'b' foi o menos usado
+    assert [cache.get(key, 'faltou') for key in 'abc'] == [1, 'faltou', 3]
+
+
+def designers():
+    return {
+        'nail_designers': [{
+            'id': 'd1', 'name': 'Ana', 'phone': '(11) 99999-9999', 'phone_e164': '+5511999999999',
+            'password': 'antiga', 'is_active': True, 'created_at': '2025-01-01T00:00:00+00:00',
+        }],
+        'clients': [],
+    }
+
+
+def test_lookup_always_rereads_found_rows():
+    with PostgrestStandIn(designers()) as server:
+        client = PostgrestClient(server.url, 'teste')
+        lookup = PhoneLookup(client)
+        assert lookup.designer_by_phone('11999999999')['password'] == 'antiga'
+        assert len(lookup.cache) == 0 and lookup.requests == 1
+
+        client.update('nail_designers', [('id', 'eq.d1')], {'password': 'nova', 'is_active': False})
+        row = lookup.designer_by_phone('+55 (11) 99999-9999')
+        assert (row['password'], row['is_active']) == ('nova', False)
+        assert lookup.requests == 2
+
+        client.update('nail_designers', [('id', 'eq.d1')], {'phone': '21988887777', 'phone_e164': '+5521988887777'})
+        assert lookup.designer_by_phone('21 98888-7777')['id'] == 'd1'
+
+
+def test_lookup_caches_misses_until_invalidated():
+    with PostgrestStandIn(designers()) as server:
+        client = PostgrestClient(server.url, 'teste')
+        lookup = PhoneLookup(client)
+        assert lookup.client_by_phone('(21) 97777-6666') is None
+        assert lookup.client_by_phone('21977776666') is None  # Outra forma, mesmo número
+        assert lookup.requests == 1
+
+        client.insert('clients', [{
+            'id': 'c1', 'phone': '21977776666', 'phone_e164': '+5521977776666',
+            'created_at': '2025-01-02T00:00:00+00:00',
+        }])
+        lookup.invalidate('21 97777-6666')
+        assert lookup.client_by_phone('21977776666')['id'] == 'c1'
+
+        uncached = PhoneLookup(client, negative_ttl=0)
+        assert uncached.designer_by_phone('31966665555') is None
+        assert uncached.designer_by_phone('31966665555') is None
+        assert uncached.requests == 2 and len(uncached.cache) == 0
+
+
+def test_bench_reports_with_and_without_cache(capsys):
+    assert main(['bench', '--designers', '5', '--clients', '20', '--logins', '60']) == 0
+    out = capsys.readouterr().out
+    assert 'depois (E.164, sem cache)' in out and 'depois (E.164 + cache de faltas)' in out
+
+
+def test_check_reports_pending_mismatched_invalid_and_duplicates():
+    check = check_phones('clients', [
+        {'id': 'a', 'phone': '11999999999', 'phone_e164': None},
+        {'id': 'b', 'phone': '(11) 99999-9999', 'phone_e164': '+5511999999999'},
+        {'id': 'c', 'phone': '1133334444', 'phone_e164': '+5511933334444'},
+        {'id': 'd', 'phone': 'sem número', 'phone_e164': None},
+        {'id': 'e', 'phone': None},
+    ])
+    assert check.rows == 5
+    assert check.pending == ['a']
+    assert check.mismatched == {'c': ('+5511933334444', '+551133334444')}
+    assert check.invalid == [('d', 'sem número')]
+    assert check.duplicates == {'+5511999999999': ['a', 'b']}
+
+
+def test_check_command_reads_a_dump(tmp_path, capsys):
+    dump = tmp_path / 'dump.json'
+    dump.write_text(json.dumps({'nail_designers': [{'id': 'd1', 'phone': '11999999999'}]}), encoding='utf-8')
+    assert main(['check', str(dump)]) == 0
+    out = capsys.readouterr().out
+    assert 'nail_designers: 1 linha(s), 1 sem phone_e164' in out
+    assert 'add-phone-e164-columns.sql' in out
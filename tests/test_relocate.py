@@ -0,0 +1,60 @@
+from codemods.engine import DRIFT, PATCHED, Edit, apply_edits
+from codemods.lineindex import LineIndex
+from codemods.relocate import DEFAULT_THRESHOLD, relocate, relocation_span
+
+ANCHOR = '''  const handleNext = () => {
+    validate(form);
+    setStep(step + 1);
+    track('next');
+  };'''
+
+# Upstream renomeou uma linha e inseriu outra no meio do trecho
+DRIFTED = '''import x from 'y';
+
+function Page() {
+  const [step, setStep] = useState(1);
+  const handleNext = () => {
+    validate(form);
+    saveDraft(form);
+    setStep(step + 1);
+    analytics.track('next');
+  };
+  return null;
+}
+'''
+
+
+def test_relocate_finds_the_drifted_block():
+    index = LineIndex(DRIFTED)
+    found = relocate(index, ANCHOR)
+    assert (found.first_line, found.last_line) == (4, 9)
+    assert 0.5 < found.confidence < 1
+    start, end = relocation_span(index, found)
+    assert DRIFTED[start:end].startswith('const handleNext') and DRIFTED[start:end].endswith('};')
+
+
+def test_nothing_similar_gives_no_relocation():
+    assert relocate(LineIndex(DRIFTED), 'totally();\nunrelated();\ncode();') is None
+    assert relocate(LineIndex(DRIFTED), '  validate(form);') is None  # Uma linha só não basta
+
+
+def test_relocation_is_only_applied_above_the_threshold():
+    edit = Edit(ANCHOR, ANCHOR.replace('validate(form);', 'if (!validate(form)) return;'))
+    suggested = apply_edits(DRIFTED, [edit])
+    assert suggested.results[0].status == DRIFT and not suggested.changed
+    assert suggested.results[0].relocation is not None
+
+    confidence = suggested.results[0].relocation.confidence
+    applied = apply_edits(DRIFTED, [edit], relocate_threshold=confidence)
+    assert applied.results[0].status == PATCHED
+    assert 'if (!validate(form)) return;' in applied.output
+    assert apply_edits(DRIFTED, [edit], relocate_threshold=min(1.0, confidence + 0.01)).changed is False
+
+
+def test_an_already_relocated_edit_is_recognized():
+    replacement = ANCHOR.replace('validate(form);', 'if (!validate(form)) return;')
+    # Aplicada antes e depois alguém inseriu uma linha no meio
+    patched = DRIFTED.replace('    validate(form);\n', '    if (!validate(form)) return;\n')
+    patched = patched.replace('    analytics.track', '    track')
+    result = apply_edits(patched, [Edit(ANCHOR, replacement)], relocate_threshold=DEFAULT_THRESHOLD)
+    assert result.results[0].present and not result.changed
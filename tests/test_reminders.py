@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from studio.reminders import ReminderScheduler, reminder_key, sent_keys
+from studio.snapshot import Snapshot
+from studio.tables import TABLES, load_dump
+
+
+class Clock:
+    """Relógio que começa em `now` e anda junto com o tempo real (para o backoff)"""
+
+    def __init__(self, now):
+        self.now = now
+
+    @property
+    def now(self):
+        return self._start + timedelta(seconds=time.monotonic() - self._started)
+
+    @now.setter
+    def now(self, value):
+        self._start, self._started = value, time.monotonic()
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    """Responde com os status da fila; `hold` segura o envio de uma chave até `release`"""
+
+    def __init__(self, statuses=(), hold=None):
+        self.statuses = list(statuses)
+        self.calls = []
+        self.hold = hold
+        self.holding = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def post(self, payload, key):
+        self.calls.append((key, payload))
+        if key == self.hold:
+            self.hold = None
+            self.holding.set()
+            await self.release.wait()
+        return self.statuses.pop(0) if self.statuses else 200
+
+
+def appointment(date, time='10:00', id='a1'):
+    return {'id': id, 'date': date, 'time': time, 'status': 'confirmed', 'client_phone': '11999990000'}
+
+
+def scheduler(client, clock, **kwargs):
+    return ReminderScheduler(client, clock, backoff=0.001, max_backoff=0.001, **kwargs)
+
+
+def test_due_reminders_are_sent_once():
+    async def scenario():
+        clock = Clock(datetime(2026, 1, 1, 9, 0))
+        client = FakeClient()
+        reminders = scheduler(client, clock)
+        reminders.schedule_appointment(appointment('2026-01-01', '12:00'))
+        await reminders.run(until_idle=True)
+        return client, reminders
+
+    client, reminders = asyncio.run(scenario())
+    assert sorted(key for key, _ in client.calls) == ['a1:reminder_24h', 'a1:reminder_6h']
+    assert reminders.sent == {'a1:reminder_24h', 'a1:reminder_6h'}
+    assert len(reminders) == 0
+
+
+def test_already_sent_keys_are_not_scheduled():
+    clock = Clock(datetime(2026, 1, 1, 9, 0))
+    reminders = scheduler(FakeClient(), clock, sent=sent_keys([
+        {'appointment_id': 'a1', 'message_type': 'reminder_24h', 'status': 'sent'},
+        {'appointment_id': 'a1', 'message_type': 'reminder_6h', 'status': 'failed'},
+    ]))
+    scheduled = reminders.schedule_appointment(appointment('2026-01-02'))
+    assert [reminder.kind for reminder in scheduled] == ['reminder_6h']
+
+
+def test_failed_sends_retry_then_give_up():
+    async def scenario():
+        clock = Clock(datetime(2026, 1, 1, 9, 0))
+        client = FakeClient([503] * 6)
+        reminders = scheduler(client, clock, max_attempts=3)
+        reminders.schedule_appointment(appointment('2026-01-01', '12:00'))
+        await reminders.run(until_idle=True)
+        return reminders
+
+    reminders = asyncio.run(scenario())
+    assert reminders.stats.retried == 4  # 3 tentativas para cada um dos dois
+    assert reminders.stats.failed == 2
+    assert reminders.sent == set()
+    assert {reminder.key for reminder in reminders.failed} == {'a1:reminder_24h', 'a1:reminder_6h'}
+
+
+def test_reschedule_while_sending_drops_the_stale_retry():
+    async def scenario():
+        clock = Clock(datetime(2025, 12, 31, 10, 0))
+        key = reminder_key('a1', 'reminder_24h')
+        client = FakeClient([500], hold=key)
+        reminders = scheduler(client, clock)
+        reminders.schedule_appointment(appointment('2026-01-01'))
+        loop = asyncio.create_task(reminders.run(until_idle=True))
+        await client.holding.wait()
+
+        reminders.schedule_appointment(appointment('2026-01-05'))
+        clock.now = datetime(2026, 1, 5, 9, 0)  # Os lembretes novos já venceram
+        client.release.set()
+        await loop
+        return client, reminders
+
+    client, reminders = asyncio.run(scenario())
+    stale = [payload for key, payload in client.calls if payload['template_parameters']['date'] == '2026-01-01']
+    fresh = [payload for key, payload in client.calls if payload['template_parameters']['date'] == '2026-01-05']
+    assert len(stale) == 1  # Só o envio que já estava em andamento
+    assert sorted(payload['message_type'] for payload in fresh) == ['reminder_24h', 'reminder_6h']
+    assert reminders.stats.superseded == 1
+    assert reminders.stats.retried == 0
+    assert reminders.sent == {'a1:reminder_24h', 'a1:reminder_6h'}
+
+
+def test_cancel_while_sending_stops_the_retry():
+    async def scenario():
+        clock = Clock(datetime(2025, 12, 31, 10, 0))
+        client = FakeClient([500], hold=reminder_key('a1', 'reminder_24h'))
+        reminders = scheduler(client, clock)
+        reminders.schedule_appointment(appointment('2026-01-01'))
+        loop = asyncio.create_task(reminders.run(until_idle=True))
+        await client.holding.wait()
+
+        assert reminders.cancel_appointment('a1') == 2  # Um na fila, um em envio
+        client.release.set()
+        await loop
+        return client, reminders
+
+    client, reminders = asyncio.run(scenario())
+    assert len(client.calls) == 1
+    assert reminders.sent == set()
+    assert reminders.failed == []
+    assert reminders.stats.superseded == 1
+
+
+def test_load_dump_from_snapshot_has_empty_logs(tmp_path):
+    path = tmp_path / 'snapshot.sqlite'
+    with Snapshot(path) as snapshot:
+        snapshot.import_tables({'appointments': [appointment('2026-01-01')]})
+    tables = load_dump(path, TABLES + ('whatsapp_logs',))
+    assert tables['whatsapp_logs'] == []
+    assert [row['id'] for row in tables['appointments']] == ['a1']
@@ -0,0 +1,123 @@
+from datetime import date
+
+import pytest
+
+from studio.dedup import SnapshotTarget, apply_operations, inverse, plan_dedup
+from studio.postgrest import PostgrestClient
+from studio.rollups import STATUSES, AppointmentColumns, MaterializedRollups, group
+from studio.snapshot import Snapshot
+from studio.standin import PostgrestStandIn
+
+DESIGNERS = [
+    {'id': 'd1', 'name': 'Ana', 'email': 'ana@example.com', 'created_at': '2025-01-01T00:00:00Z', 'updated_at': '2025-01-01T00:00:00Z'},
+    {'id': 'd2', 'name': 'Ana', 'email': 'ANA@example.com ', 'created_at': '2025-02-01T00:00:00Z', 'updated_at': '2025-02-01T00:00:00Z'},
+    {'id': 'd3', 'name': 'Bia', 'email': 'bia@example.com', 'created_at': '2025-01-01T00:00:00Z', 'updated_at': '2025-01-01T00:00:00Z'},
+]
+
+
+def appointment(id, designer, day, status='confirmed', price=50.0, time='10:00', client='Carla', updated='2025-03-01T00:00:00Z'):
+    return {
+        'id': id, 'designer_id': designer, 'date': day, 'time': time, 'status': status, 'price': price,
+        'client_name': client, 'service': 'Unha', 'created_at': updated, 'updated_at': updated,
+    }
+
+
+APPOINTMENTS = [
+    appointment('a1', 'd1', '2025-03-01'),
+    appointment('a2', 'd2', '2025-03-01'),  # Vira duplicata de a1 depois do remapeamento
+    appointment('a3', 'd2', '2025-03-02', status='cancelled'),
+    appointment('a4', 'd2', '2025-04-10', price=80.0, client='Dora'),
+    appointment('a5', 'd3', '2025-03-01', status='completed', price=120.0),
+]
+
+
+def materialized(snapshot):
+    rows = {}
+    for table in MaterializedRollups.TABLES:
+        rows[table] = [tuple(row) for row in snapshot.db.execute(f'SELECT * FROM {table} ORDER BY designer_id, period')]
+    return rows
+
+
+def rebuilt(snapshot):
+    MaterializedRollups.of(snapshot).rebuild()
+    return materialized(snapshot)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'snapshot.sqlite'
+    with Snapshot(path) as snapshot:
+        snapshot.import_tables({'nail_designers': DESIGNERS, 'appointments': APPOINTMENTS})
+        MaterializedRollups.of(snapshot)
+    return path
+
+
+def test_group_matches_a_plain_loop():
+    rows = APPOINTMENTS + [appointment('a6', 'd1', '2025-03-01', status='canceled', price=30.0)]
+    rollup = group(AppointmentColumns.from_rows(rows), 'D')
+    expected = {}
+    for row in rows:
+        counts = expected.setdefault((row['designer_id'], row['date']), [0] * (len(STATUSES) + 1))
+        status = 'cancelled' if row['status'] in ('cancelled', 'canceled') else row['status']
+        counts[STATUSES.index(status)] += 1
+        if status != 'cancelled':
+            counts[-1] += round(row['price'] * 100)
+    assert {(designer, period): list(values) for designer, period, *values in rollup.rows()} == expected
+
+
+def test_weights_undo_an_old_version():
+    old = AppointmentColumns.from_rows([appointment('a1', 'd1', '2025-03-01')], weight=-1)
+    new = AppointmentColumns.from_rows([appointment('a1', 'd1', '2025-03-01', status='cancelled')])
+    rollup = group(AppointmentColumns.concat([old, new]), 'M')
+    counts = dict(zip(STATUSES, rollup.counts[0]))
+    assert counts['confirmed'] == -1 and counts['cancelled'] == 1
+    assert rollup.revenue.tolist() == [-5000]
+
+
+def test_creating_rollups_starts_from_existing_rows(path):
+    with Snapshot(path) as snapshot:
+        assert materialized(snapshot) == rebuilt(snapshot)
+        assert snapshot.rollups is not None  # Religado sozinho ao reabrir
+
+
+def test_dedup_apply_and_undo_keep_rollups_in_sync(path):
+    with Snapshot(path) as snapshot:
+        plan = plan_dedup(snapshot.tables())
+        assert plan.summary()['nail_designers'][1] == 1
+        target = SnapshotTarget(snapshot)
+        apply_operations(target, plan.operations)
+        after = materialized(snapshot)
+        assert after == rebuilt(snapshot)
+        assert {row[0] for row in after['rollup_monthly']} == {'d1', 'd3'}
+
+        apply_operations(target, inverse(plan.operations))
+        assert materialized(snapshot) == rebuilt(snapshot)
+
+
+def test_sync_and_reconcile_keep_rollups_in_sync(path):
+    remote = {
+        'appointments': [
+            appointment('a1', 'd1', '2025-03-01', status='cancelled', updated='2025-05-01T00:00:00Z'),
+            appointment('a4', 'd2', '2025-04-10', price=80.0, client='Dora'),
+            appointment('a5', 'd3', '2025-03-01', status='completed', price=120.0),
+            appointment('a7', 'd3', '2025-05-02', price=60.0, updated='2025-05-02T00:00:00Z'),
+        ],
+    }
+    with PostgrestStandIn(remote) as stand_in, Snapshot(path) as snapshot:
+        client = PostgrestClient(stand_in.url, 'test')
+        stats = snapshot.sync_table(client, 'appointments', page_size=1)
+        assert stats.fetched == 2
+        assert materialized(snapshot) == rebuilt(snapshot)
+
+        stats = snapshot.reconcile(client, 'appointments')
+        assert stats.removed == 2  # a2 e a3 sumiram no Supabase
+        assert materialized(snapshot) == rebuilt(snapshot)
+
+
+def test_window_totals(path):
+    with Snapshot(path) as snapshot:
+        totals = MaterializedRollups.of(snapshot).window('d2', date(2025, 3, 1), 60)
+    assert totals['active'] == 2
+    assert totals['cancelled'] == 1
+    assert totals['revenue_cents'] == 13000
+    assert totals['cancellation_rate'] == pytest.approx(1 / 3)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from codemods import runner
+from codemods.runner import group_by_target, main, run_batch
+from codemods.spec import parse_specs
+
+SPECS = {
+    'fix_a.toml': '''id = "fix_a"
+target = "src/A.tsx"
+
+[[edits]]
+anchor = "const a = 1;"
+replacement = "const a = 2;"
+done = "✅ a"
+''',
+    'fix_b.toml': '''id = "fix_b"
+target = "src\\\\A.tsx"
+after = ["fix_a"]
+
+[[edits]]
+anchor = "const b = 1;"
+replacement = "const b = 2;"
+done = "✅ b"
+''',
+    'fix_c.toml': '''id = "fix_c"
+target = "src/B.tsx"
+
+[[edits]]
+anchor = "let c;"
+replacement = "let c = 0;"
+''',
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    specs = tmp_path / 'specs'
+    specs.mkdir()
+    for name, text in SPECS.items():
+        (specs / name).write_text(text, encoding='utf-8')
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'A.tsx').write_text('const a = 1;\nconst b = 1;\n', encoding='utf-8')
+    (tmp_path / 'src' / 'B.tsx').write_text('let c;\n', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def io_calls(monkeypatch):
+    """Conta leituras e gravações do runner sem trocar o que elas fazem"""
+    calls = {'read': [], 'write': []}
+
+    def spy(name, kind):
+        real = getattr(runner, name)
+
+        def wrapper(source, *args, **kwargs):
+            calls[kind].append(os.path.basename(str(getattr(source, 'path', source))))
+            return real(source, *args, **kwargs)
+        monkeypatch.setattr(runner, name, wrapper)
+
+    spy('read_source', 'read')
+    spy('write_patched', 'write')
+    spy('write_text', 'write')
+    return calls
+
+
+def test_codemods_are_grouped_by_resolved_target(project):
+    codemods = parse_specs(project / 'specs')
+    groups = group_by_target(project, codemods)
+    assert {path.name: [codemod.name for codemod in mods] for path, mods in groups.items()} == {
+        'A.tsx': ['fix_a', 'fix_b'],  # `src\\A.tsx` e `src/A.tsx` são o mesmo arquivo
+        'B.tsx': ['fix_c'],
+    }
+
+
+def test_each_file_is_read_and_written_once(project, io_calls):
+    reports = run_batch(project, parse_specs(project / 'specs'), jobs=1)
+    assert sorted(io_calls['read']) == ['A.tsx', 'B.tsx']
+    assert sorted(io_calls['write']) == ['A.tsx', 'B.tsx']
+    assert all(report.changed and not report.error for report in reports)
+    assert (project / 'src' / 'A.tsx').read_text(encoding='utf-8') == 'const a = 2;\nconst b = 2;\n'
+    assert [message for report in reports for message in report.messages] == ['[fix_a] ✅ a', '[fix_b] ✅ b']
+
+
+def test_dry_run_prints_a_unified_diff_and_leaves_files_alone(project, io_calls, capsys):
+    path = project / 'src' / 'A.tsx'
+    before = os.stat(path).st_mtime_ns
+    code = main(['--root', str(project), '--specs', str(project / 'specs'), '--dry-run', '--jobs', '1', '--no-manifest'])
+    out = capsys.readouterr().out
+    assert code == 0
+    assert '--- a/A.tsx\n+++ b/A.tsx\n' in out
+    assert '-const a = 1;\n-const b = 1;\n+const a = 2;\n+const b = 2;\n' in out
+    assert io_calls['write'] == []
+    assert os.stat(path).st_mtime_ns == before
+    assert path.read_text(encoding='utf-8') == 'const a = 1;\nconst b = 1;\n'
+
+
+def test_names_select_codemods(project, capsys):
+    assert main(['--root', str(project), '--specs', str(project / 'specs'), 'fix_c.py', '--jobs', '1']) == 0
+    assert (project / 'src' / 'A.tsx').read_text(encoding='utf-8') == 'const a = 1;\nconst b = 1;\n'
+    assert (project / 'src' / 'B.tsx').read_text(encoding='utf-8') == 'let c = 0;\n'
+    assert main(['--root', str(project), '--specs', str(project / 'specs'), 'nada']) == 1
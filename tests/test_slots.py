@@ -0,0 +1,124 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from studio.slots import CalendarError, SlotCalendar, SlotEngine, SlotSet, load_calendar, span_mask
+
+CALENDAR = SlotCalendar(SlotSet('normal', ('08:00', '10:00', '13:00', '15:00', '17:00')))
+SERVICES = [{'designer_id': 'd1', 'name': 'Alongamento', 'duration': 150}, {'designer_id': 'd1', 'name': 'Manicure', 'duration': 60}]
+DURATION = {'Alongamento': 150, 'Manicure': 60}
+MONDAY = date(2025, 11, 3)
+
+
+def minutes(value):
+    hours, mins = map(int, value.split(':')[:2])
+    return hours * 60 + mins
+
+
+def naive_free(appointments, blocks, day, duration):
+    """Regra do BookingPage refeita com laços: cada minuto do horário contra cada linha"""
+    free = []
+    for slot in CALENDAR.default.times:
+        start = minutes(slot)
+        wanted = range(start, start + duration)
+        taken = False
+        for row in appointments:
+            if row['status'] != 'cancelled' and row['date'] == day.isoformat():
+                begin = minutes(row['time'])
+                taken |= any(begin <= minute < begin + DURATION[row['service']] for minute in wanted)
+        for row in blocks:
+            if row['is_available']:
+                continue
+            if row.get('specific_date') == day.isoformat() or row.get('day_of_week') == (day.weekday() + 1) % 7:
+                end = 1440 if row['end_time'] == '23:59' else minutes(row['end_time'])
+                taken |= any(minutes(row['start_time']) <= minute < end for minute in wanted)
+        if not taken:
+            free.append(slot)
+    return free
+
+
+def random_rows(rng, count):
+    appointments = [{
+        'id': f'a{index}', 'designer_id': 'd1',
+        'date': (MONDAY + timedelta(days=rng.randrange(7))).isoformat(),
+        'time': f'{rng.randrange(8, 18):02d}:{rng.choice(["00", "30"])}',
+        'service': rng.choice(list(DURATION)), 'status': rng.choice(['pending', 'confirmed', 'cancelled']),
+    } for index in range(count)]
+    blocks = [
+        {'id': 'b1', 'designer_id': 'd1', 'is_available': False, 'specific_date': (MONDAY + timedelta(days=2)).isoformat(),
+         'start_time': '12:00', 'end_time': '14:00'},
+        {'id': 'b2', 'designer_id': 'd1', 'is_available': False, 'day_of_week': 6, 'start_time': '00:00', 'end_time': '23:59'},
+        {'id': 'b3', 'designer_id': 'd1', 'is_available': True, 'specific_date': MONDAY.isoformat(),
+         'start_time': '08:00', 'end_time': '18:00'},
+    ]
+    return appointments, blocks
+
+
+def test_span_mask_is_clipped_to_the_day():
+    assert span_mask(0, 3) == 0b111
+    assert span_mask(5, 5) == 0 and span_mask(-10, 1) == 1
+    assert span_mask(1430, 1500).bit_length() == 1440
+
+
+@pytest.mark.parametrize('duration', [None, 60, 150])
+def test_free_slots_match_a_plain_scan(duration):
+    rng = random.Random(duration or 1)
+    appointments, blocks = random_rows(rng, 25)
+    engine = SlotEngine.from_rows(appointments, blocks, SERVICES, CALENDAR)
+    found = engine.free_slots('d1', MONDAY, days=7, duration=duration)
+    for offset in range(7):
+        day = MONDAY + timedelta(days=offset)
+        assert found[day] == naive_free(appointments, blocks, day, duration or 1), day
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(11)
+    appointments, blocks = random_rows(rng, 30)
+    engine = SlotEngine.from_rows(appointments[:10], blocks, SERVICES, CALENDAR)
+    current = {row['id']: row for row in appointments[:10]}
+    for row in appointments[10:]:
+        engine.put_appointment(row)
+        current[row['id']] = row
+    for _ in range(40):
+        key = rng.choice(sorted(current))
+        if rng.random() < 0.3:
+            engine.drop_appointment(key)
+            del current[key]
+        else:
+            moved = {**current[key], 'date': (MONDAY + timedelta(days=rng.randrange(7))).isoformat(),
+                     'status': rng.choice(['confirmed', 'cancelled'])}
+            engine.put_appointment(moved)
+            current[key] = moved
+    engine.put_block({**blocks[0], 'is_available': True})  # Bloqueio liberado
+    engine.drop_block('b2')
+    rebuilt = SlotEngine.from_rows(current.values(), [{**blocks[0], 'is_available': True}, blocks[2]], SERVICES, CALENDAR)
+    for offset in range(7):
+        day = MONDAY + timedelta(days=offset)
+        assert engine.busy('d1', day) == rebuilt.busy('d1', day), day
+    assert all(day for day in engine.designers['d1'].days.values())  # Dias vazios são removidos
+
+
+def test_is_free_uses_the_whole_duration():
+    engine = SlotEngine.from_rows(
+        [{'id': 'a', 'designer_id': 'd1', 'date': '2025-11-03', 'time': '13:00', 'service': 'Alongamento', 'status': 'confirmed'}],
+        services=SERVICES, calendar=CALENDAR,
+    )
+    assert not engine.is_free('d1', MONDAY, '15:00')
+    assert engine.is_free('d1', MONDAY, '15:30')
+    assert not engine.is_free('d1', MONDAY, '12:00', duration=61)
+    assert engine.is_free('d2', MONDAY, '13:00')
+
+
+def test_repo_calendar_picks_the_season(tmp_path):
+    calendar = load_calendar()
+    assert calendar.for_day(date(2025, 12, 10)).name == 'dezembro_2025'
+    assert calendar.for_day(date(2026, 1, 1)) == calendar.default
+
+    broken = tmp_path / 'slot_sets.toml'
+    broken.write_text('[default]\nslots = ["25:00"]\n', encoding='utf-8')
+    with pytest.raises(CalendarError, match='horário inválido'):
+        load_calendar(broken)
+    broken.write_text('[default]\nslots = ["08:00"]\n[[seasons]]\nname = "x"\nstart = 2025-12-02\nend = 2025-12-01\nslots = ["09:00"]\n', encoding='utf-8')
+    with pytest.raises(CalendarError, match='end antes de start'):
+        load_calendar(broken)
@@ -0,0 +1,71 @@
+import pytest
+
+from studio.postgrest import PostgrestClient
+from studio.snapshot import Snapshot
+from studio.standin import PostgrestStandIn
+
+
+def service(id, updated_at, name='Unha'):
+    return {'id': id, 'designer_id': 'd1', 'name': name, 'duration': 60, 'price': 50.0,
+            'created_at': '2025-01-01T00:00:00+00:00', 'updated_at': updated_at}
+
+
+@pytest.fixture
+def remote():
+    # Várias linhas com o mesmo updated_at: a página vira no meio de um empate
+    tables = {'services': [service(f's{index:02d}', f'2025-01-0{1 + index // 4}T10:00:00.5+00:00') for index in range(11)]}
+    with PostgrestStandIn(tables) as server:
+        yield tables, PostgrestClient(server.url, 'teste')
+
+
+def ids(snapshot, table='services'):
+    return [row['id'] for row in snapshot.table(table)]
+
+
+def test_incremental_sync_pages_through_ties_and_resumes(tmp_path, remote):
+    tables, client = remote
+    with Snapshot(tmp_path / 's.sqlite') as snapshot:
+        stats = snapshot.sync_table(client, 'services', page_size=3)
+        assert (stats.fetched, stats.pages) == (11, 4)
+        assert ids(snapshot) == sorted(row['id'] for row in tables['services'])
+        assert snapshot.watermark('services') == ('2025-01-03T10:00:00.5+00:00', 's10')
+        assert snapshot.sync_table(client, 'services', page_size=3).fetched == 0
+
+        # Mesmo updated_at da marca com id maior, e uma linha antiga alterada
+        tables['services'].append(service('s99', '2025-01-03T10:00:00.5+00:00'))
+        tables['services'][0].update(name='Pé', updated_at='2025-02-01T00:00:00+00:00')
+        stats = snapshot.sync_table(client, 'services', page_size=3)
+        assert stats.fetched == 2
+        assert snapshot.table('services')[0]['name'] == 'Pé'
+        assert snapshot.watermark('services') == ('2025-02-01T00:00:00+00:00', 's00')
+
+    with Snapshot(tmp_path / 's.sqlite') as reopened:  # A marca d'água fica no arquivo
+        assert reopened.sync_table(client, 'services', page_size=3).fetched == 0
+
+
+def test_reconcile_removes_vanished_rows_and_sees_null_watermarks(tmp_path, remote):
+    tables, client = remote
+    with Snapshot(tmp_path / 's.sqlite') as snapshot:
+        snapshot.sync_table(client, 'services', page_size=3)
+        del tables['services'][5]
+        tables['services'].append(service('s50', None))
+        assert snapshot.sync_table(client, 'services', page_size=3).fetched == 0  # Nenhuma das duas aparece
+        stats = snapshot.reconcile(client, 'services', page_size=3)
+        assert (stats.fetched, stats.removed) == (11, 1)
+        assert ids(snapshot) == sorted(row['id'] for row in tables['services'])
+
+
+def test_import_mirrors_columns_without_password_and_derives_phones(tmp_path):
+    designers = [
+        {'id': 'd1', 'name': 'Ana', 'phone': '(11) 99999-9999', 'password': 'segredo', 'is_active': True,
+         'created_at': '2025-01-01', 'updated_at': '2025-01-02T00:00:00+00:00'},
+        {'id': 'd2', 'name': 'Bia', 'phone': '11 98888-7777', 'is_active': False,
+         'created_at': '2025-01-02', 'updated_at': '2025-01-01T00:00:00+00:00'},
+    ]
+    with Snapshot(tmp_path / 's.sqlite') as snapshot:
+        assert snapshot.import_tables({'nail_designers': designers})['nail_designers'] == 2
+        assert snapshot.watermark('nail_designers') == ('2025-01-02T00:00:00+00:00', 'd1')
+        row = snapshot.designer_by_phone('+55 11 99999-9999')
+        assert row['id'] == 'd1' and row['phone_e164'] == '+5511999999999'
+        assert 'password' not in row and row['is_active'] is True
+        assert [item['id'] for item in snapshot.designers(active_only=True)] == ['d1']
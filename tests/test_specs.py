@@ -0,0 +1,39 @@
+from codemods.engine import apply_edits
+from codemods.spec import SPEC_DIR, parse_specs
+
+BOOKING_PAGE = '''import React, { useState, useEffect } from 'react';
+
+export default function BookingPage({ initialDesigner }) {
+  const [step, setStep] = useState(initialDesigner ? 2 : 1);
+  useEffect(() => {
+  }, [step, selectedDate]); // 🆕 Adicionar dependências
+  return (
+                  <div>
+                    <input
+                      type="date"
+                      value={selectedDate}
+                    />
+                  </div>
+  );
+}
+'''
+
+
+def test_every_repo_spec_parses_with_unique_ids():
+    codemods = parse_specs(SPEC_DIR)
+    names = [codemod.name for codemod in codemods]
+    assert len(names) == len(set(names)) and 'fix_calendar_auto_open' in names
+    assert all(codemod.edits for codemod in codemods)
+
+
+def test_calendar_auto_open_runs_like_the_original_script():
+    # O script antigo não conferia o import de useRef; o spec também não
+    codemod = next(codemod for codemod in parse_specs(SPEC_DIR) if codemod.name == 'fix_calendar_auto_open')
+    assert codemod.unmet(BOOKING_PAGE) == ''
+    result = apply_edits(BOOKING_PAGE, codemod.matcher)
+    assert [item.status for item in result.results] == ['patched'] * 3
+    output = result.output
+    assert 'const dateInputRef = useRef<HTMLInputElement>(null);' in output
+    assert 'ref={dateInputRef}' in output
+    assert 'dateInputRef.current?.showPicker?.();' in output
+    assert apply_edits(output, codemod.matcher).changed is False
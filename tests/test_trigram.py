@@ -0,0 +1,45 @@
+from codemods.engine import Edit, compile_edits
+from codemods.runner import repo_groups
+from codemods.spec import Codemod
+from codemods.trigram import TrigramIndex, anchor_mask, scan_file
+
+ANCHOR = '''if (step === 3) {
+  setOpen(true);
+}'''
+FIXED = '''if (step === 3) {
+  setOpen(false);
+}'''
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def test_tests_scripts_and_diffs_are_not_candidates(tmp_path):
+    _write(tmp_path / 'src' / 'Page.tsx', f'function f() {{\n  {ANCHOR}\n}}\n')
+    _write(tmp_path / 'tests' / 'test_specs.py', f'FIXTURE = """{ANCHOR}"""\n')
+    _write(tmp_path / 'tests' / 'fixture.tsx', ANCHOR)
+    _write(tmp_path / 'fix_calendar.py', f'content.replace("""{ANCHOR}""", "")\n')
+    _write(tmp_path / 'REVIEW_DIFF.patch', f'-{ANCHOR}\n')
+    _write(tmp_path / 'NOTAS.md', ANCHOR)
+
+    index = TrigramIndex(tmp_path)
+    index.update()
+
+    assert 'tests/fixture.tsx' not in index.files
+    assert index.candidates([anchor_mask(ANCHOR)]) == ['src/Page.tsx']
+
+    codemod = Codemod('fix_calendar', 'src/Page.tsx', (Edit(ANCHOR, FIXED),))
+    assert list(repo_groups(tmp_path, [codemod])) == [(tmp_path / 'src' / 'Page.tsx').resolve()]
+
+
+def test_reindented_html_copy_is_found_by_the_normalized_search(tmp_path):
+    path = tmp_path / 'test-booking.html'
+    path.write_bytes(
+        b'<script>\r\n\t\tif (step  ===  3) {\r\n\t\t\tsetOpen(true);\r\n\t\t}\r\n</script>\r\n'
+    )
+    compiled = compile_edits([Edit('nunca();', 'sempre();'), Edit(ANCHOR, FIXED)])
+
+    assert scan_file(path, compiled) == {1}
+    assert scan_file(path, compile_edits([Edit('if (step === 4) {', '')])) == set()
@@ -0,0 +1,34 @@
+import pytest
+
+from codemods.verify import check_text
+
+
+@pytest.mark.parametrize('source', [
+    'const open = "{"; const close = \'}\'; const paren = "(";\n',
+    'const s = `a ${ok ? `x${value({})}` : \'}\'} z`;\n',
+    '// { aberto só no comentário\n/* ( [ { */\nconst a = 1;\n',
+    'const el = <p>Texto com (parênteses) e [colchetes]: 10 > 9</p>;\n',
+    'const id = <T,>(value: T) => { return value; };\nconst k = <K extends string>(key: K) => key;\n',
+    'if (ok) /a{/.test(s);\nwhile (next()) /[}]/g.exec(s);\n',
+    'const half = (total) / 2 / (count);\nconst r = s.replace(/\\{/g, "");\n',
+])
+def test_balanced_sources(source):
+    assert check_text(source) is None
+
+
+def test_mismatched_closing_tag_reports_line_and_column():
+    issue = check_text('const el = (\n  <div>\n    <span>x</div>\n  </div>\n);\n', 'A.tsx')
+    assert (issue.path, issue.line, issue.column) == ('A.tsx', 3, 12)
+    assert issue.message == '</div> fecha <span> aberto na linha 3'
+
+
+def test_unclosed_brace_points_to_the_opening():
+    issue = check_text('function f() {\n  if (ok) {\n    run();\n}\n')
+    assert (issue.line, issue.column) == (1, 14)
+    assert issue.message == "'{' aberto e nunca fechado"
+
+
+def test_stray_brace_in_jsx_text():
+    issue = check_text('const el = <p>a } b</p>;\n')
+    assert (issue.line, issue.column) == (1, 17)
+    assert issue.message.startswith("'}' solto no texto de <p>")
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+import pytest
+
+from codemods.engine import Edit
+from codemods.lineindex import LineIndex
+from codemods.spec import Codemod
+from codemods.watch import AnchorProfile, PollingWatcher, Watch, affected, changed_ranges
+
+FILLER = ''.join(f'const f{i} = {i};\n' for i in range(30))
+FIX_A = Codemod('fix_a', 'src/Page.ts', (Edit('const a = 1;', 'const a = 2;'),))
+FIX_B = Codemod('fix_b', 'src/Page.ts', (Edit('const b = 1;', 'const b = 2;'),))
+
+
+def _source(a, b):
+    return f'const a = {a};\n{FILLER}const b = {b};\n'
+
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / 'src' / 'Page.ts'
+    path.parent.mkdir()
+    path.write_text(_source(1, 1), encoding='utf-8')
+    return path
+
+
+def _regenerate(path, text):
+    # Gerador externo: grava conteúdo novo com mtime certamente diferente
+    stat = os.stat(path)
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+
+def test_changed_ranges_uses_unique_lines_as_anchors():
+    old = [1, 2, 3, 4, 5, 6]
+    assert changed_ranges(old, old) == []
+    assert changed_ranges(old, [1, 2, 9, 4, 5, 6]) == [(2, 3)]
+    assert changed_ranges(old, [1, 2, 3, 7, 8, 4, 5, 6]) == [(3, 5)]
+    assert changed_ranges(old, [1, 2, 3]) == [(3, 3)]
+    # Duas mudanças separadas por linhas únicas viram duas faixas
+    assert changed_ranges(old, [9, 2, 3, 4, 5, 8]) == [(0, 1), (5, 6)]
+    # Linhas repetidas não servem de âncora; remoção vira faixa vazia no ponto
+    assert changed_ranges([0, 1, 0, 2, 0], [0, 2, 0, 7, 1, 0]) == [(1, 4), (5, 5)]
+
+
+def test_affected_only_when_an_anchor_touches_the_changed_lines():
+    text = _source(1, 2)
+    index = LineIndex(text)
+    near_a = changed_ranges(LineIndex(_source(2, 2)).hashes, index.hashes)
+    assert near_a == [(0, 1)]
+    assert affected(FIX_A, AnchorProfile.of(FIX_A), text, index, near_a)
+    assert not affected(FIX_B, AnchorProfile.of(FIX_B), text, index, near_a)
+    assert not affected(FIX_A, AnchorProfile.of(FIX_A), text, index, [(10, 12)])
+
+
+def test_own_write_and_touch_do_not_trigger_a_cycle(page):
+    watch = Watch(page.parent.parent, [FIX_A, FIX_B])
+    [cycle] = watch.start()
+    assert cycle.report.changed
+    assert page.read_text(encoding='utf-8') == _source(2, 2)
+
+    assert watch.react(page) is None
+    os.utime(page, ns=(0, os.stat(page).st_mtime_ns + 10_000_000))
+    assert watch.react(page) is None
+
+
+def test_only_the_affected_codemod_is_reapplied(page):
+    watch = Watch(page.parent.parent, [FIX_A, FIX_B])
+    watch.start()
+
+    _regenerate(page, _source(1, 2))
+    cycle = watch.react(page)
+    assert cycle.codemods == ['fix_a']
+    assert cycle.report.changed and not cycle.issue
+    assert page.read_text(encoding='utf-8') == _source(2, 2)
+
+    _regenerate(page, '// cabeçalho novo\n' + _source(2, 2))
+    cycle = watch.react(page)
+    assert cycle.codemods == [] and cycle.report is None
+
+
+def test_run_with_polling_reacts_once_to_a_burst(page):
+    watch = Watch(page.parent.parent, [FIX_A, FIX_B])
+    watch.start()
+    watcher = PollingWatcher([page], interval=0.005)
+    cycles = []
+    reacted = []
+    react = watch.react
+    watch.react = lambda path: reacted.append(path) or react(path)
+
+    def burst():
+        # O editor grava o arquivo três vezes em sequência: só a última conta
+        for b in (5, 6, 1):
+            time.sleep(0.01)
+            _regenerate(page, _source(1, b))
+
+    runner = threading.Thread(target=watch.run, args=(watcher,), kwargs={
+        'debounce': 0.3, 'on_cycle': cycles.append, 'max_cycles': 1,
+    }, daemon=True)
+    runner.start()
+    burst()
+    runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    assert reacted == [page]
+    assert [cycle.codemods for cycle in cycles] == [['fix_a', 'fix_b']]
+    assert page.read_text(encoding='utf-8') == _source(2, 2)
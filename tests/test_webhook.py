@@ -0,0 +1,125 @@
+import json
+import re
+
+import pytest
+
+from studio import webhook
+from studio.postgrest import PostgrestClient, PostgrestError
+from studio.reminders import REMINDERS
+from studio.standin import PostgrestStandIn, UniqueConstraint
+from studio.webhook import Ingestor, apply_statuses, coalesce, merge_status, parse_payload
+
+
+def payload(statuses=(), messages=()):
+    value = {
+        'statuses': [{'id': id, 'status': status, 'timestamp': str(ts)} for id, status, ts in statuses],
+        'messages': [{'id': id, 'from': phone, 'type': 'text', 'text': {'body': body}} for id, phone, body in messages],
+    }
+    return {'entry': [{'changes': [{'field': 'messages', 'value': value}, {'field': 'other', 'value': value}]}]}
+
+
+class RefusingClient:
+    """Recusa toda gravação com o status dado"""
+
+    def __init__(self, status):
+        self.status = status
+        self.calls = 0
+
+    def insert(self, *args, **kwargs):
+        self.calls += 1
+        raise PostgrestError(self.status, 'recusado')
+
+    def rpc(self, *args, **kwargs):
+        self.calls += 1
+        raise PostgrestError(self.status, 'recusado')
+
+
+def test_parse_payload_reads_only_the_messages_field():
+    events = parse_payload(payload([('m1', 'read', 1000), ('m1', 'bogus', 1000)], [('m2', '5511', 'oi')]))
+    assert [(event.kind, event.key) for event in events] == [
+        ('status', ('status', 'm1', 'read')),
+        ('message', ('message', 'm2')),
+    ]
+    assert events[1].row['message_type'] == 'incoming'
+
+
+def test_coalesce_keeps_the_most_advanced_status():
+    events = parse_payload(payload(
+        [('m1', 'read', 1010), ('m1', 'sent', 1000), ('m1', 'delivered', 1005), ('m2', 'sent', 1000)],
+        [('m3', '5511', 'oi'), ('m3', '5511', 'oi de novo')],
+    ))
+    messages, statuses = coalesce(events)
+    assert [row['message_id'] for row in messages] == ['m3']
+    assert messages[0]['template_parameters']['text'] == 'oi'
+    by_id = {row['message_id']: row for row in statuses}
+    assert by_id['m1']['delivery_status'] == 'read'
+    assert by_id['m1']['delivered_at'] is not None and by_id['m1']['read_at'] is not None
+    assert by_id['m2']['delivery_status'] == 'sent'
+
+
+def test_merge_status_never_goes_back():
+    read = parse_payload(payload([('m1', 'read', 1010)]))[0].row
+    delivered = parse_payload(payload([('m1', 'delivered', 1005)]))[0].row
+    assert merge_status(read, delivered)['delivery_status'] == 'read'
+    assert merge_status(delivered, read)['delivery_status'] == 'read'
+
+
+def test_apply_statuses_ignores_late_receipts():
+    tables = {'whatsapp_logs': [{'message_id': 'm1', 'delivery_status': 'read'}]}
+    late = parse_payload(payload([('m1', 'delivered', 1005)]))[0].row
+    assert apply_statuses(tables, {'statuses': [late]}) == 1
+    assert tables['whatsapp_logs'][0]['delivery_status'] == 'read'
+    assert tables['whatsapp_logs'][0]['delivered_at'] == late['delivered_at']
+
+
+def test_ingestor_batches_and_skips_redeliveries():
+    tables = {'whatsapp_logs': [{'id': 'l1', 'message_id': 'm1', 'delivery_status': 'sent'}]}
+    stand_in = PostgrestStandIn(
+        tables, unique=[UniqueConstraint('whatsapp_logs', ('message_id',))],
+        functions={webhook.STATUS_FUNCTION: apply_statuses},
+    )
+    with stand_in:
+        ingestor = Ingestor(PostgrestClient(stand_in.url, 'test'), max_delay=0.01)
+        ingestor.start()
+        body = payload([('m1', 'delivered', 1005), ('m1', 'read', 1010)], [('m2', '5511', 'oi')])
+        assert ingestor.offer(body)
+        assert ingestor.offer(body)  # Reenvio da Meta
+        ingestor.stop()
+    stats = ingestor.snapshot()
+    assert stats == ingestor.stats and stats.flush_sizes is not ingestor.stats.flush_sizes
+    assert stats.duplicates == 3
+    assert stats.writes == 2
+    by_id = {row['message_id']: row for row in tables['whatsapp_logs']}
+    assert by_id['m1']['delivery_status'] == 'read'
+    assert by_id['m2']['status'] == 'received'
+
+
+@pytest.mark.parametrize('status', [400, 503])
+def test_dropped_batch_accepts_the_redelivery(tmp_path, monkeypatch, status):
+    monkeypatch.setattr(webhook, 'RETRY_MAX', 0.0)
+    client = RefusingClient(status)
+    dead_letter = tmp_path / 'dead.jsonl'
+    ingestor = Ingestor(client, dead_letter=dead_letter)
+    body = payload([('m1', 'read', 1010)], [('m2', '5511', 'oi')])
+    assert ingestor.offer(body)
+    ingestor.flush(ingestor.queue.get_nowait())
+
+    assert client.calls == (1 if status == 400 else webhook.FLUSH_ATTEMPTS)
+    assert ingestor.stats.lost == 2
+    lines = [json.loads(line) for line in dead_letter.read_text(encoding='utf-8').splitlines()]
+    assert sorted((line['kind'], line['row']['message_id']) for line in lines) == [('message', 'm2'), ('status', 'm1')]
+
+    assert ingestor.offer(body)  # Não é tomado por duplicata
+    assert ingestor.stats.duplicates == 0
+    assert ingestor.queue.qsize() == 1
+
+
+def test_log_constraints_accept_what_the_repo_writes():
+    sql = (webhook.REPO / 'whatsapp-webhook-batch.sql').read_text(encoding='utf-8')
+    kinds = re.search(r'message_type IN \(([^)]*)\)', sql).group(1)
+    statuses = re.search(r'CHECK \(status IN \(([^)]*)\)', sql).group(1)
+    for kind, _ in REMINDERS:
+        assert f"'{kind}'" in kinds
+    reminders = (webhook.REPO / 'whatsapp-auto-reminders.sql').read_text(encoding='utf-8')
+    assert "'reminder_6h'" in reminders and "'scheduled'" in statuses
+    assert "'incoming'" in kinds and "'received'" in statuses
@@ -0,0 +1,132 @@
+import codecs
+import hashlib
+import mmap
+import os
+import tracemalloc
+
+import pytest
+
+from codemods import writer
+from codemods.engine import Edit, apply_edits
+from codemods.runner import patch_file
+from codemods.spec import Codemod
+from codemods.writer import MMAP_THRESHOLD, EncodingError, read_source, write_atomic, write_patched, write_text
+
+
+def _patch(path, anchor, replacement):
+    with read_source(path) as source:
+        result = apply_edits(source.text, [Edit(anchor, replacement)])
+        return write_patched(source, result.spans)
+
+
+def _leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith('.tmp')]
+
+
+def test_write_replaces_atomically_and_keeps_the_mode(tmp_path):
+    path = tmp_path / 'A.tsx'
+    path.write_bytes(b'const a = 1;\n')
+    os.chmod(path, 0o640)
+
+    digest = _patch(path, 'a = 1', 'a = 2')
+
+    assert path.read_bytes() == b'const a = 2;\n'
+    assert digest == hashlib.sha256(b'const a = 2;\n').hexdigest()
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert _leftovers(tmp_path) == []
+
+
+def test_failure_midway_keeps_the_original_and_removes_the_temp(tmp_path):
+    path = tmp_path / 'A.tsx'
+    path.write_bytes(b'original\n')
+
+    def chunks():
+        yield b'meio '
+        raise OSError('disco cheio')
+
+    with pytest.raises(OSError, match='disco cheio'):
+        write_atomic(path, chunks())
+    assert path.read_bytes() == b'original\n'
+    assert _leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize('raw', [
+    codecs.BOM_UTF8 + 'const ação = 1;\r\nfim();\r\n'.encode('utf-8'),
+    codecs.BOM_UTF16_LE + 'const ação = 1;\r\nfim();\r\n'.encode('utf-16-le'),
+    'const ação = 1;\r\nfim();\r\n'.encode('cp1252'),
+])
+def test_round_trip_keeps_bom_encoding_and_crlf(tmp_path, raw):
+    path = tmp_path / 'A.tsx'
+    path.write_bytes(raw)
+    with read_source(path) as source:
+        bom, encoding = source.bom, source.encoding
+
+    _patch(path, 'ação = 1', 'ação = 2')
+
+    expected = bom + 'const ação = 2;\r\nfim();\r\n'.encode(encoding)
+    assert path.read_bytes() == expected
+    with read_source(path) as source:
+        text = source.text
+    with read_source(path) as source:
+        write_text(source, text)
+    assert path.read_bytes() == expected
+
+
+def test_large_file_is_mapped_and_unmapped_before_the_replace(tmp_path, monkeypatch):
+    path = tmp_path / 'big.css'
+    body = b'.a { color: red; }\n' * (MMAP_THRESHOLD // 19 + 1)
+    path.write_bytes(body)
+    real_replace = os.replace
+    mapped = []
+
+    def replace(src, dst):
+        # No Windows o os.replace falha se o destino ainda estiver mapeado
+        assert all(buffer.closed for buffer in mapped)
+        real_replace(src, dst)
+    monkeypatch.setattr(writer.os, 'replace', replace)
+
+    with read_source(path) as source:
+        assert isinstance(source.buffer, mmap.mmap)
+        mapped.append(source.buffer)
+        result = apply_edits(source.text, [Edit('color: red', 'color: blue', count=1)])
+        write_patched(source, result.spans)
+
+    assert path.read_bytes() == body.replace(b'color: red', b'color: blue', 1)
+
+
+def test_unencodable_replacement_is_a_clear_error(tmp_path):
+    path = tmp_path / 'A.tsx'
+    raw = 'const ação = 1;\n'.encode('cp1252')
+    path.write_bytes(raw)
+
+    with pytest.raises(EncodingError, match=r"'✓' \(U\+2713\) não existe em cp1252"):
+        _patch(path, 'ação = 1', 'ação = "✓"')
+    with read_source(path) as source:
+        with pytest.raises(EncodingError, match='linha 2'):
+            write_text(source, 'ok\n"✓"\n')
+    assert path.read_bytes() == raw
+    assert _leftovers(tmp_path) == []
+
+    report = patch_file(path, [Codemod('fix_check', 'A.tsx', (Edit('ação = 1', 'ação = "✓"'),))])
+    assert report.error.startswith("[fix_check] edição 1: '✓' (U+2713) não existe em cp1252")
+    assert report.entry is None
+    assert path.read_bytes() == raw
+
+
+def test_single_change_is_written_without_a_second_copy(tmp_path):
+    path = tmp_path / 'big.css'
+    body = '.a { margin: 0; }\n' * (2 * MMAP_THRESHOLD // 18) + '.b { color: red; }\n'
+    path.write_text(body, encoding='utf-8')
+    codemod = Codemod('fix_color', 'big.css', (Edit('color: red', 'color: blue'),))
+
+    tracemalloc.start()
+    try:
+        report = patch_file(path, [codemod])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert report.changed and not report.error
+    # O buffer é mapeado: só o texto decodificado conta, nada de uma saída inteira
+    assert peak < 1.5 * len(body)
+    assert path.read_text(encoding='utf-8') == body.replace('color: red', 'color: blue')
@@ -0,0 +1,83 @@
+-- Gravação em lote dos eventos do webhook do WhatsApp
+-- Execute este script no SQL Editor do Supabase
+--
+-- O serviço python -m studio.webhook responde à Meta na hora, junta os
+-- eventos em memória e grava de tempos em tempos com duas requisições:
+--   POST /rest/v1/whatsapp_logs?on_conflict=message_id  (mensagens recebidas,
+--        resolution=ignore-duplicates: reenvios da Meta não duplicam linhas)
+--   POST /rest/v1/rpc/apply_whatsapp_statuses           (recibos de entrega)
+--
+-- O status nunca volta atrás: um 'delivered' atrasado não desfaz um 'read'.
+
+-- 1. A Edge Function já grava mensagens recebidas com message_type
+--    'incoming' e status 'received', e whatsapp-auto-reminders.sql (assim
+--    como python -m studio.reminders) usa 'reminder_6h' com status
+--    'scheduled'; os CHECK originais recusam todos eles
+ALTER TABLE whatsapp_logs DROP CONSTRAINT IF EXISTS whatsapp_logs_message_type_check;
+ALTER TABLE whatsapp_logs ADD CONSTRAINT whatsapp_logs_message_type_check
+    CHECK (message_type IN ('confirmation', 'reminder_24h', 'reminder_6h', 'reminder_2h', 'cancellation', 'incoming'));
+
+ALTER TABLE whatsapp_logs DROP CONSTRAINT IF EXISTS whatsapp_logs_status_check;
+ALTER TABLE whatsapp_logs ADD CONSTRAINT whatsapp_logs_status_check
+    CHECK (status IN ('pending', 'scheduled', 'sent', 'failed', 'received'));
+
+-- 2. message_id único (reenvios antigos da Meta podem ter duplicado linhas:
+--    fica a mais antiga)
+DELETE FROM whatsapp_logs AS a
+USING whatsapp_logs AS b
+WHERE a.message_id IS NOT NULL
+  AND a.message_id = b.message_id
+  AND (a.created_at, a.id) > (b.created_at, b.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_whatsapp_logs_message_id ON whatsapp_logs(message_id);
+
+-- 3. Ordem dos status de entrega
+CREATE OR REPLACE FUNCTION whatsapp_status_rank(value TEXT)
+RETURNS INTEGER AS $$
+    SELECT CASE value
+        WHEN 'sent' THEN 1
+        WHEN 'delivered' THEN 2
+        WHEN 'read' THEN 3
+        WHEN 'failed' THEN 4
+        ELSE 0
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 4. Recibos de entrega em lote: [{message_id, delivery_status,
+--    delivered_at, read_at, error_message, error_code}, ...]
+CREATE OR REPLACE FUNCTION apply_whatsapp_statuses(statuses JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE whatsapp_logs AS l SET
+        delivery_status = CASE
+            WHEN whatsapp_status_rank(s.delivery_status) >= whatsapp_status_rank(l.delivery_status)
+            THEN s.delivery_status ELSE l.delivery_status END,
+        delivered_at = COALESCE(l.delivered_at, s.delivered_at),
+        read_at = COALESCE(l.read_at, s.read_at),
+        error_message = COALESCE(s.error_message, l.error_message),
+        error_code = COALESCE(s.error_code, l.error_code),
+        updated_at = NOW()
+    FROM jsonb_to_recordset(statuses) AS s(
+        message_id TEXT,
+        delivery_status TEXT,
+        delivered_at TIMESTAMP WITH TIME ZONE,
+        read_at TIMESTAMP WITH TIME ZONE,
+        error_message TEXT,
+        error_code TEXT
+    )
+    WHERE l.message_id = s.message_id;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 5. Documentação
+COMMENT ON FUNCTION apply_whatsapp_statuses(JSONB) IS 'Recibos de entrega do webhook em lote (python -m studio.webhook)';
+
+-- Verificar resultado
+SELECT whatsapp_status_rank('read') > whatsapp_status_rank('delivered') AS esperado_true;
+SELECT COUNT(*) AS message_id_repetido FROM (
+    SELECT message_id FROM whatsapp_logs WHERE message_id IS NOT NULL GROUP BY message_id HAVING COUNT(*) > 1
+) AS repetidos;